@@ -25,30 +25,52 @@ from sutekh.core.SutekhTables import TABLE_LIST
 # correctly, even though we don't use it directly
 import sutekh.core.Filters
 # pylint: enable=unused-import
+from sutekh.core.Filters import CryptCardFilter
 from sutekh.SutekhUtility import (read_white_wolf_list, read_rulings,
                                   gen_temp_dir, is_crypt_card,
                                   format_text, read_exp_info_file,
                                   read_lookup_data, do_card_checks,
                                   keyword_sort_key)
 from sutekh.base.core.DBUtility import refresh_tables, make_adapter_caches
+from sutekh.base.core.BaseDBManagement import update_abstract_card_db
+from sutekh.base.core.CardLookup import DEFAULT_LOOKUP
 from sutekh.base.Utility import (ensure_dir_exists, prefs_dir, sqlite_uri,
                                  setup_logging, fix_ssl_env)
 from sutekh.core.DatabaseUpgrade import DBUpgradeManager
 from sutekh.base.core.CardSetHolder import CardSetWrapper
 from sutekh.base.CliUtils import (run_filter, print_card_filter_list,
-                                  print_card_list, do_print_card)
+                                  print_card_list, do_print_card,
+                                  print_similar_card_sets)
 from sutekh.io.XmlFileHandling import (PhysicalCardXmlFile,
                                        PhysicalCardSetXmlFile,
                                        AbstractCardSetXmlFile,
                                        write_all_pcs)
 from sutekh.io.WriteArdbText import WriteArdbText
+from sutekh.io.PhysicalCardSetWriter import PhysicalCardSetWriter
+from sutekh.io.PhysicalCardSetParser import PhysicalCardSetParser
+from sutekh.io.CardSetFormats import CARD_SET_EXPORTERS, CARD_SET_PARSERS
 from sutekh.io.ZipFileWrapper import ZipFileWrapper
 from sutekh.base.io.EncodedFile import EncodedFile
+from sutekh.base.io.ImageDownloader import (DEFAULT_WORKERS, DOWNLOADED,
+                                            NOT_MODIFIED)
+from sutekh.io.CardImageSource import download_card_images
 from sutekh.io.WwUrls import (WW_CARDLIST_URL, WW_RULINGS_URL,
                               EXTRA_CARD_URL, EXP_DATA_URL,
                               LOOKUP_DATA_URL)
+from sutekh.base.QueryServer import serve_queries, DEFAULT_PORT
 from sutekh.SutekhInfo import SutekhInfo
 
+# Formats for the query server. These are the formats used by the
+# export and import plugins, along with Sutekh's own XML format
+SERVER_WRITERS = dict((sName, tInfo[0]) for sName, tInfo in
+                      CARD_SET_EXPORTERS.items())
+SERVER_WRITERS['Sutekh XML'] = PhysicalCardSetWriter
+
+SERVER_PARSERS = dict((sName, tInfo[0]) for sName, tInfo in
+                      CARD_SET_PARSERS.items())
+SERVER_PARSERS['Sutekh XML'] = PhysicalCardSetParser
+
+
 def parse_options(aArgs):
     """Handle the command line options"""
     oOptParser = optparse.OptionParser(
@@ -80,6 +102,12 @@ def parse_options(aArgs):
                           dest="refresh_tables", default=False,
                           help="Drop (if possible) and recreate database "
                                "tables.")
+    oOptParser.add_option("--incremental", action="store_true",
+                          dest="incremental", default=False,
+                          help="Use with --refresh-tables to update the "
+                               "existing card list in place, rather than "
+                               "recreating the tables. Card sets are "
+                               "preserved.")
     oOptParser.add_option("--refresh-ruling-tables", action="store_true",
                           dest="refresh_ruling_tables", default=False,
                           help="Drop (if possible) and recreate rulings "
@@ -138,6 +166,13 @@ def parse_options(aArgs):
     oOptParser.add_option("--limit-list-to", type="string", dest="limit_list",
                           default=None, help="Limit the printed list to the "
                                              "children of the given card set")
+    oOptParser.add_option("--similar-to", type="string", dest="similar_to",
+                          default=None, help="Print the card sets most "
+                                             "similar to the given card set")
+    oOptParser.add_option("--similar-count", type="int",
+                          dest="similar_count", default=10,
+                          help="Number of card sets to print with "
+                               "--similar-to [%default]")
     oOptParser.add_option("--filter", type="string", dest="filter_string",
                           default=None, help="Filter to run on the database")
     oOptParser.add_option("--filter-cs", type="string", dest="filter_cs",
@@ -162,49 +197,68 @@ def parse_options(aArgs):
                                "text files from their respective default "
                                "sites. Should be used with the -c option to "
                                "refresh the database contents")
+    oOptParser.add_option("--download-images", type="string",
+                          dest="download_images", default=None,
+                          help="Download any missing or outdated card images "
+                               "from sutekh.vtes.za.net to the given "
+                               "directory")
+    oOptParser.add_option("--image-workers", type="int",
+                          dest="image_workers", default=DEFAULT_WORKERS,
+                          help="Number of simultaneous downloads to use "
+                               "with --download-images [%default]")
+    oOptParser.add_option("--serve", action="store_true", dest="serve",
+                          default=False,
+                          help="After the other options, keep running and "
+                               "serve filter queries, card lookups and card "
+                               "set exports and imports over a local HTTP "
+                               "JSON API")
+    oOptParser.add_option("--serve-port", type="int", dest="serve_port",
+                          default=DEFAULT_PORT,
+                          help="Local port to use with --serve [%default]")
 
     return oOptParser, oOptParser.parse_args(aArgs)
 
 
-def print_card_details(oCard):
-    """Print the details of a given card"""
+def format_card_details(oCard):
+    """Return the details of a given card as a list of lines"""
     # pylint: disable=too-many-branches
     # Several cases to consider, so many branches
+    aLines = []
     if not oCard.cardtype:
-        print(u'CardType: Unknown')
+        aLines.append(u'CardType: Unknown')
     else:
         sOutput = u'CardType: %s' % u' / '.join(
             [oT.name for oT in oCard.cardtype])
-        print(sOutput)
+        aLines.append(sOutput)
     if oCard.clan:
         sOutput = u'Clan: %s' % u' / '.join([oC.name for oC in oCard.clan])
-        print(sOutput)
+        aLines.append(sOutput)
     if oCard.creed:
         sOutput = u'Creed: %s' % u' / '.join([oC.name for oC in oCard.creed])
-        print(sOutput)
+        aLines.append(sOutput)
     if oCard.capacity:
         sOutput = u'Capacity: %d' % oCard.capacity
-        print(sOutput)
+        aLines.append(sOutput)
     if oCard.life:
         sOutput = u'Life: %d' % oCard.life
-        print(sOutput)
+        aLines.append(sOutput)
     if oCard.group:
         if oCard.group == -1:
             sOutput = u'Group: Any'
         else:
             sOutput = u'Group: %d' % oCard.group
-        print(sOutput)
+        aLines.append(sOutput)
     if oCard.cost is not None:
         if oCard.cost == -1:
             sOutput = u'Cost: X %s' % oCard.costtype
         else:
             sOutput = u'Cost: %d %s' % (oCard.cost, oCard.costtype)
-        print(sOutput)
+        aLines.append(sOutput)
     if oCard.keywords:
         aKeywords = [oK.keyword for oK in oCard.keywords]
         aKeywords.sort(key=keyword_sort_key)
         sOutput = u'   '.join(aKeywords)
-        print(u'Keywords: %s' % sOutput)
+        aLines.append(u'Keywords: %s' % sOutput)
     if oCard.discipline:
         if is_crypt_card(oCard):
             aDisciplines = []
@@ -219,7 +273,7 @@ def print_card_details(oCard):
             aDisciplines = [oP.discipline.fullname for oP in oCard.discipline]
             sDisciplines = u' / '.join(aDisciplines)
         sOutput = u'Discipline: %s' % sDisciplines
-        print(sOutput)
+        aLines.append(sOutput)
     if oCard.virtue:
         if is_crypt_card(oCard):
             sOutput = u'Virtue: %s' % ' '.join(
@@ -227,8 +281,15 @@ def print_card_details(oCard):
         else:
             sOutput = u'Virtue: %s' % ' / '.join(
                 [oC.fullname for oC in oCard.virtue])
-        print(sOutput)
-    print(format_text(oCard.text))
+        aLines.append(sOutput)
+    aLines.append(format_text(oCard.text))
+    return aLines
+
+
+def print_card_details(oCard):
+    """Print the details of a given card"""
+    for sLine in format_card_details(oCard):
+        print(sLine)
 
 
 def main_with_args(aTheArgs):
@@ -276,6 +337,20 @@ def main_with_args(aTheArgs):
     # Only log critical messages by default
     setup_logging(oOpts.verbose)
 
+    if oOpts.incremental:
+        if not oOpts.refresh_tables:
+            print("incremental should be called with --refresh-tables")
+            return 1
+        if oOpts.reload:
+            print("Can't use --incremental and --reload simultaneously")
+            return 1
+        if not oConn.tableExists('abstract_card'):
+            print("Database has not been created.")
+            return 1
+        if oOpts.ww_file is None and not oOpts.fetch:
+            print("incremental needs a card list to read")
+            return 1
+
     if oOpts.reload:
         if not oOpts.refresh_tables:
             print("reload should be called with --refresh-tables")
@@ -295,6 +370,10 @@ def main_with_args(aTheArgs):
             return 1
 
     if oOpts.refresh_tables:
+        if oOpts.incremental:
+            # Read the new card list into a temporary database, and
+            # update the existing database from that
+            sqlhub.processConnection = connectionForURI("sqlite:///:memory:")
         if not refresh_tables(TABLE_LIST, sqlhub.processConnection):
             print("refresh failed")
             return 1
@@ -344,6 +423,17 @@ def main_with_args(aTheArgs):
                 print('\n'.join(aMessages))
                 print()
 
+    if oOpts.incremental:
+        oTempConn = sqlhub.processConnection
+        sqlhub.processConnection = oConn
+        bOK, aMessages = update_abstract_card_db(oTempConn, TABLE_LIST,
+                                                 DEFAULT_LOOKUP, oLogHandler)
+        if aMessages:
+            print("\n".join(aMessages))
+        if not bOK:
+            print("update failed")
+            return 1
+
     if oOpts.upgrade_db:
         oDBUpgrade = DBUpgradeManager()
         oDBUpgrade.attempt_database_upgrade(oLogHandler)
@@ -393,6 +483,12 @@ def main_with_args(aTheArgs):
         print("Can't use limit-list-to without list-cs")
         return 1
 
+    if oOpts.similar_to is not None:
+        if not print_similar_card_sets(oOpts.similar_to, oOpts.similar_count,
+                                       CryptCardFilter,
+                                       ('crypt', 'library')):
+            return 1
+
     if oOpts.filter_string is not None:
         dResults = run_filter(oOpts.filter_string, oOpts.filter_cs)
         print_card_filter_list(dResults, print_card_details,
@@ -416,10 +512,30 @@ def main_with_args(aTheArgs):
         os.remove(sReloadZipName)
         os.rmdir(sTempdir)
 
+    if oOpts.download_images is not None:
+        aResults = download_card_images(oOpts.download_images,
+                                        oOpts.image_workers)
+        if aResults is None:
+            print("Unable to fetch the image date information")
+            return 1
+        iDownloaded = len([x for x in aResults if x.sStatus == DOWNLOADED])
+        iCurrent = len([x for x in aResults if x.sStatus == NOT_MODIFIED])
+        aFailed = [x for x in aResults
+                   if x.sStatus not in (DOWNLOADED, NOT_MODIFIED)]
+        print("Downloaded %d images, %d already up to date, %d failed" % (
+            iDownloaded, iCurrent, len(aFailed)))
+        for oResult in aFailed:
+            print("    %s: %s" % (oResult.oJob.sFileName,
+                                  oResult.oError or oResult.sStatus))
+
     if oOpts.upgrade_db and oOpts.refresh_tables:
         print("Can't use --upgrade-db and --refresh-tables simulatenously")
         return 1
 
+    if oOpts.serve:
+        serve_queries(oOpts.serve_port, format_card_details, SERVER_WRITERS,
+                      SERVER_PARSERS)
+
     return 0
 
 
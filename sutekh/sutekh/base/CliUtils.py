@@ -11,14 +11,15 @@ functions to help the CLI programs
 from __future__ import print_function
 
 from sqlobject import SQLObjectNotFound
-from .core.BaseTables import (PhysicalCard,
+from .core.BaseTables import (PhysicalCard, PhysicalCardSet,
                               MapPhysicalCardToPhysicalCardSet)
 from .core.BaseAdapters import IPhysicalCardSet, IAbstractCard
 from .core.BaseFilters import (PhysicalCardSetFilter, FilterAndBox,
                                PhysicalCardFilter)
-from .core.FilterParser import FilterParser
-from .core.CardSetUtilities import format_cs_list
+from .core.FilterParser import get_compiled_filter
+from .core.CardSetUtilities import format_cs_list, CountedCardRows
 from .core.DBUtility import make_adapter_caches
+from .core.DeckSimilarity import get_deck_similarity
 
 
 def run_filter(sFilter, sCardSet):
@@ -28,19 +29,25 @@ def run_filter(sFilter, sCardSet):
     oCardSet = None
     if sCardSet:
         oCardSet = IPhysicalCardSet(sCardSet)
-    oParser = FilterParser()
-    oFilter = oParser.apply(sFilter).get_filter()
+    return filter_cards(get_compiled_filter(sFilter), oCardSet)
 
+
+def filter_cards(oFilter, oCardSet=None):
+    """Run the filter on the card set, or the card list if oCardSet is
+       None, returning a dictionary of cards and counts as for run_filter.
+
+       This assumes the adapter caches have already been initialised."""
     dResults = {}
     if oCardSet:
         # Filter the given card set
         oBaseFilter = PhysicalCardSetFilter(oCardSet.name)
         oJointFilter = FilterAndBox([oBaseFilter, oFilter])
-        aResults = oJointFilter.select(MapPhysicalCardToPhysicalCardSet)
-        for oCard in aResults:
+        aResults = CountedCardRows(oJointFilter.select(
+            MapPhysicalCardToPhysicalCardSet).distinct())
+        for oCard, iCnt in aResults.counted_rows():
             oAbsCard = IAbstractCard(oCard)
             dResults.setdefault(oAbsCard, 0)
-            dResults[oAbsCard] += 1
+            dResults[oAbsCard] += iCnt
     else:
         # Filter cardlist
         oBaseFilter = PhysicalCardFilter()
@@ -99,3 +106,34 @@ def do_print_card(sCardName, fPrintCard):
         print('Unable to find card %s' % sCardName)
         return False
     return True
+
+
+def print_similar_card_sets(sCardSet, iCount, fGetSplitFilter=None,
+                            aPartNames=('first part', 'second part')):
+    """Print the card sets most similar to the given card set.
+
+       fGetSplitFilter and aPartNames describe how the cards are split
+       for the similarity sketches, such as into the crypt and library.
+       """
+    # pylint: disable=no-member
+    # SQLObject confuses pylint
+    try:
+        oCS = IPhysicalCardSet(sCardSet)
+    except SQLObjectNotFound:
+        print('Unable to load card set', sCardSet)
+        return False
+    oIndex = get_deck_similarity('All card sets',
+                                 fGetSplitFilter=fGetSplitFilter)
+    aResults = oIndex.find_similar(oCS, iCount)
+    if not aResults:
+        print('No similar card sets found for %s' % oCS.name)
+        return True
+    print('Card sets similar to %s:' % oCS.name)
+    for iSetId, fScore, aParts in aResults:
+        aPartInfo = ['%s %3.0f%%' % (sPart, 100 * fPart)
+                     for sPart, fPart in zip(aPartNames, aParts)
+                     if fPart is not None]
+        print('  %3.0f%%  %s (%s)' % (100 * fScore,
+                                      PhysicalCardSet.get(iSetId).name,
+                                      ', '.join(aPartInfo)))
+    return True
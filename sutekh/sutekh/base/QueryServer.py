@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Serve queries on the card database over a local HTTP JSON API.
+
+   Running the command line tool for each query opens the database and
+   rebuilds the caches every time. The query server keeps the database
+   connection, the object and adapter caches and the compiled filters
+   between requests.
+
+   The requests are:
+
+     GET  /formats         The export and import formats
+     GET  /cardsets        The card sets, with their parents
+     GET  /card            The details of the card 'name'
+     GET  /filter          The cards matching 'filter', in the card set
+                           'cardset' if given, or the card list
+     GET  /export          The card set 'cardset' in the export 'format'
+     POST /import          Create a card set from the JSON object with
+                           the 'data' to import, the import 'format' and
+                           an optional 'name' for the card set
+     POST /shutdown        Stop the server
+
+   GET parameters are given in the query string. All the responses are
+   JSON objects, with an 'error' entry if the request failed.
+
+   Read requests are handled concurrently, while imports wait for the
+   running requests to finish and block new requests until they are
+   done. SQLite memory databases can't be shared between threads, so
+   for those all the database work is done on the thread running the
+   server."""
+
+import json
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import urlsplit, parse_qsl
+
+from sqlobject import SQLObjectNotFound
+
+from .core.BaseTables import PhysicalCardSet
+from .core.BaseAdapters import IAbstractCard, IPhysicalCardSet
+from .core.CardLookup import DEFAULT_LOOKUP
+from .core.CardSetHolder import CardSetHolder, CardSetWrapper
+from .core.DBUtility import can_run_in_thread, make_adapter_caches
+from .core.FilterParser import get_compiled_filter
+from .CliUtils import filter_cards
+
+DEFAULT_PORT = 8763
+LOCALHOST = '127.0.0.1'
+
+
+class QueryError(Exception):
+    """Raised when a request can't be handled, with the HTTP status to
+       return"""
+
+    def __init__(self, iStatus, sMessage):
+        super().__init__(sMessage)
+        self.iStatus = iStatus
+
+
+class ReadWriteLock:
+    """Lock allowing many readers or a single writer.
+
+       Waiting writers block new readers, so a stream of read requests
+       can't keep a writer waiting forever."""
+
+    def __init__(self):
+        self._oCond = threading.Condition()
+        self._iReaders = 0
+        self._iWaitingWriters = 0
+        self._bWriting = False
+
+    @contextmanager
+    def read(self):
+        """Hold the lock for reading"""
+        with self._oCond:
+            while self._bWriting or self._iWaitingWriters:
+                self._oCond.wait()
+            self._iReaders += 1
+        try:
+            yield
+        finally:
+            with self._oCond:
+                self._iReaders -= 1
+                if not self._iReaders:
+                    self._oCond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock for writing"""
+        with self._oCond:
+            self._iWaitingWriters += 1
+            while self._bWriting or self._iReaders:
+                self._oCond.wait()
+            self._iWaitingWriters -= 1
+            self._bWriting = True
+        try:
+            yield
+        finally:
+            with self._oCond:
+                self._bWriting = False
+                self._oCond.notify_all()
+
+
+class _DatabaseJob:
+    """Database work passed to the thread running the server"""
+
+    def __init__(self, fWork):
+        self._fWork = fWork
+        self._oDone = threading.Event()
+        self._oResult = None
+        self._oError = None
+
+    def run(self):
+        """Do the work, and wake up the waiting request"""
+        # pylint: disable=broad-except
+        # The error is passed back to the request
+        try:
+            self._oResult = self._fWork()
+        except Exception as oErr:
+            self._oError = oErr
+        self._oDone.set()
+
+    def cancel(self):
+        """Fail the job, since the server is stopping"""
+        self._oError = QueryError(503, 'The server is shutting down')
+        self._oDone.set()
+
+    def get_result(self):
+        """Wait for the work to be done, and return the result"""
+        self._oDone.wait()
+        if self._oError is not None:
+            raise self._oError
+        return self._oResult
+
+
+def _required(dArgs, sName):
+    """Return the required argument, raising a QueryError if it's
+       missing"""
+    oValue = dArgs.get(sName)
+    if not oValue:
+        raise QueryError(400, 'Missing required argument: %s' % sName)
+    return oValue
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """Handle the requests for the query server"""
+
+    GET_REQUESTS = {
+        '/formats': '_get_formats',
+        '/cardsets': '_get_card_sets',
+        '/card': '_get_card',
+        '/filter': '_get_filter',
+        '/export': '_get_export',
+    }
+
+    POST_REQUESTS = {
+        '/import': '_post_import',
+        '/shutdown': '_post_shutdown',
+    }
+
+    # pylint: disable=invalid-name
+    # do_GET and do_POST are the names BaseHTTPRequestHandler expects
+    def do_GET(self):
+        """Handle GET requests"""
+        self._respond(self.GET_REQUESTS, self._get_query_args)
+
+    def do_POST(self):
+        """Handle POST requests"""
+        self._respond(self.POST_REQUESTS, self._get_body_args)
+
+    # pylint: enable=invalid-name
+
+    def log_message(self, format, *aArgs):
+        """Send the request log to the logging module, rather than
+           stderr"""
+        # pylint: disable=redefined-builtin
+        # format is the name used by BaseHTTPRequestHandler
+        logging.info("%s - %s", self.address_string(), format % aArgs)
+
+    def _get_query_args(self):
+        """Return the arguments from the query string"""
+        return dict(parse_qsl(urlsplit(self.path).query))
+
+    def _get_body_args(self):
+        """Return the arguments from the JSON body"""
+        iLength = int(self.headers.get('Content-Length') or 0)
+        try:
+            dArgs = json.loads(self.rfile.read(iLength).decode('utf8')
+                               or '{}')
+        except ValueError as oErr:
+            raise QueryError(400, 'Invalid JSON: %s' % oErr) from oErr
+        if not isinstance(dArgs, dict):
+            raise QueryError(400, 'Expected a JSON object')
+        return dArgs
+
+    def _respond(self, dRequests, fGetArgs):
+        """Dispatch the request, and send the JSON response"""
+        # pylint: disable=broad-except
+        # Any error should be reported to the client, rather than
+        # killing the request without a response
+        bStop = False
+        try:
+            sPath = urlsplit(self.path).path
+            if sPath not in dRequests:
+                raise QueryError(404, 'Unknown request: %s' % sPath)
+            fHandler = getattr(self, dRequests[sPath])
+            oResult = fHandler(fGetArgs())
+            iStatus = 200
+            bStop = sPath == '/shutdown'
+        except QueryError as oErr:
+            iStatus, oResult = oErr.iStatus, {'error': str(oErr)}
+        except Exception as oErr:
+            logging.exception('Error handling request %s', self.path)
+            iStatus, oResult = 500, {'error': str(oErr)}
+        sData = json.dumps(oResult).encode('utf8')
+        self.send_response(iStatus)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(sData)))
+        self.end_headers()
+        self.wfile.write(sData)
+        self.wfile.flush()
+        if bStop:
+            self.server.stop()
+
+    # Requests
+
+    def _get_formats(self, _dArgs):
+        """List the export and import formats"""
+        return {'export': sorted(self.server.dWriters),
+                'import': sorted(self.server.dParsers)}
+
+    def _get_card_sets(self, _dArgs):
+        """List the card sets"""
+        def _work():
+            """List the card sets"""
+            # pylint: disable=no-member
+            # SQLObject confuses pylint
+            return [{'name': oCS.name,
+                     'parent': oCS.parent.name if oCS.parent else None,
+                     'inuse': bool(oCS.inuse)}
+                    for oCS in PhysicalCardSet.select()]
+
+        aCardSets = self.server.run_db(_work)
+        return {'cardsets': sorted(aCardSets, key=lambda x: x['name'])}
+
+    def _get_card(self, dArgs):
+        """Return the details of a card"""
+        sName = _required(dArgs, 'name')
+
+        def _work():
+            """Look up the card"""
+            try:
+                oCard = IAbstractCard(sName)
+            except SQLObjectNotFound as oErr:
+                raise QueryError(404, 'Unable to find card %s' %
+                                 sName) from oErr
+            return {'name': oCard.name,
+                    'details': self.server.format_card(oCard)}
+
+        return self.server.run_db(_work)
+
+    def _get_filter(self, dArgs):
+        """Return the cards matching the filter"""
+        sFilter = _required(dArgs, 'filter')
+        sCardSet = dArgs.get('cardset')
+
+        def _work():
+            """Run the filter"""
+            oCardSet = None
+            if sCardSet:
+                oCardSet = self.server.get_card_set(sCardSet)
+            oFilter = self.server.compile_filter(sFilter)
+            dResults = filter_cards(oFilter, oCardSet)
+            aCards = []
+            for oCard in sorted(dResults, key=lambda x: x.name):
+                if oCardSet:
+                    aCards.append({'name': oCard.name,
+                                   'count': dResults[oCard]})
+                else:
+                    aCards.append({'name': oCard.name})
+            return aCards
+
+        return {'cards': self.server.run_db(_work)}
+
+    def _get_export(self, dArgs):
+        """Export the card set with one of the writers"""
+        sCardSet = _required(dArgs, 'cardset')
+        sFormat = _required(dArgs, 'format')
+        if sFormat not in self.server.dWriters:
+            raise QueryError(400, 'Unknown export format: %s' % sFormat)
+
+        def _work():
+            """Write the card set"""
+            oCardSet = self.server.get_card_set(sCardSet)
+            fOut = StringIO()
+            oWriter = self.server.dWriters[sFormat]()
+            oWriter.write(fOut, CardSetWrapper(oCardSet))
+            return {'cardset': oCardSet.name, 'format': sFormat,
+                    'data': fOut.getvalue()}
+
+        return self.server.run_db(_work)
+
+    def _post_import(self, dArgs):
+        """Create a card set with one of the parsers"""
+        sData = _required(dArgs, 'data')
+        sFormat = _required(dArgs, 'format')
+        sName = dArgs.get('name')
+        if sFormat not in self.server.dParsers:
+            raise QueryError(400, 'Unknown import format: %s' % sFormat)
+
+        def _parse():
+            """Read the data into a card set holder"""
+            # pylint: disable=broad-except
+            # Any error means the data doesn't match the format
+            oHolder = CardSetHolder()
+            try:
+                self.server.dParsers[sFormat]().parse(StringIO(sData),
+                                                      oHolder)
+            except Exception as oErr:
+                raise QueryError(400, 'Unable to read the card set: %s' %
+                                 oErr) from oErr
+            if oHolder.num_entries < 1:
+                raise QueryError(400, 'No cards found in the card set')
+            if sName:
+                oHolder.name = sName
+            if not oHolder.name:
+                raise QueryError(400, 'No name given for the card set')
+            return oHolder
+
+        def _create(oHolder):
+            """Create the card set"""
+            # pylint: disable=no-member
+            # SQLObject confuses pylint
+            if PhysicalCardSet.selectBy(name=oHolder.name).count() > 0:
+                raise QueryError(409, 'Card set %s already exists' %
+                                 oHolder.name)
+            oHolder.create_pcs(oCardLookup=self.server.oCardLookup)
+            return {'name': oHolder.name,
+                    'warnings': oHolder.get_warnings()}
+
+        oHolder = self.server.run_db(_parse)
+        return self.server.run_db(lambda: _create(oHolder), bWrite=True)
+
+    def _post_shutdown(self, _dArgs):
+        """Stop the server, once the response is sent"""
+        return {'status': 'stopping'}
+
+
+class QueryServer(ThreadingHTTPServer):
+    """HTTP server for database queries.
+
+       fFormatCard returns the list of lines describing a card, dWriters
+       and dParsers map the names of the export and import formats to
+       the writer and parser classes, and oCardLookup is used to look up
+       the cards when importing card sets."""
+    # pylint: disable=too-many-instance-attributes
+    # We need to track the server and database thread state
+
+    daemon_threads = True
+
+    def __init__(self, tAddress, fFormatCard=None, dWriters=None,
+                 dParsers=None, oCardLookup=DEFAULT_LOOKUP):
+        super().__init__(tAddress, QueryRequestHandler)
+        self.fFormatCard = fFormatCard
+        self.dWriters = dWriters or {}
+        self.dParsers = dParsers or {}
+        self.oCardLookup = oCardLookup
+        self._oLock = ReadWriteLock()
+        # Parsing filters updates the shared cache of parsed filters
+        self._oCompileLock = threading.Lock()
+        self._bThreaded = can_run_in_thread()
+        self._oJobs = queue.Queue()
+        self._oStopped = threading.Event()
+        self._oDBThread = None
+
+    def run_db(self, fWork, bWrite=False):
+        """Do the database work, holding the lock for reading or
+           writing, and return the result."""
+        if not self._bThreaded and \
+                threading.current_thread() is not self._oDBThread:
+            if self._oStopped.is_set():
+                raise QueryError(503, 'The server is shutting down')
+            oJob = _DatabaseJob(fWork)
+            self._oJobs.put(oJob)
+            return oJob.get_result()
+        oLock = self._oLock.write() if bWrite else self._oLock.read()
+        with oLock:
+            return fWork()
+
+    def compile_filter(self, sFilter):
+        """Return the compiled filter for the filter string, raising a
+           QueryError for invalid filters.
+
+           A new filter is built for each request, so filters which look
+           up the card sets, such as CardCount, see the current database
+           contents."""
+        # pylint: disable=broad-except
+        # The filter parser can raise many different errors
+        try:
+            with self._oCompileLock:
+                oFilter = get_compiled_filter(sFilter)
+        except Exception as oErr:
+            raise QueryError(400, 'Invalid filter: %s' % oErr) from oErr
+        if oFilter is None:
+            raise QueryError(400, 'Invalid filter: %s' % sFilter)
+        return oFilter
+
+    def get_card_set(self, sName):
+        """Return the card set, raising a QueryError if it doesn't
+           exist."""
+        try:
+            return IPhysicalCardSet(sName)
+        except SQLObjectNotFound as oErr:
+            raise QueryError(404, 'Unable to load card set %s' %
+                             sName) from oErr
+
+    def format_card(self, oCard):
+        """Return the list of lines describing the card"""
+        if self.fFormatCard is None:
+            return [oCard.text]
+        return self.fFormatCard(oCard)
+
+    def serve(self):
+        """Handle requests until stop is called."""
+        make_adapter_caches()
+        if self._bThreaded:
+            self.serve_forever()
+            return
+        # Handle requests on a separate thread, and do the database work
+        # on this one.
+        self._oDBThread = threading.current_thread()
+        oThread = threading.Thread(target=self.serve_forever, daemon=True)
+        oThread.start()
+        while not self._oStopped.is_set():
+            try:
+                oJob = self._oJobs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            oJob.run()
+        oThread.join()
+        while not self._oJobs.empty():
+            self._oJobs.get().cancel()
+
+    def stop(self):
+        """Stop handling requests.
+
+           This must not be called from the thread running serve."""
+        self._oStopped.set()
+        self.shutdown()
+
+
+def serve_queries(iPort, fFormatCard=None, dWriters=None, dParsers=None,
+                  oCardLookup=DEFAULT_LOOKUP):
+    """Run the query server on the local port until it's stopped"""
+    oServer = QueryServer((LOCALHOST, iPort), fFormatCard, dWriters,
+                          dParsers, oCardLookup)
+    print('Serving queries on http://%s:%d/' % oServer.server_address[:2])
+    try:
+        oServer.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        oServer.server_close()
+    return True
@@ -17,6 +17,7 @@ from .BaseTables import (LookupHints, AbstractCard, PhysicalCard,
                          Keyword, Ruling, RarityPair, Expansion, Printing,
                          PrintingProperty, Rarity, CardType, Artist)
 from .BaseAbbreviations import CardTypes, Expansions, Rarities
+from .FuzzyNameIndex import get_fuzzy_name_index
 from ..Utility import move_articles_to_front
 
 
@@ -230,9 +231,20 @@ IAbstractCard.register(AbstractCard, passthrough)
 
 
 class CardNameLookupAdapter(Adapter):
-    """Adapter for card name string -> AbstractCard"""
+    """Adapter for card name string -> AbstractCard
+
+       If a fuzzy threshold is set, names which don't match a card exactly
+       are resolved with the fuzzy name index, provided the best match is
+       good enough. This is off by default."""
 
     __dCache = {}
+    __fFuzzyThreshold = None
+
+    @classmethod
+    def set_fuzzy_threshold(cls, fThreshold):
+        """Set the threshold for resolving unknown names with the fuzzy
+           name index, or None to disable fuzzy matching."""
+        cls.__fFuzzyThreshold = fThreshold
 
     @classmethod
     def make_object_cache(cls):
@@ -274,6 +286,13 @@ class CardNameLookupAdapter(Adapter):
                     # We will handle the failure case after the loop
                     oExp = oError
                     continue
+            if oExp and cls.__fFuzzyThreshold is not None:
+                # Fuzzy matches aren't cached, since the threshold may
+                # change
+                oCard = get_fuzzy_name_index().resolve(
+                    sName, cls.__fFuzzyThreshold)
+                if oCard is not None:
+                    oExp = None
             # pylint: disable=raising-bad-type
             # We're only raising if this is not None, so we're OK
             if oExp:
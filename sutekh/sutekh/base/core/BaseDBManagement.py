@@ -13,9 +13,15 @@
 from logging import Logger
 
 from sqlobject import sqlhub
+from sqlobject.sqlbuilder import Table, Insert, Update, Delete, IN
 
-from .CardSetHolder import make_card_set_holder
-from .BaseTables import PhysicalCardSet
+from .CardLookup import LookupFailed
+from .CardSetHolder import make_card_set_holder, CachedCardSetHolder
+from .CardSetUtilities import add_cards_to_set
+from .CountedRelatedJoin import BULK_INSERT_ROWS
+from .BaseTables import (PhysicalCardSet, PhysicalCard,
+                         MapPhysicalCardToPhysicalCardSet, PHYSICAL_SET_LIST)
+from .DBUtility import flush_cache
 
 
 # Utility Exception
@@ -78,3 +84,264 @@ def copy_to_new_abstract_card_db(oOrigConn, oNewConn, oCardLookup,
         sqlhub.processConnection.cache.clear()
     sqlhub.processConnection = oOldConn
     return (True, [])
+
+
+def _get_references(cTable):
+    """Return the names of the classes cTable refers to"""
+    aRefs = [oCol.foreignKey for oCol in cTable.sqlmeta.columnList
+             if getattr(oCol, 'foreignKey', None)]
+    if cTable.sqlmeta.parentClass:
+        aRefs.append(cTable.sqlmeta.parentClass.__name__)
+    return aRefs
+
+
+def _get_sync_order(aTables):
+    """Order the tables so each table comes after the tables it refers
+       to, so we know the new ids of the rows it refers to."""
+    dNames = dict((cTable.__name__, cTable) for cTable in aTables)
+    aOrdered = []
+    aToDo = list(aTables)
+    while aToDo:
+        aLater = []
+        for cTable in aToDo:
+            aDeps = [dNames[sName] for sName in _get_references(cTable)
+                     if sName in dNames and sName != cTable.__name__]
+            if all(cDep in aOrdered for cDep in aDeps):
+                aOrdered.append(cTable)
+            else:
+                aLater.append(cTable)
+        if len(aLater) == len(aToDo):
+            raise RuntimeError("Unable to order tables %s" %
+                               ', '.join(x.__name__ for x in aLater))
+        aToDo = aLater
+    return aOrdered
+
+
+def _read_rows(cTable, oConn):
+    """Return the (id, columns) rows for the table"""
+    aCols = [cTable.sqlmeta.idName] + [oCol.dbName for oCol in
+                                       cTable.sqlmeta.columnList]
+    return [(x[0], tuple(x[1:])) for x in oConn.queryAll(
+        'SELECT %s FROM %s' % (', '.join(aCols), cTable.sqlmeta.table))]
+
+
+class _TableSync:
+    """Update a single card data table to match the new database.
+
+       Rows are matched on the first alternateID column if there is one,
+       on the id for a child table (which shares the parent's ids), and
+       on the whole row otherwise. References to other tables are
+       translated to the ids in the existing database before comparing."""
+
+    def __init__(self, cTable, dIdMaps):
+        self.cTable = cTable
+        self._dIdMaps = dIdMaps
+        self._aCols = cTable.sqlmeta.columnList
+        self._sParent = None
+        if cTable.sqlmeta.parentClass:
+            self._sParent = cTable.sqlmeta.parentClass.__name__
+        self._iKey = None
+        for iIdx, oCol in enumerate(self._aCols):
+            if oCol.alternateID:
+                self._iKey = iIdx
+                break
+        self.aDeleted = []
+        self.iInserted = 0
+        self.iUpdated = 0
+
+    def _map_row(self, tRow):
+        """Translate the foreign keys in tRow to the existing ids"""
+        aRow = list(tRow)
+        for iIdx, oCol in enumerate(self._aCols):
+            sRef = getattr(oCol, 'foreignKey', None)
+            if sRef and aRow[iIdx] is not None:
+                aRow[iIdx] = self._dIdMaps[sRef][aRow[iIdx]]
+        return tuple(aRow)
+
+    def _get_key(self, iId, tRow, bNew):
+        """Return the key used to match rows"""
+        if self._sParent:
+            if bNew:
+                return self._dIdMaps[self._sParent][iId]
+            return iId
+        if self._iKey is not None:
+            return tRow[self._iKey]
+        return tRow
+
+    def sync(self, oNewConn, oConn, bNeedIds):
+        """Apply the inserts and updates needed to match the new database.
+
+           Rows to delete are stored in aDeleted, since other tables may
+           still refer to them. If bNeedIds is set, we record the mapping
+           from the new ids to the existing ids for the tables which
+           refer to this one."""
+        sTable = self.cTable.sqlmeta.table
+        sIdName = self.cTable.sqlmeta.idName
+        aNames = [oCol.dbName for oCol in self._aCols]
+        dExisting = {}
+        for iId, tRow in _read_rows(self.cTable, oConn):
+            dExisting.setdefault(self._get_key(iId, tRow, False),
+                                 []).append((iId, tRow))
+        dIdMap = {}
+        aInserts = []
+        for iNewId, tRow in _read_rows(self.cTable, oNewConn):
+            tRow = self._map_row(tRow)
+            oKey = self._get_key(iNewId, tRow, True)
+            if dExisting.get(oKey):
+                iId, tOldRow = dExisting[oKey].pop()
+                if tOldRow != tRow:
+                    oConn.query(oConn.sqlrepr(Update(
+                        sTable, dict(zip(aNames, tRow)),
+                        where=getattr(Table(sTable), sIdName) == iId)))
+                    self.iUpdated += 1
+            elif self._sParent or bNeedIds:
+                # Child tables must reuse the parent's id
+                iId = oConn.queryInsertID(
+                    self.cTable, oKey if self._sParent else None,
+                    list(aNames), list(tRow))
+                self.iInserted += 1
+            else:
+                aInserts.append(dict(zip(aNames, tRow)))
+                continue
+            dIdMap[iNewId] = iId
+        for iStart in range(0, len(aInserts), BULK_INSERT_ROWS):
+            oConn.query(oConn.sqlrepr(Insert(
+                sTable, valueList=aInserts[iStart:iStart + BULK_INSERT_ROWS])))
+        self.iInserted += len(aInserts)
+        for aRows in dExisting.values():
+            self.aDeleted.extend(iId for iId, _tRow in aRows)
+        if bNeedIds:
+            self._dIdMaps[self.cTable.__name__] = dIdMap
+
+    def delete(self, oConn):
+        """Delete the rows which aren't in the new database"""
+        sTable = self.cTable.sqlmeta.table
+        oIdField = getattr(Table(sTable), self.cTable.sqlmeta.idName)
+        for iStart in range(0, len(self.aDeleted), BULK_INSERT_ROWS):
+            oConn.query(oConn.sqlrepr(Delete(sTable, where=IN(
+                oIdField, self.aDeleted[iStart:iStart + BULK_INSERT_ROWS]))))
+
+
+def _remove_card_set_entries(aPhysCardIds, oConn):
+    """Remove the card set entries for the given physical cards.
+
+       Returns a list of (CardSetHolder, count) pairs, one for each card
+       set affected, holding the removed cards and the number of cards
+       removed."""
+    # pylint: disable=no-member
+    # SQLObject confuses pylint
+    dHolders = {}
+    dCounts = {}
+    oMapTable = MapPhysicalCardToPhysicalCardSet
+    for iStart in range(0, len(aPhysCardIds), BULK_INSERT_ROWS):
+        aIds = aPhysCardIds[iStart:iStart + BULK_INSERT_ROWS]
+        for oEntry in oMapTable.select(IN(oMapTable.q.physicalCardID, aIds),
+                                       connection=oConn):
+            oCardSet = oEntry.physicalCardSet
+            if oCardSet.id not in dHolders:
+                dHolders[oCardSet.id] = CachedCardSetHolder()
+                dHolders[oCardSet.id].name = oCardSet.name
+            dCounts[oCardSet.id] = (dCounts.get(oCardSet.id, 0) +
+                                    oEntry.cardCount)
+            oCard = oEntry.physicalCard
+            if oCard.printing is None:
+                dHolders[oCardSet.id].add(oEntry.cardCount,
+                                          oCard.abstractCard.canonicalName,
+                                          None, None)
+            else:
+                dHolders[oCardSet.id].add(oEntry.cardCount,
+                                          oCard.abstractCard.canonicalName,
+                                          oCard.printing.expansion.name,
+                                          oCard.printing.name)
+        oConn.query(oConn.sqlrepr(Delete(oMapTable.sqlmeta.table, where=IN(
+            oMapTable.q.physicalCardID, aIds))))
+    return [(dHolders[iId], dCounts[iId]) for iId in sorted(dHolders)]
+
+
+def _do_update_card_db(oNewConn, aTables, oCardLookup, oLogger):
+    """Update the card data in sqlhub.processConnection to match
+       oNewConn."""
+    # pylint: disable=too-many-locals
+    # we need a lot of variables here
+    oConn = sqlhub.processConnection
+    aTables = _get_sync_order([cTable for cTable in aTables
+                               if cTable not in PHYSICAL_SET_LIST])
+    # We need the id mappings for tables other tables refer to
+    aReferenced = set()
+    for cTable in aTables:
+        aReferenced.update(_get_references(cTable))
+    dIdMaps = {}
+    aSyncs = []
+    for cTable in aTables:
+        oSync = _TableSync(cTable, dIdMaps)
+        oSync.sync(oNewConn, oConn, cTable.__name__ in aReferenced)
+        if cTable.sqlmeta.parentClass:
+            # Child tables share the ids of the parent table
+            dIdMaps[cTable.__name__] = dIdMaps[
+                cTable.sqlmeta.parentClass.__name__]
+        aSyncs.append(oSync)
+        oLogger.info('Updated %s: %d new, %d changed, %d removed',
+                     cTable.__name__, oSync.iInserted, oSync.iUpdated,
+                     len(oSync.aDeleted))
+    # Card set entries for physical cards which no longer exist need
+    # to be looked up again, which also handles renamed cards
+    aHolders = []
+    for oSync in aSyncs:
+        if oSync.cTable is PhysicalCard:
+            aHolders = _remove_card_set_entries(oSync.aDeleted, oConn)
+    # Delete in reverse order, so nothing refers to the deleted rows
+    for oSync in reversed(aSyncs):
+        oSync.delete(oConn)
+    oConn.cache.clear()
+    flush_cache()
+    oCardLookup.refresh_from_new_db()
+    dLookupCache = {}
+    aMessages = []
+    for oHolder, iCount in aHolders:
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        oCardSet = PhysicalCardSet.byName(oHolder.name, connection=oConn)
+        aPhysCards = [x for x in oHolder.lookup_physical_cards(
+            oCardLookup, dLookupCache) if x]
+        add_cards_to_set(oCardSet, aPhysCards)
+        if len(aPhysCards) < iCount:
+            aMessages.append('Card Set "%s": %d cards are no longer in the'
+                             ' card list and have been removed'
+                             % (oHolder.name, iCount - len(aPhysCards)))
+        aMessages.extend(oHolder.get_warnings())
+    return aMessages
+
+
+def update_abstract_card_db(oNewConn, aTables, oCardLookup,
+                            oLogHandler=None):
+    """Update the card list in place to match a new database.
+
+       Given a database created from a new cardlist, update the card data
+       tables in the current database, rather than recreating them, so
+       only the cards which have changed are touched. Card sets keep their
+       ids, and only the entries for cards which are no longer in the card
+       list (because they have been renamed or removed) are looked up
+       again using oCardLookup.
+
+       Returns (bOK, aMessages). The update is done in a single
+       transaction, so if it fails the database is unchanged.
+       """
+    oLogger = Logger('update abstract card DB')
+    if oLogHandler:
+        oLogger.addHandler(oLogHandler)
+        if hasattr(oLogHandler, 'set_total'):
+            oLogHandler.set_total(len([x for x in aTables
+                                       if x not in PHYSICAL_SET_LIST]))
+    try:
+        if hasattr(sqlhub.processConnection, 'commit'):
+            aMessages = _do_update_card_db(oNewConn, aTables, oCardLookup,
+                                           oLogger)
+        else:
+            aMessages = sqlhub.doInTransaction(_do_update_card_db, oNewConn,
+                                               aTables, oCardLookup, oLogger)
+    except LookupFailed:
+        return (False, ["Card set lookup cancelled"])
+    # Reset the caches, since the transaction is finished
+    sqlhub.processConnection.cache.clear()
+    flush_cache()
+    return (True, aMessages)
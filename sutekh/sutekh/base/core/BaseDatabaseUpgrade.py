@@ -21,10 +21,12 @@ from logging import Logger
 # pylint: disable=no-name-in-module
 # sqlobject confuses pylint here
 from sqlobject import sqlhub, connectionForURI, SQLObjectNotFound
+from sqlobject.sqlbuilder import Select, Table, func
 # pylint: enable=no-name-in-module
 
 from .BaseTables import (PhysicalCard, AbstractCard,
-                         PhysicalCardSet, Expansion,
+                         PhysicalCardSet, MapPhysicalCardToPhysicalCardSet,
+                         Expansion,
                          Rarity, RarityPair, CardType,
                          Ruling, Keyword, Artist, Metadata,
                          LookupHints, Printing, PrintingProperty)
@@ -61,6 +63,9 @@ class BaseDBUpgradeManager:
         'AbstractCard': (AbstractCard, (AbstractCard.tableversion,)),
         'PhysicalCard': (PhysicalCard, (2, PhysicalCard.tableversion,)),
         'PhysicalCardSet': (PhysicalCardSet, (PhysicalCardSet.tableversion,)),
+        'MapPhysicalCardToPhysicalCardSet': (
+            MapPhysicalCardToPhysicalCardSet,
+            (1, MapPhysicalCardToPhysicalCardSet.tableversion)),
         'LookupHints': (LookupHints, (-1, LookupHints.tableversion,)),
         'Printing': (Printing, (-1, Printing.tableversion,)),
         'PrintingProperty': (PrintingProperty,
@@ -537,6 +542,23 @@ class BaseDBUpgradeManager:
            required"""
         return (False, ["Unknown PhysicalCard version"])  # pragma: no cover
 
+    def _get_old_card_counts(self, oSet, oOrigConn, bCounted):
+        """Return a list of (physical card id, count) pairs for the card
+           set in the old database.
+
+           If bCounted is False, the old physical_map has a row for each
+           copy, so we need to count the rows."""
+        oTable = Table(MapPhysicalCardToPhysicalCardSet.sqlmeta.table)
+        if bCounted:
+            oQuery = Select((oTable.physical_card_id, oTable.card_count),
+                            where=oTable.physical_card_set_id == oSet.id)
+        else:
+            oQuery = Select((oTable.physical_card_id,
+                             func.COUNT(oTable.physical_card_id)),
+                            where=oTable.physical_card_set_id == oSet.id,
+                            groupBy=oTable.physical_card_id)
+        return oOrigConn.queryAll(oOrigConn.sqlrepr(oQuery))
+
     def _copy_physical_card_set_loop(self, aSets, oTrans, oOrigConn, oLogger):
         """Central loop for copying card sets.
 
@@ -544,6 +566,10 @@ class BaseDBUpgradeManager:
            children."""
         bDone = False
         dDone = {}
+        # Version 1 of physical_map has a row for each copy of the card
+        bCounted = DatabaseVersion().check_table_in_versions(
+            MapPhysicalCardToPhysicalCardSet,
+            [MapPhysicalCardToPhysicalCardSet.tableversion], oOrigConn)
         # SQLObject < 0.11.4 does this automatically, but later versions don't
         # We depend on this, so we force the issue
         for oSet in aSets:
@@ -571,8 +597,12 @@ class BaseDBUpgradeManager:
                                             annotations=oSet.annotations,
                                             inuse=oSet.inuse,
                                             parent=oParent, connection=oTrans)
-                    for oCard in oSet.cards:
-                        oCopy.addPhysicalCard(oCard.id)
+                    for iCardId, iCount in self._get_old_card_counts(
+                            oSet, oOrigConn, bCounted):
+                        MapPhysicalCardToPhysicalCardSet(
+                            physicalCardID=iCardId,
+                            physicalCardSetID=oCopy.id,
+                            cardCount=iCount, connection=oTrans)
                     oCopy.syncUpdate()
                     oLogger.info('Copied PCS %s', oCopy.name)
                     dDone[oSet.id] = oCopy
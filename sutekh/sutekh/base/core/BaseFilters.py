@@ -30,6 +30,7 @@ from .BaseTables import (AbstractCard, CardType, Expansion, RarityPair,
 from .BaseAdapters import (IAbstractCard, IPhysicalCardSet, IRarityPair,
                            IExpansion, ICardType, IRarity, IArtist,
                            IPrinting, IPrintingName, IKeyword)
+from .FilterIndex import get_card_index, bits_to_ids, count_bits
 
 
 # Compability Patches
@@ -69,9 +70,55 @@ class Filter:
         return self.is_physical_card_only()
 
     def select(self, cCardClass):
-        """cCardClass.select(...) applying the filter to the selection."""
-        return cCardClass.select(self._get_expression(),
-                                 join=self._get_joins())
+        """cCardClass.select(...) applying the filter to the selection.
+
+           If the card index is enabled, the parts of the filter which
+           can be answered from the index are replaced with a list of
+           card ids first."""
+        # pylint: disable=protected-access
+        # we call the rewritten filter's protected methods
+        oFilter = self._get_indexed_filter()
+        return cCardClass.select(oFilter._get_expression(),
+                                 join=oFilter._get_joins())
+
+    def select_card_counts(self):
+        """Return the card counts for the card set entries matching the
+           filter.
+
+           This is a list of (abstract card id, physical card id,
+           card set id, count) tuples, calculated with a single GROUP BY
+           query, so no card objects need to be created. Only meaningful
+           for filters which operate on MapPhysicalCardToPhysicalCardSet."""
+        # pylint: disable=protected-access
+        # we call the rewritten filter's protected methods
+        oFilter = self._get_indexed_filter()
+        oMap = MapPhysicalCardToPhysicalCardSet.q
+        sMapTable = MapPhysicalCardToPhysicalCardSet.sqlmeta.table
+        # The filter joins can return the same row several times, so
+        # we select the distinct rows first, and group those
+        oRows = Select(oMap.id, where=oFilter._get_expression(),
+                       join=oFilter._get_joins(), distinct=True,
+                       staticTables=[sMapTable])
+        aGroup = (PhysicalCard.q.abstractCardID, oMap.physicalCardID,
+                  oMap.physicalCardSetID)
+        oQuery = Select(aGroup + (func.SUM(oMap.cardCount),),
+                        where=SQLOBJ_IN(oMap.id, oRows),
+                        join=LEFTJOINOn(None, PhysicalCard,
+                                        PhysicalCard.q.id ==
+                                        oMap.physicalCardID),
+                        groupBy=aGroup, staticTables=[sMapTable])
+        oConn = sqlhub.processConnection
+        return [(iAbsId, iPhysId, iSetId, int(iCount)) for
+                iAbsId, iPhysId, iSetId, iCount in
+                oConn.queryAll(oConn.sqlrepr(oQuery))]
+
+    def _get_indexed_filter(self):
+        """Return the filter with the card index applied, if the index
+           is enabled."""
+        oIndex = get_card_index()
+        if oIndex is not None:
+            return self._apply_index(oIndex)
+        return self
 
     def _get_expression(self):
         """Actual filter expression"""
@@ -81,6 +128,22 @@ class Filter:
         """joins needed by the filter"""
         raise NotImplementedError  # pragma: no cover
 
+    # pylint: disable=no-self-use
+    # children need to be able to override this.
+    def _get_bits(self, _oIndex):
+        """Return the bitset of matching abstract card ids from the card
+           index, or None if the filter can't be answered by the index."""
+        return None
+
+    def _apply_index(self, oIndex):
+        """Return an equivalent filter, with the parts which can be
+           answered from the card index replaced by IndexedCardFilter."""
+        if 'AbstractCard' in self.types:
+            iBits = self._get_bits(oIndex)
+            if iBits is not None:
+                return IndexedCardFilter(iBits, oIndex, self.types)
+        return self
+
     def is_physical_card_only(self):
         """Return true if this filter only operates on physical cards.
 
@@ -125,6 +188,27 @@ class FilterBox(Filter, list):
             bResult = bResult or oSubFilter.involves(oCardSet)
         return bResult
 
+    def _get_sub_bits(self, oIndex):
+        """Return the list of bitsets for the subfilters, or None if any
+           of them can't be answered from the index."""
+        aBits = [x._get_bits(oIndex) for x in self]
+        if not aBits or None in aBits:
+            # Empty boxes don't restrict the results, so we leave
+            # them to SQL
+            return None
+        return aBits
+
+    def _apply_index(self, oIndex):
+        """Use the index for the entire box if possible, otherwise
+           for as many of the subfilters as possible."""
+        oFilter = super()._apply_index(oIndex)
+        if oFilter is not self:
+            return oFilter
+        aFilters = [x._apply_index(oIndex) for x in self]
+        if all(oNew is oOld for oNew, oOld in zip(aFilters, self)):
+            return self
+        return self.__class__(aFilters)
+
     # We allow protected access here too
     types = property(fget=lambda self: self._get_types(),
                      doc="types supported by this filter")
@@ -139,6 +223,16 @@ class FilterAndBox(FilterBox):
         """Combine filters with AND"""
         return AND(*[x._get_expression() for x in self])
 
+    def _get_bits(self, oIndex):
+        """Intersect the subfilter results"""
+        aBits = self._get_sub_bits(oIndex)
+        if aBits is None:
+            return None
+        iBits = aBits[0]
+        for iSubBits in aBits[1:]:
+            iBits &= iSubBits
+        return iBits
+
 
 class FilterOrBox(FilterBox):
     """OR a list of filters."""
@@ -149,6 +243,16 @@ class FilterOrBox(FilterBox):
         """Combine filters with OR"""
         return OR(*[x._get_expression() for x in self])
 
+    def _get_bits(self, oIndex):
+        """Combine the subfilter results"""
+        aBits = self._get_sub_bits(oIndex)
+        if aBits is None:
+            return None
+        iBits = 0
+        for iSubBits in aBits:
+            iBits |= iSubBits
+        return iBits
+
 
 # NOT Filter
 class FilterNot(Filter):
@@ -195,6 +299,24 @@ class FilterNot(Filter):
                                                        join=aJoins)))
         raise RuntimeError("FilterNot unable to handle sub-filter type.")
 
+    def _get_bits(self, oIndex):
+        """Invert the subfilter result"""
+        iBits = self.__oSubFilter._get_bits(oIndex)
+        if iBits is None:
+            return None
+        return oIndex.get_all() & ~iBits
+
+    def _apply_index(self, oIndex):
+        """Use the index for the sub-filter if we can't use it for the
+           whole filter"""
+        oFilter = super()._apply_index(oIndex)
+        if oFilter is not self:
+            return oFilter
+        oSubFilter = self.__oSubFilter._apply_index(oIndex)
+        if oSubFilter is self.__oSubFilter:
+            return self
+        return FilterNot(oSubFilter)
+
 
 class CachedFilter(Filter):
     """A filter which caches joins and expression lookups"""
@@ -206,6 +328,7 @@ class CachedFilter(Filter):
         self._oSubFilter = oFilter
         self._oExpression = oFilter._get_expression()
         self._aJoins = oFilter._get_joins()
+        self._tIndexBits = (None, None)
 
     def _get_expression(self):
         return self._oExpression
@@ -213,6 +336,12 @@ class CachedFilter(Filter):
     def _get_joins(self):
         return self._aJoins
 
+    def _get_bits(self, oIndex):
+        """Cache the index lookup, as we do for the expression"""
+        if self._tIndexBits[0] is not oIndex:
+            self._tIndexBits = (oIndex, self._oSubFilter._get_bits(oIndex))
+        return self._tIndexBits[1]
+
     # pylint: disable=protected-access
     # we are delibrately accesing protected members her
     types = property(fget=lambda self: self._oSubFilter.types,
@@ -233,6 +362,9 @@ class NullFilter(Filter):
     def _get_joins(self):
         return []
 
+    def _get_bits(self, oIndex):
+        return oIndex.get_all()
+
 
 # NotNullFilter
 class NotNullFilter(NullFilter):
@@ -243,6 +375,9 @@ class NotNullFilter(NullFilter):
     def _get_expression(self):
         return NOT(TRUE)  # See Null Filter
 
+    def _get_bits(self, _oIndex):
+        return 0
+
 
 # Base Classes for Common Filter Idioms
 class SingleFilter(Filter):
@@ -265,6 +400,10 @@ class SingleFilter(Filter):
         # SQLObject methods not detected by pylint
         return self._oIdField == self._oId
 
+    def _get_bits(self, oIndex):
+        return oIndex.get_map_bits(str(self._oIdField.tableName),
+                                   self._oIdField.fieldName, [self._oId])
+
 
 class MultiFilter(Filter):
     """Base class for filters on multiple items which connect to AbstractCard
@@ -287,6 +426,10 @@ class MultiFilter(Filter):
         # SQLObject methods not detected by pylint
         return IN(self._oIdField, self._aIds)
 
+    def _get_bits(self, oIndex):
+        return oIndex.get_map_bits(str(self._oIdField.tableName),
+                                   self._oIdField.fieldName, self._aIds)
+
 
 class DirectFilter(Filter):
     """Base class for filters which query AbstractTable directly."""
@@ -297,6 +440,44 @@ class DirectFilter(Filter):
         return []
 
 
+class IndexedCardFilter(DirectFilter):
+    """Filter on a set of abstract cards looked up in the card index.
+
+       This replaces the filters the index can answer, so the database
+       only needs to match a list of ids, rather than doing the joins
+       for each of the original filters."""
+
+    def __init__(self, iBits, oIndex, tTypes):
+        self._iBits = iBits
+        self._oIndex = oIndex
+        self.types = tTypes
+
+    # pylint: disable=missing-docstring
+    # don't need docstrings for _get_expression, get_values & _get_joins
+    def _get_bits(self, oIndex):
+        if oIndex is self._oIndex:
+            return self._iBits
+        return None
+
+    def _apply_index(self, _oIndex):
+        return self
+
+    def _get_expression(self):
+        # pylint: disable=no-member
+        # SQLObject methods not detected by pylint
+        iAll = self._oIndex.get_all()
+        iBits = self._iBits & iAll
+        if iBits == iAll:
+            return TRUE
+        if not iBits:
+            return NOT(TRUE)
+        # Use the shorter of the lists of matching and non-matching cards
+        iMissing = iAll & ~iBits
+        if count_bits(iMissing) < count_bits(iBits):
+            return NOT(IN(AbstractCard.q.id, bits_to_ids(iMissing)))
+        return IN(AbstractCard.q.id, bits_to_ids(iBits))
+
+
 # Useful utiltiy function for filters using with
 def split_list(aList):
     """Split a list of 'X with Y' strings into (X, Y) tuples"""
@@ -430,6 +611,9 @@ class PrintingFilter(DirectFilter):
         # SQLObject confuses pylint
         return IN(AbstractCard.q.id, self._aIds)
 
+    def _get_bits(self, oIndex):
+        return oIndex.get_id_bits(self._aIds)
+
 
 class MultiPrintingFilter(DirectFilter):
     """Filter on multiple Printings"""
@@ -466,6 +650,9 @@ class MultiPrintingFilter(DirectFilter):
         # SQLObject confuses pylint
         return IN(AbstractCard.q.id, self._aIds)
 
+    def _get_bits(self, oIndex):
+        return oIndex.get_id_bits(self._aIds)
+
 
 class CardTypeFilter(SingleFilter):
     """Filter on card type"""
@@ -586,6 +773,12 @@ class BaseCardTextFilter(DirectFilter):
         return LIKE(func.LOWER(AbstractCard.q.text),
                     '%' + self._sPattern + '%')
 
+    def _get_bits(self, oIndex):
+        # pylint: disable=no-member
+        # SQLObject methods not detected by pylint
+        return oIndex.get_text_bits(AbstractCard.sqlmeta.table, 'text',
+                                    self._sPattern)
+
 
 class CardNameFilter(DirectFilter):
     """Filter on the name of the card"""
@@ -612,6 +805,14 @@ class CardNameFilter(DirectFilter):
         return LIKE(AbstractCard.q.canonicalName,
                     '%' + self.__sPattern + '%')
 
+    def _get_bits(self, oIndex):
+        # pylint: disable=no-member
+        # SQLObject methods not detected by pylint
+        return oIndex.get_text_bits(
+            AbstractCard.sqlmeta.table,
+            AbstractCard.sqlmeta.columns['canonicalName'].dbName,
+            self.__sPattern)
+
 
 class PhysicalCardFilter(Filter):
     """Filter for converting a filter on abstract cards to a filter on
@@ -683,6 +884,8 @@ class CardSetMultiCardCountFilter(DirectFilter):
         # Selects cards with a count in the range specified by aCounts from
         # the Physical Card Set sCardSetName
         # We rely on the joins to limit this to the appropriate card sets
+        # physical_map stores a count for each card, so we sum the counts
+        # across the different physical cards for the abstract card
         # pylint: disable=no-member
         # SQLObject methods not detected by pylint
         aIds = []
@@ -728,7 +931,8 @@ class CardSetMultiCardCountFilter(DirectFilter):
                     MapPhysicalCardToPhysicalCardSet.q.physicalCardID),
                 groupBy=(PhysicalCard.q.abstractCardID,
                          MapPhysicalCardToPhysicalCardSet.q.physicalCardSetID),
-                having=func.COUNT(PhysicalCard.q.abstractCardID) > 30)
+                having=func.SUM(
+                    MapPhysicalCardToPhysicalCardSet.q.cardCount) > 30)
             self._oFilters.append(oGreater30Query)
         if aCounts:
             # SQLite doesn't like strings here, so convert to int
@@ -742,8 +946,9 @@ class CardSetMultiCardCountFilter(DirectFilter):
                     MapPhysicalCardToPhysicalCardSet.q.physicalCardID),
                 groupBy=(PhysicalCard.q.abstractCardID,
                          MapPhysicalCardToPhysicalCardSet.q.physicalCardSetID),
-                having=IN(func.COUNT(PhysicalCard.q.abstractCardID),
-                          [int(x) for x in aCounts]))
+                having=IN(func.SUM(
+                    MapPhysicalCardToPhysicalCardSet.q.cardCount),
+                    [int(x) for x in aCounts]))
             self._oFilters.append(oCountFilter)
 
     # pylint: disable=missing-docstring
@@ -1083,6 +1288,9 @@ class SpecificCardFilter(DirectFilter):
         # SQLObject methods not detected by pylint
         return AbstractCard.q.id == self.__iCardId
 
+    def _get_bits(self, oIndex):
+        return oIndex.get_id_bits([self.__iCardId])
+
 
 class SpecificCardIdFilter(DirectFilter):
     """This filter matches a single card by id."""
@@ -1098,6 +1306,9 @@ class SpecificCardIdFilter(DirectFilter):
         # SQLObject methods not detected by pylint
         return AbstractCard.q.id == self.__iCardId
 
+    def _get_bits(self, oIndex):
+        return oIndex.get_id_bits([self.__iCardId])
+
 
 class MultiSpecificCardIdFilter(DirectFilter):
     """This filter matches multiple cards by id."""
@@ -1113,6 +1324,9 @@ class MultiSpecificCardIdFilter(DirectFilter):
         # SQLObject methods not detected by pylint
         return IN(AbstractCard.q.id, self.__aCardIds)
 
+    def _get_bits(self, oIndex):
+        return oIndex.get_id_bits(self.__aCardIds)
+
 
 class SpecificPhysCardIdFilter(DirectFilter):
     """This filter matches a single physical card by id.
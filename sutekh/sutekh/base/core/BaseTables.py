@@ -17,6 +17,7 @@ from sqlobject.inheritance import InheritableSQLObject
 # pylint: enable=no-name-in-module
 
 from .CachedRelatedJoin import CachedRelatedJoin
+from .CountedRelatedJoin import CountedRelatedJoin, find_join
 
 # Table Objects
 
@@ -98,8 +99,9 @@ class PhysicalCard(SQLObject):
     abstractCardIndex = DatabaseIndex(abstractCard)
     # Explicitly allow None as expansion
     printing = ForeignKey('Printing', notNull=False)
-    sets = RelatedJoin('PhysicalCardSet', intermediateTable='physical_map',
-                       createRelatedTable=False)
+    sets = CountedRelatedJoin('PhysicalCardSet',
+                              intermediateTable='physical_map',
+                              createRelatedTable=False)
 
 
 class PhysicalCardSet(SQLObject):
@@ -110,10 +112,32 @@ class PhysicalCardSet(SQLObject):
     annotations = UnicodeCol(default='')
     inuse = BoolCol(default=False)
     parent = ForeignKey('PhysicalCardSet', default=None)
-    cards = RelatedJoin('PhysicalCard', intermediateTable='physical_map',
-                        createRelatedTable=False)
+    cards = CountedRelatedJoin('PhysicalCard',
+                               intermediateTable='physical_map',
+                               createRelatedTable=False)
     parentIndex = DatabaseIndex(parent)
 
+    # The physical_map table stores a count for each card, so we override
+    # the methods SQLObject would create to allow adding and removing
+    # several copies at once.
+
+    def addPhysicalCard(self, oCard, iCount=1):
+        find_join(PhysicalCardSet, 'cards').add(self, oCard, iCount)
+
+    def removePhysicalCard(self, oCard, iCount=None):
+        # iCount of None removes all copies of the card, like the
+        # default RelatedJoin remove.
+        find_join(PhysicalCardSet, 'cards').remove(self, oCard, iCount)
+
+    def add_card_counts(self, dCounts):
+        # Add several cards at once. dCounts maps physical card ids to
+        # the number of copies to add
+        find_join(PhysicalCardSet, 'cards').add_counts(self, dCounts)
+
+    def get_card_counts(self):
+        # Return a list of (physical card id, count) pairs
+        return find_join(PhysicalCardSet, 'cards').get_counts(self)
+
 
 class RarityPair(SQLObject):
     tableversion = 1
@@ -208,14 +232,17 @@ class MapPhysicalCardToPhysicalCardSet(SQLObject):
     class sqlmeta:
         table = 'physical_map'
 
-    tableversion = 1
+    # Version 2 stores a single row with a count for each card in the
+    # card set, rather than a row for each copy
+    tableversion = 2
 
     physicalCard = ForeignKey('PhysicalCard', notNull=True)
     physicalCardSet = ForeignKey('PhysicalCardSet', notNull=True)
+    cardCount = IntCol(default=1, notNull=True)
 
     physicalCardIndex = DatabaseIndex(physicalCard, unique=False)
     physicalCardSetIndex = DatabaseIndex(physicalCardSet, unique=False)
-    jointIndex = DatabaseIndex(physicalCard, physicalCardSet, unique=False)
+    jointIndex = DatabaseIndex(physicalCard, physicalCardSet, unique=True)
 
 
 class MapAbstractCardToRarityPair(SQLObject):
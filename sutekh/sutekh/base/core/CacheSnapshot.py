@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Save and restore a snapshot of the rows used to fill the object cache.
+
+   Reading all the card data and the cached joins is the main cost of
+   starting up, so we save the raw rows to disk and reuse them while
+   the card list is unchanged. The snapshot is keyed on the card list
+   update date, the database and the table versions and sizes, so any
+   change to the card data causes it to be rebuilt."""
+
+import logging
+import os
+import pickle
+
+from sqlobject import sqlhub
+from sqlobject.inheritance import InheritableSQLObject
+
+from .DatabaseVersion import DatabaseVersion
+from .DBUtility import (CARDLIST_UPDATE_DATE, get_cached_joins,
+                        get_join_key, init_cache)
+from .BaseTables import Metadata
+
+# Bump this if the layout of the snapshot changes
+SNAPSHOT_VERSION = 1
+
+
+def _get_column_names(cType):
+    """Return the list of database column names, in the order
+       _SO_selectInit expects them."""
+    return [oCol.dbName for oCol in cType.sqlmeta.columnList]
+
+
+def _get_table_rows(cType, oConn):
+    """Return the raw (id, columns) rows for the given table."""
+    aCols = [cType.sqlmeta.idName] + _get_column_names(cType)
+    sQuery = 'SELECT %s FROM %s ORDER BY %s' % (
+        ', '.join(aCols), cType.sqlmeta.table, cType.sqlmeta.idName)
+    return [(x[0], tuple(x[1:])) for x in oConn.queryAll(sQuery)]
+
+
+def _get_table_info(cType, oConn):
+    """Return a cheap summary of the table contents, to catch changes
+       made without updating the card list date."""
+    sQuery = 'SELECT COUNT(*), MAX(%s) FROM %s' % (cType.sqlmeta.idName,
+                                                   cType.sqlmeta.table)
+    iCount, iMaxId = oConn.queryOne(sQuery)
+    return (cType.__name__, DatabaseVersion().get_table_version(cType, oConn),
+            tuple(_get_column_names(cType)), iCount, iMaxId)
+
+
+def _get_snapshot_key(aTypes, oConn):
+    """Return the key used to check if the snapshot is still valid."""
+    # pylint: disable=no-member
+    # SQLObject confuses pylint
+    aUpdate = list(Metadata.selectBy(dataKey=CARDLIST_UPDATE_DATE,
+                                     connection=oConn))
+    sUpdateDate = aUpdate[0].value if aUpdate else None
+    return (SNAPSHOT_VERSION, oConn.uri(), sUpdateDate,
+            tuple(_get_table_info(cType, oConn) for cType in aTypes))
+
+
+def _read_snapshot(sFile, tKey):
+    """Read the snapshot from disk, returning None if it's missing or
+       doesn't match the key."""
+    if not os.path.exists(sFile):
+        return None
+    try:
+        with open(sFile, 'rb') as fIn:
+            dSnapshot = pickle.load(fIn)
+    except (IOError, EOFError, pickle.UnpicklingError, ValueError,
+            AttributeError, TypeError) as oErr:
+        logging.warning('Unable to read cache snapshot %s: %s', sFile, oErr)
+        return None
+    if not isinstance(dSnapshot, dict) or dSnapshot.get('key') != tKey:
+        return None
+    return dSnapshot
+
+
+def _write_snapshot(sFile, dSnapshot):
+    """Write the snapshot to disk.
+
+       We write to a temporary file and rename it, so a failed write
+       doesn't leave a corrupt snapshot behind."""
+    sTmpFile = sFile + '.tmp'
+    try:
+        with open(sTmpFile, 'wb') as fOut:
+            pickle.dump(dSnapshot, fOut, pickle.HIGHEST_PROTOCOL)
+        os.replace(sTmpFile, sFile)
+    except (IOError, OSError) as oErr:
+        logging.warning('Unable to write cache snapshot %s: %s', sFile, oErr)
+
+
+def _make_objects(cType, aRows, oConn):
+    """Create the objects for the table from the raw rows, without
+       querying the database."""
+    bChildUpdate = (issubclass(cType, InheritableSQLObject) and
+                    'childName' in cType.sqlmeta.columns)
+    aObjects = []
+    for iId, tRow in aRows:
+        if bChildUpdate:
+            # Inheritable parent classes would otherwise redirect to the
+            # child class, which we load separately
+            aObjects.append(cType.get(iId, connection=oConn,
+                                      selectResults=tRow, childUpdate=True))
+        else:
+            aObjects.append(cType.get(iId, connection=oConn,
+                                      selectResults=tRow))
+    return aObjects
+
+
+def load_object_cache(aTypes, sFile=None):
+    """Load all the objects of the given types and initialise the cached
+       joins.
+
+       If sFile is given, use the snapshot stored there if it is still
+       valid, and write a new snapshot otherwise.
+
+       Inheritable classes must be listed before their children.
+       Returns a dictionary of type to the list of objects."""
+    oConn = sqlhub.processConnection
+    dSnapshot = None
+    if sFile:
+        tKey = _get_snapshot_key(aTypes, oConn)
+        dSnapshot = _read_snapshot(sFile, tKey)
+    if dSnapshot is None:
+        dSnapshot = {
+            'tables': dict((cType.__name__, _get_table_rows(cType, oConn))
+                           for cType in aTypes),
+            'joins': dict((get_join_key(oJoin), oJoin.get_join_rows())
+                          for oJoin in get_cached_joins()),
+        }
+        if sFile:
+            dSnapshot['key'] = tKey
+            _write_snapshot(sFile, dSnapshot)
+    dCache = {}
+    for cType in aTypes:
+        dCache[cType] = _make_objects(cType,
+                                      dSnapshot['tables'][cType.__name__],
+                                      oConn)
+    init_cache(dSnapshot['joins'])
+    return dCache
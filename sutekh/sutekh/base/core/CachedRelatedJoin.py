@@ -45,28 +45,44 @@ class SOCachedRelatedJoin(joins.SORelatedJoin):
         """Flush the contents of the cache."""
         self._dJoinCache = {}
 
-    def init_cache(self):
-        """Initialise the cache with the data from the database."""
-        self._find_other_join()
-
+    def get_join_rows(self):
+        """Return the (id, other id) pairs from the intermediate table."""
         oIntermediateTable = Table(self.intermediateTable)
         oJoinColumn = getattr(oIntermediateTable, self.joinColumn)
         oOtherColumn = getattr(oIntermediateTable, self.otherColumn)
         # pylint: disable=protected-access
         # We need to access _connection here
         oConn = self.soClass._connection
+        return [tuple(x) for x in oConn.queryAll(
+            repr(Select((oJoinColumn, oOtherColumn))))]
+
+    def init_cache(self, aRows=None):
+        """Initialise the cache with the data from the database.
+
+           aRows can be used to supply the (id, other id) pairs, such as
+           from a saved snapshot, instead of querying the database."""
+        self._find_other_join()
+
+        if aRows is None:
+            aRows = self.get_join_rows()
+        # pylint: disable=protected-access
+        # We need to access _connection here
+        oConn = self.soClass._connection
 
-        for (oId, oOtherId) in oConn.queryAll(
-                repr(Select((oJoinColumn, oOtherColumn)))):
+        # Start from an empty cache, so initialising twice doesn't
+        # duplicate entries
+        dJoinCache = {}
+        for (oId, oOtherId) in aRows:
             oInst = self.soClass.get(oId, oConn)
             oOther = self.otherClass.get(oOtherId, oConn)
-            self._dJoinCache.setdefault(oInst, [])
-            self._dJoinCache[oInst].append(oOther)
+            dJoinCache.setdefault(oInst, [])
+            dJoinCache[oInst].append(oOther)
 
         # Apply ordering (we assume it won't change later)
-        for oInst in self._dJoinCache:
-            self._dJoinCache[oInst] = self._applyOrderBy(
-                self._dJoinCache[oInst], self.otherClass)
+        for oInst in dJoinCache:
+            dJoinCache[oInst] = self._applyOrderBy(dJoinCache[oInst],
+                                                   self.otherClass)
+        self._dJoinCache = dJoinCache
 
     def invalidate_cache_item(self, oInst, oOther, bDoOther=True):
         """Invalidate a cache item and its equivalent in the other join."""
@@ -8,6 +8,7 @@
 
 from sqlobject import SQLObjectNotFound
 from .BaseAdapters import IPhysicalCard, IExpansion, IAbstractCard, IPrinting
+from .FuzzyNameIndex import get_fuzzy_name_index
 
 
 class LookupFailed(Exception):
@@ -79,8 +80,15 @@ class SimpleLookup(AbstractCardLookup, PhysicalCardLookup, PrintingLookup):
     """A really straightforward lookup of AbstractCards and PhysicalCards.
 
        The default when we don't have a more cunning plan.
+
+       If fFuzzyThreshold is set, unknown names are resolved with the
+       fuzzy name index when the best match scores at least
+       fFuzzyThreshold, rather than being excluded.
        """
 
+    def __init__(self, fFuzzyThreshold=None):
+        self._fFuzzyThreshold = fFuzzyThreshold
+
     def refresh_from_new_db(self):
         """Reload info from the daabase to pick up new lookups, etc"""
         # Nothing in the simple case
@@ -88,6 +96,7 @@ class SimpleLookup(AbstractCardLookup, PhysicalCardLookup, PrintingLookup):
     def lookup(self, aNames, _sInfo):
         """A lookup method that excludes unknown cards."""
         aCards = []
+        aUnknown = []
         for sName in aNames:
             if sName:
                 try:
@@ -95,8 +104,15 @@ class SimpleLookup(AbstractCardLookup, PhysicalCardLookup, PrintingLookup):
                     aCards.append(oAbs)
                 except SQLObjectNotFound:
                     aCards.append(None)
+                    aUnknown.append(sName)
             else:
                 aCards.append(None)
+        if aUnknown and self._fFuzzyThreshold is not None:
+            dResolved = get_fuzzy_name_index().resolve_all(
+                aUnknown, self._fFuzzyThreshold)
+            aCards = [oAbs if oAbs is not None or not sName
+                      else dResolved.get(sName)
+                      for sName, oAbs in zip(aNames, aCards)]
         return aCards
 
     def physical_lookup(self, dCardExpansions, dNameCards, dNamePrintings,
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Keep caches of card set data in sync with the database signals.
+
+   CardSetCaches holds a collection of named caches, and passes the card
+   and card set signals on to them. The signals are connected when the
+   first cache is requested. By default, a cache is flushed when card
+   sets are added, removed or changed, since that may change the card
+   sets it covers."""
+
+from .BaseTables import PhysicalCardSet
+from .DBSignals import (listen_changed, listen_cards_changed,
+                        listen_row_destroy, listen_row_created,
+                        listen_row_updated)
+
+
+class CardSetCache:
+    """Base class for the caches held by CardSetCaches"""
+
+    def flush(self):
+        """Discard the cached data, so it's rebuilt on the next lookup"""
+        raise NotImplementedError("implement flush")  # pragma: no cover
+
+    def card_changed(self, oCardSet, oPhysCard, iChg):
+        """Update the cache when cards are added or removed"""
+        raise NotImplementedError(
+            "implement card_changed")  # pragma: no cover
+
+    def cards_changed(self, oCardSet, dChanges):
+        """Update the cache for a bulk change to the card set"""
+        for oPhysCard, iChg in dChanges.items():
+            self.card_changed(oCardSet, oPhysCard, iChg)
+
+    def card_set_created(self, _oCardSet, _dKW=None, _fPostFuncs=None):
+        """Flush the cache when a card set is added"""
+        self.flush()
+
+    def card_set_deleted(self, _oCardSet, _fPostFuncs=None):
+        """Flush the cache when a card set is removed"""
+        self.flush()
+
+    def card_set_updated(self, _oCardSet, _fPostFuncs=None):
+        """Flush the cache when a card set is changed"""
+        self.flush()
+
+
+class CardSetCaches:
+    """A collection of named CardSetCache objects, kept up to date from
+       the database signals."""
+
+    def __init__(self):
+        self._dCaches = {}
+        self._bListening = False
+
+    def get(self, sName, fCreate):
+        """Return the cache called sName, calling fCreate to create it
+           if needed."""
+        if not self._bListening:
+            listen_changed(self._card_changed, PhysicalCardSet)
+            listen_cards_changed(self._cards_changed, PhysicalCardSet)
+            listen_row_created(self._card_set_created, PhysicalCardSet)
+            listen_row_destroy(self._card_set_deleted, PhysicalCardSet)
+            listen_row_updated(self._card_set_updated, PhysicalCardSet)
+            self._bListening = True
+        if sName not in self._dCaches:
+            self._dCaches[sName] = fCreate()
+        return self._dCaches[sName]
+
+    def flush(self):
+        """Flush all the caches"""
+        for oCache in self._dCaches.values():
+            oCache.flush()
+
+    # Signal handlers
+
+    def _card_changed(self, oCardSet, oPhysCard, iChg):
+        """Pass the changed signal to the caches"""
+        for oCache in self._dCaches.values():
+            oCache.card_changed(oCardSet, oPhysCard, iChg)
+
+    def _cards_changed(self, oCardSet, dChanges):
+        """Pass the bulk changed signal to the caches"""
+        for oCache in self._dCaches.values():
+            oCache.cards_changed(oCardSet, dChanges)
+
+    def _card_set_created(self, oCardSet, dKW=None, fPostFuncs=None):
+        """Pass the row created signal to the caches"""
+        for oCache in self._dCaches.values():
+            oCache.card_set_created(oCardSet, dKW, fPostFuncs)
+
+    def _card_set_deleted(self, oCardSet, fPostFuncs=None):
+        """Pass the row destroy signal to the caches"""
+        for oCache in self._dCaches.values():
+            oCache.card_set_deleted(oCardSet, fPostFuncs)
+
+    def _card_set_updated(self, oCardSet, fPostFuncs=None):
+        """Pass the row updated signal to the caches"""
+        for oCache in self._dCaches.values():
+            oCache.card_set_updated(oCardSet, fPostFuncs)
@@ -9,7 +9,8 @@
 from sqlobject import SQLObjectNotFound, sqlhub
 
 from .CardLookup import DEFAULT_LOOKUP
-from .BaseTables import PhysicalCardSet
+from .BaseTables import PhysicalCardSet, PhysicalCard
+from .CardSetUtilities import add_cards_to_set
 
 
 class CardSetHolder:
@@ -178,13 +179,7 @@ class CardSetHolder:
                                inuse=self.inuse, parent=oParent)
         oPCS.syncUpdate()
 
-        for oPhysCard in aPhysCards:
-            # pylint: disable=no-member
-            # SQLObject confuses pylint
-            if not oPhysCard:
-                continue
-            oPCS.addPhysicalCard(oPhysCard.id)
-        oPCS.syncUpdate()
+        add_cards_to_set(oPCS, aPhysCards)
 
 
 class CardSetWrapper(CardSetHolder):
@@ -262,6 +257,19 @@ class CachedCardSetHolder(CardSetHolder):
            dLookupCache is updated as soon as possible, i.e. immediately after
            calling oCardLookup.lookup(...).
            """
+        aPhysCards = self.lookup_physical_cards(oCardLookup, dLookupCache)
+        if hasattr(sqlhub.processConnection, 'commit'):
+            self._commit_pcs(aPhysCards)
+        else:
+            sqlhub.doInTransaction(self._commit_pcs, aPhysCards)
+
+    def lookup_physical_cards(self, oCardLookup=DEFAULT_LOOKUP,
+                              dLookupCache={}):
+        """Lookup the physical cards for the cards in the holder, using
+           dLookupCache as for create_pcs.
+
+           Returns the list of physical cards, with an entry for each copy
+           of the card."""
         # Need to cache both abstract card lookups & expansion lookups
         # pylint: disable=too-many-locals
         # We use a lot of local variables for clarity
@@ -362,10 +370,7 @@ class CachedCardSetHolder(CardSetHolder):
                         tOldExp = list(dCardExpansions[sName])[0]
                         dLookupCache['special cases'][(sName, tOldExp)] = tPrintKey
 
-        if hasattr(sqlhub.processConnection, 'commit'):
-            self._commit_pcs(aPhysCards)
-        else:
-            sqlhub.doInTransaction(self._commit_pcs, aPhysCards)
+        return aPhysCards
 
 
 def make_card_set_holder(oCardSet):
@@ -380,11 +385,12 @@ def make_card_set_holder(oCardSet):
     oCS.inuse = oCardSet.inuse
     if oCardSet.parent:
         oCS.parent = oCardSet.parent.name
-    for oCard in oCardSet.cards:
+    for iCardId, iCount in oCardSet.get_card_counts():
+        oCard = PhysicalCard.get(iCardId)
         if oCard.printing is None:
-            oCS.add(1, oCard.abstractCard.canonicalName, None, None)
+            oCS.add(iCount, oCard.abstractCard.canonicalName, None, None)
         else:
-            oCS.add(1, oCard.abstractCard.canonicalName,
+            oCS.add(iCount, oCard.abstractCard.canonicalName,
                     oCard.printing.expansion.name,
                     oCard.printing.name)
     return oCS
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Inverted index from cards to the card sets which contain them, for a
+   group of card sets, such as the TWDA decks.
+
+   The index maps each abstract card id to the card sets in the group
+   containing the card, with the number of copies, so finding the card
+   sets containing any, all or at least some of a list of cards is
+   done with set operations rather than database queries.
+
+   The index is read with a single GROUP BY query the first time it's
+   needed. Card changes in the indexed card sets are applied to the
+   index, while adding, removing or changing card sets may change the
+   card sets in the group, so the index is rebuilt on the next lookup.
+   The indexes are also flushed along with the other caches by
+   flush_cache."""
+
+from .BaseTables import PhysicalCardSet
+from .BaseFilters import MultiPhysicalCardSetMapFilter
+from .CardSetCache import CardSetCache, CardSetCaches
+
+
+class CardSetCardIndex(CardSetCache):
+    """Index of the cards in a group of card sets.
+
+       fGetNames is called with no arguments to get the names of the
+       card sets in the group when the index is built."""
+
+    def __init__(self, fGetNames):
+        self._fGetNames = fGetNames
+        # abstract card id -> {card set id: count}
+        self._dCards = None
+        self._aCardSets = set()
+
+    def _build(self):
+        """Read the index from the database"""
+        self._dCards = {}
+        self._aCardSets = set()
+        aNames = set(self._fGetNames())
+        if not aNames:
+            return
+        self._aCardSets = {oCS.id for oCS in PhysicalCardSet.select()
+                           if oCS.name in aNames}
+        oFilter = MultiPhysicalCardSetMapFilter(aNames)
+        for iAbsId, _iPhysId, iSetId, iCnt in oFilter.select_card_counts():
+            dSets = self._dCards.setdefault(iAbsId, {})
+            dSets.setdefault(iSetId, 0)
+            dSets[iSetId] += iCnt
+
+    def _get_card_sets(self, iAbsId):
+        """The card set to count dictionary for the card"""
+        if self._dCards is None:
+            self._build()
+        return self._dCards.get(iAbsId, {})
+
+    def flush(self):
+        """Discard the index, so it's rebuilt on the next lookup"""
+        self._dCards = None
+        self._aCardSets = set()
+
+    def get_card_set_ids(self):
+        """Return the ids of all the card sets in the group"""
+        if self._dCards is None:
+            self._build()
+        return set(self._aCardSets)
+
+    def find_at_least(self, aAbsIds, iMin):
+        """Return the ids of the card sets which contain at least iMin
+           of the given abstract cards."""
+        dMatches = {}
+        for iAbsId in set(aAbsIds):
+            for iSetId in self._get_card_sets(iAbsId):
+                dMatches.setdefault(iSetId, 0)
+                dMatches[iSetId] += 1
+        return {iSetId for iSetId, iNum in dMatches.items() if iNum >= iMin}
+
+    def find_any(self, aAbsIds):
+        """Return the ids of the card sets containing any of the
+           given abstract cards."""
+        aResult = set()
+        for iAbsId in set(aAbsIds):
+            aResult.update(self._get_card_sets(iAbsId))
+        return aResult
+
+    def find_all(self, aAbsIds):
+        """Return the ids of the card sets containing all of the
+           given abstract cards."""
+        aResult = None
+        for iAbsId in set(aAbsIds):
+            aSets = set(self._get_card_sets(iAbsId))
+            aResult = aSets if aResult is None else aResult & aSets
+            if not aResult:
+                break
+        return aResult or set()
+
+    def get_counts(self, iSetId, aAbsIds):
+        """Return a dictionary of abstract card id to count for the given
+           cards in the card set, skipping cards not in the card set."""
+        dCounts = {}
+        for iAbsId in set(aAbsIds):
+            iCnt = self._get_card_sets(iAbsId).get(iSetId, 0)
+            if iCnt:
+                dCounts[iAbsId] = iCnt
+        return dCounts
+
+    # Signal handlers.
+    # If we haven't built the index yet, there's nothing to update
+
+    def card_changed(self, oCardSet, oPhysCard, iChg):
+        """Update the counts when cards are added or removed"""
+        if self._dCards is None or oCardSet.id not in self._aCardSets:
+            return
+        iAbsId = oPhysCard.abstractCardID
+        dSets = self._dCards.setdefault(iAbsId, {})
+        iCnt = dSets.get(oCardSet.id, 0) + iChg
+        if iCnt > 0:
+            dSets[oCardSet.id] = iCnt
+        else:
+            dSets.pop(oCardSet.id, None)
+            if not dSets:
+                del self._dCards[iAbsId]
+
+
+_oIndexes = CardSetCaches()
+
+
+def get_card_set_index(sName, fGetNames):
+    """Return the index called sName, creating it if needed.
+
+       The first call connects the database signals used to keep the
+       indexes up to date."""
+    return _oIndexes.get(sName, lambda: CardSetCardIndex(fGetNames))
+
+
+def flush_card_set_indexes():
+    """Discard the contents of all the indexes, so they are read from the
+       database on the next lookup."""
+    _oIndexes.flush()
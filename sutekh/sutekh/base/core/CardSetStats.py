@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Statistics for each card set, such as the total number of cards and
+   the number of child card sets.
+
+   The statistics for all the card sets are read with a few GROUP BY
+   queries the first time they're needed, and are then kept up to date
+   from the database signals, so showing them for a long card set list
+   doesn't need several queries per card set.
+
+   Apps can add extra counts, such as the number of crypt cards, with
+   register_stats_category. These are also read in bulk, the first time
+   they're asked for.
+
+   The statistics are flushed along with the other caches by flush_cache,
+   and rebuilt on the next lookup."""
+
+from sqlobject import sqlhub
+from sqlobject.sqlbuilder import Select, INNERJOINOn, IN, func
+
+from .BaseTables import (AbstractCard, PhysicalCard, PhysicalCardSet,
+                         MapPhysicalCardToPhysicalCardSet)
+from .CardSetCache import CardSetCache, CardSetCaches
+
+
+class CardSetInfo:
+    """The statistics for a single card set"""
+    # pylint: disable=too-few-public-methods
+    # Simple data holder
+
+    def __init__(self, iId, sName, iParentId, bInUse):
+        self.iId = iId
+        self.sName = sName
+        self.iParentId = iParentId
+        self.bInUse = bInUse
+        self.iTotal = 0
+        self.iChildren = 0
+        self.iInUseChildren = 0
+        self.dCounts = {}
+
+
+class _Categories:
+    """The registered extra counts.
+
+       Maps the category name to a function which returns the filter
+       for the cards to count."""
+    dFilters = {}
+
+
+def register_stats_category(sCategory, fGetFilter):
+    """Add an extra count to the card set statistics.
+
+       fGetFilter is called with no arguments to create the filter on
+       AbstractCard for the cards which should be counted."""
+    _Categories.dFilters[sCategory] = fGetFilter
+
+
+class CardSetStats(CardSetCache):
+    """Statistics for all the card sets, keyed by card set id"""
+
+    def __init__(self):
+        self._dInfo = None
+        self._dNames = {}
+        # Category name -> set of abstract card ids
+        self._dCategoryIds = {}
+
+    def flush(self):
+        """Discard the statistics, so they're read on the next lookup"""
+        self._dInfo = None
+        self._dNames = {}
+        self._dCategoryIds = {}
+
+    def _load(self):
+        """Read the card sets and their card totals"""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        oConn = sqlhub.processConnection
+        oMap = MapPhysicalCardToPhysicalCardSet.q
+        self._dInfo = {}
+        self._dNames = {}
+        self._dCategoryIds = {}
+        for iId, sName, iParentId, bInUse in oConn.queryAll(oConn.sqlrepr(
+                Select((PhysicalCardSet.q.id, PhysicalCardSet.q.name,
+                        PhysicalCardSet.q.parentID,
+                        PhysicalCardSet.q.inuse)))):
+            self._dInfo[iId] = CardSetInfo(iId, sName, iParentId,
+                                           bool(bInUse))
+            self._dNames[sName] = iId
+        for oInfo in list(self._dInfo.values()):
+            self._adjust_children(oInfo, 1)
+        for iId, iTotal in oConn.queryAll(oConn.sqlrepr(
+                Select((oMap.physicalCardSetID, func.SUM(oMap.cardCount)),
+                       groupBy=oMap.physicalCardSetID))):
+            if iId in self._dInfo:
+                self._dInfo[iId].iTotal = int(iTotal)
+
+    def _load_category(self, sCategory):
+        """Read the counts for the given category"""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        oFilter = _Categories.dFilters[sCategory]()
+        aIds = set(oCard.id for oCard in oFilter.select(AbstractCard))
+        self._dCategoryIds[sCategory] = aIds
+        for oInfo in self._dInfo.values():
+            oInfo.dCounts[sCategory] = 0
+        if not aIds:
+            return
+        oConn = sqlhub.processConnection
+        oMap = MapPhysicalCardToPhysicalCardSet.q
+        for iId, iCount in oConn.queryAll(oConn.sqlrepr(
+                Select((oMap.physicalCardSetID, func.SUM(oMap.cardCount)),
+                       where=IN(PhysicalCard.q.abstractCardID,
+                                sorted(aIds)),
+                       join=INNERJOINOn(None, PhysicalCard,
+                                        PhysicalCard.q.id ==
+                                        oMap.physicalCardID),
+                       groupBy=oMap.physicalCardSetID,
+                       staticTables=[MapPhysicalCardToPhysicalCardSet
+                                     .sqlmeta.table]))):
+            if iId in self._dInfo:
+                self._dInfo[iId].dCounts[sCategory] = int(iCount)
+
+    def _adjust_children(self, oInfo, iChg):
+        """Add or remove oInfo from its parent's child counts"""
+        oParent = self._dInfo.get(oInfo.iParentId)
+        if oParent is None:
+            return
+        oParent.iChildren += iChg
+        if oInfo.bInUse:
+            oParent.iInUseChildren += iChg
+
+    def get_info(self, sName):
+        """Return the CardSetInfo for the named card set, or None if the
+           card set doesn't exist."""
+        if self._dInfo is None:
+            self._load()
+        iId = self._dNames.get(sName)
+        if iId is None:
+            return None
+        return self._dInfo[iId]
+
+    def get_count(self, sName, sCategory):
+        """Return the number of cards in the named card set for the given
+           registered category, or None if the card set doesn't exist."""
+        oInfo = self.get_info(sName)
+        if oInfo is None:
+            return None
+        if sCategory not in self._dCategoryIds:
+            self._load_category(sCategory)
+        return oInfo.dCounts[sCategory]
+
+    def get_name(self, iId):
+        """Return the name of the card set with the given id, or None"""
+        if self._dInfo is None:
+            self._load()
+        oInfo = self._dInfo.get(iId)
+        if oInfo is None:
+            return None
+        return oInfo.sName
+
+    def get_all(self):
+        """Return a dictionary of card set name to CardSetInfo for all the
+           card sets"""
+        if self._dInfo is None:
+            self._load()
+        return dict((oInfo.sName, oInfo) for oInfo in self._dInfo.values())
+
+    # Signal handlers.
+    # If we haven't loaded the statistics yet, there's nothing to update
+
+    def card_changed(self, oCardSet, oPhysCard, iChg):
+        """Update the counts when cards are added or removed"""
+        if self._dInfo is None or oCardSet.id not in self._dInfo:
+            return
+        oInfo = self._dInfo[oCardSet.id]
+        oInfo.iTotal += iChg
+        for sCategory, aIds in self._dCategoryIds.items():
+            if oPhysCard.abstractCardID in aIds:
+                oInfo.dCounts[sCategory] += iChg
+
+    def card_set_created(self, oCardSet, _dKW=None, _fPostFuncs=None):
+        """Add a new card set"""
+        if self._dInfo is None:
+            return
+        oOld = self._dInfo.get(oCardSet.id)
+        if oOld is not None:
+            # Shouldn't happen, but don't leave stale entries behind
+            self._remove(oCardSet.id)
+        oInfo = CardSetInfo(oCardSet.id, oCardSet.name, oCardSet.parentID,
+                            oCardSet.inuse)
+        for sCategory in self._dCategoryIds:
+            oInfo.dCounts[sCategory] = 0
+        self._dInfo[oCardSet.id] = oInfo
+        self._dNames[oInfo.sName] = oCardSet.id
+        self._adjust_children(oInfo, 1)
+
+    def card_set_deleted(self, oCardSet, _fPostFuncs=None):
+        """Remove a deleted card set"""
+        if self._dInfo is None:
+            return
+        self._remove(oCardSet.id)
+
+    def card_set_updated(self, oCardSet, _fPostFuncs=None):
+        """Update the card set details after a change"""
+        if self._dInfo is None or oCardSet.id not in self._dInfo:
+            return
+        oInfo = self._dInfo[oCardSet.id]
+        if oInfo.sName != oCardSet.name:
+            if self._dNames.get(oInfo.sName) == oCardSet.id:
+                del self._dNames[oInfo.sName]
+            oInfo.sName = oCardSet.name
+            self._dNames[oInfo.sName] = oCardSet.id
+        if oInfo.iParentId != oCardSet.parentID or \
+                oInfo.bInUse != oCardSet.inuse:
+            self._adjust_children(oInfo, -1)
+            oInfo.iParentId = oCardSet.parentID
+            oInfo.bInUse = oCardSet.inuse
+            self._adjust_children(oInfo, 1)
+
+    def _remove(self, iId):
+        """Remove the card set with the given id"""
+        oInfo = self._dInfo.pop(iId, None)
+        if oInfo is None:
+            return
+        self._adjust_children(oInfo, -1)
+        if self._dNames.get(oInfo.sName) == iId:
+            del self._dNames[oInfo.sName]
+
+
+# The statistics are the only cache here
+_oCaches = CardSetCaches()
+
+
+def get_card_set_stats():
+    """Return the current card set statistics.
+
+       The first call connects the database signals used to keep the
+       statistics up to date."""
+    return _oCaches.get('stats', CardSetStats)
+
+
+def flush_card_set_stats():
+    """Discard the statistics, so they are read from the database on the
+       next lookup."""
+    _oCaches.flush()
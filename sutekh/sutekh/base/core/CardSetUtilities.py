@@ -6,8 +6,11 @@
 """Utility functions for dealing with managing the CardSet Objects"""
 
 from sqlobject import SQLObjectNotFound, sqlhub
-from .BaseTables import PhysicalCardSet
+from sqlobject.sqlbuilder import Select, INNERJOINOn, LEFTJOINOn, func
+from .BaseTables import (PhysicalCardSet, PhysicalCard, AbstractCard,
+                         Printing, Expansion, MapPhysicalCardToPhysicalCardSet)
 from .BaseAdapters import IPhysicalCardSet
+from .DBSignals import send_cards_changed_signal
 
 
 def check_cs_exists(sName):
@@ -76,8 +79,8 @@ def delete_physical_card_set(sSetName):
         """Remove cards from the card set.
 
            Intended to be wrapped in a transaction for speed."""
-        for oCard in oCS.cards:
-            oCS.removePhysicalCard(oCard)
+        for iCardId, _iCount in oCS.get_card_counts():
+            oCS.removePhysicalCard(iCardId)
     try:
         oCS = PhysicalCardSet.byName(sSetName)
         aChildren = find_children(oCS)
@@ -96,6 +99,56 @@ def delete_physical_card_set(sSetName):
         return False
 
 
+def add_cards_to_set(oCardSet, aPhysCards):
+    """Add a list of physical cards to the card set in a single batch.
+
+       The cards are collapsed into counts and written with bulk inserts.
+       A single bulk changed signal is sent for the card set, rather
+       than one signal per card.
+       None entries in aPhysCards are skipped."""
+    dCards = {}
+    dCounts = {}
+    for oPhysCard in aPhysCards:
+        if not oPhysCard:
+            continue
+        dCards[oPhysCard.id] = oPhysCard
+        dCounts.setdefault(oPhysCard.id, 0)
+        dCounts[oPhysCard.id] += 1
+    if not dCounts:
+        return
+    oCardSet.add_card_counts(dCounts)
+    oCardSet.syncUpdate()
+    send_cards_changed_signal(oCardSet, dict(
+        (dCards[iCardId], iCount) for iCardId, iCount in dCounts.items()))
+
+
+def get_card_name_counts(oCardSet):
+    """Return the contents of the card set as a list of
+       (card name, expansion name, printing name, count) tuples.
+
+       This uses a single query, rather than loading all the physical
+       cards, so is suitable for large card sets. The expansion and
+       printing names are None if not set."""
+    oMap = MapPhysicalCardToPhysicalCardSet.q
+    oQuery = Select(
+        (AbstractCard.q.name, Expansion.q.name, Printing.q.name,
+         func.SUM(oMap.cardCount)),
+        where=oMap.physicalCardSetID == oCardSet.id,
+        join=[INNERJOINOn(None, PhysicalCard,
+                          PhysicalCard.q.id == oMap.physicalCardID),
+              INNERJOINOn(None, AbstractCard,
+                          AbstractCard.q.id == PhysicalCard.q.abstractCardID),
+              LEFTJOINOn(None, Printing,
+                         Printing.q.id == PhysicalCard.q.printingID),
+              LEFTJOINOn(None, Expansion,
+                         Expansion.q.id == Printing.q.expansionID)],
+        groupBy=(AbstractCard.q.name, Expansion.q.name, Printing.q.name),
+        staticTables=[MapPhysicalCardToPhysicalCardSet.sqlmeta.table])
+    oConn = sqlhub.processConnection
+    return [tuple(x[:3]) + (int(x[3]),)
+            for x in oConn.queryAll(oConn.sqlrepr(oQuery))]
+
+
 def find_children(oCardSet):
     """Find all the children of the given card set"""
     # pylint: disable=no-member
@@ -149,3 +202,33 @@ def get_current_card_sets():
        Useful for determining the existing list for clean_empty."""
     # This is a one-liner, but helps ensure consistency
     return [x.name for x in PhysicalCardSet.select()]
+
+
+class CountedCardRows:
+    """Wrap a selection of MapPhysicalCardToPhysicalCardSet rows.
+
+       Each row stores the number of copies of the card in the card set,
+       so iterating over this returns each row once for each copy, which
+       matches the behaviour of the older schema with a row per copy.
+       count() returns the total number of cards, rather than the number
+       of rows.
+
+       The selection should be distinct, since filter joins can return
+       the same row multiple times."""
+
+    def __init__(self, oSelect):
+        self._oSelect = oSelect
+
+    def __iter__(self):
+        for oRow in self._oSelect:
+            for _iNum in range(oRow.cardCount):
+                yield oRow
+
+    def counted_rows(self):
+        """Iterate over the (row, count) pairs"""
+        for oRow in self._oSelect:
+            yield oRow, oRow.cardCount
+
+    def count(self):
+        """Return the total number of cards"""
+        return sum(oRow.cardCount for oRow in self._oSelect)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""K-means clustering of tabulated card data.
+
+   The tables produced by the card list tabulator are mostly zeros (each
+   card has only a few disciplines, clans and so on), so we store each
+   row as a list of its non-zero entries. The distance from a row to a
+   cluster center is then the distance from the zero vector to the center,
+   which we only need to calculate once per center, corrected for the
+   row's non-zero entries."""
+
+import random
+
+
+class Metric:
+    """A distance measure, given as the contribution of each column to
+       the squared distance.
+
+       fPair(x, y) is the contribution of a column with values x and y."""
+
+    def __init__(self, fPair):
+        self.fPair = fPair
+
+    def zero(self, fCenter):
+        """Contribution of a column where the row is zero"""
+        return self.fPair(0, fCenter)
+
+    def distance_sq(self, aRow, aCenter):
+        """Squared distance between two dense vectors"""
+        return sum(self.fPair(x, y) for x, y in zip(aRow, aCenter))
+
+
+def _euclidean_pair(fRow, fCenter):
+    """Usual squared difference"""
+    return (fRow - fCenter) ** 2
+
+
+def _sutekh_pair(fRow, fCenter):
+    """Like Euclidean distance, but -1 is distance 0.25 to anything
+       (including 0 and -1) and 0 is distance 4.0 from anything other
+       than 0."""
+    if fRow == -1 or fCenter == -1:
+        return 0.25
+    if (fRow == 0) ^ (fCenter == 0):
+        return 4.0
+    return (fRow - fCenter) ** 2
+
+
+METRICS = {
+    'Euclidean Distance': Metric(_euclidean_pair),
+    'Sutekh Distance': Metric(_sutekh_pair),
+}
+
+# Other possibile metrics:
+#  'City Block Distance',
+#  'Correlation',
+#  'Absolute Value of the Correlation',
+#  'Uncentered Correlation',
+#  'Absolute Value of the Uncentered Correlation',
+#  "Spearman's Rank Correlation"
+#  "Kendall's Tau"
+
+
+class ClusterTable:
+    """The rows of the table to cluster, stored as lists of the
+       (column, value) pairs for the non-zero entries."""
+
+    def __init__(self, aTable):
+        self.iCols = len(aTable[0]) if aTable else 0
+        self.aRows = [[(iCol, fVal) for iCol, fVal in enumerate(aRow) if fVal]
+                      for aRow in aTable]
+
+    def __len__(self):
+        return len(self.aRows)
+
+    def dense(self, iRow):
+        """Return the row as a list of values"""
+        aDense = [0.0] * self.iCols
+        for iCol, fVal in self.aRows[iRow]:
+            aDense[iCol] = fVal
+        return aDense
+
+    def distances_sq(self, aCenter, oMetric):
+        """Return the squared distances from each row to aCenter"""
+        aZero = [oMetric.zero(fVal) for fVal in aCenter]
+        fBase = sum(aZero)
+        fPair = oMetric.fPair
+        return [fBase + sum(fPair(fVal, aCenter[iCol]) - aZero[iCol]
+                            for iCol, fVal in aRow)
+                for aRow in self.aRows]
+
+    def centroid(self, aMembers):
+        """Return the mean of the given rows"""
+        aSum = [0.0] * self.iCols
+        for iRow in aMembers:
+            for iCol, fVal in self.aRows[iRow]:
+                aSum[iCol] += fVal
+        fScale = 1.0 / len(aMembers)
+        return [x * fScale for x in aSum]
+
+
+def k_means_plus_plus(oTable, iNumClust, oMetric, oRandom):
+    """Find a set of initial centers using the k-means++ algorithm.
+
+       See http://www.stanford.edu/~darthur/kMeansPlusPlus.pdf.
+       """
+    aMeans = [oTable.dense(oRandom.randrange(len(oTable)))]
+    # Squared distance from each row to the nearest center so far
+    aMinDists = oTable.distances_sq(aMeans[0], oMetric)
+
+    while len(aMeans) < iNumClust:
+        fPick = oRandom.uniform(0, sum(aMinDists))
+        for iRow, fMinD in enumerate(aMinDists):
+            fPick -= fMinD
+            if fPick <= 0:
+                break
+        # iRow is always defined, since oTable isn't empty, and ends at the
+        # last row if rounding means we never reach 0
+        # pylint: disable=undefined-loop-variable
+        aMeans.append(oTable.dense(iRow))
+        aMinDists = [min(x, y) for x, y in
+                     zip(aMinDists, oTable.distances_sq(aMeans[-1],
+                                                        oMetric))]
+    return aMeans
+
+
+def _lloyd(oTable, aMeans, iIterations, oMetric, fStep):
+    """Refine the centers using Lloyd's algorithm.
+
+       Returns the clusters and the total squared distance of the rows
+       from their cluster centers. fStep is called after each
+       iteration."""
+    iNumClust = len(aMeans)
+    aAssigned = None
+    for iIter in range(iIterations):
+        aDists = [oTable.distances_sq(aMean, oMetric) for aMean in aMeans]
+        aNewAssigned = [min(range(iNumClust), key=tRowDists.__getitem__)
+                        for tRowDists in zip(*aDists)]
+        aClusters = [[] for _iClust in range(iNumClust)]
+        for iRow, iClust in enumerate(aNewAssigned):
+            aClusters[iClust].append(iRow)
+        if aNewAssigned == aAssigned:
+            # Nothing has moved, so further iterations won't change anything
+            fStep(iIterations - iIter)
+            break
+        aAssigned = aNewAssigned
+        for iClust, aMembers in enumerate(aClusters):
+            if aMembers:
+                aMeans[iClust] = oTable.centroid(aMembers)
+        fStep(1)
+    fCost = 0.0
+    for aMean, aMembers in zip(aMeans, aClusters):
+        if aMembers:
+            aDists = oTable.distances_sq(aMean, oMetric)
+            fCost += sum(aDists[iRow] for iRow in aMembers)
+    return aClusters, fCost
+
+
+def k_means(aTable, iNumClust, iIterations, oMetric, iRestarts=1,
+            oRandom=None, fProgress=None):
+    """Perform k-means clustering on a table of card properties.
+
+       Each restart chooses new initial centers with k-means++, and
+       refines them with up to iIterations steps of Lloyd's algorithm. We
+       return the means and clusters (lists of row indexes) from the
+       restart with the smallest total distance from the rows to their
+       centers. Pass a seeded random.Random as oRandom to get repeatable
+       results. fProgress, if given, is called with the fraction of the
+       work done."""
+    oTable = ClusterTable(aTable)
+    if not oTable or not oTable.iCols:
+        # empty card set or zero-length vectors
+        return [], []
+    if oRandom is None:
+        oRandom = random.Random()
+
+    iTotalSteps = iRestarts * iIterations
+    aStepsDone = [0]
+
+    def step(iSteps):
+        """Report progress"""
+        aStepsDone[0] += iSteps
+        if fProgress:
+            fProgress(aStepsDone[0] / iTotalSteps)
+
+    tBest = None
+    for _iRestart in range(iRestarts):
+        aMeans = k_means_plus_plus(oTable, iNumClust, oMetric, oRandom)
+        aClusters, fCost = _lloyd(oTable, aMeans, iIterations, oMetric,
+                                  step)
+        if tBest is None or fCost < tBest[0]:
+            tBest = (fCost, aMeans, aClusters)
+    return tBest[1], tBest[2]
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Implement RelatedJoin over an intermediate table with a count column"""
+
+from sqlobject import joins
+from sqlobject.sqlbuilder import Table, Select, Update, Insert, Delete, AND
+
+# Limit the size of a single INSERT statement, to stay well clear of
+# the statement length limits of the various databases
+BULK_INSERT_ROWS = 500
+
+
+class SOCountedRelatedJoin(joins.SORelatedJoin):
+    """Version of RelatedJoin where the intermediate table stores a
+       (object, other, count) row rather than one row for each copy.
+
+       performJoin still returns each related object once per copy, so
+       code iterating over the join sees the same results as with a
+       plain RelatedJoin, but adding and removing objects update the
+       count rather than inserting and deleting rows.
+       """
+
+    def __init__(self, *aArgs, **kwargs):
+        self.countColumn = kwargs.pop('countColumn', 'card_count')
+        super().__init__(*aArgs, **kwargs)
+
+    def _get_columns(self):
+        """Return the sqlbuilder columns for the intermediate table"""
+        oTable = Table(self.intermediateTable)
+        return (oTable, getattr(oTable, self.joinColumn),
+                getattr(oTable, self.otherColumn),
+                getattr(oTable, self.countColumn))
+
+    def get_counts(self, oInst):
+        """Return a list of (other id, count) pairs for oInst"""
+        _oTable, oJoinCol, oOtherCol, oCountCol = self._get_columns()
+        # pylint: disable=protected-access
+        # We need to access _connection here
+        oConn = oInst._connection
+        return oConn.queryAll(oConn.sqlrepr(
+            Select((oOtherCol, oCountCol), where=oJoinCol == oInst.id)))
+
+    # pylint: disable=invalid-name
+    # Name must match SQLObject conventions
+    def performJoin(self, oInst):
+        """Return the join result, with each object repeated once for
+           each copy."""
+        # pylint: disable=protected-access
+        # We need to access _connection and sqlmeta here
+        if oInst.sqlmeta._perConnection:
+            oConn = oInst._connection
+        else:
+            oConn = None
+        aResults = []
+        for iOtherId, iCount in self.get_counts(oInst):
+            if iOtherId is None:
+                continue
+            oOther = self.otherClass.get(iOtherId, oConn)
+            aResults.extend([oOther] * iCount)
+        return self._applyOrderBy(aResults, self.otherClass)
+
+    def _get_count(self, oInst, oOther):
+        """Return the current count for the (oInst, oOther) pair, or None
+           if no row exists."""
+        _oTable, oJoinCol, oOtherCol, oCountCol = self._get_columns()
+        # pylint: disable=protected-access
+        # We need to access _connection here
+        oConn = oInst._connection
+        aRows = oConn.queryAll(oConn.sqlrepr(
+            Select(oCountCol, where=AND(oJoinCol == joins.getID(oInst),
+                                        oOtherCol == joins.getID(oOther)))))
+        if not aRows:
+            return None
+        return aRows[0][0]
+
+    def set_count(self, oInst, oOther, iCount):
+        """Set the count for the (oInst, oOther) pair directly.
+
+           A count of 0 or less removes the row."""
+        self._update_count(oInst, oOther, iCount,
+                           self._get_count(oInst, oOther))
+
+    def _update_count(self, oInst, oOther, iCount, iCurCount):
+        """Write the new count, given the current count (None if there
+           is no existing row)."""
+        _oTable, oJoinCol, oOtherCol, _oCountCol = self._get_columns()
+        # pylint: disable=protected-access
+        # We need to access _connection here
+        oConn = oInst._connection
+        iInstId = joins.getID(oInst)
+        iOtherId = joins.getID(oOther)
+        oWhere = AND(oJoinCol == iInstId, oOtherCol == iOtherId)
+        if iCount <= 0:
+            if iCurCount is not None:
+                oConn.query(oConn.sqlrepr(
+                    Delete(self.intermediateTable, where=oWhere)))
+        elif iCurCount is None:
+            oConn.query(oConn.sqlrepr(
+                Insert(self.intermediateTable,
+                       values={self.joinColumn: iInstId,
+                               self.otherColumn: iOtherId,
+                               self.countColumn: iCount})))
+        elif iCurCount != iCount:
+            oConn.query(oConn.sqlrepr(
+                Update(self.intermediateTable,
+                       values={self.countColumn: iCount},
+                       where=oWhere)))
+
+    def add(self, oInst, oOther, iCount=1):
+        """Add iCount copies of oOther to the join."""
+        iCurCount = self._get_count(oInst, oOther)
+        self._update_count(oInst, oOther, (iCurCount or 0) + iCount,
+                           iCurCount)
+
+    def remove(self, oInst, oOther, iCount=None):
+        """Remove iCount copies of oOther from the join.
+
+           If iCount is None, all the copies are removed, matching the
+           behaviour of RelatedJoin."""
+        iCurCount = self._get_count(oInst, oOther)
+        if iCount is None:
+            iNewCount = 0
+        else:
+            iNewCount = (iCurCount or 0) - iCount
+        self._update_count(oInst, oOther, iNewCount, iCurCount)
+
+    def add_counts(self, oInst, dCounts):
+        """Add several objects to the join at once.
+
+           dCounts maps the ids of the other objects to the number of
+           copies to add. Rows for objects not already in the join are
+           created with multi-row INSERTs, rather than a query per object.
+           """
+        # pylint: disable=protected-access
+        # We need to access _connection here
+        oConn = oInst._connection
+        dCurrent = dict(self.get_counts(oInst))
+        aNewRows = []
+        for iOtherId, iCount in dCounts.items():
+            if iCount <= 0:
+                continue
+            if iOtherId in dCurrent:
+                self._update_count(oInst, iOtherId,
+                                   dCurrent[iOtherId] + iCount,
+                                   dCurrent[iOtherId])
+            else:
+                aNewRows.append({self.joinColumn: oInst.id,
+                                 self.otherColumn: iOtherId,
+                                 self.countColumn: iCount})
+        for iStart in range(0, len(aNewRows), BULK_INSERT_ROWS):
+            oConn.query(oConn.sqlrepr(
+                Insert(self.intermediateTable,
+                       valueList=aNewRows[iStart:iStart + BULK_INSERT_ROWS])))
+
+
+class CountedRelatedJoin(joins.RelatedJoin):
+    """Provide CountedRelatedJoin object to Sutekh"""
+    baseClass = SOCountedRelatedJoin
+
+
+def find_join(cCls, sJoinName):
+    """Return the join on cCls named sJoinName."""
+    for oJoin in cCls.sqlmeta.joins:
+        if oJoin.joinMethodName == sJoinName:
+            return oJoin
+    raise KeyError("No join %s on %s" % (sJoinName, cCls.__name__))
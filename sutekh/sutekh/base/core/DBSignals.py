@@ -9,7 +9,8 @@
 collection in sync."""
 
 from sqlobject.events import (Signal, listen, RowUpdateSignal,
-                              RowDestroySignal, RowCreatedSignal)
+                              RowUpdatedSignal, RowDestroySignal,
+                              RowCreatedSignal)
 
 # We need to test in this order, because sqlobject < 3.0 & pydispatch can
 # be installed together, and then importing the system pydispatch will
@@ -31,18 +32,38 @@ class ChangedSignal(Signal):
        """
 
 
+class CardsChangedSignal(Signal):
+    """Syncronisation signal for changes to many cards in a card set.
+
+       Sent instead of ChangedSignal for bulk changes, with a dictionary
+       of physical card to change in the count, so listeners can handle
+       the whole change at once.
+       """
+
+
 # Senders
 def send_changed_signal(oCardSet, oPhysCard, iChange, cClass=PhysicalCardSet):
     """Sent when card counts change, as card sets may need to update."""
     cClass.sqlmeta.send(ChangedSignal, oCardSet, oPhysCard, iChange)
 
 
+def send_cards_changed_signal(oCardSet, dChanges, cClass=PhysicalCardSet):
+    """Sent when the counts of many cards change at once, with a
+       dictionary of physical card to change in the count."""
+    cClass.sqlmeta.send(CardsChangedSignal, oCardSet, dChanges)
+
+
 # Listeners
 def listen_changed(fListener, cClass):
     """Listens for the changed_signal."""
     listen(fListener, cClass, ChangedSignal)
 
 
+def listen_cards_changed(fListener, cClass):
+    """Listens for the bulk changed signal."""
+    listen(fListener, cClass, CardsChangedSignal)
+
+
 def listen_row_destroy(fListener, cClass):
     """listen for the row destroyed signal sent when a card set is deleted."""
     listen(fListener, cClass, RowDestroySignal)
@@ -53,6 +74,12 @@ def listen_row_update(fListener, cClass):
     listen(fListener, cClass, RowUpdateSignal)
 
 
+def listen_row_updated(fListener, cClass):
+    """listen for the row updated signal sent after a card set has been
+       modified."""
+    listen(fListener, cClass, RowUpdatedSignal)
+
+
 def listen_row_created(fListener, cClass):
     """listen for the row created signal sent when a new set is created."""
     listen(fListener, cClass, RowCreatedSignal)
@@ -63,6 +90,12 @@ def disconnect_changed(fListener, cClass):
     dispatcher.disconnect(fListener, signal=ChangedSignal, sender=cClass)
 
 
+def disconnect_cards_changed(fListener, cClass):
+    """Disconnects from the bulk changed signal."""
+    dispatcher.disconnect(fListener, signal=CardsChangedSignal,
+                          sender=cClass)
+
+
 def disconnect_row_destroy(fListener, cClass):
     """Disconnect from the row destroyed signal."""
     dispatcher.disconnect(fListener, signal=RowDestroySignal, sender=cClass)
@@ -73,6 +106,11 @@ def disconnect_row_created(fListener, cClass):
     dispatcher.disconnect(fListener, signal=RowCreatedSignal, sender=cClass)
 
 
+def disconnect_row_updated(fListener, cClass):
+    """Disconnect the row updated signal sent after the modification."""
+    dispatcher.disconnect(fListener, signal=RowUpdatedSignal, sender=cClass)
+
+
 def disconnect_row_update(fListener, cClass):
     """Disconnect the row updated signal."""
     dispatcher.disconnect(fListener, signal=RowUpdateSignal, sender=cClass)
@@ -11,17 +11,28 @@
 import datetime
 import logging
 
-from sqlobject import SQLObjectNotFound
+from sqlobject import SQLObjectNotFound, sqlhub
 
-from .BaseTables import VersionTable, PhysicalCardSet, AbstractCard, Metadata
+from .BaseTables import (VersionTable, PhysicalCardSet, AbstractCard,
+                         Metadata, Printing)
 from .BaseAdapters import Adapter
 from .BaseAbbreviations import DatabaseAbbreviation
 from .DatabaseVersion import DatabaseVersion
 from .CachedRelatedJoin import SOCachedRelatedJoin
+from .FilterIndex import flush_card_index
+from .CardSetStats import flush_card_set_stats
+from .FilterCache import flush_filter_cache
+from .CardSetIndex import flush_card_set_indexes
+from .DeckSimilarity import flush_deck_similarity
+from .FuzzyNameIndex import flush_fuzzy_name_index
 from ..Utility import find_subclasses
 
 CARDLIST_UPDATE_DATE = "last cardlist update"
 
+# Flush functions for caches defined outside base, which can't be
+# imported here
+_aFlushFunctions = []
+
 
 def make_adapter_caches():
     """Flush all adapter and abbreviation caches.
@@ -39,33 +50,83 @@ def make_adapter_caches():
         cAdapter.make_object_cache()
 
 
-def flush_cache(bMakeCache=True):
-    """Flush all the object caches - needed before importing new card lists
-       and such"""
-    for oJoin in AbstractCard.sqlmeta.joins:
-        if isinstance(oJoin, SOCachedRelatedJoin):
-            oJoin.flush_cache()
+def can_run_in_thread(oConn=None):
+    """Check if work using the database connection can be run on a
+       worker thread."""
+    if oConn is None:
+        oConn = sqlhub.processConnection
+    # pylint: disable=protected-access
+    # No public way to check for memory databases
+    return not (oConn.dbName == 'sqlite' and oConn._memory)
+
+
+def register_flush_function(fFlush):
+    """Register a function to be called by flush_cache.
+
+       This is for caches of the card list that are defined by the
+       application, rather than in base."""
+    if fFlush not in _aFlushFunctions:
+        _aFlushFunctions.append(fFlush)
+
+
+def get_cached_joins():
+    """Return a list of the cached joins on AbstractCard and its
+       subclasses."""
+    aJoins = [oJoin for oJoin in AbstractCard.sqlmeta.joins
+              if isinstance(oJoin, SOCachedRelatedJoin)]
     # pylint: disable=no-member
     # AbstractCard confuses pylint
     for oChild in AbstractCard.__subclasses__():
-        for oJoin in oChild.sqlmeta.joins:
-            if isinstance(oJoin, SOCachedRelatedJoin):
-                oJoin.flush_cache()
+        aJoins.extend([oJoin for oJoin in oChild.sqlmeta.joins
+                       if isinstance(oJoin, SOCachedRelatedJoin)])
+    return aJoins
+
+
+def _flush_other_joins():
+    """Flush the cached joins on the tables other than AbstractCard.
+
+       These are filled as needed, rather than by init_cache, but the
+       cache is keyed on the object ids, so it needs to be flushed when
+       the card data changes."""
+    for oJoin in Printing.sqlmeta.joins:
+        if isinstance(oJoin, SOCachedRelatedJoin):
+            oJoin.flush_cache()
+
+
+def get_join_key(oJoin):
+    """Return a key identifying the cached join, for use in snapshots."""
+    return (oJoin.soClass.__name__, oJoin.joinMethodName)
+
+
+def flush_cache(bMakeCache=True):
+    """Flush all the object caches - needed before importing new card lists
+       and such"""
+    for oJoin in get_cached_joins():
+        oJoin.flush_cache()
+    _flush_other_joins()
+    flush_card_index()
+    flush_card_set_stats()
+    flush_filter_cache()
+    flush_card_set_indexes()
+    flush_deck_similarity()
+    flush_fuzzy_name_index()
+    for fFlush in _aFlushFunctions:
+        fFlush()
     if bMakeCache:
         make_adapter_caches()
 
 
-def init_cache():
-    """Initiliase the cached join tables."""
-    for oJoin in AbstractCard.sqlmeta.joins:
-        if isinstance(oJoin, SOCachedRelatedJoin):
-            oJoin.init_cache()
-    # pylint: disable=no-member
-    # AbstractCard confuses pylint
-    for oChild in AbstractCard.__subclasses__():
-        for oJoin in oChild.sqlmeta.joins:
-            if isinstance(oJoin, SOCachedRelatedJoin):
-                oJoin.init_cache()
+def init_cache(dJoinRows=None):
+    """Initiliase the cached join tables.
+
+       dJoinRows can be used to provide the join contents, keyed by
+       get_join_key, rather than reading them from the database."""
+    if dJoinRows is None:
+        dJoinRows = {}
+    for oJoin in get_cached_joins():
+        # Joins missing from dJoinRows are read from the database
+        oJoin.init_cache(dJoinRows.get(get_join_key(oJoin)))
+    _flush_other_joins()
     make_adapter_caches()
 
 
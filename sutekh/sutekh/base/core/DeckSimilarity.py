@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Find similar card sets using MinHash sketches.
+
+   Each card set in a group is summarised by a MinHash signature over
+   its cards, with each copy of a card counted as a separate token, so
+   the fraction of matching signature entries estimates the weighted
+   Jaccard similarity of two card sets. The cards can be split into
+   two parts, such as the crypt and the library, with a signature for
+   each part, so the smaller part isn't swamped by the larger one.
+
+   The signatures are split into bands, and only card sets sharing a
+   band with the query are compared, so finding the most similar card
+   sets doesn't need to compare the query with every card set.
+
+   The sketches are read with a single GROUP BY query the first time
+   they're needed. Card sets with card changes are marked as stale,
+   and only their sketches are recalculated on the next lookup, while
+   adding, removing or changing card sets flushes the sketches, as for
+   the card set indexes. The sketches are also flushed along with the
+   other caches by flush_cache."""
+
+import random
+from array import array
+
+from .BaseTables import PhysicalCardSet, AbstractCard
+from .BaseFilters import MultiPhysicalCardSetMapFilter
+from .CardSetCache import CardSetCache, CardSetCaches
+
+NUM_HASHES = 64
+BAND_ROWS = 4
+# Copies beyond this are ignored, which limits the number of distinct
+# tokens. This is far more than any deck needs.
+MAX_COPIES = 32
+
+# Hash functions are (a * x + b) mod p, for the mersenne prime p.
+# The seed is fixed, so the sketches are reproducible.
+_PRIME = (1 << 61) - 1
+_HASH_SEED = 20260917
+
+
+def _make_hash_params():
+    """Create the parameters for the hash functions"""
+    oRandom = random.Random(_HASH_SEED)
+    return [(oRandom.randrange(1, _PRIME), oRandom.randrange(_PRIME))
+            for _iNum in range(NUM_HASHES)]
+
+
+class _HashCache:
+    """The hash function parameters and the cached token hashes"""
+    aParams = _make_hash_params()
+    # token -> array of the hashes
+    dHashes = {}
+
+
+def _token_hashes(iToken):
+    """Return the hashes for the token, caching the result"""
+    aHashes = _HashCache.dHashes.get(iToken)
+    if aHashes is None:
+        aHashes = array('q', [(iA * iToken + iB) % _PRIME
+                              for iA, iB in _HashCache.aParams])
+        _HashCache.dHashes[iToken] = aHashes
+    return aHashes
+
+
+def make_signature(dCounts):
+    """Return the MinHash signature for the dictionary of abstract card
+       ids to counts, or None if there are no cards."""
+    aVectors = [_token_hashes(iAbsId * MAX_COPIES + iCopy)
+                for iAbsId, iCnt in dCounts.items()
+                for iCopy in range(min(iCnt, MAX_COPIES))]
+    if not aVectors:
+        return None
+    return array('q', map(min, zip(*aVectors)))
+
+
+def _compare(aSig1, aSig2):
+    """Estimate the similarity of the part from the two signatures.
+
+       Returns None if both parts are empty."""
+    if aSig1 is None or aSig2 is None:
+        if aSig1 is None and aSig2 is None:
+            return None
+        return 0.0
+    return sum(1 for iA, iB in zip(aSig1, aSig2) if iA == iB) / NUM_HASHES
+
+
+class DeckSketch:
+    """The signatures for a card set.
+
+       aSplitIds is the set of abstract card ids in the first part, such
+       as the crypt. All the other cards are in the second part."""
+
+    def __init__(self, dCounts, aSplitIds):
+        dFirst = {}
+        dSecond = {}
+        for iAbsId, iCnt in dCounts.items():
+            if iCnt <= 0:
+                continue
+            if iAbsId in aSplitIds:
+                dFirst[iAbsId] = iCnt
+            else:
+                dSecond[iAbsId] = iCnt
+        self.aSignatures = (make_signature(dFirst), make_signature(dSecond))
+
+    def similarity(self, oOther):
+        """Return the estimated similarity to the other sketch, and the
+           similarity of each part (None for parts that are empty in
+           both card sets).
+
+           The overall similarity is the mean of the parts which aren't
+           empty in both card sets."""
+        aParts = [_compare(aSig1, aSig2) for aSig1, aSig2 in
+                  zip(self.aSignatures, oOther.aSignatures)]
+        aScores = [fPart for fPart in aParts if fPart is not None]
+        if not aScores:
+            return 0.0, aParts
+        return sum(aScores) / len(aScores), aParts
+
+    def band_keys(self):
+        """Return the LSH bucket keys for the sketch"""
+        aKeys = []
+        for iPart, aSig in enumerate(self.aSignatures):
+            if aSig is None:
+                continue
+            for iBand, iStart in enumerate(range(0, NUM_HASHES, BAND_ROWS)):
+                aKeys.append(hash((iPart, iBand) +
+                                  tuple(aSig[iStart:iStart + BAND_ROWS])))
+        return aKeys
+
+
+def rank_similar(oSketch, aCandidates, iTopK):
+    """Return the candidates most similar to the sketch.
+
+       aCandidates is a list of (card set id, sketch) pairs, as returned
+       by DeckSimilarityIndex.get_candidates. This doesn't touch the
+       index or the database, so can be run in a background job.
+       Returns up to iTopK (card set id, similarity, part similarities)
+       tuples, most similar first."""
+    aResults = []
+    for iSetId, oOther in aCandidates:
+        fScore, aParts = oSketch.similarity(oOther)
+        aResults.append((iSetId, fScore, aParts))
+    aResults.sort(key=lambda x: (-x[1], x[0]))
+    return aResults[:iTopK]
+
+
+def _read_counts(aNames):
+    """Return a dictionary of card set id to the dictionary of abstract
+       card ids and counts for the named card sets."""
+    dSets = {}
+    if not aNames:
+        return dSets
+    oFilter = MultiPhysicalCardSetMapFilter(aNames)
+    for iAbsId, _iPhysId, iSetId, iCnt in oFilter.select_card_counts():
+        dCounts = dSets.setdefault(iSetId, {})
+        dCounts.setdefault(iAbsId, 0)
+        dCounts[iAbsId] += iCnt
+    return dSets
+
+
+class DeckSimilarityIndex(CardSetCache):
+    """MinHash sketches for a group of card sets, with the LSH buckets
+       used to find the similar card sets.
+
+       fGetNames is called with no arguments to get the names of the
+       card sets in the group when the sketches are built. If it's None,
+       all the card sets are included. fGetSplitFilter is called with no
+       arguments to create the filter on AbstractCard for the cards in
+       the first part of the sketches. If it's None, the sketches only
+       have a single part."""
+
+    def __init__(self, fGetNames=None, fGetSplitFilter=None):
+        self._fGetNames = fGetNames
+        self._fGetSplitFilter = fGetSplitFilter
+        self._dSketches = None
+        # bucket key -> set of card set ids
+        self._dBuckets = {}
+        self._aSplitIds = set()
+        self._aStale = set()
+
+    def _build(self):
+        """Read the sketches from the database"""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        self._dSketches = {}
+        self._dBuckets = {}
+        self._aStale = set()
+        self._aSplitIds = set()
+        if self._fGetSplitFilter is not None:
+            oFilter = self._fGetSplitFilter()
+            self._aSplitIds = set(oCard.id for oCard in
+                                  oFilter.select(AbstractCard))
+        if self._fGetNames is None:
+            aNames = set(oCS.name for oCS in PhysicalCardSet.select())
+        else:
+            aNames = set(self._fGetNames())
+        if not aNames:
+            return
+        dSets = _read_counts(aNames)
+        for oCS in PhysicalCardSet.select():
+            if oCS.name in aNames:
+                self._add(oCS.id, DeckSketch(dSets.get(oCS.id, {}),
+                                             self._aSplitIds))
+
+    def _add(self, iSetId, oSketch):
+        """Add the sketch to the index"""
+        self._dSketches[iSetId] = oSketch
+        for iKey in oSketch.band_keys():
+            self._dBuckets.setdefault(iKey, set()).add(iSetId)
+
+    def _remove(self, iSetId):
+        """Remove the card set's sketch from the index"""
+        oSketch = self._dSketches.pop(iSetId, None)
+        if oSketch is None:
+            return
+        for iKey in oSketch.band_keys():
+            aBucket = self._dBuckets.get(iKey)
+            if aBucket is None:
+                continue
+            aBucket.discard(iSetId)
+            if not aBucket:
+                del self._dBuckets[iKey]
+
+    def _update(self):
+        """Build the index if needed, and recalculate the sketches for
+           any changed card sets"""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        if self._dSketches is None:
+            self._build()
+        if not self._aStale:
+            return
+        aStale = self._aStale
+        self._aStale = set()
+        dNames = dict((iSetId, PhysicalCardSet.get(iSetId).name)
+                      for iSetId in aStale)
+        dSets = _read_counts(set(dNames.values()))
+        for iSetId in aStale:
+            self._remove(iSetId)
+            self._add(iSetId, DeckSketch(dSets.get(iSetId, {}),
+                                         self._aSplitIds))
+
+    def flush(self):
+        """Discard the sketches, so they're rebuilt on the next lookup"""
+        self._dSketches = None
+        self._dBuckets = {}
+        self._aStale = set()
+
+    def get_card_set_ids(self):
+        """Return the ids of all the card sets in the group"""
+        self._update()
+        return set(self._dSketches)
+
+    def get_sketch(self, oCardSet):
+        """Return the sketch for the card set, which needn't be in the
+           group."""
+        self._update()
+        oSketch = self._dSketches.get(oCardSet.id)
+        if oSketch is None:
+            dSets = _read_counts([oCardSet.name])
+            oSketch = DeckSketch(dSets.get(oCardSet.id, {}),
+                                 self._aSplitIds)
+        return oSketch
+
+    def get_candidates(self, oSketch, aExclude=()):
+        """Return the (card set id, sketch) pairs for the card sets which
+           share a LSH bucket with the sketch, excluding the card set
+           ids in aExclude."""
+        self._update()
+        aCandidates = set()
+        for iKey in oSketch.band_keys():
+            aCandidates.update(self._dBuckets.get(iKey, ()))
+        aCandidates.difference_update(aExclude)
+        return [(iSetId, self._dSketches[iSetId]) for iSetId in aCandidates]
+
+    def find_similar_sketch(self, oSketch, iTopK, aExclude=()):
+        """Return the most similar card sets to the sketch, as for
+           rank_similar.
+
+           Only card sets which share a LSH bucket with the sketch are
+           considered."""
+        return rank_similar(oSketch, self.get_candidates(oSketch, aExclude),
+                            iTopK)
+
+    def find_similar(self, oCardSet, iTopK):
+        """Return the card sets most similar to the given card set,
+           excluding the card set itself, as for find_similar_sketch."""
+        return self.find_similar_sketch(self.get_sketch(oCardSet), iTopK,
+                                        (oCardSet.id,))
+
+    # Signal handlers.
+    # If we haven't built the sketches yet, there's nothing to update
+
+    def card_changed(self, oCardSet, _oPhysCard, _iChg):
+        """Mark the card set's sketch as stale"""
+        self.cards_changed(oCardSet, None)
+
+    def cards_changed(self, oCardSet, _dChanges):
+        """Mark the card set's sketch as stale after a bulk change"""
+        if self._dSketches is None or oCardSet.id not in self._dSketches:
+            return
+        self._aStale.add(oCardSet.id)
+
+
+_oIndexes = CardSetCaches()
+
+
+def get_deck_similarity(sName, fGetNames=None, fGetSplitFilter=None):
+    """Return the similarity index called sName, creating it if needed.
+
+       The first call connects the database signals used to keep the
+       indexes up to date."""
+    return _oIndexes.get(sName, lambda: DeckSimilarityIndex(
+        fGetNames, fGetSplitFilter))
+
+
+def flush_deck_similarity():
+    """Discard the sketches in all the indexes, so they are read from the
+       database on the next lookup."""
+    _oIndexes.flush()
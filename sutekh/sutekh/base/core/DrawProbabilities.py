@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Probabilities for drawing combinations of cards from a deck.
+
+   These are the (multivariate) hypergeometric probabilities used by the
+   card draw probabilities plugin. Binomial coefficients are taken from
+   a cached table of log factorials, and the "at least" probabilities
+   are found by convolving the possible counts for each group of cards,
+   rather than by enumerating every combination."""
+
+import math
+
+
+class _LogFactorials:
+    """Cache of log(n!), extended as needed"""
+    aTable = [0.0]
+
+    @classmethod
+    def get(cls, iNum):
+        """Return log(iNum!)"""
+        aTable = cls.aTable
+        while len(aTable) <= iNum:
+            aTable.append(aTable[-1] + math.log(len(aTable)))
+        return aTable[iNum]
+
+
+def log_choose(iChoices, iTotal):
+    """Return the log of the number of ways of choosing iChoices objects
+       from iTotal, or None if that's impossible."""
+    if iChoices < 0 or iChoices > iTotal:
+        return None
+    return (_LogFactorials.get(iTotal) - _LogFactorials.get(iChoices) -
+            _LogFactorials.get(iTotal - iChoices))
+
+
+def _check_args(aFound, iDraws, aObjects, iTotal):
+    """Complain about impossible cases"""
+    if len(aFound) != len(aObjects):
+        raise RuntimeError('Invalid input: aFound : %s, aObjects: %s' % (
+            ','.join([str(x) for x in aFound]),
+            ','.join([str(x) for x in aObjects])))
+    # pylint: disable=too-many-boolean-expressions
+    # We do want to check all of these
+    if min(aFound) < 0 or iTotal <= 0 or iDraws <= 0 or \
+            min(aObjects) < 0 or sum(aObjects) > iTotal or iDraws > iTotal:
+        raise RuntimeError('Invalid values for multivariate hypergeomtric'
+                           ' probability calculation: aFound: %s iDraws: %d'
+                           ' aObjects: %s iTotal: %d' % (
+                               ','.join([str(x) for x in aFound]),
+                               iDraws, ','.join([str(x) for x in aObjects]),
+                               iTotal))
+
+
+def gen_choice_list(aCounts, iMaxCards=None):
+    """Generate all the possible draws from groups of aCounts cards.
+
+       Each draw is a list of the number of cards drawn from each group.
+       If iMaxCards is given, only draws of at most iMaxCards cards in
+       total are generated. The list is sorted by the total number of
+       cards, then by the individual counts."""
+    if iMaxCards is None:
+        iMaxCards = sum(aCounts)
+    aList = [[]]
+    for iCount in reversed(aCounts):
+        aList = [[iChoice] + aChoice for iChoice in range(iCount + 1)
+                 for aChoice in aList if iChoice + sum(aChoice) <= iMaxCards]
+    aList.sort(key=lambda x: [sum(x)] + x)
+    return aList
+
+
+def multi_hyper_prob(aFound, iDraws, aObjects, iTotal):
+    """Multivariate hypergeometric probability.
+
+       Given a list of draw numbers: aFound = [iFound1, iFound2 ... iFoundN]
+       from aObjects = [iObjects1, iObjects2 ... iObjectsN]
+       return the probably of seeing exactly aFound from iDraws
+       """
+    _check_args(aFound, iDraws, aObjects, iTotal)
+    return _exact_prob(aFound, iDraws, aObjects, iTotal)
+
+
+def _exact_prob(aFound, iDraws, aObjects, iTotal):
+    """Unchecked version of multi_hyper_prob.
+
+       P(X_i = iFound_i) = choose(iFound1, iObjects1) * ...
+           * choose(remaining draws, remaining objects) / choose(iDraws, iTotal)
+       """
+    fLog = log_choose(iDraws - sum(aFound), iTotal - sum(aObjects))
+    if fLog is None:
+        return 0.0
+    for iFound, iObjects in zip(aFound, aObjects):
+        fTerm = log_choose(iFound, iObjects)
+        if fTerm is None:
+            return 0.0
+        fLog += fTerm
+    return math.exp(fLog - log_choose(iDraws, iTotal))
+
+
+def hyper_prob_at_least(aFound, iDraws, aObjects, iTotal):
+    """Returns the probablity of drawing at least aFound from aObjects
+       objects of interest from iTotal objects in iDraws draws."""
+    _check_args(aFound, iDraws, aObjects, iTotal)
+    return _at_least_prob(aFound, iDraws, aObjects, iTotal)
+
+
+def _at_least_prob(aFound, iDraws, aObjects, iTotal):
+    """Unchecked version of hyper_prob_at_least.
+
+       We build up the number of ways of drawing s cards of interest,
+       with at least aFound[i] from group i, one group at a time, and
+       then fill the rest of the draw from the other cards."""
+    # aWays[s] is the number of ways of drawing s cards from the groups
+    # seen so far, divided by exp(fLogScale) to keep the numbers in range
+    aWays = [1.0]
+    fLogScale = 0.0
+    for iFound, iObjects in zip(aFound, aObjects):
+        iMax = min(iObjects, iDraws)
+        if iFound > iMax:
+            return 0.0
+        aLogTerms = [log_choose(iCur, iObjects)
+                     for iCur in range(iFound, iMax + 1)]
+        fMaxTerm = max(aLogTerms)
+        aTerms = [math.exp(fTerm - fMaxTerm) for fTerm in aLogTerms]
+        fLogScale += fMaxTerm
+        aNew = [0.0] * min(len(aWays) + iMax, iDraws + 1)
+        for iPrev, fPrev in enumerate(aWays):
+            if not fPrev:
+                continue
+            for iOffset, fTerm in enumerate(aTerms):
+                iSum = iPrev + iFound + iOffset
+                if iSum > iDraws:
+                    break
+                aNew[iSum] += fPrev * fTerm
+        aWays = aNew
+    iRest = iTotal - sum(aObjects)
+    fLogTotal = log_choose(iDraws, iTotal) - fLogScale
+    fProb = 0.0
+    for iSum, fWays in enumerate(aWays):
+        fLog = log_choose(iDraws - iSum, iRest)
+        if fWays and fLog is not None:
+            fProb += fWays * math.exp(fLog - fLogTotal)
+    # Avoid rounding taking us out of range
+    return min(fProb, 1.0)
+
+
+def prob_table(aChoices, aDraws, aObjects, iTotal):
+    """Calculate the probabilities for a whole table of draws.
+
+       aChoices is a list of draws, as returned by gen_choice_list, and
+       aDraws a list of the number of cards drawn. Returns a list with an
+       entry for each entry in aChoices, each of which is a list of
+       (exact probability, at least probability) pairs for each entry in
+       aDraws. Draws of more than iTotal cards give None."""
+    aTable = []
+    for aFound in aChoices:
+        aRow = []
+        for iDraws in aDraws:
+            if iDraws > iTotal:
+                aRow.append(None)
+                continue
+            _check_args(aFound, iDraws, aObjects, iTotal)
+            aRow.append((_exact_prob(aFound, iDraws, aObjects, iTotal),
+                         _at_least_prob(aFound, iDraws, aObjects, iTotal)))
+        aTable.append(aRow)
+    return aTable
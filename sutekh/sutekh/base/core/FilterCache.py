@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Cache of parsed filters, keyed by the filter string.
+
+   Parsing a filter is repeated every time a model is reloaded with the
+   same filter. The cache keeps the parsed filter, with the variables
+   bound, so the parsing is only done once per filter.
+
+   The filter objects are still built from the parsed filter for each
+   caller, since many filters, such as the card count and in use
+   filters, look up the database when they are created, so sharing them
+   would give stale results. The parsed filter doesn't depend on the
+   database, so the cache is only flushed by flush_cache."""
+
+from collections import OrderedDict
+
+DEFAULT_FILTER_CACHE_SIZE = 64
+
+
+class CompiledFilterCache:
+    """A bounded least recently used cache of parsed filters"""
+
+    def __init__(self, iMaxSize=DEFAULT_FILTER_CACHE_SIZE):
+        self._dCache = OrderedDict()
+        self.iMaxSize = iMaxSize
+        self.iHits = 0
+        self.iMisses = 0
+
+    def __len__(self):
+        return len(self._dCache)
+
+    def get(self, tKey):
+        """Return the parsed filter for tKey, or None if it isn't
+           cached"""
+        oFilter = self._dCache.get(tKey)
+        if oFilter is None:
+            self.iMisses += 1
+            return None
+        self.iHits += 1
+        self._dCache.move_to_end(tKey)
+        return oFilter
+
+    def set(self, tKey, oFilter):
+        """Add the parsed filter for tKey, discarding the least recently used
+           filters if the cache is full."""
+        self._dCache[tKey] = oFilter
+        self._dCache.move_to_end(tKey)
+        while len(self._dCache) > self.iMaxSize:
+            self._dCache.popitem(last=False)
+
+    def clear(self):
+        """Discard all the parsed filters"""
+        self._dCache.clear()
+
+
+class _FilterCacheHolder:
+    """Holds the current filter cache"""
+    oCache = None
+
+
+def get_filter_cache():
+    """Return the parsed filter cache."""
+    if _FilterCacheHolder.oCache is None:
+        _FilterCacheHolder.oCache = CompiledFilterCache()
+    return _FilterCacheHolder.oCache
+
+
+def flush_filter_cache():
+    """Discard all the parsed filters."""
+    if _FilterCacheHolder.oCache is not None:
+        _FilterCacheHolder.oCache.clear()
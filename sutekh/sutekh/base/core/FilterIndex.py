@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""In-memory index of card properties, used to answer filters without
+   SQL joins.
+
+   For each mapping table or column a filter uses, we store a bitset
+   (as a python int, with bit n set for abstract card id n) of the cards
+   which have each value. Filters which can be answered from the index
+   combine these with bitwise operations, and the result is passed back
+   to the database as a simple list of card ids, rather than as a
+   sequence of joins on the mapping tables.
+
+   Card text and name searches use the substring indexes from TextIndex.
+
+   The index only covers the abstract card data, which only changes when
+   the card list is reloaded, so it is flushed along with the other
+   caches by flush_cache."""
+
+from sqlobject import sqlhub
+
+from .BaseTables import AbstractCard
+from .TextIndex import make_text_index
+
+
+def ids_to_bits(aIds):
+    """Convert a list of card ids to a bitset"""
+    aIds = [iId for iId in aIds if iId is not None]
+    if not aIds:
+        return 0
+    aBytes = bytearray(max(aIds) // 8 + 1)
+    for iId in aIds:
+        aBytes[iId >> 3] |= 1 << (iId & 7)
+    return int.from_bytes(aBytes, 'little')
+
+
+def bits_to_ids(iBits):
+    """Convert a bitset to a sorted list of card ids"""
+    return [iId for iId, sBit in enumerate(reversed(bin(iBits)[2:]))
+            if sBit == '1']
+
+
+def count_bits(iBits):
+    """Return the number of cards in the bitset"""
+    return bin(iBits).count('1')
+
+
+class CardIndex:
+    """Bitsets of abstract card ids for the values of the mapping tables
+       and card columns used by the filters.
+
+       The bitsets for each table are built from a single query the
+       first time a filter needs them."""
+
+    def __init__(self):
+        self._dTables = {}
+        self._dTextIndexes = {}
+        self._iAll = None
+
+    def _build(self, sTable, sCardColumn, sColumn):
+        """Read the values for sColumn from sTable, and return a
+           dictionary of value to bitset of card ids."""
+        oConn = sqlhub.processConnection
+        dIds = {}
+        for iCardId, oValue in oConn.queryAll(
+                'SELECT %s, %s FROM %s' % (sCardColumn, sColumn, sTable)):
+            dIds.setdefault(oValue, []).append(iCardId)
+        return dict((oValue, ids_to_bits(aIds))
+                    for oValue, aIds in dIds.items())
+
+    def _get_value_bits(self, sTable, sCardColumn, sColumn):
+        """Return the cached value to bitset map for the table"""
+        tKey = (sTable, sCardColumn, sColumn)
+        if tKey not in self._dTables:
+            self._dTables[tKey] = self._build(sTable, sCardColumn, sColumn)
+        return self._dTables[tKey]
+
+    def get_all(self):
+        """Return the bitset of all the abstract cards"""
+        if self._iAll is None:
+            # pylint: disable=no-member
+            # SQLObject confuses pylint
+            oConn = sqlhub.processConnection
+            self._iAll = ids_to_bits([x[0] for x in oConn.queryAll(
+                'SELECT id FROM %s' % AbstractCard.sqlmeta.table)])
+        return self._iAll
+
+    def get_map_bits(self, sTable, sColumn, aValues):
+        """Return the cards linked to any of aValues by the mapping
+           table sTable."""
+        dValues = self._get_value_bits(sTable, 'abstract_card_id', sColumn)
+        iBits = 0
+        for oValue in aValues:
+            iBits |= dValues.get(oValue, 0)
+        return iBits
+
+    def get_column_bits(self, sTable, sColumn, aValues, bMatchNull=False):
+        """Return the cards where sColumn in sTable, which shares its ids
+           with AbstractCard, is one of aValues.
+
+           Like SQL's IN, None in aValues never matches. Use bMatchNull to
+           select the cards where the column is NULL."""
+        dValues = self._get_value_bits(sTable, 'id', sColumn)
+        iBits = 0
+        for oValue in aValues:
+            if oValue is not None:
+                iBits |= dValues.get(oValue, 0)
+        if bMatchNull:
+            iBits |= dValues.get(None, 0)
+        return iBits
+
+    def get_text_bits(self, sTable, sColumn, sPattern):
+        """Return the cards where sColumn in sTable, which shares its ids
+           with AbstractCard, matches the case insensitive LIKE pattern
+           '%sPattern%'."""
+        tKey = (sTable, sColumn)
+        if tKey not in self._dTextIndexes:
+            oConn = sqlhub.processConnection
+            self._dTextIndexes[tKey] = make_text_index(dict(oConn.queryAll(
+                'SELECT id, %s FROM %s' % (sColumn, sTable))))
+        return ids_to_bits(self._dTextIndexes[tKey].search(sPattern))
+
+    def get_id_bits(self, aIds):
+        """Return the bitset for the given list of card ids, restricted
+           to cards in the database."""
+        return ids_to_bits(aIds) & self.get_all()
+
+
+class _IndexHolder:
+    """Holds the current index, which is None if the index is disabled"""
+    oIndex = None
+
+
+def enable_card_index():
+    """Use the card index to answer filters where possible"""
+    if _IndexHolder.oIndex is None:
+        _IndexHolder.oIndex = CardIndex()
+
+
+def disable_card_index():
+    """Stop using the card index, and always use SQL"""
+    _IndexHolder.oIndex = None
+
+
+def flush_card_index():
+    """Discard the card index contents, so they are rebuilt from the
+       database on the next lookup."""
+    if _IndexHolder.oIndex is not None:
+        _IndexHolder.oIndex = CardIndex()
+
+
+def get_card_index():
+    """Return the current card index, or None if it isn't enabled"""
+    return _IndexHolder.oIndex
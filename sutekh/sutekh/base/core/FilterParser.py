@@ -17,7 +17,9 @@
 import ply.lex as lex
 import ply.yacc as yacc
 # pylint: enable=no-name-in-module
-from .BaseFilters import Filter, FilterNot, FilterAndBox, FilterOrBox
+from .BaseFilters import (Filter, FilterNot, FilterAndBox, FilterOrBox,
+                          CachedFilter)
+from .FilterCache import get_filter_cache
 from ..Utility import find_subclasses
 
 
@@ -270,6 +272,56 @@ class FilterParser:
         return oAST
 
 
+def _freeze(oValue):
+    """Convert the lists in a variable value to tuples, so it can be used
+       as part of a cache key."""
+    if isinstance(oValue, (list, tuple)):
+        return tuple(_freeze(x) for x in oValue)
+    return oValue
+
+
+def _bind_variables(oAST, dVariables):
+    """Set the values of the $X variables in oAST from dVariables"""
+    aNodes = [oAST]
+    while aNodes:
+        oNode = aNodes.pop()
+        if not isinstance(oNode, AstBaseNode):
+            continue
+        if isinstance(oNode, FilterPartNode) and \
+                oNode.aFilterValues is None and \
+                oNode.sVariableName in dVariables:
+            oNode.set_values(dVariables[oNode.sVariableName])
+        aNodes.extend(oNode.aChildren)
+
+
+def get_compiled_filter(sFilter, dVariables=None):
+    """Return the filter for the filter string sFilter.
+
+       dVariables maps variable names, such as '$foo', to the values
+       to use for them. The result is a new CachedFilter, or None if the
+       filter string doesn't give a filter. Only the parsing is cached,
+       since the filter objects may depend on the current database
+       contents.
+
+       Parse errors are raised as for FilterParser.apply."""
+    if dVariables is None:
+        dVariables = {}
+    tKey = (sFilter, tuple(sorted((sName, _freeze(oValue))
+                                  for sName, oValue in dVariables.items())))
+    oCache = get_filter_cache()
+    oAST = oCache.get(tKey)
+    if oAST is None:
+        oAST = FilterParser().apply(sFilter)
+        if not oAST:
+            return None
+        _bind_variables(oAST, dVariables)
+        oCache.set(tKey, oAST)
+    oFilter = oAST.get_filter()
+    if oFilter is None:
+        return None
+    return CachedFilter(oFilter)
+
+
 # Helper functions for dealing with strings
 def escape(sData):
     """Escape quotes and \\'s in the string"""
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""In-memory fuzzy matching of card names, for resolving unknown names
+   when importing card sets.
+
+   The card names, along with the card name aliases from the lookup
+   hints, and the names without any trailing qualifier in brackets, are
+   normalised (articles moved to the front, accents, punctuation and
+   case removed) and indexed by their trigrams. Lookups use the shared
+   trigrams to pick a short list of candidates, which are then ranked
+   by edit distance, so lookups don't need any database queries.
+
+   The index is built the first time it's needed, and flushed along
+   with the other caches by flush_cache."""
+
+import re
+import string
+import unicodedata
+
+from .BaseTables import AbstractCard, LookupHints
+from ..Utility import move_articles_to_front
+
+# Matches above this score can be used without asking the user
+AUTO_RESOLVE_THRESHOLD = 0.85
+# The best match must be this far ahead of the next card to be used
+AUTO_RESOLVE_MARGIN = 0.05
+# Number of candidates from the trigram index to rank by edit distance
+TRIGRAM_CANDIDATES = 20
+
+_PUNCTUATION = re.compile('[%s]' % re.escape(string.punctuation))
+_QUALIFIER = re.compile(r'\s*\([^)]*\)\s*$')
+
+
+def normalise_name(sName):
+    """Normalise a name for fuzzy matching"""
+    sName = move_articles_to_front(sName.strip()).lower()
+    sName = ''.join(sChar for sChar in unicodedata.normalize('NFKD', sName)
+                    if not unicodedata.combining(sChar))
+    sName = _PUNCTUATION.sub(' ', sName)
+    return ' '.join(sName.split())
+
+
+def _trigrams(sName):
+    """Return the set of trigrams of the normalised name"""
+    sPadded = '  %s ' % sName
+    return set(sPadded[iPos:iPos + 3] for iPos in range(len(sPadded) - 2))
+
+
+def edit_distance(sFirst, sSecond):
+    """Return the Levenshtein edit distance between the strings"""
+    if len(sFirst) < len(sSecond):
+        sFirst, sSecond = sSecond, sFirst
+    aPrev = list(range(len(sSecond) + 1))
+    for iPos1, sChar1 in enumerate(sFirst, 1):
+        aCur = [iPos1]
+        for iPos2, sChar2 in enumerate(sSecond, 1):
+            aCur.append(min(aPrev[iPos2] + 1, aCur[iPos2 - 1] + 1,
+                            aPrev[iPos2 - 1] + (sChar1 != sChar2)))
+        aPrev = aCur
+    return aPrev[-1]
+
+
+def name_similarity(sFirst, sSecond):
+    """Return the similarity of two normalised names, from 0.0 for
+       completely different names to 1.0 for identical names."""
+    iLen = max(len(sFirst), len(sSecond))
+    if not iLen:
+        return 1.0
+    return 1.0 - edit_distance(sFirst, sSecond) / iLen
+
+
+class FuzzyNameIndex:
+    """Trigram index of the normalised card names"""
+
+    def __init__(self):
+        # Normalised names and the card ids they refer to
+        self._aNames = None
+        self._aCardIds = []
+        self._aTrigramCounts = []
+        # trigram -> set of indexes into _aNames
+        self._dTrigrams = {}
+
+    def _add(self, sName, iCardId, aSeen):
+        """Add a name for the card, skipping duplicates"""
+        sNorm = normalise_name(sName)
+        if not sNorm or (sNorm, iCardId) in aSeen:
+            return
+        aSeen.add((sNorm, iCardId))
+        iIndex = len(self._aNames)
+        aTrigrams = _trigrams(sNorm)
+        self._aNames.append(sNorm)
+        self._aCardIds.append(iCardId)
+        self._aTrigramCounts.append(len(aTrigrams))
+        for sTrigram in aTrigrams:
+            self._dTrigrams.setdefault(sTrigram, set()).add(iIndex)
+
+    def _build(self):
+        """Read the card names and aliases"""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        self._aNames = []
+        self._aCardIds = []
+        self._aTrigramCounts = []
+        self._dTrigrams = {}
+        aSeen = set()
+        dCanonical = {}
+        for oCard in AbstractCard.select():
+            dCanonical[oCard.canonicalName] = oCard.id
+            self._add(oCard.name, oCard.id, aSeen)
+            sBase = _QUALIFIER.sub('', oCard.name)
+            if sBase != oCard.name:
+                self._add(sBase, oCard.id, aSeen)
+        for oLookup in LookupHints.select():
+            if oLookup.domain != 'CardNames':
+                continue
+            iCardId = dCanonical.get(oLookup.value.lower())
+            if iCardId is not None:
+                self._add(oLookup.lookup, iCardId, aSeen)
+
+    def flush(self):
+        """Discard the index, so it's rebuilt on the next lookup"""
+        self._aNames = None
+        self._aCardIds = []
+        self._aTrigramCounts = []
+        self._dTrigrams = {}
+
+    def find_candidates(self, sName, iMax=5):
+        """Return up to iMax (card, score) tuples for the cards with names
+           closest to sName, best match first."""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        if self._aNames is None:
+            self._build()
+        sNorm = normalise_name(sName)
+        if not sNorm:
+            return []
+        aQuery = _trigrams(sNorm)
+        dShared = {}
+        for sTrigram in aQuery:
+            for iIndex in self._dTrigrams.get(sTrigram, ()):
+                dShared.setdefault(iIndex, 0)
+                dShared[iIndex] += 1
+        # Rank by the Dice coefficient of the trigrams, and then check
+        # the best of those with the edit distance
+        aShortList = sorted(
+            dShared, key=lambda iIndex: (
+                -2 * dShared[iIndex] / (len(aQuery) +
+                                        self._aTrigramCounts[iIndex]),
+                iIndex))[:TRIGRAM_CANDIDATES]
+        dScores = {}
+        for iIndex in aShortList:
+            fScore = name_similarity(sNorm, self._aNames[iIndex])
+            iCardId = self._aCardIds[iIndex]
+            if fScore > dScores.get(iCardId, -1.0):
+                dScores[iCardId] = fScore
+        aResults = sorted(dScores.items(), key=lambda x: (-x[1], x[0]))
+        return [(AbstractCard.get(iCardId), fScore)
+                for iCardId, fScore in aResults[:iMax]]
+
+    def find_all_candidates(self, aNames, iMax=5):
+        """Return a dictionary of name to the list of candidates, as for
+           find_candidates, for all the names"""
+        return dict((sName, self.find_candidates(sName, iMax))
+                    for sName in set(aNames))
+
+    def resolve(self, sName, fThreshold=AUTO_RESOLVE_THRESHOLD):
+        """Return the card matching sName, if the best match scores at
+           least fThreshold and is clearly better than the next card.
+           Otherwise return None."""
+        aCandidates = self.find_candidates(sName, 2)
+        if not aCandidates or aCandidates[0][1] < fThreshold:
+            return None
+        if len(aCandidates) > 1 and \
+                aCandidates[0][1] - aCandidates[1][1] < AUTO_RESOLVE_MARGIN:
+            return None
+        return aCandidates[0][0]
+
+    def resolve_all(self, aNames, fThreshold=AUTO_RESOLVE_THRESHOLD):
+        """Return a dictionary of name to resolved card, as for resolve,
+           for all the names. Names which can't be resolved are None."""
+        return dict((sName, self.resolve(sName, fThreshold))
+                    for sName in set(aNames))
+
+
+class _NameIndexHolder:
+    """Holds the current name index"""
+    oIndex = None
+
+
+def get_fuzzy_name_index():
+    """Return the current fuzzy name index"""
+    if _NameIndexHolder.oIndex is None:
+        _NameIndexHolder.oIndex = FuzzyNameIndex()
+    return _NameIndexHolder.oIndex
+
+
+def flush_fuzzy_name_index():
+    """Discard the name index, so it's rebuilt on the next lookup"""
+    if _NameIndexHolder.oIndex is not None:
+        _NameIndexHolder.oIndex.flush()
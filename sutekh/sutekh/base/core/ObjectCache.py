@@ -8,7 +8,8 @@
 
 from .BaseTables import (AbstractCard, RarityPair, Rarity, CardType,
                          Expansion, Ruling, PhysicalCard, Keyword, Artist)
-from .DBUtility import init_cache
+from .CacheSnapshot import load_object_cache
+from .FilterIndex import enable_card_index
 
 
 class ObjectCache:
@@ -21,14 +22,18 @@ class ObjectCache:
        Including Ruling costs about an extra 1MB for no real speed up, but
        we threw it in anyway (on the assumption it may be useful sometime
        in the future).
+
+       If sSnapshotFile is given, the cache is loaded from the snapshot
+       saved there when it is still valid for the database, which avoids
+       most of the startup queries.
+
+       Creating the cache also enables the card index, so filters on the
+       card properties are answered without SQL joins.
        """
 
-    def __init__(self, aExtraTypesToCache):
-        self._dCache = {}
+    def __init__(self, aExtraTypesToCache, sSnapshotFile=None):
         aTypesToCache = [Rarity, Expansion, RarityPair, CardType,
                          Ruling, Keyword, Artist, AbstractCard,
                          PhysicalCard] + aExtraTypesToCache
-        for cType in aTypesToCache:
-            self._dCache[cType] = list(cType.select())
-
-        init_cache()
+        self._dCache = load_object_cache(aTypesToCache, sSnapshotFile)
+        enable_card_index()
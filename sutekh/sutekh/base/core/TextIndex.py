@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Substring search indexes for the card text and card name filters.
+
+   The text filters match LIKE '%pattern%', where the pattern may use
+   % and _ as wildcards. Both indexes here give the same results, but
+   use trigrams to avoid scanning all the card text for each search.
+
+   If python's sqlite3 module supports the FTS5 trigram tokenizer, we
+   use an in-memory FTS5 table, which evaluates the LIKE pattern itself.
+   Otherwise we fall back to a pure python trigram index, and check the
+   candidate cards against the pattern with a regular expression."""
+
+import re
+
+try:
+    import sqlite3
+except ImportError:  # pragma: no cover
+    # Some python builds don't include sqlite3
+    sqlite3 = None
+
+
+def _split_literals(sPattern):
+    """Return the literal sections of the LIKE pattern"""
+    return [x for x in re.split('[%_]', sPattern) if x]
+
+
+def _make_trigrams(sText):
+    """Return the set of trigrams in sText"""
+    return {sText[i:i + 3] for i in range(len(sText) - 2)}
+
+
+def like_to_regex(sPattern):
+    """Convert a LIKE pattern to an equivalent regular expression.
+
+       The pattern is implicitly surrounded by %'s, as in the filters."""
+    aParts = []
+    for sChar in sPattern:
+        if sChar == '%':
+            aParts.append('.*')
+        elif sChar == '_':
+            aParts.append('.')
+        else:
+            aParts.append(re.escape(sChar))
+    return re.compile(''.join(aParts), re.DOTALL)
+
+
+class TrigramTextIndex:
+    """Pure python trigram index over the card texts.
+
+       dTexts maps card ids to the text to index."""
+
+    def __init__(self, dTexts):
+        self._dTexts = {}
+        self._dTrigrams = {}
+        for iId, sText in dTexts.items():
+            sText = (sText or '').lower()
+            self._dTexts[iId] = sText
+            for sTrigram in _make_trigrams(sText):
+                self._dTrigrams.setdefault(sTrigram, set()).add(iId)
+
+    def search(self, sPattern):
+        """Return the set of card ids whose text contains sPattern"""
+        sPattern = sPattern.lower()
+        oCandidates = None
+        for sLiteral in _split_literals(sPattern):
+            for sTrigram in _make_trigrams(sLiteral):
+                oIds = self._dTrigrams.get(sTrigram, set())
+                if oCandidates is None:
+                    oCandidates = set(oIds)
+                else:
+                    oCandidates &= oIds
+                if not oCandidates:
+                    return set()
+        if oCandidates is None:
+            # Nothing long enough to use the index, so we check everything
+            oCandidates = self._dTexts.keys()
+        oRegex = like_to_regex(sPattern)
+        return {iId for iId in oCandidates
+                if oRegex.search(self._dTexts[iId])}
+
+
+class FTSTextIndex:
+    """Text index using an in-memory SQLite FTS5 table with the trigram
+       tokenizer.
+
+       Raises sqlite3.OperationalError if FTS5 or the trigram tokenizer
+       isn't available."""
+
+    def __init__(self, dTexts):
+        # We may be used from a worker thread, so we don't tie the
+        # connection to the thread that creates it
+        self._oConn = sqlite3.connect(':memory:', check_same_thread=False)
+        self._oConn.execute("CREATE VIRTUAL TABLE card_text USING"
+                            " fts5(text, tokenize='trigram')")
+        self._oConn.executemany(
+            "INSERT INTO card_text (rowid, text) VALUES (?, ?)",
+            [(iId, (sText or '').lower()) for iId, sText in dTexts.items()])
+
+    def search(self, sPattern):
+        """Return the set of card ids whose text contains sPattern"""
+        return {x[0] for x in self._oConn.execute(
+            "SELECT rowid FROM card_text WHERE text LIKE ?",
+            ('%' + sPattern.lower() + '%',))}
+
+
+def make_text_index(dTexts):
+    """Create the best available text index for dTexts"""
+    if sqlite3 is not None:
+        try:
+            return FTSTextIndex(dTexts)
+        except sqlite3.OperationalError:
+            # No FTS5, or an SQLite version without the trigram tokenizer
+            pass
+    return TrigramTextIndex(dTexts)
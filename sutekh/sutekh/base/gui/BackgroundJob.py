@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Run database heavy work on a worker thread, so the gui stays
+   responsive.
+
+   The work is run on a worker thread while the main loop keeps
+   running, with progress shown in a ProgressDialog. Progress updates
+   and the result are passed back to the main thread with GLib.idle_add,
+   so the caller sees the result as if the work had been done directly.
+
+   The worker thread gets its own database connection from SQLObject,
+   which keeps a connection per thread, but shares the SQLObject caches
+   with the main thread, so the objects returned can be used as normal.
+   The work must not change the database, since the change signals
+   would then be sent from the worker thread, and it must not touch
+   any gtk widgets.
+
+   SQLite memory databases can't be shared between threads, so the work
+   is run directly on the main thread for those."""
+
+import logging
+import threading
+
+from gi.repository import GLib
+
+from ..core.DBUtility import can_run_in_thread
+from .ProgressDialog import ProgressDialog
+
+
+class JobCancelled(Exception):
+    """Raised in the work function when the job has been cancelled"""
+
+
+class JobProgress:
+    """Passed to the work function to report progress and check for
+       cancellation.
+
+       This has the update_bar method of the ProgressDialog, so it can
+       be given to the existing log handlers and progress callbacks.
+       Updating the progress raises JobCancelled if the job has been
+       cancelled, so work which reports progress stops at the next
+       update."""
+
+    def __init__(self, fUpdate):
+        self._fUpdate = fUpdate
+        self._bCancelled = False
+
+    bCancelled = property(fget=lambda self: self._bCancelled,
+                          doc="True if the job has been cancelled")
+
+    def cancel(self):
+        """Ask the job to stop"""
+        self._bCancelled = True
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the job has been cancelled"""
+        if self._bCancelled:
+            raise JobCancelled()
+
+    def update_bar(self, fStep):
+        """Report the fraction of the work done"""
+        self.check_cancelled()
+        self._fUpdate(fStep)
+
+
+class BackgroundJob:
+    """Run fWork(oProgress, *aArgs) on a worker thread, showing the
+       progress in a ProgressDialog.
+
+       If oLogHandler is given, it's pointed at the job's progress, so
+       the work can report progress by logging, as the readers and
+       writers do."""
+    # pylint: disable=too-many-instance-attributes
+    # We need to track both the thread and the gui state
+
+    def __init__(self, sDescription, fWork, *aArgs, oLogHandler=None,
+                 bCancel=True, bDialog=True):
+        self._sDescription = sDescription
+        self._fWork = fWork
+        self._aArgs = aArgs
+        self._oLogHandler = oLogHandler
+        self._bCancel = bCancel
+        self._bDialog = bDialog
+        self._oDialog = None
+        self._bDone = False
+        self._oResult = None
+        self._oError = None
+        self._oLock = threading.Lock()
+        self._fPending = None
+        self.oProgress = None
+
+    def run(self):
+        """Run the job, returning the result of the work function.
+
+           The main loop keeps running until the work is finished.
+           Exceptions raised by the work, including JobCancelled, are
+           raised again here."""
+        bThread = can_run_in_thread()
+        if bThread:
+            self.oProgress = JobProgress(self._queue_progress)
+        else:
+            # Update the dialog directly, since we're on the main thread
+            self.oProgress = JobProgress(self._show_progress)
+        if self._bDialog:
+            self._oDialog = ProgressDialog()
+            self._oDialog.set_description(self._sDescription)
+            if self._bCancel:
+                self._oDialog.add_cancel_button(self.oProgress.cancel)
+        if self._oLogHandler:
+            self._oLogHandler.set_dialog(self.oProgress)
+        try:
+            if bThread:
+                oThread = threading.Thread(target=self._do_work,
+                                           name=self._sDescription,
+                                           daemon=True)
+                oThread.start()
+                oContext = GLib.MainContext.default()
+                while not self._bDone:
+                    oContext.iteration(True)
+                oThread.join()
+            else:
+                self._do_work()
+        finally:
+            if self._oLogHandler:
+                self._oLogHandler.set_dialog(None)
+            if self._oDialog:
+                self._oDialog.destroy()
+                self._oDialog = None
+        if self._oError is not None:
+            raise self._oError
+        return self._oResult
+
+    def _do_work(self):
+        """Call the work function, and flag the result"""
+        try:
+            self._oResult = self._fWork(self.oProgress, *self._aArgs)
+        except JobCancelled as oErr:
+            logging.info('%s cancelled', self._sDescription)
+            self._oError = oErr
+        # pylint: disable=broad-except
+        # We pass everything back to the main thread
+        except Exception as oErr:
+            self._oError = oErr
+        if threading.current_thread() is threading.main_thread():
+            self._bDone = True
+        else:
+            GLib.idle_add(self._finished)
+
+    def _finished(self):
+        """Called on the main thread when the worker is done"""
+        self._bDone = True
+        return False
+
+    def _queue_progress(self, fStep):
+        """Pass the progress to the main thread.
+
+           We only queue a single update, so a fast worker doesn't
+           flood the main loop."""
+        with self._oLock:
+            bQueued = self._fPending is not None
+            self._fPending = fStep
+        if not bQueued:
+            GLib.idle_add(self._update_from_queue)
+
+    def _update_from_queue(self):
+        """Show the latest progress on the main thread"""
+        with self._oLock:
+            fStep = self._fPending
+            self._fPending = None
+        self._show_progress(fStep)
+        return False
+
+    def _show_progress(self, fStep):
+        """Update the progress dialog"""
+        if self._oDialog:
+            self._oDialog.update_bar(fStep)
+
+
+def run_job(sDescription, fWork, *aArgs, **kwargs):
+    """Convenience wrapper to create a BackgroundJob and run it"""
+    return BackgroundJob(sDescription, fWork, *aArgs, **kwargs).run()
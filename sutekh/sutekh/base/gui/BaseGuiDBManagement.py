@@ -16,7 +16,8 @@ from gi.repository import Gtk
 from sqlobject import sqlhub, connectionForURI
 
 from ..core.BaseDBManagement import (UnknownVersion,
-                                     copy_to_new_abstract_card_db)
+                                     copy_to_new_abstract_card_db,
+                                     update_abstract_card_db)
 from ..core.BaseTables import AbstractCard, PhysicalCardSet
 from ..core.DBUtility import (flush_cache, get_cs_id_name_table,
                               refresh_tables, set_metadata_date,
@@ -232,6 +233,37 @@ class BaseGuiDBManager:
             return iResponse == Gtk.ResponseType.OK
         return True
 
+    def update_db_in_place(self, oTempConn, oProgressDialog, oLogHandler):
+        """Update the card list in the current database to match
+           oTempConn, leaving the card sets alone where possible.
+
+           Returns False if the update failed, in which case the database
+           is unchanged."""
+        self._oWin.clear_cache()  # Don't hold old copies
+        oProgressDialog.set_description("Updating the card list")
+        oProgressDialog.reset()
+        # pylint: disable=broad-except
+        # We fall back to the full reload on any failure
+        try:
+            (bOK, aMessages) = update_abstract_card_db(oTempConn,
+                                                       self.aTables,
+                                                       self._oWin.cardLookup,
+                                                       oLogHandler)
+        except Exception as oErr:
+            logging.warning('Updating the card list in place failed: %s',
+                            oErr, exc_info=True)
+            return False
+        oProgressDialog.set_complete()
+        if not bOK:
+            logging.warning('Updating the card list in place failed: %s',
+                            '\n'.join(aMessages))
+            return False
+        if aMessages:
+            logging.info('\n'.join(aMessages))
+            do_info_message("<b>Some card sets have changed:</b>\n\n%s"
+                            % '\n'.join(aMessages))
+        return True
+
     def initialize_db(self, oConfig):
         """Initialise the database if it doesn't exist."""
         # The config file is passed in as a parameter becasuse this can be
@@ -341,19 +373,25 @@ class BaseGuiDBManager:
         oLogHandler = SutekhCountLogHandler()
         oLogHandler.set_dialog(oProgressDialog)
         sqlhub.processConnection = oOldConn
-        if not self.copy_to_new_db(oOldConn, oTempConn, oProgressDialog,
-                                   oLogHandler):
-            oProgressDialog.destroy()
-            self._oWin.update_to_new_db()
-            return True  # Force refresh
-        # OK, update complete, copy back from oTempConn
-        sqlhub.processConnection = oOldConn
-        self._oWin.clear_cache()  # Don't hold old copies
-        oProgressDialog.set_description("Finalizing import")
-        oProgressDialog.reset()
-        oProgressDialog.show()
-        (bOK, aErrors) = self._oDatabaseUpgrade.create_final_copy(
-            oTempConn, oLogHandler)
+        # Updating the existing card list only touches the cards and card
+        # sets that have changed, so we only reload everything if that
+        # fails
+        if self.update_db_in_place(oTempConn, oProgressDialog, oLogHandler):
+            bOK, aErrors = True, []
+        else:
+            if not self.copy_to_new_db(oOldConn, oTempConn, oProgressDialog,
+                                       oLogHandler):
+                oProgressDialog.destroy()
+                self._oWin.update_to_new_db()
+                return True  # Force refresh
+            # OK, update complete, copy back from oTempConn
+            sqlhub.processConnection = oOldConn
+            self._oWin.clear_cache()  # Don't hold old copies
+            oProgressDialog.set_description("Finalizing import")
+            oProgressDialog.reset()
+            oProgressDialog.show()
+            (bOK, aErrors) = self._oDatabaseUpgrade.create_final_copy(
+                oTempConn, oLogHandler)
         if not bOK:
             sMesg = ("There was a problem updating the database\n"
                      "Your database may be in an inconsistent state -"
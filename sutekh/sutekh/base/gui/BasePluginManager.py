@@ -27,6 +27,7 @@ from sqlobject import sqlhub
 from ..core.DatabaseVersion import DatabaseVersion
 from ..core.BaseTables import PhysicalCardSet, PhysicalCard
 from ..core.BaseAdapters import IAbstractCard
+from ..core.CardSetUtilities import add_cards_to_set
 from .BaseConfigFile import CARDSET, FULL_CARDLIST, CARDSET_LIST, FRAME
 from .MessageBus import MessageBus
 from .SutekhDialog import do_complaint_warning
@@ -473,12 +474,4 @@ class BasePlugin:
 
     def _commit_cards(self, oCS, aCards):
         """Add a list of physiccal cards to the given card set"""
-        def _in_transaction(oCS, aCards):
-            """The actual work happens here, so it can be wrapped in a
-               sqlobject transaction"""
-            for oCard in aCards:
-                # pylint: disable=no-member
-                # SQLObject confuses pylint
-                oCS.addPhysicalCard(oCard)
-
-        sqlhub.doInTransaction(_in_transaction, oCS, aCards)
+        sqlhub.doInTransaction(add_cards_to_set, oCS, aCards)
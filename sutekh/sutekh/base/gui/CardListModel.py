@@ -17,7 +17,7 @@ from ..core.BaseGroupings import CardTypeGrouping
 from ..core.BaseTables import PhysicalCard
 from ..core.BaseAdapters import (IAbstractCard, IPhysicalCard,
                                  IPrintingName, PrintingNameAdapter)
-from ..core.FilterParser import FilterParser
+from ..core.FilterParser import get_compiled_filter
 from ..Utility import move_articles_to_back
 from .BaseConfigFile import FULL_CARDLIST
 from .SutekhDialog import do_exception_complaint
@@ -129,7 +129,6 @@ class CardListModel(Gtk.TreeStore):
         self.bUseIcons = True
         self._bHideIllegal = True
         self._oController = None
-        self._oFilterParser = FilterParser()
         self._dTransformers = {}
         self.register_transformer(PostfixName)
         MessageBus.subscribe(MessageBus.Type.CONFIG_MSG, 'replace_filter',
@@ -511,8 +510,16 @@ class CardListModel(Gtk.TreeStore):
         # TODO: Reimplement
         return True
 
+    def fill_children(self, oIter):
+        """Make sure the child rows of oIter have been added.
+
+           The card list adds all the rows when loading, so there's nothing
+           to do here. Models which add the child rows lazily override
+           this."""
+
     def get_all_iter_children(self, oIter):
         """Get a list of all the subiters of this iter"""
+        self.fill_children(oIter)
         aChildIters = []
         oChildIter = self.iter_children(oIter)
         while oChildIter:
@@ -559,6 +566,7 @@ class CardListModel(Gtk.TreeStore):
         if iDepth != 1:
             # No children to look at
             return aChildren
+        self.fill_children(oIter)
         oChildIter = self.iter_children(oIter)
         while oChildIter:
             oPhysCard = self.get_value(oChildIter, 9)
@@ -620,13 +628,11 @@ class CardListModel(Gtk.TreeStore):
         sFilterText = self._oConfig.get_filter(sFilter)
         oFilter = None
         if sFilterText:
-            oAST = self._oFilterParser.apply(sFilterText)
-            if oAST:
-                try:
-                    oFilter = oAST.get_filter()
-                except RuntimeError as oErr:
-                    # Tell user about the issue
-                    do_exception_complaint("Failed to load Filter: %s" % oErr)
+            try:
+                oFilter = get_compiled_filter(sFilterText)
+            except RuntimeError as oErr:
+                # Tell user about the issue
+                do_exception_complaint("Failed to load Filter: %s" % oErr)
         if oFilter == self._oConfigFilter:
             return False
         self._oConfigFilter = oFilter
@@ -84,6 +84,20 @@ class CardListView(FilteredView):
         oPhysCard = self._oModel.get_physical_card_from_path(oPath)
         if oPhysCard:
             self._oController.set_card_text(oPhysCard)
+            self._oController.prefetch_cards(self._get_neighbours(oPath))
+
+    def _get_neighbours(self, oPath):
+        """Return the cards in the rows before and after oPath, which
+           are likely to be selected next."""
+        aCards = []
+        oIter = self._oModel.get_iter(oPath)
+        for oNext in (self._oModel.iter_next(oIter.copy()),
+                      self._oModel.iter_previous(oIter.copy())):
+            if oNext is not None:
+                oPhysCard = self._oModel.get_physical_card_from_iter(oNext)
+                if oPhysCard:
+                    aCards.append(oPhysCard)
+        return aCards
 
     def process_selection(self):
         """Create a dictionary from the selection.
@@ -51,6 +51,11 @@ class CardSetController:
         MessageBus.publish(MessageBus.Type.CARD_TEXT_MSG, 'set_card_text',
                            oCard)
 
+    def prefetch_cards(self, aCards):
+        """Pass on the cards likely to be selected next."""
+        MessageBus.publish(MessageBus.Type.CARD_TEXT_MSG, 'prefetch_cards',
+                           aCards)
+
     # pylint: enable=no-self-use
 
     def inc_card(self, oPhysCard, sCardSetName, bAddUndo=True):
@@ -90,13 +95,13 @@ class CardSetController:
             return None
 
         for oCard in aPhysCards:
-            # Need to remove a single physical card from the mapping table
-            # Can't use PhysicalCardSet.remove, as that removes all the cards
-            aCandCards = list(MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=oCard.id, physicalCardSetID=oThePCS.id))
-            if aCandCards:
-                # Found candidates, so remove last one
-                MapPhysicalCardToPhysicalCardSet.delete(aCandCards[-1].id)
+            # Need to remove a single copy of the card from the mapping table
+            if MapPhysicalCardToPhysicalCardSet.selectBy(
+                    physicalCardID=oCard.id,
+                    physicalCardSetID=oThePCS.id).count():
+                # pylint: disable=no-member
+                # SQLObject confuses pylint
+                oThePCS.removePhysicalCard(oCard.id, 1)
                 oThePCS.syncUpdate()
                 # signal to update the model
                 send_changed_signal(oThePCS, oCard, -1)
@@ -10,6 +10,7 @@
 """The Gtk.TreeModel for the card set lists."""
 
 import enum
+import threading
 
 from gi.repository import Gdk
 
@@ -28,7 +29,10 @@ from ..core.BaseTables import (PhysicalCard, PhysicalCardSet,
                                MapPhysicalCardToPhysicalCardSet)
 from ..core.BaseAdapters import (IPhysicalCard, IPhysicalCardSet,
                                  IAbstractCard, IPrintingName)
+from ..core.CardSetUtilities import CountedCardRows
+from ..core.CardSetStats import get_card_set_stats
 from ..core.DBSignals import (listen_changed, disconnect_changed,
+                              listen_cards_changed, disconnect_cards_changed,
                               listen_row_destroy, listen_row_update,
                               listen_row_created,
                               disconnect_row_destroy, disconnect_row_created,
@@ -36,6 +40,7 @@ from ..core.DBSignals import (listen_changed, disconnect_changed,
 from ..Utility import move_articles_to_back
 from .CardListModel import CardListModel, USE_ICONS, HIDE_ILLEGAL
 from .BaseConfigFile import CARDSET, FRAME
+from .BackgroundJob import run_job, can_run_in_thread
 from .MessageBus import MessageBus
 
 @enum.unique
@@ -92,6 +97,8 @@ SHOW_CARD_LOOKUP = {
     "child cards": ShowMode.CHILD_CARDS,
 }
 
+LAZY_LEVELS_OPTION = "fill extra levels when expanded"
+
 PARENT_COUNT_MODE = "parent count mode"
 PARENT_COUNT_LOOKUP = {
     "ignore parent": ParentCountMode.IGNORE_PARENT,
@@ -113,6 +120,25 @@ BOTH_EXP_CARD_SETS = set([ExtraLevels.CARD_SETS_AND_EXP,
 PARENT_OR_MINUS = set([ParentCountMode.PARENT_COUNT,
                        ParentCountMode.MINUS_THIS_SET])
 
+# Card sets (including the parent) with more cards than this are loaded
+# in a background job
+BACKGROUND_LOAD_SIZE = 2000
+
+
+def _total_card_counts(aCardCounts):
+    """Sum a list of (abstract card id, physical card id, card set id, count)
+       tuples, as returned by Filter.select_card_counts, for each
+       physical card.
+
+       Returns a list of (abstract card id, physical card, count) tuples,
+       skipping cards with no copies left."""
+    dTotals = {}
+    for iAbsId, iPhysId, _iSetId, iCnt in aCardCounts:
+        dTotals.setdefault((iAbsId, iPhysId), 0)
+        dTotals[(iAbsId, iPhysId)] += iCnt
+    return [(iAbsId, PhysicalCard.get(iPhysId), iCnt) for
+            (iAbsId, iPhysId), iCnt in dTotals.items() if iCnt > 0]
+
 
 class CardSetModelRow:
     """Object which holds the data needed for a card set row."""
@@ -201,6 +227,11 @@ class CardSetCardListModel(CardListModel):
         self._cCardClass = MapPhysicalCardToPhysicalCardSet
         self._oBaseFilter = CachedFilter(PhysicalCardSetFilter(sSetName))
         self._oCardSet = IPhysicalCardSet(sSetName)
+        # The caches being filled by a load, which only the thread doing
+        # the load sees, until load applies them
+        self._oLoadState = threading.local()
+        self._bLoading = False
+        self._bReloadPending = False
         self._dCache = {}
         self.bChildren = False
         self.bEditable = False
@@ -210,6 +241,14 @@ class CardSetCardListModel(CardListModel):
         self._dAbsSecondLevel2Iter = {}
         self._dAbs2nd3rdLevel2Iter = {}
         self._dGroupName2Iter = {}
+        # The settings which determine the layout of the rows when the
+        # model was last loaded. If these change, we can't update the
+        # existing rows, and need to rebuild the model
+        self._tLoadedLayout = None
+        # Card rows which only have a placeholder child, keyed by abstract
+        # card id, when adding the extra levels lazily
+        self._dPendingRows = {}
+        self.bLazyLevels = False
         self.oEditColour = None
         self._oCountColour = BLACK
 
@@ -219,6 +258,7 @@ class CardSetCardListModel(CardListModel):
 
         # Add database listeners
         listen_changed(self.card_changed, PhysicalCardSet)
+        listen_cards_changed(self.cards_changed, PhysicalCardSet)
         listen_row_update(self.card_set_changed, PhysicalCardSet)
         listen_row_destroy(self.card_set_deleted_created, PhysicalCardSet)
         listen_row_created(self.card_set_deleted_created, PhysicalCardSet)
@@ -226,6 +266,20 @@ class CardSetCardListModel(CardListModel):
         # sets aren't inuse. If that changes, we'll need to add an additional
         # signal listen here
 
+    def get_card_iterator(self, oFilter):
+        """Return an iterator over the card model.
+
+           Each MapPhysicalCardToPhysicalCardSet row is returned once for
+           each copy of the card in the card set, and count() returns the
+           number of cards.
+           """
+        return CountedCardRows(super().get_card_iterator(oFilter))
+
+    def _select_cards(self, oFilter):
+        """Return the CountedCardRows for the filter, without combining
+           it with the base filter."""
+        return CountedCardRows(oFilter.select(self.cardclass).distinct())
+
     def __get_frame_id(self):
         """Return the frame id, handling oController is None case"""
         if self._oController:
@@ -250,6 +304,22 @@ class CardSetCardListModel(CardListModel):
     cardset = property(fget=lambda self: self._oCardSet,
                        doc="Associated card set")
 
+    # The caches are looked up through the load state, so the thread
+    # grouping the cards for load sees the new caches, while everything
+    # else sees the caches for the current rows
+    _dCache = property(
+        fget=lambda self: getattr(self._oLoadState, 'dCache',
+                                  self._dCurCache),
+        fset=lambda self, dCache: setattr(self, '_dCurCache', dCache),
+        doc="Cached card lists and filters")
+    _dAbs2Phys = property(
+        fget=lambda self: getattr(self._oLoadState, 'dAbs2Phys',
+                                  self._dCurAbs2Phys),
+        fset=lambda self, dAbs2Phys: setattr(self, '_dCurAbs2Phys',
+                                             dAbs2Phys),
+        doc="Physical card counts for each abstract card id, with a"
+            " physical card filter")
+
     # pylint: enable=protected-access
 
     def cleanup(self):
@@ -257,6 +327,7 @@ class CardSetCardListModel(CardListModel):
         """Remove the signal handler - avoids issues when card sets are
            deleted, but the objects are still around."""
         disconnect_changed(self.card_changed, PhysicalCardSet)
+        disconnect_cards_changed(self.cards_changed, PhysicalCardSet)
         disconnect_row_update(self.card_set_changed, PhysicalCardSet)
         disconnect_row_destroy(self.card_set_deleted_created, PhysicalCardSet)
         disconnect_row_created(self.card_set_deleted_created, PhysicalCardSet)
@@ -292,34 +363,78 @@ class CardSetCardListModel(CardListModel):
                                                  [], BLACK, None, None))
 
     def load(self):
-        # pylint: disable=too-many-locals
-        # we use many local variables for clarity
-        """Clear and reload the underlying store. For use after initialisation,
+        """Reload the underlying store. For use after initialisation,
            when the filter or grouping changes or when card set relationships
            change.
+
+           If the grouping, the extra levels shown and the parent count mode
+           are the same as for the last load, the existing rows are updated,
+           and only the rows which have changed are added or removed.
+           Otherwise the store is cleared and rebuilt.
+
+           For large card sets, the cards are queried and grouped in a
+           BackgroundJob, and the store and caches are updated once it's
+           done. Reloads and card changes while the job is running are
+           handled by loading again afterwards.
            """
+        if self._bLoading:
+            self._bReloadPending = True
+            return
+        self._bLoading = True
+        self._bReloadPending = True
+        try:
+            while self._bReloadPending:
+                self._bReloadPending = False
+                self._load_rows()
+        finally:
+            self._bLoading = False
+            self._bReloadPending = False
+
+    def _load_rows(self):
+        """Query and group the cards, and fill in the store."""
+        # pylint: disable=too-many-locals, too-many-branches
+        # we use many local variables for clarity
         self.set_count_colour()
-        self.clear()
-        self._dAbs2Phys = {}
-        self._dAbs2Iter = {}
-        self._dAbsSecondLevel2Iter = {}
-        self._dAbs2nd3rdLevel2Iter = {}
-        self._dGroupName2Iter = {}
-        # Clear cache (we can't do this in grouped_card_iter, since that
-        # is also called by add_new_card)
-        self._init_cache(True)
-
         self._bPhysicalFilter = False
         if self.applyfilter and self.selectfilter:
             self._bPhysicalFilter = self.selectfilter.is_physical_card_only()
         elif self.configfilter is not None:
             self._bPhysicalFilter = self.configfilter.is_physical_card_only()
 
-        oCardIter = self.get_card_iterator(self.get_current_filter())
-        # pylint: disable=unbalanced-tuple-unpacking
-        # pylint misinterprets the number of iterms grouped_card_iter returns
-        oGroupedIter, aCards = self.grouped_card_iter(oCardIter)
-        # pylint: enable=unbalanced-tuple-unpacking
+        # The filters and card lists we keep between loads are copied
+        # to the new cache
+        dCache = dict(self._dCache)
+        if self._use_background_load():
+            # We don't allow cancelling, since the rows would then not
+            # match the current filter and modes
+            aGroups, aCards, dCache, dAbs2Phys = run_job(
+                'Loading %s' % self._oCardSet.name, self._get_grouped_rows,
+                dCache, bCancel=False)
+        else:
+            aGroups, aCards, dCache, dAbs2Phys = self._get_grouped_rows(
+                None, dCache)
+        if self._bReloadPending:
+            # The rows may be out of date, so we don't use them
+            return
+        self._dCache = dCache
+        self._dAbs2Phys = dAbs2Phys
+
+        tLayout = (self.groupby, self._eExtraLevelsMode,
+                   self._eParentCountMode, self.bLazyLevels)
+        bUpdate = tLayout == self._tLoadedLayout
+        self._tLoadedLayout = tLayout
+        if bUpdate:
+            if self.oEmptyIter is not None:
+                self.remove(self.oEmptyIter)
+            dOldGroups = self._get_child_iters(None)
+        else:
+            self.clear()
+            dOldGroups = {}
+        self._dAbs2Iter = {}
+        self._dAbsSecondLevel2Iter = {}
+        self._dAbs2nd3rdLevel2Iter = {}
+        self._dGroupName2Iter = {}
+        self._dPendingRows = {}
         self.oEmptyIter = None
 
         # Disable sorting while we do the insertions
@@ -333,18 +448,24 @@ class CardSetCardListModel(CardListModel):
 
         # Iterate over groups
 
-        for sGroup, oGroupIter in oGroupedIter:
+        for sGroup, aGroupRows in aGroups:
             # Check for null group
             sGroup = self._fix_group_name(sGroup)
 
-            # Create Group Section
-            oSectionIter = self.insert_with_values(None, 0, [0], [sGroup])
+            # Create Group Section, if we don't already have it
+            oSectionIter = self._pop_child_iter(dOldGroups, sGroup)
+            bNewGroup = oSectionIter is None
+            if bNewGroup:
+                oSectionIter = self.insert_with_values(None, 0, [0], [sGroup])
+                dOldCards = {}
+            else:
+                dOldCards = self._get_child_iters(oSectionIter, True)
             self._dGroupName2Iter[sGroup] = oSectionIter
 
             # Fill in Cards
             iGrpCnt = 0
             iParGrpCnt = 0
-            for _oId, oRow in oGroupIter:
+            for _oId, oRow in aGroupRows:
                 oCard = oRow.oAbsCard
                 iCnt = oRow.iCount
                 iParCnt = oRow.iParentCount
@@ -356,25 +477,29 @@ class CardSetCardListModel(CardListModel):
                 sName = oCard.name
                 for oTransform in self._dTransformers.values():
                     sName = oTransform.transform(sName, oCard)
-                oChildIter = self.insert_with_values(oSectionIter, 0,
-                                                     [0, 1, 2, 3, 4, 8, 9],
-                                                     [sName, iCnt, iParCnt,
-                                                      bIncCard, bDecCard,
-                                                      oCard, oRow.oPhysCard])
-                self.set_par_count_colour(oChildIter, iParCnt, iCnt)
+                aCols = [0, 1, 2, 3, 4, 8, 9]
+                aValues = [sName, iCnt, iParCnt, bIncCard, bDecCard,
+                           oCard, oRow.oPhysCard]
+                oChildIter = self._pop_child_iter(dOldCards, oCard.id)
+                if oChildIter is None:
+                    oChildIter = self.insert_with_values(oSectionIter, 0,
+                                                         aCols, aValues)
+                    self.set_par_count_colour(oChildIter, iParCnt, iCnt)
+                    self._add_card_children(oChildIter, oRow, False)
+                else:
+                    if self._update_row(oChildIter, aCols, aValues):
+                        self.set_par_count_colour(oChildIter, iParCnt, iCnt)
+                    self._add_card_children(oChildIter, oRow, True)
                 self._dAbs2Iter.setdefault(oCard.id, []).append(oChildIter)
-                self._add_children(oChildIter, oRow)
+            self._remove_child_iters(dOldCards)
             # Update Group Section
             aTexts, aIcons = self.lookup_icons(sGroup)
-            if aTexts:
-                self.set(oSectionIter, 1, iGrpCnt, 2, iParGrpCnt,
-                         5, aTexts, 6, aIcons,
-                        )
-            else:
-                self.set(oSectionIter, 1, iGrpCnt, 2, iParGrpCnt)
-
-            self.set_par_count_colour(oSectionIter, iParGrpCnt, iGrpCnt)
+            if self._update_row(oSectionIter, [1, 2, 5, 6],
+                                [iGrpCnt, iParGrpCnt, aTexts or None,
+                                 aIcons or None]) or bNewGroup:
+                self.set_par_count_colour(oSectionIter, iParGrpCnt, iGrpCnt)
 
+        self._remove_child_iters(dOldGroups)
         self._check_if_empty()
 
         # Notify Listeners
@@ -385,6 +510,100 @@ class CardSetCardListModel(CardListModel):
         if iSortColumn is not None:
             self.set_sort_column_id(iSortColumn, iSortOrder)
 
+    def _use_background_load(self):
+        """Check if the card set is large enough that we should load it
+           in a background job."""
+        if not can_run_in_thread():
+            return False
+        if self._eShowCardMode == ShowMode.ALL_CARDS:
+            return True
+        oStats = get_card_set_stats()
+        iCards = 0
+        for oCardSet in (self._oCardSet, self._oCardSet.parent):
+            oInfo = oStats.get_info(oCardSet.name) if oCardSet else None
+            if oInfo:
+                iCards += oInfo.iTotal
+        return iCards > BACKGROUND_LOAD_SIZE
+
+    def _get_grouped_rows(self, oProgress, dCache):
+        """Query the database for the rows to show, and group them.
+
+           The caches are filled in starting from dCache, and are only
+           seen by this thread, so this can be run as a BackgroundJob.
+           Returns the list of (group, rows) pairs, the list of cards
+           and the new caches, for load to apply."""
+        self._oLoadState.dCache = dCache
+        self._oLoadState.dAbs2Phys = {}
+        try:
+            # Clear cache (we can't do this in grouped_card_iter, since
+            # that is also called by add_new_card)
+            self._init_cache(True)
+            oCardIter = self.get_card_iterator(self.get_current_filter())
+            # pylint: disable=unbalanced-tuple-unpacking
+            # pylint misinterprets the number of iterms grouped_card_iter
+            # returns
+            oGroupedIter, aCards = self.grouped_card_iter(oCardIter)
+            # pylint: enable=unbalanced-tuple-unpacking
+            if oProgress:
+                oProgress.update_bar(0.5)
+            aGroups = [(sGroup, list(oGroupIter)) for sGroup, oGroupIter in
+                       oGroupedIter]
+            if oProgress:
+                oProgress.update_bar(1.0)
+            return (aGroups, aCards, self._oLoadState.dCache,
+                    self._oLoadState.dAbs2Phys)
+        finally:
+            del self._oLoadState.dCache
+            del self._oLoadState.dAbs2Phys
+
+    def _get_child_iters(self, oParIter, bCards=False):
+        """Return the child rows of oParIter, keyed by the name, or by the
+           abstract card id if bCards is True."""
+        dIters = {}
+        oIter = self.iter_children(oParIter)
+        while oIter:
+            if bCards:
+                oKey = self.get_value(oIter, 8).id
+            else:
+                oKey = self.get_value(oIter, 0)
+            dIters.setdefault(oKey, []).append(oIter)
+            oIter = self.iter_next(oIter)
+        return dIters
+
+    # pylint: disable=no-self-use
+    # Method for consistency with the other helpers
+    def _pop_child_iter(self, dIters, oKey):
+        """Remove an existing row for oKey from dIters and return it.
+
+           Returns None if there isn't a row for oKey."""
+        aIters = dIters.get(oKey)
+        if not aIters:
+            return None
+        return aIters.pop()
+
+    # pylint: enable=no-self-use
+
+    def _remove_child_iters(self, dIters):
+        """Remove all the rows left in dIters from the model"""
+        for aIters in dIters.values():
+            for oIter in aIters:
+                self.remove(oIter)
+
+    def _update_row(self, oIter, aCols, aValues):
+        """Set the values of the given columns of an existing row.
+
+           Only the columns that differ are set, to avoid needless
+           row-changed signals. Returns True if any columns were changed."""
+        aChanges = []
+        for iCol, oValue in zip(aCols, aValues):
+            oCurValue = self.get_value(oIter, iCol)
+            if oCurValue is not oValue and oCurValue != oValue:
+                aChanges.extend((iCol, oValue))
+        if not aChanges:
+            return False
+        self.set(oIter, *aChanges)
+        return True
+
     def _try_queue_reload(self):
         """Attempt to setup a call to queue_reload, otherwise just reload"""
         if self._oController:
@@ -392,42 +611,116 @@ class CardSetCardListModel(CardListModel):
         else:
             self.load()
 
-    def _add_children(self, oChildIter, oRow):
-        """Add the needed children for a card in the model."""
+    def _has_extra_levels(self, oRow):
+        """Check if the card row will have any expansion or child card
+           set rows below it."""
+        if self._eExtraLevelsMode in EXPANSIONS_2ND_LEVEL:
+            return bool(oRow.dExpansions)
+        if self._eExtraLevelsMode in CARD_SETS_2ND_LEVEL:
+            return bool(oRow.dChildCardSets)
+        return False
+
+    def _is_placeholder(self, oIter):
+        """Check if oIter is the placeholder row added in lazy mode.
+
+           The real extra level rows always have a physical card."""
+        return self.get_value(oIter, 9) is None
+
+    def _add_card_children(self, oChildIter, oRow, bUpdate):
+        """Add the children for a card row when loading the model.
+
+           If bLazyLevels is set, card rows which haven't been filled in
+           yet only get a placeholder child, so the view shows the row as
+           expandable, and the real rows are added by fill_children."""
+        if not self.bLazyLevels:
+            self._add_children(oChildIter, oRow, bUpdate)
+            return
+        oFirstIter = self.iter_children(oChildIter) if bUpdate else None
+        if oFirstIter is not None and not self._is_placeholder(oFirstIter):
+            # This row has already been filled in, so keep it up to date
+            self._add_children(oChildIter, oRow, True)
+        elif self._has_extra_levels(oRow):
+            self._dPendingRows[oRow.oAbsCard.id] = oRow
+            if oFirstIter is None:
+                self.insert_with_values(oChildIter, 0, [0], [''])
+        elif oFirstIter is not None:
+            # Placeholder is no longer needed
+            self.remove(oFirstIter)
+
+    def fill_children(self, oIter):
+        """Replace the placeholder below the card row oIter with the
+           expansion and child card set rows.
+
+           Called by the view before the row is expanded, and before
+           anything that looks at the rows below the card."""
+        if not self._dPendingRows or self.iter_depth(oIter) != 1:
+            return
+        oFirstIter = self.iter_children(oIter)
+        if oFirstIter is None or not self._is_placeholder(oFirstIter):
+            return
+        oRow = self._dPendingRows[self.get_value(oIter, 8).id]
+        self.remove(oFirstIter)
+        self._add_children(oIter, oRow)
+
+    def _fill_card(self, oAbsId):
+        """Fill in all the rows for the card before they're changed"""
+        if oAbsId not in self._dPendingRows:
+            return
+        for oIter in self._dAbs2Iter.get(oAbsId, []):
+            self.fill_children(oIter)
+        del self._dPendingRows[oAbsId]
+
+    def _add_children(self, oChildIter, oRow, bUpdate=False):
+        """Add the needed children for a card in the model.
+
+           If bUpdate is True, the existing children of oChildIter are
+           updated, and any which are no longer needed are removed."""
         dExpansionInfo = oRow.get_expansion_info()
         dChildInfo = oRow.get_child_info()
         oAbsId = oRow.oAbsCard.id
+        dOldIters = self._get_child_iters(oChildIter) if bUpdate else None
         if self._eExtraLevelsMode == ExtraLevels.SHOW_EXPANSIONS:
             for sExpansion in dExpansionInfo:
                 self._add_extra_level(oChildIter, sExpansion,
                                       dExpansionInfo[sExpansion],
-                                      (2, oAbsId))
+                                      (2, oAbsId), dOldIters)
         elif self._eExtraLevelsMode == ExtraLevels.SHOW_CARD_SETS:
             for sChildSet in dChildInfo:
                 self._add_extra_level(oChildIter, sChildSet,
                                       dChildInfo[sChildSet],
-                                      (2, oAbsId))
+                                      (2, oAbsId), dOldIters)
         elif self._eExtraLevelsMode == ExtraLevels.EXP_AND_CARD_SETS:
             for sExpansion in dExpansionInfo:
                 oSubIter = self._add_extra_level(oChildIter,
                                                  sExpansion,
                                                  dExpansionInfo[sExpansion],
-                                                 (2, oAbsId))
+                                                 (2, oAbsId), dOldIters)
+                dOldSubIters = self._get_child_iters(oSubIter) \
+                    if bUpdate else None
                 for sChildSet in dChildInfo[sExpansion]:
                     self._add_extra_level(oSubIter, sChildSet,
                                           dChildInfo[sExpansion][sChildSet],
-                                          (3, (oAbsId, sExpansion)))
+                                          (3, (oAbsId, sExpansion)),
+                                          dOldSubIters)
+                if bUpdate:
+                    self._remove_child_iters(dOldSubIters)
         elif self._eExtraLevelsMode == ExtraLevels.CARD_SETS_AND_EXP:
             for sChildSet in dChildInfo:
                 oSubIter = self._add_extra_level(oChildIter,
                                                  sChildSet,
                                                  dChildInfo[sChildSet],
-                                                 (2, oAbsId))
+                                                 (2, oAbsId), dOldIters)
+                dOldSubIters = self._get_child_iters(oSubIter) \
+                    if bUpdate else None
                 for sExpansion in dExpansionInfo[sChildSet]:
                     self._add_extra_level(
                         oSubIter, sExpansion,
                         dExpansionInfo[sChildSet][sExpansion],
-                        (3, (oAbsId, sChildSet)))
+                        (3, (oAbsId, sChildSet)), dOldSubIters)
+                if bUpdate:
+                    self._remove_child_iters(dOldSubIters)
+        if bUpdate:
+            self._remove_child_iters(dOldIters)
 
     def check_inc_dec(self, iCnt):
         """Helper function to get correct flags"""
@@ -441,17 +734,29 @@ class CardSetCardListModel(CardListModel):
         self.set(oIter, 1, iCnt, 2, iParCnt, 3, bIncCard, 4, bDecCard)
         self.set_par_count_colour(oIter, iParCnt, iCnt)
 
-    def _add_extra_level(self, oParIter, sName, tInfo, tKeyInfo):
-        """Add an extra level iterator to the card list model."""
+    # pylint: disable=too-many-arguments
+    # Need all these arguments here
+    def _add_extra_level(self, oParIter, sName, tInfo, tKeyInfo,
+                         dOldIters=None):
+        """Add an extra level iterator to the card list model.
+
+           If dOldIters has an existing row for sName, that row is
+           updated and reused."""
         iCnt, iParCnt, oPhysCard, bIncCard, bDecCard = tInfo
         iDepth, oKey = tKeyInfo
-        # Rely on the defaults to handle icons + textlist
-        # Since we skip the handling here, this is about 15% faster on
-        # large loads such as All Cards + Expansions + Card Sets
-        oIter = self.insert_with_values(oParIter, 0, [0, 1, 2, 3, 4, 9],
-                                        [sName, iCnt, iParCnt, bIncCard,
-                                         bDecCard, oPhysCard])
-        self.set_par_count_colour(oIter, iParCnt, iCnt)
+        aCols = [0, 1, 2, 3, 4, 9]
+        aValues = [sName, iCnt, iParCnt, bIncCard, bDecCard, oPhysCard]
+        oIter = None
+        if dOldIters:
+            oIter = self._pop_child_iter(dOldIters, sName)
+        if oIter is None:
+            # Rely on the defaults to handle icons + textlist
+            # Since we skip the handling here, this is about 15% faster on
+            # large loads such as All Cards + Expansions + Card Sets
+            oIter = self.insert_with_values(oParIter, 0, aCols, aValues)
+            self.set_par_count_colour(oIter, iParCnt, iCnt)
+        elif self._update_row(oIter, aCols, aValues):
+            self.set_par_count_colour(oIter, iParCnt, iCnt)
         if iDepth == 2:
             self._dAbsSecondLevel2Iter.setdefault(oKey, {})
             self._dAbsSecondLevel2Iter[oKey].setdefault(
@@ -462,6 +767,8 @@ class CardSetCardListModel(CardListModel):
                 sName, []).append(oIter)
         return oIter
 
+    # pylint: enable=too-many-arguments
+
     def get_exp_name_from_path(self, oPath):
         """Get the expansion information from the model, returning None
            if this is not at a level where the expansion is known.
@@ -560,6 +867,7 @@ class CardSetCardListModel(CardListModel):
            Always returns the expansions, regaredless of eExtraLevelsMode.
            """
         oIter = self.get_iter(oPath)
+        self.fill_children(oIter)
         iDepth = self.iter_depth(oIter)
         if iDepth == 0 or iDepth == 3 or (iDepth == 2 and
                                           self._eExtraLevelsMode in
@@ -581,10 +889,10 @@ class CardSetCardListModel(CardListModel):
             oCard = self.get_abstract_card_from_path(oPath)
             oCardIter = self.get_card_iterator(
                 SpecificCardIdFilter(oCard.id))
-            for oCard in oCardIter:
+            for oCard, iCnt in oCardIter.counted_rows():
                 oPhysCard = IPhysicalCard(oCard)
                 dResult.setdefault(oPhysCard.id, 0)
-                dResult[oPhysCard.id] += 1
+                dResult[oPhysCard.id] += iCnt
         elif self._eExtraLevelsMode == ExtraLevels.CARD_SETS_AND_EXP:
             # can read info from the model
             oChildIter = self.iter_children(oIter)
@@ -600,10 +908,10 @@ class CardSetCardListModel(CardListModel):
             sCardSetName = self.get_name_from_iter(oIter)
             oCSFilter = FilterAndBox([self._dCache['child filters'][
                 sCardSetName], SpecificCardIdFilter(oCard.id)])
-            for oCard in oCSFilter.select(self.cardclass):
+            for oCard, iCnt in self._select_cards(oCSFilter).counted_rows():
                 oPhysCardID = IPhysicalCard(oCard).id
                 dResult.setdefault(oPhysCardID, 0)
-                dResult[oPhysCardID] += 1
+                dResult[oPhysCardID] += iCnt
         return dResult
 
     def _init_expansions(self, dExpanInfo, oAbsCard):
@@ -614,8 +922,9 @@ class CardSetCardListModel(CardListModel):
                     dExpanInfo.setdefault((IPrintingName(oPhysCard),
                                            oPhysCard), 0)
 
-    def _adjust_row(self, dAbsCards, oPhysCard, dChildCache, bInc):
-        """Initialize the entry for oAbsCard in dAbsCards"""
+    def _adjust_row(self, dAbsCards, oPhysCard, dChildCache, iCnt):
+        """Initialize the entry for oAbsCard in dAbsCards, adding iCnt
+           to the card count."""
         if oPhysCard.abstractCardID not in dAbsCards:
             oAbsCard = IAbstractCard(oPhysCard)
             oRow = CardSetModelRow(self.bEditable,
@@ -648,15 +957,13 @@ class CardSetCardListModel(CardListModel):
                     oRow.oPhysCard = aPhysCards[0]
         else:
             oRow = dAbsCards[oPhysCard.abstractCardID]
-        if bInc:
-            oRow.iCount += 1
+        oRow.iCount += iCnt
         dExpanInfo = oRow.dExpansions
         dChildInfo = oRow.dChildCardSets
         if self._eExtraLevelsMode in EXPANSIONS_2ND_LEVEL:
             sExpName = IPrintingName(oPhysCard)
             dExpanInfo.setdefault((sExpName, oPhysCard), 0)
-            if bInc:
-                dExpanInfo[(sExpName, oPhysCard)] += 1
+            dExpanInfo[(sExpName, oPhysCard)] += iCnt
         if not dChildInfo and self._eExtraLevelsMode in CARD_SETS_LEVEL:
             self.get_child_set_info(oRow.oAbsCard, dChildInfo, dExpanInfo,
                                     dChildCache)
@@ -669,14 +976,12 @@ class CardSetCardListModel(CardListModel):
         # The various cache cases intoduce many branches, but can't
         # reasonably split away.
 
-        def _update_child_caches(oCard):
+        def _update_child_caches(oAbsId, oCard, iCnt):
             """Add card info to the cache"""
-            oAbsId = oCard.abstractCardID
             self._dCache['child cards'].setdefault(oCard, 0)
             self._dCache['child abstract cards'].setdefault(oAbsId, 0)
-            self._dCache['child cards'][oCard] += 1
-            self._dCache['child abstract cards'][oAbsId] += 1
-            return oAbsId
+            self._dCache['child cards'][oCard] += iCnt
+            self._dCache['child abstract cards'][oAbsId] += iCnt
 
         if self._eExtraLevelsMode in CARD_SETS_LEVEL or \
                 self._eShowCardMode == ShowMode.CHILD_CARDS:
@@ -707,7 +1012,7 @@ class CardSetCardListModel(CardListModel):
         elif self._dCache['all children filter']:
             oFullFilter = FilterAndBox([self._dCache['all children filter'],
                                         oCurFilter])
-            aChildCards = list(oFullFilter.select(self.cardclass).distinct())
+            aChildCards = oFullFilter.select_card_counts()
             if not self.is_filtered():
                 self._dCache['full child card list'] = aChildCards
         if self._eExtraLevelsMode in CARD_SETS_LEVEL and \
@@ -718,19 +1023,20 @@ class CardSetCardListModel(CardListModel):
                 self._dCache['child card sets'].setdefault(sName, {})
                 dChildCardCache.setdefault(sName, {})
             # Pull all cards of interest in a single query
-            for oMapCard in aChildCards:
-                sName = dChildren[oMapCard.physicalCardSetID]
-                oCard = IPhysicalCard(oMapCard)
-                oAbsId = _update_child_caches(oCard)
-                dChildCardCache[sName].setdefault(oAbsId, []).append(oCard)
+            for oAbsId, iPhysId, iSetId, iCnt in aChildCards:
+                sName = dChildren[iSetId]
+                oCard = PhysicalCard.get(iPhysId)
+                _update_child_caches(oAbsId, oCard, iCnt)
+                dCardCounts = dChildCardCache[sName].setdefault(oAbsId, {})
+                dCardCounts.setdefault(oCard, 0)
+                dCardCounts[oCard] += iCnt
                 self._dCache['child card sets'][sName].setdefault(oCard, 0)
-                self._dCache['child card sets'][sName][oCard] += 1
+                self._dCache['child card sets'][sName][oCard] += iCnt
         elif self._eShowCardMode == ShowMode.CHILD_CARDS and \
                 self._dCache['child filters']:
             # Need to setup the cache
-            for oMapCard in aChildCards:
-                oCard = IPhysicalCard(oMapCard)
-                _update_child_caches(oCard)
+            for oAbsId, iPhysId, _iSetId, iCnt in aChildCards:
+                _update_child_caches(oAbsId, PhysicalCard.get(iPhysId), iCnt)
         return dChildCardCache
 
     def _get_parent_list(self, oCurFilter, oCardIter, iIterCnt):
@@ -759,18 +1065,14 @@ class CardSetCardListModel(CardListModel):
                         MultiSpecificCardIdFilter(aAbsCardIds))
                     aFilters.append(self._dCache['cardset cards filter'])
                 oParentFilter = FilterAndBox(aFilters)
-                aParentCards = [
-                    IPhysicalCard(x) for x in
-                    oParentFilter.select(self.cardclass).distinct()]
+                aParentCards = oParentFilter.select_card_counts()
                 if not self.is_filtered():
                     self._dCache['full parent card list'] = aParentCards
-            for oPhysCard in aParentCards:
+            for oAbsId, oPhysCard, iCnt in _total_card_counts(aParentCards):
                 self._dCache['parent cards'].setdefault(oPhysCard, 0)
-                self._dCache['parent abstract cards'].setdefault(
-                    oPhysCard.abstractCardID, 0)
-                self._dCache['parent cards'][oPhysCard] += 1
-                self._dCache['parent abstract cards'][
-                    oPhysCard.abstractCardID] += 1
+                self._dCache['parent abstract cards'].setdefault(oAbsId, 0)
+                self._dCache['parent cards'][oPhysCard] += iCnt
+                self._dCache['parent abstract cards'][oAbsId] += iCnt
 
     def _get_extra_cards(self, oCurFilter):
         """Return any extra cards not in this card set that need to be
@@ -882,23 +1184,24 @@ class CardSetCardListModel(CardListModel):
 
         # Other card show modes
         for oPhysCard in self._get_extra_cards(oCurFilter):
-            self._adjust_row(dAbsCards, oPhysCard, dChildCardCache, False)
+            self._adjust_row(dAbsCards, oPhysCard, dChildCardCache, 0)
 
         if not self.is_filtered() and self._dCache['this card list']:
             for oPhysCard in self._dCache['this card list']:
-                self._adjust_row(dAbsCards, oPhysCard,
-                                 dChildCardCache, True)
                 dPhysCards.setdefault(oPhysCard, 0)
                 dPhysCards[oPhysCard] += 1
+            for oPhysCard, iCnt in dPhysCards.items():
+                self._adjust_row(dAbsCards, oPhysCard,
+                                 dChildCardCache, iCnt)
             aCards = self._dCache['this card list']
         else:
-            for oCard in oCardIter:
+            for oCard, iCnt in oCardIter.counted_rows():
                 oPhysCard = IPhysicalCard(oCard)
                 self._adjust_row(dAbsCards, oPhysCard,
-                                 dChildCardCache, True)
+                                 dChildCardCache, iCnt)
                 dPhysCards.setdefault(oPhysCard, 0)
-                dPhysCards[oPhysCard] += 1
-                aCards.append(oPhysCard)
+                dPhysCards[oPhysCard] += iCnt
+                aCards.extend([oPhysCard] * iCnt)
                 if self._bPhysicalFilter:
                     # We need to be able to give the correct list of physical
                     # cards to the listeners if we remove these via
@@ -909,7 +1212,7 @@ class CardSetCardListModel(CardListModel):
                     oAbsId = oPhysCard.abstractCardID
                     self._dAbs2Phys.setdefault(oAbsId, {})
                     self._dAbs2Phys[oAbsId].setdefault(oPhysCard, 0)
-                    self._dAbs2Phys[oAbsId][oPhysCard] += 1
+                    self._dAbs2Phys[oAbsId][oPhysCard] += iCnt
             if not self.is_filtered():
                 self._dCache['this card list'] = aCards
 
@@ -928,12 +1231,10 @@ class CardSetCardListModel(CardListModel):
         """Fill in info about the child card sets for the grouped iterator"""
         oAbsId = oAbsCard.id
         for sCardSetName in dChildCardCache:
-            aChildCards = []
-            if oAbsId in dChildCardCache[sCardSetName]:
-                aChildCards = dChildCardCache[sCardSetName][oAbsId]
+            dChildCards = dChildCardCache[sCardSetName].get(oAbsId, {})
             if self._eExtraLevelsMode == ExtraLevels.SHOW_CARD_SETS or \
                     self._eExtraLevelsMode == ExtraLevels.CARD_SETS_AND_EXP:
-                iChildCnt = len(aChildCards)
+                iChildCnt = sum(dChildCards.values())
                 if iChildCnt > 0 or self.bEditable:
                     # We treat card sets like expansion, showing all of them
                     # when editable.
@@ -942,12 +1243,12 @@ class CardSetCardListModel(CardListModel):
                         dExpanInfo.setdefault(sCardSetName, {})
                         self._init_expansions(dExpanInfo[sCardSetName],
                                               oAbsCard)
-                        for oThisPhysCard in aChildCards:
+                        for oThisPhysCard, iCnt in dChildCards.items():
                             sExpName = IPrintingName(oThisPhysCard)
                             dExpanInfo[sCardSetName].setdefault(
                                 (sExpName, oThisPhysCard), 0)
                             dExpanInfo[sCardSetName][(sExpName,
-                                                      oThisPhysCard)] += 1
+                                                      oThisPhysCard)] += iCnt
             elif self._eExtraLevelsMode == ExtraLevels.EXP_AND_CARD_SETS:
                 if self.bEditable:
                     if not dChildInfo:
@@ -956,15 +1257,16 @@ class CardSetCardListModel(CardListModel):
                             dChildInfo.setdefault(sExpName, {})
                     for sExpName in dChildInfo:
                         dChildInfo[sExpName].setdefault(sCardSetName, 0)
-                for oThisPhysCard in aChildCards:
+                for oThisPhysCard, iCnt in dChildCards.items():
                     sExpName = IPrintingName(oThisPhysCard)
                     dChildInfo.setdefault(sExpName, {})
                     dChildInfo[sExpName].setdefault(
                         sCardSetName, 0)
-                    dChildInfo[sExpName][sCardSetName] += 1
+                    dChildInfo[sExpName][sCardSetName] += iCnt
 
     def _get_sibling_cards(self, oCurFilter):
-        """Get the list of cards in sibling card sets"""
+        """Get the cards in sibling card sets, as a dictionary of
+           abstract card id to a dictionary of physical card to count"""
         dSiblingCards = {}
         if self._dCache['sibling filter'] is None:
             aChildren = [x.name for x in PhysicalCardSet.selectBy(
@@ -992,18 +1294,15 @@ class CardSetCardListModel(CardListModel):
                         oCurFilter,
                         ])
 
-                aInUseCards = [IPhysicalCard(x)
-                               for x in
-                               oSibFilter.select(self.cardclass).distinct()]
+                aInUseCards = oSibFilter.select_card_counts()
                 if not self.is_filtered():
                     self._dCache['full sibling card list'] = aInUseCards
-            for oPhysCard in aInUseCards:
-                oAbsId = oPhysCard.abstractCardID
-                dSiblingCards.setdefault(oAbsId, []).append(oPhysCard)
+            for oAbsId, oPhysCard, iCnt in _total_card_counts(aInUseCards):
+                dSiblingCards.setdefault(oAbsId, {})[oPhysCard] = iCnt
                 self._dCache['sibling cards'].setdefault(oPhysCard, 0)
                 self._dCache['sibling abstract cards'].setdefault(oAbsId, 0)
-                self._dCache['sibling cards'][oPhysCard] += 1
-                self._dCache['sibling abstract cards'][oAbsId] += 1
+                self._dCache['sibling cards'][oPhysCard] += iCnt
+                self._dCache['sibling abstract cards'][oAbsId] += iCnt
         return dSiblingCards
 
     def _update_parent_info(self, oSetInfo, dPhysCards):
@@ -1035,11 +1334,11 @@ class CardSetCardListModel(CardListModel):
             dSiblingCards = self._get_sibling_cards(oCurFilter)
             for oAbsId, oRow in dAbsCards.items():
                 if oAbsId in dSiblingCards:
-                    for oPhysCard in dSiblingCards[oAbsId]:
-                        oRow.iParentCount -= 1
+                    for oPhysCard, iCnt in dSiblingCards[oAbsId].items():
+                        oRow.iParentCount -= iCnt
                         sExpansion = IPrintingName(oPhysCard)
                         oRow.dParentExpansions.setdefault(sExpansion, 0)
-                        oRow.dParentExpansions[sExpansion] -= 1
+                        oRow.dParentExpansions[sExpansion] -= iCnt
 
         elif self._eParentCountMode == ParentCountMode.MINUS_THIS_SET:
             for oRow in dAbsCards.values():
@@ -1097,7 +1396,7 @@ class CardSetCardListModel(CardListModel):
                 oParentFilter = FilterAndBox([
                     SpecificPhysCardIdFilter(oPhysCard.id),
                     self._dCache['parent filter']])
-                iParCnt = oParentFilter.select(self.cardclass).count()
+                iParCnt = self._select_cards(oParentFilter).count()
                 # Cache this lookup for the future
                 self._dCache['parent cards'][oPhysCard] = iParCnt
                 self._dCache['parent abstract cards'].setdefault(
@@ -1117,7 +1416,7 @@ class CardSetCardListModel(CardListModel):
                         oInUseFilter = FilterAndBox([
                             SpecificPhysCardIdFilter(oPhysCard.id),
                             self._dCache['sibling filter']])
-                        iSibCnt = oInUseFilter.select(self.cardclass).count()
+                        iSibCnt = self._select_cards(oInUseFilter).count()
                         iParCnt -= iSibCnt
                         self._dCache['sibling cards'][oPhysCard] = iSibCnt
                         self._dCache['sibling abstract cards'].setdefault(
@@ -1229,6 +1528,8 @@ class CardSetCardListModel(CardListModel):
         self._oCardSet = IPhysicalCardSet(sSetName)
         self._oBaseFilter = CachedFilter(PhysicalCardSetFilter(sSetName))
         self._dCache = {}
+        # The existing rows refer to the old database objects
+        self._tLoadedLayout = None
 
     def is_sibling(self, oCS):
         """Return true if oCS is an inuse sibling"""
@@ -1277,12 +1578,12 @@ class CardSetCardListModel(CardListModel):
                 # due to card sets filter limies, so just invalidate cache
                 self._dCache[sFullCache] = None
             elif self._dCache[sFullCache]:
-                if iChg > 0:
-                    self._dCache[sFullCache].append(oPhysCard)
-                elif iChg < 0 and oPhysCard in self._dCache[sFullCache]:
-                    # may be cases (THIS_SET_ONLY), were card is not in cache,
-                    # so we do need to check fot that.
-                    self._dCache[sFullCache].remove(oPhysCard)
+                # The list holds card counts, so we record the change as
+                # an extra entry. Cards removed that aren't in the cache
+                # (THIS_SET_ONLY) give negative totals, which are skipped
+                # when the list is used.
+                self._dCache[sFullCache].append(
+                    (oPhysCard.abstractCardID, oPhysCard.id, None, iChg))
 
     def _update_child_set_cache(self, oPhysCard, iChg, sName):
         """Update the number in the card cache"""
@@ -1337,6 +1638,9 @@ class CardSetCardListModel(CardListModel):
            """
         # pylint: disable=too-many-branches
         # We do need all these branches
+        if self._bLoading:
+            # The load in progress may have used the old card set details
+            self._bReloadPending = True
         if oCardSet.id == self._oCardSet.id and \
                 'parentID' in dChanges:
             # This card set's parent is changing
@@ -1410,6 +1714,9 @@ class CardSetCardListModel(CardListModel):
 
            Needed if child card sets are deleted, for instance.
            """
+        if self._bLoading:
+            # The load in progress may have used the old card sets
+            self._bReloadPending = True
         if self.is_child(oCardSet):
             # inuse child card set added or removed, so we need to reload
             self._dCache['child filters'] = None
@@ -1429,6 +1736,14 @@ class CardSetCardListModel(CardListModel):
         # here, since the fiddling on parents should generate changed
         # signals for us.
 
+    def cards_changed(self, oCardSet, dChanges):
+        """Listen on bulk card changes.
+
+           The changes are applied one card at a time, as for
+           card_changed."""
+        for oPhysCard, iChg in dChanges.items():
+            self.card_changed(oCardSet, oPhysCard, iChg)
+
     def card_changed(self, oCardSet, oPhysCard, iChg):
         """Listen on card changes.
 
@@ -1439,6 +1754,15 @@ class CardSetCardListModel(CardListModel):
            """
         # pylint: disable=too-many-branches, too-many-statements
         # need to consider several cases, so lots of branches and statements
+        if self._bLoading:
+            # The rows being loaded may not include this change, so we
+            # drop the card lists and load again once the load is done
+            for sKey in ('full card list', 'this card list',
+                         'full parent card list', 'full child card list',
+                         'full sibling card list'):
+                self._dCache[sKey] = None
+            self._bReloadPending = True
+            return
         oAbsId = oPhysCard.abstractCardID
         if self._bPhysicalFilter:
             oCurFilter = self.get_current_filter()
@@ -1480,10 +1804,11 @@ class CardSetCardListModel(CardListModel):
             if (iChg > 0 and self._dCache['this card list'] is not None
                     and self.configfilter is None):
                 # this card list can be empty
-                self._dCache['this card list'].append(oPhysCard)
+                self._dCache['this card list'].extend([oPhysCard] * iChg)
             elif (self._dCache['this card list']
                   and self.configfilter is None):
-                self._dCache['this card list'].remove(oPhysCard)
+                for _iNum in range(-iChg):
+                    self._dCache['this card list'].remove(oPhysCard)
             if self._eShowCardMode == ShowMode.THIS_SET_ONLY and iChg > 0:
                 # This cache may no longer be valid in this case
                 self._dCache['full parent card list'] = None
@@ -1752,7 +2077,7 @@ class CardSetCardListModel(CardListModel):
             else:
                 oFilter = FilterAndBox([SpecificPhysCardIdFilter(oPhysCard.id),
                                         oSetFilter])
-                iCnt = oFilter.select(self.cardclass).count()
+                iCnt = self._select_cards(oFilter).count()
                 # Cache this lookup
                 self._dCache['child card sets'].setdefault(sCardSet, {})
                 self._dCache['child card sets'][sCardSet][oPhysCard] = iCnt
@@ -1855,7 +2180,7 @@ class CardSetCardListModel(CardListModel):
                     oFilter = FilterAndBox([
                         self._dCache['child filters'][sCardSetName],
                         SpecificPhysCardIdFilter(oPhysCard.id)])
-                    iCnt = oFilter.select(self.cardclass).count()
+                    iCnt = self._select_cards(oFilter).count()
                     # Cache this lookup
                     self._dCache['child card sets'].setdefault(sCardSetName,
                                                                {})
@@ -1877,6 +2202,7 @@ class CardSetCardListModel(CardListModel):
         """Remove a card-level iter and update everything accordingly"""
         if oAbsId not in self._dAbs2Iter:
             return  # Nothing to do
+        self._dPendingRows.pop(oAbsId, None)
         for oIter in self._dAbs2Iter[oAbsId]:
             oGrpIter = self.iter_parent(oIter)
             iCnt = self.get_value(oIter, 1)
@@ -1914,6 +2240,7 @@ class CardSetCardListModel(CardListModel):
         # pylint: disable=too-many-branches
         # Several cases to consider, so several branches
         oAbsId = oPhysCard.abstractCardID
+        self._fill_card(oAbsId)
         bRemove = False
         bChecked = False  # flag to avoid repeated work
         for oIter in self._dAbs2Iter[oAbsId]:
@@ -1979,6 +2306,7 @@ class CardSetCardListModel(CardListModel):
         if not bCheckAddRemove:
             bChecked = True  # skip check
         oAbsId = oPhysCard.abstractCardID
+        self._fill_card(oAbsId)
         for oIter in self._dAbs2Iter[oAbsId]:
             oGrpIter = self.iter_parent(oIter)
             iParGrpCnt = self.get_value(oGrpIter, 2) + iChg
@@ -2073,6 +2401,7 @@ class CardSetCardListModel(CardListModel):
         # So we don't need to loop over the card level, merely the sub-levels,
         # but we do need to check if the card is removed at the end
         oAbsId = oPhysCard.abstractCardID
+        self._fill_card(oAbsId)
         if (self._eExtraLevelsMode == ExtraLevels.SHOW_EXPANSIONS and
                 self._eShowCardMode == ShowMode.CHILD_CARDS) \
                     or self._eExtraLevelsMode == ExtraLevels.EXP_AND_CARD_SETS:
@@ -2273,6 +2602,13 @@ class CardSetCardListModel(CardListModel):
         self._eParentCountMode = iLevel
         return True
 
+    def _change_lazy_mode(self, bLazy):
+        """Set whether the extra levels are only added when expanded"""
+        if self.bLazyLevels == bLazy:
+            return False
+        self.bLazyLevels = bLazy
+        return True
+
     def update_options(self, bSkipLoad=False):
         """Update all the per-deck options.
 
@@ -2297,6 +2633,9 @@ class CardSetCardListModel(CardListModel):
             sParentCountOpt, ParentCountMode.IGNORE_PARENT)
         bUseIcons = self._oConfig.get_deck_option(self.frame_id,
                                                   self.cardset_id, USE_ICONS)
+        bLazyLevels = self._oConfig.get_deck_option(self.frame_id,
+                                                    self.cardset_id,
+                                                    LAZY_LEVELS_OPTION)
 
         bHideIllegal = self._oConfig.get_deck_option(self.frame_id,
                                                      self.cardset_id,
@@ -2309,6 +2648,7 @@ class CardSetCardListModel(CardListModel):
         bReloadELM = self._change_level_mode(eExtraLevelMode)
         bReloadSCM = self._change_count_mode(eShowCardMode)
         bReloadPCM = self._change_parent_count_mode(eParentCountOpt)
+        bReloadLazy = self._change_lazy_mode(bLazyLevels)
         bReloadIcons = self._change_icon_mode(bUseIcons)
         bReloadIllegal = self._change_illegal_mode(bHideIllegal)
         if bReloadIllegal or bReloadFilter:
@@ -2318,7 +2658,7 @@ class CardSetCardListModel(CardListModel):
         # We need to check all of these
         if not bSkipLoad and (bReloadELM or bReloadSCM or bReloadPCM
                               or bReloadIcons or bReloadIllegal
-                              or bReloadFilter):
+                              or bReloadFilter or bReloadLazy):
             # queue reload for later
             self._try_queue_reload()
 
@@ -8,8 +8,8 @@
 from gi.repository import GLib, Gtk
 
 from ..core.BaseTables import PhysicalCardSet
-from ..core.BaseAdapters import IPhysicalCardSet
 from ..core.BaseFilters import NullFilter
+from ..core.CardSetStats import get_card_set_stats
 from .BaseConfigFile import CARDSET_LIST
 
 
@@ -68,15 +68,15 @@ class CardSetManagementModel(Gtk.TreeStore):
         return oFilter.select(PhysicalCardSet).distinct()
     # pylint: enable=no-self-use
 
-    def _format_set(self, oSet):
+    def _format_set(self, sName, bInUse):
         """Format the card set name for display"""
-        sMarkup = GLib.markup_escape_text(oSet.name)
-        if oSet.name in self._aExcludedSet:
+        sMarkup = GLib.markup_escape_text(sName)
+        if sName in self._aExcludedSet:
             sMarkup = '<span foreground="grey">%s</span>' % sMarkup
         elif hasattr(self._oMainWin, 'find_cs_pane_by_set_name') and \
-                self._oMainWin.find_cs_pane_by_set_name(oSet.name):
+                self._oMainWin.find_cs_pane_by_set_name(sName):
             sMarkup = '<span foreground="blue">%s</span>' % sMarkup
-        if oSet.inuse:
+        if bInUse:
             # In use sets are in bold
             sMarkup = '<b>%s</b>' % sMarkup
         return sMarkup
@@ -88,7 +88,8 @@ class CardSetManagementModel(Gtk.TreeStore):
         oPath = self.get_path_from_name(sSetName)
         if oPath:
             oIter = self.get_iter(oPath)
-            sMarkup = self._format_set(IPhysicalCardSet(sSetName))
+            oInfo = get_card_set_stats().get_info(sSetName)
+            sMarkup = self._format_set(sSetName, oInfo and oInfo.bInUse)
             # Gtk signals will do the rest for us
             self.set(oIter, 0, sMarkup)
 
@@ -123,8 +124,18 @@ class CardSetManagementModel(Gtk.TreeStore):
     def load(self):
         """Load the card sets into the card view"""
         self.clear()
-        oCardSetIter = self.get_card_set_iterator(self.get_current_filter())
         self._dName2Iter = {}
+        # We use the card set statistics for the parents and in-use
+        # status, so we don't need to look up each card set
+        oStats = get_card_set_stats()
+        dInfo = oStats.get_all()
+        oFilter = self.get_current_filter()
+        if oFilter:
+            aNames = [oCS.name for oCS in
+                      self.get_card_set_iterator(oFilter)]
+        else:
+            aNames = [oInfo.sName for oInfo in
+                      sorted(dInfo.values(), key=lambda x: x.iId)]
 
         # Disable sorting while we do the insertions - speeds things up
         iSortColumn, iSortOrder = self.get_sort_column_id()
@@ -132,29 +143,25 @@ class CardSetManagementModel(Gtk.TreeStore):
             self.set_sort_column_id(-2, 0)
 
         # Loop through the card sets, getting the parent->child relationships
-        for oCardSet in oCardSetIter:
-            if oCardSet.name in self._dName2Iter:
+        for sName in aNames:
+            if sName in self._dName2Iter:
                 # We've already loaded this card set, so skip
                 continue
-            if oCardSet.parent:
-                # Do funky stuff to make sure parent is shown in the view
-                oParent = oCardSet
-                aToAdd = []
-                oIter = None
-                while oParent and oParent.name not in self._dName2Iter:
-                    aToAdd.insert(0, oParent)  # Insert at the head
-                    oParent = oParent.parent
-                if oParent and oParent.name in self._dName2Iter:
-                    oIter = self._dName2Iter[oParent.name]
-            else:
-                # Just add
-                oIter = None
-                aToAdd = [oCardSet]
-            for oSet in aToAdd:
+            # Do funky stuff to make sure parent is shown in the view
+            aToAdd = []
+            sParent = sName
+            while sParent and sParent not in self._dName2Iter and \
+                    sParent not in aToAdd:
+                aToAdd.insert(0, sParent)  # Insert at the head
+                oInfo = dInfo.get(sParent)
+                sParent = oInfo and oStats.get_name(oInfo.iParentId)
+            oIter = self._dName2Iter.get(sParent)
+            for sSet in aToAdd:
                 oIter = self.append(oIter)
-                sMarkup = self._format_set(oSet)
-                self.set(oIter, 0, sMarkup, 1, oSet.name)
-                self._dName2Iter[oSet.name] = oIter
+                oInfo = dInfo.get(sSet)
+                sMarkup = self._format_set(sSet, oInfo and oInfo.bInUse)
+                self.set(oIter, 0, sMarkup, 1, sSet)
+                self._dName2Iter[sSet] = oIter
 
         if not self._dName2Iter:
             # Showing nothing
@@ -133,6 +133,9 @@ class CardSetView(CardListView):
 
         self.__iMapID = self.connect('map', self.mapped)
         self.connect('key-press-event', self.key_press)
+        # The model may only add the expansion and card set rows when
+        # the card is expanded
+        self.connect('test-expand-row', self.fill_row)
 
         self._oMenu = None
 
@@ -320,6 +323,13 @@ class CardSetView(CardListView):
             return True
         return False  # propogate event
 
+    def fill_row(self, _oWidget, oIter, _oPath):
+        """Ensure the model has added the row's children before we
+           expand it"""
+        self._oModel.fill_children(oIter)
+        # Allow the row to be expanded
+        return False
+
     # functions related to tweaking widget display
 
     def mapped(self, _oWidget):
@@ -11,13 +11,13 @@ import re
 from gi.repository import GObject, Gtk, Pango
 
 from sqlobject import SQLObjectNotFound
-from ..core.BaseTables import (AbstractCard, PhysicalCard, Printing,
-                               LookupHints)
+from ..core.BaseTables import PhysicalCard, Printing, LookupHints
 from ..core.BaseAdapters import (IAbstractCard, IPhysicalCard, IExpansion,
                                  IPrinting, IPrintingName)
 from ..core.CardLookup import (AbstractCardLookup, PhysicalCardLookup,
                                PrintingLookup, LookupFailed)
-from ..core.BaseFilters import best_guess_filter
+from ..core.BaseFilters import best_guess_filter, MultiSpecificCardIdFilter
+from ..core.FuzzyNameIndex import get_fuzzy_name_index
 from .SutekhDialog import (SutekhDialog, do_complaint_error, do_complaint_warning,
                            do_complaint_buttons)
 from .CellRendererSutekhButton import CellRendererSutekhButton
@@ -53,6 +53,10 @@ class DummyController:
         """Ignore card text updates."""
         pass
 
+    def prefetch_cards(self, _aCards):
+        """Ignore prefetch requests."""
+        pass
+
 
 class ACLLookupView(PhysicalCardView):
     """Specialised version for the Card Lookup."""
@@ -257,7 +261,12 @@ class ReplacementTreeView(Gtk.TreeView):
         sFullName = self.oModel.get_value(oIter, 1)
         sName, _sExp = self.parse_card_name(sFullName)
 
-        oFilter = best_guess_filter(sName)
+        aCandidates = get_fuzzy_name_index().find_candidates(sName)
+        if aCandidates:
+            oFilter = MultiSpecificCardIdFilter(
+                [oCard.id for oCard, _fScore in aCandidates])
+        else:
+            oFilter = best_guess_filter(sName)
         self.oCardListView.get_model().selectfilter = oFilter
 
         if not self.oFilterToggleButton.get_active():
@@ -748,13 +757,12 @@ class GuiLookup(AbstractCardLookup, PhysicalCardLookup, PrintingLookup):
         oModel = oReplacementView.get_model()
 
         # Populate the model with the card names and best guesses
+        dBestGuesses = get_fuzzy_name_index().resolve_all(dUnknownCards)
         for sName in dUnknownCards:
-            oBestGuessFilter = best_guess_filter(sName)
-            aCards = list(oBestGuessFilter.select(AbstractCard))
-            if len(aCards) == 1:
-                sBestGuess = aCards[0].name
+            oCard = dBestGuesses[sName]
+            if oCard is not None:
+                sBestGuess = oCard.name
                 iWeight = Pango.Weight.NORMAL
-                oCard = aCards[0]
             else:
                 sBestGuess = NO_CARD
                 iWeight = Pango.Weight.BOLD
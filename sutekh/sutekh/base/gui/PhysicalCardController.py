@@ -46,4 +46,9 @@ class PhysicalCardController:
         MessageBus.publish(MessageBus.Type.CARD_TEXT_MSG,
                            'set_card_text', oCard)
 
+    def prefetch_cards(self, aCards):
+        """Pass on the cards likely to be selected next."""
+        MessageBus.publish(MessageBus.Type.CARD_TEXT_MSG,
+                           'prefetch_cards', aCards)
+
     # pylint: enable=no-self-use
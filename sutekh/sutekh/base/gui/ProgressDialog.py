@@ -134,6 +134,27 @@ class ProgressDialog(Gtk.Window):
         self.show_all()
         self.set_modal(True)
 
+    def add_cancel_button(self, fCancel):
+        """Add a cancel button to the dialog, which calls fCancel.
+
+           Closing the dialog also cancels."""
+        oButton = Gtk.Button(label='_Cancel', use_underline=True)
+        oAlign = Gtk.Alignment(xalign=1.0, yalign=0.0)
+        oAlign.add(oButton)
+        self.oVBox.pack_end(oAlign, False, True, 0)
+
+        def _cancel(_oWidget, _oEvent=None):
+            """Call fCancel, and stop further cancel requests"""
+            oButton.set_sensitive(False)
+            self.oProgressBar.set_text('Cancelling')
+            fCancel()
+            # Don't destroy the dialog, as the owner does that
+            return True
+
+        oButton.connect('clicked', _cancel)
+        self.connect('delete-event', _cancel)
+        self.show_all()
+
     def set_description(self, sDescription):
         """Change the description of a dialog"""
         self.oVBox.remove(self.oDescription)
@@ -5,121 +5,16 @@
 # GPL - see COPYING for details
 """Calculate probabilities for drawing the current selection."""
 
-from copy import copy
-
 from gi.repository import Gtk
 
 from ...core.BaseTables import PhysicalCardSet
+from ...core.DrawProbabilities import gen_choice_list, prob_table
 from ..BasePluginManager import BasePlugin
 from ..SutekhDialog import (SutekhDialog, do_complaint_error,
                             do_complaint_warning)
 from ..AutoScrolledWindow import AutoScrolledWindow
 
 
-def _choose(iChoices, iTotal):
-    """Returns number of unordered combinations of iChoices objects from
-       iTotal (iTotal)(iTotal-1)...(iTotal-iChoices+1)/iChoices!"""
-    if iChoices > 0:
-        iDenom = iChoices
-    else:
-        return 1  # 0!/0! = 1, since 0! = 1
-    iNumerator = iTotal
-    for iNum in range(1, iChoices):
-        iNumerator *= (iTotal - iNum)
-        iDenom *= iNum
-    return iNumerator // iDenom
-
-
-def _gen_choice_list(dSelectedCounts):
-    """Recursively generate all possible choices"""
-    aList = []
-    aSelectOrder = sorted(dSelectedCounts.items(), key=lambda x: (x[1], x[0]),
-                          reverse=True)
-    sThisItem = aSelectOrder[0][0]
-    if len(dSelectedCounts) > 1:
-        dNew = copy(dSelectedCounts)
-        del dNew[sThisItem]
-        aSubLists = _gen_choice_list(dNew)
-        for iChoice in range(dSelectedCounts[sThisItem] + 1):
-            for aChoices in aSubLists:
-                aThisList = [iChoice]
-                aThisList.extend(aChoices)
-                aList.append(aThisList)
-    else:
-        aList = [[x] for x in range(dSelectedCounts[sThisItem] + 1)]
-    aList.sort(key=lambda x: [sum(x)] + x)
-    return aList
-
-
-def _multi_hyper_prob(aFound, iDraws, aObjects, iTotal):
-    """Multivariate hypergeometric probability:
-
-       Given a list of draw numbers: aFound = [iFound1, iFound2 ... iFoundN]
-       form aObjects = [iObjects1, iObjects2 ... iObjectsN]
-       return the probably of seeing exactly aFound from iDraws
-       """
-    # Complain about impossible cases
-    if len(aFound) != len(aObjects):
-        raise RuntimeError('Invalid input: aFound : %s, aObjects: %s' % (
-            ','.join([str(x) for x in aFound]),
-            ','.join([str(x) for x in aObjects])))
-    # pylint: disable=too-many-boolean-expressions
-    # We do want to check all of these
-    if sum(aFound) < 0 or min(aFound) < 0 or sum(aObjects) < 0 or \
-            iTotal <= 0 or iDraws <= 0 or min(aObjects) < 0 or \
-            sum(aObjects) > iTotal or iDraws > iTotal:
-        raise RuntimeError('Invalid values for multivariate hypergeomtric'
-                           ' probability calculation: aFound: %s iDraws: %d'
-                           ' aObjects: %s iTotal: %d' % (
-                               ','.join([str(x) for x in
-                                         aFound]),
-                               iDraws, ','.join([str(x) for x in aObjects]),
-                               iTotal))
-    # pylint: enable=too-many-boolean-expressions
-    # Eliminate trivial cases
-    if sum(aFound) > iDraws:
-        return 0.0
-    for iFound, iObjects in zip(aFound, aObjects):
-        if iFound > iObjects:
-            return 0.0
-    # Hypergeomteric probability: P(X = iFound) = choose iFound from iObjects *
-    #           choose (iDraws - iFound) from (iTotal - iObjects) /
-    #           choose iDraws from iTotal
-    # Multivariate: P(X_i = iFound[i]) = choose(iFound1, iObjects1) *
-    #           choose(iFound2, iObject2) * ... / choose(iDraws, iTotal)
-    fDemon = float(_choose(iDraws, iTotal))
-    # Ensure we handle last entry
-    iRemObjects = iTotal - sum(aObjects)
-    iRemFound = iDraws - sum(aFound)
-    fNumerator = 1.0
-    for iFound, iObjects in zip(aFound, aObjects):
-        fNumerator *= _choose(iFound, iObjects)
-    if iRemFound > 0 and iRemObjects > 0:
-        fNumerator *= _choose(iRemFound, iRemObjects)
-    return fNumerator / fDemon
-
-
-def _hyper_prob_at_least(aFound, iDraws, aObjects, iTotal, iCurCol=0):
-    """Returns the probablity of drawing at least aFound from aObjects objects
-       of interest from iTotal objects in iDraw draws."""
-    # This is the sum of hyper_prob(iCur, Draws, iObjects, iTotal) where
-    # iCur in [iFound, min(iDraws, iObjects)]
-    if len(aFound) != len(aObjects):
-        raise RuntimeError('Invalid input: aFound : %s, aObjects: %s' % (
-            ','.join([str(x) for x in aFound]),
-            ','.join([str(x) for x in aObjects])))
-    fProb = 0
-    aThisFound = copy(aFound)
-    for iCur in range(aFound[iCurCol], min(iDraws, aObjects[iCurCol]) + 1):
-        aThisFound[iCurCol] = iCur
-        if iCurCol < len(aFound) - 1:
-            fProb += _hyper_prob_at_least(aThisFound, iDraws,
-                                          aObjects, iTotal, iCurCol + 1)
-        else:
-            fProb += _multi_hyper_prob(aThisFound, iDraws, aObjects, iTotal)
-    return fProb
-
-
 class BaseDrawProbPlugin(BasePlugin):
     """Displays the probabilities for drawing cards from the current
        selection."""
@@ -182,7 +77,6 @@ class BaseDrawProbPlugin(BasePlugin):
         # Look 15 cards into the deck by default, seems good start
         self.iMax = min(15, self.iTotal - self.iOpeningDraw)
         self.iDrawStep = 1  # Increments to use in table
-        self.aAllChoices = _gen_choice_list(self.dSelectedCounts)
         self.iCardsToDraw = min(3, self.iSelectedCount)
 
         if self.iTotal <= self.iOpeningDraw:
@@ -293,9 +187,17 @@ class BaseDrawProbPlugin(BasePlugin):
            oWidget is a dummy placeholder so this method can be called by the
            'connect' signal.
            """
-        # This is messy, but does the job
-        iNumCardRows = len([sum(x) for x in self.aAllChoices if
-                            sum(x) <= self.iCardsToDraw])
+        aSelectOrder = sorted(self.dSelectedCounts.items(),
+                              key=lambda x: (x[1], x[0]), reverse=True)
+        aCardCounts = [x[1] for x in aSelectOrder]
+        # We only need the draws of up to iCardsToDraw cards
+        self.aAllChoices = gen_choice_list(aCardCounts, self.iCardsToDraw)
+        iNumCardRows = len(self.aAllChoices)
+        aDraws = [iCol * self.iDrawStep + self.iOpeningDraw
+                  for iCol in range(self.iNumSteps)]
+        self.aProbs = prob_table(
+            [self._gen_draw(iRow) for iRow in range(iNumCardRows)],
+            [x for x in aDraws if x < self.iTotal], aCardCounts, self.iTotal)
         iNumRows = 2 * iNumCardRows + 5
         if len(self.aAllChoices[0]) > 1:
             iNumCols = 2 * self.iNumSteps + 5
@@ -337,8 +239,6 @@ class BaseDrawProbPlugin(BasePlugin):
             self.oResultsTable.attach(oLabel, iTableCol + 1, iTableCol + 2,
                                       2, 3)
 
-        aSelectOrder = sorted(self.dSelectedCounts.items(),
-                              key=lambda x: (x[1], x[0]), reverse=True)
         for iRow in range(iNumCardRows):
             oLabel = Gtk.Label(self._gen_row_label(iRow, aSelectOrder))
             iTableRow = 2 * iRow + 3
@@ -350,11 +250,10 @@ class BaseDrawProbPlugin(BasePlugin):
             self.oResultsTable.attach(oLabel, 2 + iOffset, 3 + iOffset,
                                       iTableRow + 1, iTableRow + 2)
         # Fill in zero row
-        aCardCounts = [x[1] for x in aSelectOrder]
-        self._fill_row(0, iOffset, True, aCardCounts)
+        self._fill_row(0, iOffset, True)
         # Fill in other rows
         for iRow in range(1, iNumCardRows):
-            self._fill_row(iRow, iOffset, False, aCardCounts)
+            self._fill_row(iRow, iOffset, False)
         self.oResultsTable.show_all()
 
     def _setup_table(self, iNumRows, iNumCols):
@@ -385,20 +284,17 @@ class BaseDrawProbPlugin(BasePlugin):
             self.oResultsTable.attach(oLabel, 2, 3, iBottomRow + 1, iTopRow)
             iBottomRow = iTopRow
 
-    def _fill_row(self, iRow, iOffset, bZero, aCardCounts):
-        """Fill a single row of the results table"""
+    def _fill_row(self, iRow, iOffset, bZero):
+        """Fill a single row of the results table from the probabilities
+           calculated in _fill_table"""
         iTableRow = 2 * iRow + 4
-        aThisDraw = self._gen_draw(iRow)
         for iCol in range(self.iNumSteps):
             iNumDraws = iCol * self.iDrawStep + self.iOpeningDraw
             if iNumDraws < self.iTotal:
-                fProbExact = _multi_hyper_prob(aThisDraw, iNumDraws,
-                                               aCardCounts,
-                                               self.iTotal) * 100
+                fProbExact, fProbAccum = self.aProbs[iRow][iCol]
+                fProbExact *= 100
                 if not bZero:
-                    fProbAccum = _hyper_prob_at_least(aThisDraw, iNumDraws,
-                                                      aCardCounts,
-                                                      self.iTotal) * 100
+                    fProbAccum *= 100
                     oResLabel = Gtk.Label('%3.2f (%3.2f)' % (fProbAccum,
                                                              fProbExact))
                 else:
@@ -10,18 +10,18 @@ from sqlobject import SQLObjectNotFound
 
 from gi.repository import Pango
 
-from ...core.BaseTables import (PhysicalCardSet,
-                                MapPhysicalCardToPhysicalCardSet)
+from ...core.BaseTables import PhysicalCardSet
 from ...core.BaseAdapters import IPhysicalCardSet
+from ...core.CardSetStats import get_card_set_stats
 from ...core.DBSignals import (listen_row_destroy, listen_row_update,
                                listen_row_created, listen_changed,
-                               disconnect_changed,
+                               listen_cards_changed, disconnect_changed,
+                               disconnect_cards_changed,
                                disconnect_row_destroy,
                                disconnect_row_update,
                                disconnect_row_created)
 from ..CellRendererIcons import DisplayOption
-from .BaseExtraColumns import (BaseExtraColumns, get_number,
-                               format_number)
+from .BaseExtraColumns import BaseExtraColumns, format_number
 
 
 class BaseExtraCSListViewColumns(BaseExtraColumns):
@@ -53,9 +53,6 @@ class BaseExtraCSListViewColumns(BaseExtraColumns):
                         '_get_data_description'),
     }
 
-    # Cache keys to invalidate when the card set changes
-    CS_KEYS = ('Total Cards',)
-
     dCardSetListConfig = {}
 
     def __init__(self, *args, **kwargs):
@@ -65,10 +62,12 @@ class BaseExtraCSListViewColumns(BaseExtraColumns):
         listen_row_destroy(self.card_set_added_deleted, PhysicalCardSet)
         listen_row_created(self.card_set_added_deleted, PhysicalCardSet)
         listen_changed(self.card_changed, PhysicalCardSet)
+        listen_cards_changed(self.cards_changed, PhysicalCardSet)
 
     def cleanup(self):
         """Disconnect the database listeners"""
         disconnect_changed(self.card_changed, PhysicalCardSet)
+        disconnect_cards_changed(self.cards_changed, PhysicalCardSet)
         disconnect_row_update(self.card_set_changed, PhysicalCardSet)
         disconnect_row_destroy(self.card_set_added_deleted,
                                PhysicalCardSet)
@@ -92,12 +91,14 @@ class BaseExtraCSListViewColumns(BaseExtraColumns):
         listen_row_destroy(self.card_set_added_deleted, PhysicalCardSet)
         listen_row_created(self.card_set_added_deleted, PhysicalCardSet)
         listen_changed(self.card_changed, PhysicalCardSet)
+        listen_cards_changed(self.cards_changed, PhysicalCardSet)
         # queue a redraw
         self.view.queue_draw()
 
     def prepare_for_db_update(self, _sSignal):
         """Disconnect the database signals during the upgrade"""
         disconnect_changed(self.card_changed, PhysicalCardSet)
+        disconnect_cards_changed(self.cards_changed, PhysicalCardSet)
         disconnect_row_update(self.card_set_changed, PhysicalCardSet)
         disconnect_row_destroy(self.card_set_added_deleted,
                                PhysicalCardSet)
@@ -131,23 +132,25 @@ class BaseExtraCSListViewColumns(BaseExtraColumns):
     # The bGetIcons parameter is needed to avoid icon lookups, etc when
     # sorting
 
-    def _get_data_total(self, sCardSet, bGetIcons=True):
-        """Return the total number of cards in the card set"""
-        def query(oCardSet):
-            """Query the database"""
-            return MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardSetID=oCardSet.id).count()
+    def _get_stat(self, sCardSet, sAttr, bGetIcons):
+        """Return the given attribute from the card set statistics.
 
+           The statistics are shared and kept up to date from the
+           database signals, so we don't need to cache them here."""
         if sCardSet:
-            # lookup totals
-            dInfo = self._dCache[sCardSet]
+            oInfo = get_card_set_stats().get_info(sCardSet)
+            if oInfo is None:
+                return -1, []
             aIcons = []
-            iTotal = get_number(dInfo, 'Total Cards', query)
             if bGetIcons:
                 aIcons = [None]
-            return iTotal, aIcons
+            return getattr(oInfo, sAttr), aIcons
         return -1, []
 
+    def _get_data_total(self, sCardSet, bGetIcons=True):
+        """Return the total number of cards in the card set"""
+        return self._get_stat(sCardSet, 'iTotal', bGetIcons)
+
     def _render_total(self, _oColumn, oCell, _oModel, oIter, _oDummy):
         """display the total"""
         sCardSet = self._get_iter_data(oIter)
@@ -157,19 +160,7 @@ class BaseExtraCSListViewColumns(BaseExtraColumns):
 
     def _get_data_all_children(self, sCardSet, bGetIcons=True):
         """Return the number of children card sets"""
-        def query(oCardSet):
-            """Query the database"""
-            return PhysicalCardSet.selectBy(parentID=oCardSet.id).count()
-
-        if sCardSet:
-            # lookup totals
-            dInfo = self._dCache[sCardSet]
-            aIcons = []
-            iTotal = get_number(dInfo, 'All Children', query)
-            if bGetIcons:
-                aIcons = [None]
-            return iTotal, aIcons
-        return -1, []
+        return self._get_stat(sCardSet, 'iChildren', bGetIcons)
 
     def _render_all_children(self, _oColumn, oCell, _oModel, oIter, _oDummy):
         """display the the number of children"""
@@ -180,19 +171,7 @@ class BaseExtraCSListViewColumns(BaseExtraColumns):
 
     def _get_data_inuse_children(self, sCardSet, bGetIcons=True):
         """Return the number of In-Use children card sets"""
-        def query(oCardSet):
-            """Query the database"""
-            return PhysicalCardSet.selectBy(parentID=oCardSet.id,
-                                            inuse=True).count()
-        if sCardSet:
-            # lookup totals
-            dInfo = self._dCache[sCardSet]
-            aIcons = []
-            iTotal = get_number(dInfo, 'In-Use Children', query)
-            if bGetIcons:
-                aIcons = [None]
-            return iTotal, aIcons
-        return -1, []
+        return self._get_stat(sCardSet, 'iInUseChildren', bGetIcons)
 
     def _render_inuse_children(self, _oColumn, oCell, _oModel, oIter, _oDummy):
         """display the the number of In-Use children"""
@@ -263,16 +242,15 @@ class BaseExtraCSListViewColumns(BaseExtraColumns):
            invalidate the cache when that occurs"""
         self._dCache = {}
 
-    def card_changed(self, oCardSet, _oPhysCard, _iChg):
+    def card_changed(self, _oCardSet, _oPhysCard, _iChg):
         """Listen for card changes.
 
-           We invalidate card counts for the card set if it's in the cache.
+           The card counts come from the card set statistics, which
+           update themselves, so we just need to redraw.
            """
-        sName = oCardSet.name
-        if sName in self._dCache:
-            dInfo = self._dCache[sName]
-            for sKey in self.CS_KEYS:
-                if sKey in dInfo:
-                    del dInfo[sKey]
-            # queue a redraw
-            self.view.queue_draw()
+        # queue a redraw
+        self.view.queue_draw()
+
+    def cards_changed(self, _oCardSet, _dChanges):
+        """Listen for bulk card changes, and redraw."""
+        self.view.queue_draw()
@@ -13,12 +13,16 @@ import tempfile
 from urllib.error import HTTPError
 import zipfile
 
-from gi.repository import Gdk, GdkPixbuf, GObject, Gtk
+from gi.repository import Gdk, GdkPixbuf, GLib, GObject, Gtk
 
 from ...core.BaseTables import PhysicalCard
 from ...core.BaseAdapters import IPrintingName
 
 from ...io.UrlOps import urlopen_with_timeout
+from ...io.ImageDownloader import (ImageDownloader, DownloadJob,
+                                   DownloadJournal, FAILED, JOURNAL_FILE)
+from ...io.ImageCache import (ImageLRUCache, ThumbnailCache, THUMBNAIL_DIR,
+                              get_thumbnail_size)
 
 from ...Utility import prefs_dir, ensure_dir_exists, get_printing_date
 
@@ -56,6 +60,8 @@ DOWNLOAD_IMAGES = 'download images'
 CARD_IMAGE_PATH = 'card image path'
 DOWNLOAD_EXPANSIONS = 'download expansion images'
 LAST_DOWNLOADED = 'last downloaded'
+IMAGE_CACHE_SIZE = 'image cache size'
+CACHE_THUMBNAILS = 'cache scaled images'
 
 
 def _scale_dims(iImageWidth, iImageHeight, iPaneWidth, iPaneHeight):
@@ -74,6 +80,61 @@ def _scale_dims(iImageWidth, iImageHeight, iPaneWidth, iPaneHeight):
     return int(fDestWidth), int(fDestHeight)
 
 
+def _file_time(sFileName):
+    """Return the modification time of the file, or None if it's missing.
+
+       Used in the image cache keys, so updated images are reloaded."""
+    try:
+        return os.path.getmtime(sFileName)
+    except OSError:
+        return None
+
+
+def _pixbuf_size(oPixbuf):
+    """The memory used by a pixbuf, for the image cache"""
+    return oPixbuf.get_byte_length()
+
+
+def _join_pixbufs(aPixbufs):
+    """Combine the images for multi-faced cards side by side.
+
+       All the images are scaled to the size of the largest one."""
+    if len(aPixbufs) == 1:
+        return aPixbufs[0]
+    iWidth = max(x.get_width() for x in aPixbufs)
+    iHeight = max(x.get_height() for x in aPixbufs)
+    oPixbuf = GdkPixbuf.Pixbuf.new(aPixbufs[0].get_colorspace(),
+                                   aPixbufs[0].get_has_alpha(),
+                                   aPixbufs[0].get_bits_per_sample(),
+                                   (iWidth + 4) * len(aPixbufs) - 4,
+                                   iHeight)
+    oPixbuf.fill(0x00000000)  # fill with transparent black
+    iPos = 0
+    for oThisPixbuf in aPixbufs:
+        if oThisPixbuf.get_width() != iWidth or \
+                oThisPixbuf.get_height() != iHeight:
+            oThisPixbuf = oThisPixbuf.scale_simple(
+                iWidth, iHeight, GdkPixbuf.InterpType.HYPER)
+        # Add to the composite pixbuf
+        oThisPixbuf.copy_area(0, 0, iWidth, iHeight, oPixbuf, iPos, 0)
+        iPos += iWidth + 4
+    return oPixbuf
+
+
+def _scale_pixbuf(oPixbuf, tSize):
+    """Scale the image to fit tSize, preserving the aspect ratio"""
+    iDestWidth, iDestHeight = _scale_dims(oPixbuf.get_width(),
+                                          oPixbuf.get_height(),
+                                          tSize[0], tSize[1])
+    iDestWidth = max(iDestWidth, 1)
+    iDestHeight = max(iDestHeight, 1)
+    if (iDestWidth, iDestHeight) == (oPixbuf.get_width(),
+                                     oPixbuf.get_height()):
+        return oPixbuf
+    return oPixbuf.scale_simple(iDestWidth, iDestHeight,
+                                GdkPixbuf.InterpType.HYPER)
+
+
 def check_file(sFileName):
     """Check if file exists and is readable"""
     bRes = True
@@ -233,13 +294,25 @@ class BaseImageFrame(BasicFrame):
         self._sCardName = ''
         self._iZoomMode = Size.FIT
         self._tPaneSize = (0, 0)
-        self._dFailedUrls = {}
+        self._oJournal = DownloadJournal(os.path.join(self._sPrefsPath,
+                                                      JOURNAL_FILE))
         self._dDateCache = {}
         # Slow networks mean we can trigger date downloads multiple times
         # by clicking on different cards before the first one finishes.
         # This can cause isses if the download fails as multiple dialogs can
         # hide each other, making it hard to close everything
         self._dDateDownloading = False
+        # Decoded and scaled images, keyed by the files, zoom mode and
+        # the size we scaled to
+        self._oPixbufCache = ImageLRUCache(self._config_cache_size(),
+                                           _pixbuf_size)
+        self._oThumbnails = ThumbnailCache(os.path.join(self._sPrefsPath,
+                                                        THUMBNAIL_DIR))
+        # The zoom mode and size of the last image shown, used when
+        # loading the images for neighbouring cards
+        self._tLastView = None
+        self._aPrefetch = []
+        self._iPrefetchId = None
 
     type = property(fget=lambda self: "Card Image Frame", doc="Frame Type")
 
@@ -302,40 +375,52 @@ class BaseImageFrame(BasicFrame):
         dMissing, dOutdated = self._find_missing_outdated_images()
         return len(dMissing), len(dOutdated)
 
-    def _download_dict(self, dImages, oLogger):
-        """Download the images in the given dict"""
-        sCurName, sCurPrint = self._sCardName, self._sCurExpPrint
+    def _make_download_jobs(self, dImages):
+        """Create the download jobs for the images in the given dict"""
+        aJobs = []
         for oCard, aToGrab in dImages.items():
             for sName in aToGrab:
                 # make_urls may require card info, so we set it
                 self._sCardName = oCard.abstractCard.canonicalName
                 self._sCurExpPrint = IPrintingName(oCard)
-                # This pops up another progress dialog, but that
-                # is OK
-                self._download_image(sName)
-                # Update the image list progress bar
-                oLogger.info('image download attempted')
-        self._sCardName, self._sCurExpPrint = sCurName, sCurPrint
+                aUrls = self._make_card_urls(sName)
+                if aUrls:
+                    aJobs.append(DownloadJob(sName, aUrls,
+                                             self._dDateCache.get(sName)))
+        return aJobs
 
     def download_all_missing_outdated_images(self):
         """Download all images that are missing from the filesystem."""
         dMissing, dOutdated = self._find_missing_outdated_images()
         if not dMissing and not dOutdated:
             return
-        oProgress = ProgressDialog()
         sCurName, sCurPrint = self._sCardName, self._sCurExpPrint
+        try:
+            aJobs = self._make_download_jobs(dMissing)
+            aJobs.extend(self._make_download_jobs(dOutdated))
+        finally:
+            self._sCardName, self._sCurExpPrint = sCurName, sCurPrint
+        oProgress = ProgressDialog()
         try:
             oLogHandler = SutekhCountLogHandler()
             oLogHandler.set_dialog(oProgress)
-            oLogHandler.set_total(len(dMissing) + len(dOutdated))
+            oLogHandler.set_total(len(aJobs))
             oLogger = logging.Logger('Sutekh card image fetcher')
             oLogger.addHandler(oLogHandler)
             oProgress.set_description("Downloading missing or outdated images")
-            self._download_dict(dMissing, oLogger)
-            self._download_dict(dOutdated, oLogger)
+            oDownloader = ImageDownloader(self._dReqHeaders,
+                                          oJournal=self._oJournal)
+            aResults = oDownloader.download(
+                aJobs, lambda oResult: oLogger.info('image download attempted'))
         finally:
-            self._sCardName, self._sCurExpPrint = sCurName, sCurPrint
             oProgress.destroy()
+        aErrors = [x.oError for x in aResults
+                   if x.sStatus == FAILED and x.oError]
+        if aErrors:
+            logging.warning('%d images failed to download', len(aErrors))
+            # Only report the first error, rather than swamping the user
+            # with dialogs
+            image_gui_error_handler(aErrors[0])
 
     def frame_setup(self):
         """Subscribe to the set_card_text signal"""
@@ -344,14 +429,24 @@ class BaseImageFrame(BasicFrame):
                                         Gtk.IconSize.DIALOG)
         MessageBus.subscribe(MessageBus.Type.CARD_TEXT_MSG, 'set_card_text',
                              self.set_card_text)
+        MessageBus.subscribe(MessageBus.Type.CARD_TEXT_MSG, 'prefetch_cards',
+                             self.prefetch_cards)
         super().frame_setup()
 
     def cleanup(self, bQuit=False):
         """Remove the listener"""
         MessageBus.unsubscribe(MessageBus.Type.CARD_TEXT_MSG, 'set_card_text',
                                self.set_card_text)
+        MessageBus.unsubscribe(MessageBus.Type.CARD_TEXT_MSG,
+                               'prefetch_cards', self.prefetch_cards)
+        self._stop_prefetch()
+        logging.debug('Card image cache: %s',
+                      self._oPixbufCache.get_stats())
         super().cleanup(bQuit)
 
+    image_cache = property(fget=lambda self: self._oPixbufCache,
+                           doc="The cache of decoded images")
+
     def _config_download_images(self):
         """Check if we are configured to download images.
 
@@ -374,6 +469,17 @@ class BaseImageFrame(BasicFrame):
             return self._oImagePlugin.get_config_item(DOWNLOAD_EXPANSIONS)
         return None
 
+    def _config_cache_size(self):
+        """Get the memory limit for the decoded images in bytes"""
+        iSize = self._oImagePlugin.get_config_item(IMAGE_CACHE_SIZE)
+        if iSize is None:
+            iSize = 64
+        return iSize * 1024 * 1024
+
+    def _config_thumbnails(self):
+        """Check if we should keep the scaled images on disk"""
+        return bool(self._oImagePlugin.get_config_item(CACHE_THUMBNAILS))
+
     def _have_expansions(self, sTestPath=''):
         """Test if directory contains expansion/image subdirs"""
         raise NotImplementedError("Implement _have_expansions")
@@ -524,50 +630,77 @@ class BaseImageFrame(BasicFrame):
         aUrls = self._make_card_urls(sFullFilename)
         if not aUrls:
             return False
-        for sUrl in aUrls:
-            if sUrl not in self._dFailedUrls:
-                logging.info('Trying %s as source for %s',
-                             sUrl, sFullFilename)
-                oFile = urlopen_with_timeout(
-                    sUrl, fErrorHandler=image_gui_error_handler,
-                    dHeaders=self._dReqHeaders, bBinary=True)
-            else:
-                # Skip this url, since it's already failed
-                oLastChecked = self._dFailedUrls[sUrl]
-                if datetime.datetime.now() - oLastChecked > datetime.timedelta(hours=2):
-                    # Will retry next time
-                    logging.info('Removing %s from the failed cache', sUrl)
-                    del self._dFailedUrls[sUrl]
-                break
-            if oFile:
-                # Ensure the directory exists, for expansions we
-                # haven't encountered before
-                sBaseDir = os.path.dirname(sFullFilename)
-                ensure_dir_exists(sBaseDir)
-                # Create file
-                # Attempt to fetch the data
-                sImgData = progress_fetch_data(oFile)
-                oFile.close()
-                if sImgData:
-                    oOutFile = open(sFullFilename, 'wb')
-                    oOutFile.write(sImgData)
-                    oOutFile.close()
-                    logging.info('Using image data from %s', sUrl)
-                    # We remove this from the url cache
-                else:
-                    logging.info('Invalid image data from %s', sUrl)
-                    # Got bogus data, so don't retry for a while
-                    self._dFailedUrls[sUrl] = datetime.datetime.now()
-                # Don't attempt to follow other urls
-                break
-            else:
-                # Cache failure
-                self._dFailedUrls[sUrl] = datetime.datetime.now()
+        oDownloader = ImageDownloader(self._dReqHeaders, 1, self._oJournal)
+        # pylint: disable=unbalanced-tuple-unpacking
+        # We only have one job, so we get one result
+        [oResult] = oDownloader.download([DownloadJob(
+            sFullFilename, aUrls, self._dDateCache.get(sFullFilename))])
+        if oResult.sStatus == FAILED and oResult.oError:
+            image_gui_error_handler(oResult.oError)
         return True
 
+    def _get_target_size(self, iHeightOffset):
+        """Return the size to scale the image to for the current zoom
+           mode, or None if the image isn't scaled."""
+        if self._iZoomMode == Size.FIT:
+            # Need to fix aspect ratios
+            return (int(self._oView.get_hadjustment().get_page_size()),
+                    int(self._oView.get_vadjustment().get_page_size() -
+                        iHeightOffset))
+        if self._iZoomMode == Size.VIEW_FIXED:
+            return RATIO
+        return None
+
+    def _get_pixbuf(self, aFullFilenames, iZoomMode, tSize):
+        """Return the image from the files scaled to fit tSize, using the
+           cache if possible."""
+        tKey = (tuple((x, _file_time(x)) for x in aFullFilenames),
+                iZoomMode, tSize)
+        oPixbuf = self._oPixbufCache.get(tKey)
+        if oPixbuf is None:
+            oPixbuf = self._make_pixbuf(aFullFilenames, tSize)
+            self._oPixbufCache.set(tKey, oPixbuf)
+        return oPixbuf
+
+    def _make_pixbuf(self, aFullFilenames, tSize):
+        """Load the image from the files and scale it to fit tSize.
+
+           If the thumbnail cache is enabled, the image is scaled from
+           the thumbnail of the nearest larger fixed size, which is
+           created if needed."""
+        if tSize is None:
+            # Full size, so no scaling
+            return _join_pixbufs([GdkPixbuf.Pixbuf.new_from_file(x)
+                                  for x in aFullFilenames])
+        tThumbSize = None
+        if self._config_thumbnails():
+            tThumbSize = get_thumbnail_size(tSize)
+        oPixbuf = None
+        if tThumbSize:
+            sThumbnail = self._oThumbnails.lookup(aFullFilenames, tThumbSize)
+            if sThumbnail:
+                try:
+                    oPixbuf = GdkPixbuf.Pixbuf.new_from_file(sThumbnail)
+                except GObject.GError:
+                    # Broken thumbnail, so we recreate it
+                    pass
+        if oPixbuf is None:
+            oPixbuf = _join_pixbufs([GdkPixbuf.Pixbuf.new_from_file(x)
+                                     for x in aFullFilenames])
+            if tThumbSize:
+                oPixbuf = _scale_pixbuf(oPixbuf, tThumbSize)
+                sThumbnail = self._oThumbnails.prepare(aFullFilenames,
+                                                       tThumbSize)
+                try:
+                    oPixbuf.savev(sThumbnail, 'png', [], [])
+                    self._oThumbnails.added(sThumbnail)
+                except (GObject.GError, OSError) as oErr:
+                    logging.warning('Unable to save thumbnail: %s', oErr)
+        return _scale_pixbuf(oPixbuf, tSize)
+
     def _load_image(self, aFullFilenames):
         """Load an image into the pane, show broken image if needed"""
-        # pylint: disable=too-many-branches, too-many-locals, too-many-statements
+        # pylint: disable=too-many-branches
         # This is has to handle a number of special cases
         # and subdividing it further won't help clarity
         self._oImage.set_alignment(0.5, 0.5)  # Centre image
@@ -602,60 +735,22 @@ class BaseImageFrame(BasicFrame):
             else:
                 self.oExpPrintLabel.hide()  # config changes can cause this
                 iHeightOffset = 0
-            aPixbufs = []
-            iHeight = 0
-            iWidth = 0
-            for sFullFilename in aFullFilenames:
-                oPixbuf = GdkPixbuf.Pixbuf.new_from_file(sFullFilename)
-                iWidth = max(iWidth, oPixbuf.get_width())
-                iHeight = max(iHeight, oPixbuf.get_height())
-                aPixbufs.append(oPixbuf)
-            if len(aPixbufs) > 1:
-                # Create composite pixbuf
-                oPixbuf = Gdk.Pixbuf(aPixbufs[0].get_colorspace(),
-                                     aPixbufs[0].get_has_alpha(),
-                                     aPixbufs[0].get_bits_per_sample(),
-                                     (iWidth + 4) * len(aPixbufs) - 4,
-                                     iHeight)
-                oPixbuf.fill(0x00000000)  # fill with transparent black
-                iPos = 0
-                for oThisPixbuf in aPixbufs:
-                    # Scale all images to the same size
-                    oThisPixbuf.scale_simple(iWidth, iHeight,
-                                             GdkPixbuf.InterpType.HYPER)
-                    # Add to the composite pixbuf
-                    oThisPixbuf.copy_area(0, 0, iWidth, iHeight,
-                                          oPixbuf, iPos, 0)
-                    iPos += iWidth + 4
-                # Make iWidth the total width
-                iWidth = (iWidth + 4) * len(aPixbufs) - 4
-            else:
-                oPixbuf = aPixbufs[0]
+            tSize = self._get_target_size(iHeightOffset)
             if self._iZoomMode == Size.FIT:
-                # Need to fix aspect ratios
-                iPaneHeight = (self._oView.get_vadjustment().get_page_size() -
-                               iHeightOffset)
-                iPaneWidth = self._oView.get_hadjustment().get_page_size()
                 # don't centre image under label
                 self._oImage.set_alignment(0, 0.5)
-                iDestWidth, iDestHeight = _scale_dims(iWidth, iHeight,
-                                                      iPaneWidth, iPaneHeight)
-                if iDestWidth > 0 and iDestHeight > 0:
-                    self._oImage.set_from_pixbuf(
-                        oPixbuf.scale_simple(iDestWidth, iDestHeight,
-                                             GdkPixbuf.InterpType.HYPER))
-                    self._tPaneSize = (
-                        self._oView.get_hadjustment().get_page_size(),
-                        self._oView.get_vadjustment().get_page_size())
-            elif self._iZoomMode == Size.VIEW_FIXED:
-                iDestWidth, iDestHeight = _scale_dims(iWidth, iHeight,
-                                                      RATIO[0], RATIO[1])
-                self._oImage.set_from_pixbuf(
-                    oPixbuf.scale_simple(iDestWidth, iDestHeight,
-                                         GdkPixbuf.InterpType.HYPER))
-            else:
-                # Full size, so no scaling
-                self._oImage.set_from_pixbuf(oPixbuf)
+                if tSize[0] <= 0 or tSize[1] <= 0:
+                    # Pane not sized yet
+                    self._oImage.queue_draw()
+                    return
+            self._oImage.set_from_pixbuf(self._get_pixbuf(aFullFilenames,
+                                                          self._iZoomMode,
+                                                          tSize))
+            self._tLastView = (self._iZoomMode, tSize)
+            if self._iZoomMode == Size.FIT:
+                self._tPaneSize = (
+                    self._oView.get_hadjustment().get_page_size(),
+                    self._oView.get_vadjustment().get_page_size())
         except GObject.GError:
             self._oImage.set_from_icon_name("image-missing",
                                             Gtk.IconSize.DIALOG)
@@ -671,8 +766,12 @@ class BaseImageFrame(BasicFrame):
     def update_config_path(self, sNewPath):
         """Update the path we use to search for expansions."""
         self._sPrefsPath = sNewPath
+        self._oJournal = DownloadJournal(os.path.join(sNewPath, JOURNAL_FILE))
         self._oImagePlugin.set_config_item(CARD_IMAGE_PATH, sNewPath)
         self._bShowExpansions = self._have_expansions()
+        self._oThumbnails = ThumbnailCache(os.path.join(sNewPath,
+                                                        THUMBNAIL_DIR))
+        self._oPixbufCache.clear()
 
     def set_card_text(self, _sSignal, oPhysCard):
         """Set the image in response to a set card name event."""
@@ -710,6 +809,43 @@ class BaseImageFrame(BasicFrame):
                     self._iExpansionPos = 0
         self._redraw(False)
 
+    def prefetch_cards(self, _sSignal, aPhysCards):
+        """Load the images for the cards likely to be shown next in the
+           background, so they can be shown quickly.
+
+           Only images we already have are loaded, and any earlier
+           requests which haven't been handled yet are dropped."""
+        self._aPrefetch = []
+        if self._tLastView is None:
+            # We don't know what size to scale to yet
+            return
+        iZoomMode, tSize = self._tLastView
+        for oPhysCard in aPhysCards:
+            aFullFilenames = self.lookup_filename(oPhysCard)
+            if all(check_file(x) for x in aFullFilenames):
+                self._aPrefetch.append((aFullFilenames, iZoomMode, tSize))
+        if self._aPrefetch and self._iPrefetchId is None:
+            self._iPrefetchId = GLib.idle_add(self._do_prefetch)
+
+    def _do_prefetch(self):
+        """Load the next queued image into the cache when idle"""
+        if not self._aPrefetch:
+            self._iPrefetchId = None
+            return False
+        aFullFilenames, iZoomMode, tSize = self._aPrefetch.pop(0)
+        try:
+            self._get_pixbuf(aFullFilenames, iZoomMode, tSize)
+        except GObject.GError as oErr:
+            logging.info('Unable to prefetch %s: %s', aFullFilenames, oErr)
+        return True
+
+    def _stop_prefetch(self):
+        """Cancel any queued prefetches"""
+        self._aPrefetch = []
+        if self._iPrefetchId is not None:
+            GLib.source_remove(self._iPrefetchId)
+            self._iPrefetchId = None
+
     def do_cycle_expansion(self, iDir):
         """Change the expansion image to a different one in the list."""
         if len(self._aExpPrints) < 2 or not self._bShowExpansions:
@@ -866,6 +1002,9 @@ class BaseImagePlugin(BasePlugin):
 
     dGlobalConfig = {
         CARD_IMAGE_PATH: 'string(default=None)',
+        # Memory limit for the decoded images, in MB
+        IMAGE_CACHE_SIZE: 'integer(min=0, default=64)',
+        CACHE_THUMBNAILS: 'boolean(default=False)',
     }
 
     _sMenuFlag = BaseImageFrame.sMenuFlag
@@ -952,7 +1091,7 @@ class BaseImagePlugin(BasePlugin):
         """Download all the missing images"""
         iMissing, iOutdated = self.image_frame.count_missing_outdated_images()
         if not iMissing and not iOutdated:
-            _iMesg = do_complaint_buttons(
+            do_complaint_buttons(
                 "All images already downloaded.", Gtk.MessageType.INFO,
                 ("_OK", Gtk.ResponseType.OK))
             return
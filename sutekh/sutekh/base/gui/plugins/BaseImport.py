@@ -9,6 +9,7 @@
 from gi.repository import Gtk
 from ...io.UrlOps import urlopen_with_timeout
 from ...io.EncodedFile import EncodedFile
+from ...io.BaseGuessFileParser import GUESS_FILE_FORMAT
 from ...core.BaseTables import PhysicalCardSet
 from ..BasePluginManager import BasePlugin
 from ..SutekhDialog import SutekhDialog
@@ -16,8 +17,6 @@ from ..GuiCardSetFunctions import import_cs
 from ..SutekhFileWidget import SutekhFileWidget
 from ..GuiDataPack import gui_error_handler
 
-GUESS_FILE_FORMAT = 'Guess File Format'
-
 
 class BaseImport(BasePlugin):
     """Import cardsets in some format.
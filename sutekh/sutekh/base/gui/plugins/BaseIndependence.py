@@ -16,6 +16,7 @@ from ..CardSetsListView import CardSetsListView
 from ..SutekhDialog import (SutekhDialog, NotebookDialog,
                             do_info_message, do_complaint_error)
 from ..AutoScrolledWindow import AutoScrolledWindow
+from ..BackgroundJob import run_job, JobCancelled
 from ..GuiCardSetFunctions import create_card_set
 
 
@@ -244,12 +245,21 @@ class BaseIndependence(BasePlugin):
     def _test_card_sets(self, aCardSetNames, oParentCS, bIgnoreExpansions):
         """Test if the Card Sets are actaully independent by
            looking for cards common to the sets"""
-        dCards = {}
-        for sCardSetName in aCardSetNames:
-            oCS = IPhysicalCardSet(sCardSetName)
-            _get_cards(oCS, dCards, bIgnoreExpansions)
-        dParent = {}
-        _get_cards(oParentCS, dParent, bIgnoreExpansions)
+        def _gather_cards(oProgress):
+            """Get the cards in the card sets and the parent"""
+            dCards = {}
+            for iNum, sCardSetName in enumerate(aCardSetNames):
+                oProgress.update_bar(iNum / (len(aCardSetNames) + 1))
+                oCS = IPhysicalCardSet(sCardSetName)
+                _get_cards(oCS, dCards, bIgnoreExpansions)
+            dParent = {}
+            _get_cards(oParentCS, dParent, bIgnoreExpansions)
+            return dCards, dParent
+
+        try:
+            dCards, dParent = run_job('Checking card sets', _gather_cards)
+        except JobCancelled:
+            return
         dMissing = {}
         for oCard, oInfo in dCards.items():
             if oCard not in dParent:
@@ -5,8 +5,7 @@
 """Force all cards which can only belong to 1 expansion to that expansion"""
 
 from gi.repository import Gtk
-from ...core.BaseTables import (PhysicalCardSet,
-                                MapPhysicalCardToPhysicalCardSet)
+from ...core.BaseTables import PhysicalCardSet
 from ...core.BaseAdapters import (IExpansion, IPhysicalCard,
                                   IAbstractCard, IPrinting)
 from ...core.DBSignals import send_changed_signal
@@ -76,8 +75,9 @@ class BaseSetExpansion(BasePlugin):
         """Iterate over the cards, setting the correct expansion"""
         # Dealing with selected cards, so filter list is the correct one
         oCS = self._get_card_set()
-        for oCard in self.model.get_card_iterator(
-                self.model.get_current_filter()):
+        aCards = list(self.model.get_card_iterator(
+            self.model.get_current_filter()).counted_rows())
+        for oCard, iCnt in aCards:
             oAbsCard = IAbstractCard(oCard)
             if oAbsCard.id in dSelected:
                 oPhysCard = IPhysicalCard(oCard)
@@ -86,12 +86,12 @@ class BaseSetExpansion(BasePlugin):
                 if oPhysCard.id in dSelected[oAbsCard.id]:
                     oNewCard = IPhysicalCard((oAbsCard, oPrinting))
                     # Card in the selection, so replace with changed card
-                    MapPhysicalCardToPhysicalCardSet.delete(oCard.id)
-                    oCS.addPhysicalCard(oNewCard.id)
+                    oCS.removePhysicalCard(oPhysCard.id)
+                    oCS.addPhysicalCard(oNewCard.id, iCnt)
                     oCS.syncUpdate()
                     # Handle updates
-                    send_changed_signal(oCS, oPhysCard, -1)
-                    send_changed_signal(oCS, oNewCard, +1)
+                    send_changed_signal(oCS, oPhysCard, -iCnt)
+                    send_changed_signal(oCS, oNewCard, +iCnt)
         self.view.reload_keep_expanded()
 
     def find_common_expansions(self, aCardList):
@@ -114,11 +114,9 @@ class BaseCardXMLWriter(BaseXMLWriter):
     sTypeTag = "none"
     sVersionTag = "none"
 
-    def _gen_tree(self, oHolder):
-        """Convert the card set wrapped in oHolder to an ElementTree."""
-        dPhys = {}
-        bInUse = oHolder.inuse
-
+    def _gen_root(self, oHolder):
+        """Create the root element, with the card set details from oHolder,
+           but without the cards."""
         oRoot = Element(self.sTypeTag,
                         name=oHolder.name)
         oRoot.attrib[self.sVersionTag] = self.sMyVersion
@@ -133,8 +131,27 @@ class BaseCardXMLWriter(BaseXMLWriter):
         if oHolder.parent:
             oRoot.attrib['parent'] = oHolder.parent
 
-        if bInUse:
+        if oHolder.inuse:
             oRoot.attrib['inuse'] = 'Yes'
+        return oRoot
+
+    def _add_cards(self, oRoot, dPhys):
+        """Add the card elements to oRoot.
+
+           dPhys maps (card name, expansion name, printing name) to the
+           card count."""
+        # we sort by card name & expansion, as makes results more predictable
+        for tKey in sorted(dPhys):
+            iNum = dPhys[tKey]
+            sName, sExpName, sPrinting = tKey
+            SubElement(oRoot, 'card', name=sName, count=str(iNum),
+                       expansion=sExpName, printing=sPrinting)
+
+    def _gen_tree(self, oHolder):
+        """Convert the card set wrapped in oHolder to an ElementTree."""
+        dPhys = {}
+
+        oRoot = self._gen_root(oHolder)
 
         for oCard in oHolder.cards:
             # ElementTree 1.2 doesn't support searching for attributes,
@@ -153,10 +170,24 @@ class BaseCardXMLWriter(BaseXMLWriter):
             dPhys.setdefault(tKey, 0)
             dPhys[tKey] += 1
 
-        # we sort by card name & expansion, as makes results more predictable
-        for tKey in sorted(dPhys):
-            iNum = dPhys[tKey]
-            sName, sExpName, sPrinting = tKey
-            SubElement(oRoot, 'card', name=sName, count=str(iNum),
-                       expansion=sExpName, printing=sPrinting)
+        self._add_cards(oRoot, dPhys)
         return oRoot
+
+    def write_counts(self, fOut, oHolder, aCounts):
+        """Write the card set to fOut, using the card counts in aCounts
+           rather than the cards in oHolder.
+
+           aCounts is a list of (card name, expansion name, printing name,
+           count) tuples, as returned by get_card_name_counts, so we
+           avoid loading all the physical cards for large card sets."""
+        dPhys = {}
+        oRoot = self._gen_root(oHolder)
+        for sName, sExpName, sPrinting, iCount in aCounts:
+            if sExpName is None:
+                sExpName = 'None Specified'
+            if sPrinting is None:
+                sPrinting = 'No Printing'
+            tKey = (sName, sExpName, sPrinting)
+            dPhys[tKey] = dPhys.get(tKey, 0) + iCount
+        self._add_cards(oRoot, dPhys)
+        self._write_tree(fOut, oRoot)
@@ -13,6 +13,9 @@
 from io import StringIO
 from ..core.CardSetHolder import CardSetHolder
 
+# The name used for this parser in the lists of formats
+GUESS_FILE_FORMAT = 'Guess File Format'
+
 
 class BaseGuessFileParser:
     """Parser which guesses the file type"""
@@ -17,14 +17,20 @@ except ImportError:
     from xml.parsers.expat import ExpatError as ParseError
 # pylint: enable=no-name-in-module, import-error
 
+from ..core.CardSetUtilities import check_cs_exists
+
 
 class BaseIdXMLFile:
     """Tries to identify the XML file type.
 
        Parse the file into an ElementTree, and then tests the Root element
        to see which xml file it matches.
+
+       If bCheckDatabase is False, we don't look up the card sets in the
+       database, and exists and parent_exists are always False.
        """
-    def __init__(self):
+    def __init__(self, bCheckDatabase=True):
+        self._bCheckDatabase = bCheckDatabase
         self._bSetExists = self._bParentExists = False
         self._sType = 'Unknown'
         self._sName = self._sParent = None
@@ -54,6 +60,13 @@ class BaseIdXMLFile:
                     doc='The type of the XML data')
     # pylint: enable=protected-access
 
+    def _cs_exists(self, sName):
+        """Check if the card set exists in the database, if we're
+           checking the database."""
+        if not self._bCheckDatabase:
+            return False
+        return check_cs_exists(sName)
+
     def _identify_tree(self, oTree):
         """Process the ElementTree to identify the XML file type."""
         raise NotImplementedError("provide _identify_tree")
@@ -75,6 +88,10 @@ class BaseIdXMLFile:
             return
         self._identify_tree(oTree)
 
+    def id_tree(self, oTree):
+        """Identify an already parsed ElementTree"""
+        self._identify_tree(oTree)
+
     def parse(self, fIn, _oDummyHolder=None):
         """Parse the file fIn into the ElementTree."""
         try:
@@ -9,10 +9,11 @@
 """Provide a ZipFile class which wraps the functionlity from zipfile
    Sutekh needs."""
 
-import zipfile
 import datetime
-from io import StringIO
+import zipfile
+from io import StringIO, TextIOWrapper
 from logging import Logger
+from xml.etree.ElementTree import ElementTree, fromstring, ParseError
 
 from sqlobject import sqlhub
 
@@ -21,7 +22,7 @@ from ..core.BaseAdapters import IPhysicalCardSet
 from ..core.CardLookup import DEFAULT_LOOKUP
 from ..core.CardSetHolder import CachedCardSetHolder, CardSetWrapper
 from ..core.DBUtility import refresh_tables
-from ..core.CardSetUtilities import check_cs_exists
+from ..core.CardSetUtilities import check_cs_exists, get_card_name_counts
 
 
 def parse_string(oParser, sIn, oHolder):
@@ -46,6 +47,25 @@ def write_string(oWriter, oPCSet):
     return oString
 
 
+def _parse_entry(cIdentifyFile, sFilename, sData):
+    """Identify and parse a single zip file entry.
+
+       Returns the filename, the identifier and the filled in
+       CachedCardSetHolder, or None if the entry isn't a card set."""
+    oIdParser = cIdentifyFile(bCheckDatabase=False)
+    try:
+        oTree = ElementTree(fromstring(sData))
+    except ParseError:
+        # Not an XML file, so the identifier stays 'Unknown'
+        return sFilename, oIdParser, None
+    oIdParser.id_tree(oTree)
+    if not oIdParser.can_parse():
+        return sFilename, oIdParser, None
+    oHolder = CachedCardSetHolder()
+    oIdParser.get_parser().parse_tree(oTree, oHolder)
+    return sFilename, oIdParser, oHolder
+
+
 class ZipEntryProxy(StringIO):
     """A proxy that provides a suitable open method so
        these can be passed to the card reading routines."""
@@ -83,7 +103,11 @@ class BaseZipFileWrapper:
         self.oZip = None
 
     def _write_pcs_list_to_zip(self, aPCSList, oLogger):
-        """Write the given list of card sets to the zip file"""
+        """Write the given list of card sets to the zip file.
+
+           Each card set is written straight into the zip file, using
+           a single query for the card set contents, so we never need
+           to hold more than one card set in memory."""
         bClose = False
         tTime = datetime.datetime.now().timetuple()
         if self.oZip is None:
@@ -96,7 +120,6 @@ class BaseZipFileWrapper:
             # subclasses will provide a callable cWriter
             oWriter = self._cWriter()
             # pylint: enable=not-callable
-            oString = write_string(oWriter, oPCSet)
             sZName = sZName.replace(" ", "_")
             sZName = sZName.replace("/", "_")
             sZipName = '%s.xml' % sZName
@@ -109,17 +132,61 @@ class BaseZipFileWrapper:
             # python bugtracker. Docs say this is safe on all platforms
             oInfoObj.external_attr = 0o600 << 16
             oInfoObj.compress_type = zipfile.ZIP_DEFLATED
-            self.oZip.writestr(oInfoObj, oString)
+            with TextIOWrapper(self.oZip.open(oInfoObj, 'w'),
+                               encoding='ascii') as oEntry:
+                oWriter.write_counts(oEntry, CardSetWrapper(oPCSet),
+                                     get_card_name_counts(oPCSet))
             oLogger.info('PCS: %s written', oPCSet.name)
         if bClose:
             self._close_zip()
         return aList
 
+    def _parse_entries(self):
+        """Identify and parse all the entries in the zip file.
+
+           Returns a list of (filename, identifier, holder) tuples, in
+           the order of the zip file, with holder None for entries which
+           aren't card sets."""
+        return [_parse_entry(self._cIdentifyFile, oItem.filename,
+                             self.oZip.read(oItem.filename))
+                for oItem in self.oZip.infolist()]
+
+    def _sort_entries(self, aEntries):
+        """Sort the card set entries so parents come before their
+           children.
+
+           Returns the sorted list and the list of entries that can't be
+           placed, because their parents are missing or form a cycle."""
+        dChildren = {}
+        dWaiting = {}
+        aReady = []
+        aNames = set(oHolder.name for _sFile, _oId, oHolder in aEntries)
+        for tEntry in aEntries:
+            sParent = tEntry[2].parent
+            if sParent and (sParent in aNames or not
+                            check_cs_exists(sParent)):
+                dChildren.setdefault(sParent, []).append(tEntry)
+                dWaiting[id(tEntry)] = tEntry
+            else:
+                aReady.append(tEntry)
+        aSorted = []
+        # aReady grows as we go, so we keep the zip file order as far as
+        # possible
+        for tEntry in aReady:
+            aSorted.append(tEntry)
+            for tChild in dChildren.pop(tEntry[2].name, []):
+                del dWaiting[id(tChild)]
+                aReady.append(tChild)
+        aStuck = [x for x in aEntries if id(x) in dWaiting]
+        return aSorted, aStuck
+
     def do_restore_from_zip(self, oCardLookup=DEFAULT_LOOKUP,
                             oLogHandler=None):
-        """Recover data from the zip file"""
+        """Recover data from the zip file.
+
+           Each entry is parsed once, and the card sets are then created
+           in dependency order in a single transaction."""
         self._aWarnings = []
-        bTablesRefreshed = False
         self._bForceReparent = False
         self._open_zip_for_read()
         oLogger = Logger('Restore zip file')
@@ -127,82 +194,53 @@ class BaseZipFileWrapper:
             oLogger.addHandler(oLogHandler)
             if hasattr(oLogHandler, 'set_total'):
                 oLogHandler.set_total(len(self.oZip.infolist()))
+        try:
+            aParsed = self._parse_entries()
+        finally:
+            self._close_zip()
         # We do this so we can accomodate user created zipfiles,
         # that don't nessecarily have the ordering we want
-        # pylint: disable=not-callable
-        # subclasses will provide a callable cIdentifyFile
-        oIdParser = self._cIdentifyFile()
-        # pylint: enable=not-callable
-        # check that the zip file contains at least 1 Physical Card Set
-        for oItem in self.oZip.infolist():
-            oData = self.oZip.read(oItem.filename)
-            oIdParser.parse_string(oData)
-            if not bTablesRefreshed and self._check_refresh(oIdParser):
-                # We delete the Physical Card Sets
-                # Since this is restoring the contents of a zip file,
-                # hopefully this is safe to do
-                # if we fail, the database will be in an inconsitent state,
-                # but that's going to be true anyway
-                refresh_tables(PHYSICAL_SET_LIST, sqlhub.processConnection)
-                bTablesRefreshed = True
+        bRefresh = False
+        aEntries = []
+        for sFilename, oIdParser, oHolder in aParsed:
+            if self._check_refresh(oIdParser):
+                bRefresh = True
             if self._should_force_reparent(oIdParser):
                 self._bForceReparent = True
-        if not bTablesRefreshed:
+            if oHolder is not None:
+                aEntries.append((sFilename, oIdParser, oHolder))
+        # check that the zip file contains at least 1 Physical Card Set
+        if not bRefresh:
             raise IOError("No valid card sets found in the zip file.")
-        # We try and restore the card sets ensuring parents exist
+        for _sFilename, oIdParser, oHolder in aEntries:
+            if self._check_forced_reparent(oIdParser):
+                # We need to reparent this card set
+                oHolder.parent = 'My Collection'
+        # We delete the Physical Card Sets
+        # Since this is restoring the contents of a zip file,
+        # hopefully this is safe to do
+        # if we fail, the database will be in an inconsitent state,
+        # but that's going to be true anyway
+        refresh_tables(PHYSICAL_SET_LIST, sqlhub.processConnection)
+        aSorted, aStuck = self._sort_entries(aEntries)
         dLookupCache = {}
-        aToRead = self.oZip.infolist()
-        while aToRead:
-            aToRead = self.read_items(aToRead, oCardLookup, oLogger,
-                                      dLookupCache)
-        self._close_zip()
-
-    def read_items(self, aList, oCardLookup, oLogger, dLookupCache):
-        """Read a list of CardSet items from the card list, reaturning
-           a list of those that couldn't be read because their parents
-           weren't read first"""
-        aToRead = []
-        # pylint: disable=not-callable
-        # subclasses will provide a callable cIdentifyFile
-        oIdParser = self._cIdentifyFile()
-        # pylint: enable=not-callable
         oOldConn = sqlhub.processConnection
         oTrans = oOldConn.transaction()
         sqlhub.processConnection = oTrans
-        for oItem in aList:
-            bReparent = False
-            oData = self.oZip.read(oItem.filename)
-            oIdParser.parse_string(oData)
-            if not oIdParser.can_parse():
-                # Unreadable item, so skip it
-                continue
-            # We check whether the parent has been read already
-            if not oIdParser.parent_exists:
-                aToRead.append(oItem)
-                continue
-            if self._check_forced_reparent(oIdParser):
-                # We need to reparent this card set
-                if check_cs_exists('My Collection'):
-                    bReparent = True
-                else:
-                    # Card Collection not there yet, so delay
-                    aToRead.append(oItem)
-                    continue
-            oParser = oIdParser.get_parser()
-            oHolder = CachedCardSetHolder()
-            parse_string(oParser, oData, oHolder)
-            if bReparent:
-                oHolder.parent = 'My Collection'
-            oHolder.create_pcs(oCardLookup, dLookupCache)
-            self._aWarnings.extend(oHolder.get_warnings())
-            oLogger.info('%s %s read', oIdParser.type, oItem.filename)
-        oTrans.commit(close=True)
-        sqlhub.processConnection = oOldConn
-        if len(aToRead) == len(aList):
-            # We were unable to read any items this loop, so we fail
+        try:
+            for sFilename, oIdParser, oHolder in aSorted:
+                oHolder.create_pcs(oCardLookup, dLookupCache)
+                self._aWarnings.extend(oHolder.get_warnings())
+                oLogger.info('%s %s read', oIdParser.type, sFilename)
+            oTrans.commit(close=True)
+        except Exception:
+            oTrans.rollback()
+            raise
+        finally:
+            sqlhub.processConnection = oOldConn
+        if aStuck:
             raise IOError('Card sets with unstatisfiable parents %s' %
-                          ','.join([x.filename for x in aToRead]))
-        return aToRead
+                          ','.join([x[0] for x in aStuck]))
 
     # Helper methods for influencing how the zip files are handled
     # subclasses should override these
@@ -90,6 +90,11 @@ class BaseXMLParser:
             raise IOError('Not an valid XML file') from oExp
         self._convert_tree(oHolder)
 
+    def parse_tree(self, oTree, oHolder):
+        """Fill in the holder from an already parsed ElementTree"""
+        self._oTree = oTree
+        self._convert_tree(oHolder)
+
 
 class BaseLineParser(CardSetParser):
     """Base class for simple line-by-line parsers.
@@ -123,7 +128,10 @@ class BaseXMLWriter(CardSetWriter):
     def write(self, fOut, oHolder):
         """Write the holder contents as pretty XML to the given file-like
            object fOut"""
-        oRoot = self._gen_tree(oHolder)
+        self._write_tree(fOut, self._gen_tree(oHolder))
+
+    def _write_tree(self, fOut, oRoot):
+        """Write the XML tree as pretty XML to fOut"""
         pretty_xml(oRoot)
         sData = tostring(oRoot)
         # Standardise quotes
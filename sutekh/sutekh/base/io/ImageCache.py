@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Caches for the decoded and scaled card images.
+
+   ImageLRUCache keeps the most recently used images in memory, up to a
+   total size, so moving back and forth through a card list doesn't
+   decode and rescale the same images over and over.
+
+   ThumbnailCache manages a directory of pre-scaled copies of the images,
+   so the scaled images survive restarts. It only deals with the file
+   names - reading and writing the images is left to the caller. The
+   thumbnails are made at a few fixed sizes, so resizing the pane
+   doesn't create a new set of thumbnails, and the least recently used
+   thumbnails are removed when the directory grows too large.
+
+   Neither cache knows anything about the image format, so they can be
+   used and tested without the GUI."""
+
+import hashlib
+import logging
+import os
+import shutil
+from collections import OrderedDict
+
+from ..Utility import ensure_dir_exists
+
+# Default memory limit for the decoded images, in bytes
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+# Name of the thumbnail directory, kept with the images
+THUMBNAIL_DIR = '.thumbnails'
+# The thumbnails are scaled to fit squares of these sizes. Larger images
+# are always scaled from the original.
+THUMBNAIL_SIZES = (256, 384, 512, 768, 1024)
+# Default limit on the total size of the thumbnails, in bytes
+DEFAULT_THUMBNAIL_DIR_SIZE = 256 * 1024 * 1024
+# When pruning, we remove thumbnails until we're below this fraction of
+# the limit, so we don't need to prune again for every new thumbnail
+PRUNE_FRACTION = 0.75
+
+
+def get_thumbnail_size(tSize):
+    """Return the thumbnail size to use for images scaled to fit tSize.
+
+       This is the smallest of the fixed sizes that's at least as large
+       as tSize, or None if tSize is larger than all of them."""
+    iLargest = max(tSize)
+    for iSize in THUMBNAIL_SIZES:
+        if iSize >= iLargest:
+            return (iSize, iSize)
+    return None
+
+
+class ImageLRUCache:
+    """Size bounded least recently used cache.
+
+       fSize is called with each value to find how much it counts towards
+       iMaxSize. Values bigger than iMaxSize are never kept.
+
+       The hit, miss and eviction counts are kept, so the cache size can
+       be tuned."""
+
+    def __init__(self, iMaxSize=DEFAULT_CACHE_SIZE, fSize=None):
+        self._dCache = OrderedDict()
+        self._iMaxSize = iMaxSize
+        self._fSize = fSize if fSize else lambda _oValue: 1
+        self.iSize = 0
+        self.iHits = 0
+        self.iMisses = 0
+        self.iEvictions = 0
+
+    def __len__(self):
+        return len(self._dCache)
+
+    def __contains__(self, tKey):
+        """Check for the key without changing the usage order or counts"""
+        return tKey in self._dCache
+
+    def get(self, tKey):
+        """Return the cached value for tKey, or None if it isn't cached"""
+        oEntry = self._dCache.get(tKey)
+        if oEntry is None:
+            self.iMisses += 1
+            return None
+        self.iHits += 1
+        self._dCache.move_to_end(tKey)
+        return oEntry[0]
+
+    def set(self, tKey, oValue):
+        """Add oValue to the cache, discarding the least recently used
+           entries if needed to make space."""
+        self.discard(tKey)
+        iSize = self._fSize(oValue)
+        if iSize > self._iMaxSize:
+            return
+        self._dCache[tKey] = (oValue, iSize)
+        self.iSize += iSize
+        self._shrink()
+
+    def discard(self, tKey):
+        """Remove tKey from the cache if present"""
+        oEntry = self._dCache.pop(tKey, None)
+        if oEntry is not None:
+            self.iSize -= oEntry[1]
+
+    def set_max_size(self, iMaxSize):
+        """Change the size limit, discarding entries if needed"""
+        self._iMaxSize = iMaxSize
+        self._shrink()
+
+    def _shrink(self):
+        """Discard the oldest entries until we're within the size limit"""
+        while self.iSize > self._iMaxSize and self._dCache:
+            _tKey, (_oValue, iSize) = self._dCache.popitem(last=False)
+            self.iSize -= iSize
+            self.iEvictions += 1
+
+    def clear(self):
+        """Empty the cache. The counts are kept."""
+        self._dCache.clear()
+        self.iSize = 0
+
+    def get_stats(self):
+        """Return a dictionary of the cache counts"""
+        return {
+            'entries': len(self._dCache),
+            'size': self.iSize,
+            'max size': self._iMaxSize,
+            'hits': self.iHits,
+            'misses': self.iMisses,
+            'evictions': self.iEvictions,
+        }
+
+
+class ThumbnailCache:
+    """Directory of pre-scaled images.
+
+       Each thumbnail is named from a hash of the source file names and
+       the size, and is only used if it's newer than all the source
+       files, so replaced images are rescaled. The sizes should be
+       chosen with get_thumbnail_size.
+
+       Using a thumbnail updates its modification time, and the oldest
+       thumbnails are removed when the total size exceeds iMaxSize."""
+
+    def __init__(self, sDir, iMaxSize=DEFAULT_THUMBNAIL_DIR_SIZE):
+        self._sDir = sDir
+        self._iMaxSize = iMaxSize
+        # Total size of the thumbnails, found when first needed
+        self._iSize = None
+        self.iHits = 0
+        self.iMisses = 0
+        self.iPruned = 0
+
+    def get_name(self, aFileNames, tSize):
+        """Return the thumbnail file name for the images scaled to tSize"""
+        oHash = hashlib.sha1()
+        for sFileName in aFileNames:
+            oHash.update(os.path.abspath(sFileName).encode('utf8'))
+            oHash.update(b'\0')
+        oHash.update(('%dx%d' % tuple(tSize)).encode('ascii'))
+        sHash = oHash.hexdigest()
+        return os.path.join(self._sDir, sHash[:2], sHash[2:] + '.png')
+
+    def lookup(self, aFileNames, tSize):
+        """Return the thumbnail file name if there is a current thumbnail,
+           otherwise None."""
+        sThumbnail = self.get_name(aFileNames, tSize)
+        try:
+            fThumbTime = os.path.getmtime(sThumbnail)
+            bCurrent = all(os.path.getmtime(x) <= fThumbTime
+                           for x in aFileNames)
+        except OSError:
+            bCurrent = False
+        if bCurrent:
+            self.iHits += 1
+            try:
+                # Mark the thumbnail as recently used
+                os.utime(sThumbnail)
+            except OSError:
+                pass
+            return sThumbnail
+        self.iMisses += 1
+        return None
+
+    def prepare(self, aFileNames, tSize):
+        """Return the file name to save a new thumbnail to, creating the
+           directory if needed."""
+        sThumbnail = self.get_name(aFileNames, tSize)
+        ensure_dir_exists(os.path.dirname(sThumbnail))
+        return sThumbnail
+
+    def added(self, sThumbnail):
+        """Record that a new thumbnail has been saved to sThumbnail,
+           removing old thumbnails if the directory is now too large."""
+        if self._iSize is None:
+            # The scan includes the new thumbnail
+            self._iSize = sum(x[1] for x in self._list_thumbnails())
+        else:
+            try:
+                self._iSize += os.path.getsize(sThumbnail)
+            except OSError:
+                pass
+        if self._iSize > self._iMaxSize:
+            self.prune()
+
+    def prune(self, iTargetSize=None):
+        """Remove the least recently used thumbnails until the total
+           size is below iTargetSize, which defaults to PRUNE_FRACTION of
+           the size limit."""
+        if iTargetSize is None:
+            iTargetSize = int(self._iMaxSize * PRUNE_FRACTION)
+        aThumbnails = sorted(self._list_thumbnails(), key=lambda x: x[2])
+        iSize = sum(x[1] for x in aThumbnails)
+        for sThumbnail, iFileSize, _fTime in aThumbnails:
+            if iSize <= iTargetSize:
+                break
+            try:
+                os.remove(sThumbnail)
+            except OSError as oErr:
+                logging.warning('Unable to remove thumbnail %s: %s',
+                                sThumbnail, oErr)
+                continue
+            iSize -= iFileSize
+            self.iPruned += 1
+        self._iSize = iSize
+
+    def _list_thumbnails(self):
+        """Return a list of (file name, size, modification time) for the
+           thumbnails."""
+        aThumbnails = []
+        if not os.path.isdir(self._sDir):
+            return aThumbnails
+        for sSubDir in os.listdir(self._sDir):
+            sPath = os.path.join(self._sDir, sSubDir)
+            if not os.path.isdir(sPath):
+                continue
+            for sName in os.listdir(sPath):
+                sThumbnail = os.path.join(sPath, sName)
+                try:
+                    oStat = os.stat(sThumbnail)
+                except OSError:
+                    continue
+                aThumbnails.append((sThumbnail, oStat.st_size,
+                                    oStat.st_mtime))
+        return aThumbnails
+
+    def clear(self):
+        """Remove all the thumbnails"""
+        self._iSize = None
+        if os.path.isdir(self._sDir):
+            try:
+                shutil.rmtree(self._sDir)
+            except OSError as oErr:
+                logging.warning('Unable to remove thumbnails: %s', oErr)
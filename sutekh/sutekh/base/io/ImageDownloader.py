@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Download lots of files, such as card images, concurrently.
+
+   The downloads are done by a small pool of worker threads, each of
+   which keeps a connection open to each host it talks to. The worker
+   threads only do network and file IO - the results are passed back to
+   the calling thread, so progress reporting can safely touch the GUI.
+
+   Files which already exist are fetched with a conditional request, so
+   the server can tell us if our copy is current. Files are written to
+   a temporary file and moved into place, so an interrupted download
+   never leaves a truncated image behind.
+
+   Urls which fail are recorded in a journal, which is saved to disk, so
+   repeated or interrupted runs don't keep retrying them."""
+
+import datetime
+import email.utils
+import http.client
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.error import HTTPError, URLError
+from urllib.parse import urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+from ..Utility import ensure_dir_exists
+from .UrlOps import urlopen_with_timeout
+
+DEFAULT_WORKERS = 4
+# Name of the failed download journal, kept with the downloaded files
+JOURNAL_FILE = '.download_journal.json'
+# How long to wait before retrying a url that failed
+RETRY_DELAY = datetime.timedelta(hours=2)
+# Save the journal after this many downloads, so we don't lose too
+# much if we're interrupted
+JOURNAL_SAVE_INTERVAL = 50
+MAX_REDIRECTS = 5
+
+# Download result states
+DOWNLOADED = 'downloaded'
+NOT_MODIFIED = 'not modified'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+
+def write_file_atomic(sFileName, sData):
+    """Write sData to sFileName via a temporary file in the same
+       directory, so readers never see a partially written file."""
+    sDir = os.path.dirname(sFileName)
+    if sDir:
+        ensure_dir_exists(sDir)
+    iFd, sTempName = tempfile.mkstemp(dir=sDir or None, prefix='.',
+                                      suffix='.part')
+    try:
+        with os.fdopen(iFd, 'wb') as oFile:
+            oFile.write(sData)
+        os.replace(sTempName, sFileName)
+    except Exception:
+        os.remove(sTempName)
+        raise
+
+
+class DownloadJournal:
+    """Record of the urls which have recently failed to download.
+
+       If sFileName is given, the journal is read from and saved to that
+       file, so the failures are remembered between runs."""
+
+    def __init__(self, sFileName=None):
+        self._sFileName = sFileName
+        self._oLock = threading.Lock()
+        self._dFailed = {}
+        if sFileName and os.path.exists(sFileName):
+            try:
+                with open(sFileName, 'r', encoding='utf-8') as oFile:
+                    dData = json.load(oFile)
+                self._dFailed = dict((sUrl, float(fTime)) for sUrl, fTime
+                                     in dData.get('failed', {}).items())
+            except (OSError, ValueError, AttributeError) as oErr:
+                # A corrupt journal isn't worth failing over
+                logging.warning('Ignoring invalid download journal %s: %s',
+                                sFileName, oErr)
+
+    def should_skip(self, sUrl, oRetryDelay=RETRY_DELAY):
+        """Return True if sUrl failed recently enough that we shouldn't
+           try it again yet."""
+        with self._oLock:
+            fFailed = self._dFailed.get(sUrl)
+            if fFailed is None:
+                return False
+            oFailed = datetime.datetime.fromtimestamp(fFailed)
+            if datetime.datetime.now() - oFailed > oRetryDelay:
+                logging.info('Removing %s from the failed cache', sUrl)
+                del self._dFailed[sUrl]
+                return False
+            return True
+
+    def record_failure(self, sUrl):
+        """Note that sUrl failed"""
+        with self._oLock:
+            self._dFailed[sUrl] = datetime.datetime.now().timestamp()
+
+    def record_success(self, sUrl):
+        """Note that sUrl worked"""
+        with self._oLock:
+            self._dFailed.pop(sUrl, None)
+
+    def get_failed(self):
+        """Return the list of urls currently marked as failed"""
+        with self._oLock:
+            return sorted(self._dFailed)
+
+    def save(self):
+        """Save the journal, if it has a file"""
+        if not self._sFileName:
+            return
+        with self._oLock:
+            sData = json.dumps({'failed': self._dFailed}, indent=1,
+                               sort_keys=True)
+        try:
+            write_file_atomic(self._sFileName, sData.encode('utf-8'))
+        except OSError as oErr:
+            logging.warning('Unable to save download journal %s: %s',
+                            self._sFileName, oErr)
+
+
+class DownloadJob:
+    """A file to download, and the urls to try, in order.
+
+       oRemoteDate is the date of the file on the server, if known.
+       """
+    # pylint: disable=too-few-public-methods
+    # Simple data holder
+
+    def __init__(self, sFileName, aUrls, oRemoteDate=None):
+        self.sFileName = sFileName
+        self.aUrls = aUrls
+        self.oRemoteDate = oRemoteDate
+
+
+class DownloadResult:
+    """The outcome of a DownloadJob.
+
+       sStatus is one of DOWNLOADED, NOT_MODIFIED, SKIPPED or FAILED.
+       sUrl is the url used, if any, and oError the last error seen."""
+    # pylint: disable=too-few-public-methods
+    # Simple data holder
+
+    def __init__(self, oJob, sStatus, sUrl=None, oError=None):
+        self.oJob = oJob
+        self.sStatus = sStatus
+        self.sUrl = sUrl
+        self.oError = oError
+
+
+class ImageDownloader:
+    """Download a list of DownloadJobs using a pool of worker threads"""
+
+    def __init__(self, dHeaders=None, iWorkers=DEFAULT_WORKERS,
+                 oJournal=None, fTimeout=None):
+        self._dHeaders = dict(dHeaders or {})
+        self._iWorkers = max(1, iWorkers)
+        self._oJournal = oJournal if oJournal is not None else \
+            DownloadJournal()
+        # We follow the global timeout setting by default, like
+        # urlopen_with_timeout
+        self._fTimeout = fTimeout if fTimeout is not None else \
+            socket.getdefaulttimeout()
+        self._oLocal = threading.local()
+        self._oConnLock = threading.Lock()
+        self._aConnections = []
+
+    journal = property(fget=lambda self: self._oJournal,
+                       doc="The failed download journal")
+
+    def _get_connection(self, sScheme, sHost):
+        """Return this thread's connection to the host, creating it if
+           needed."""
+        dConns = getattr(self._oLocal, 'dConns', None)
+        if dConns is None:
+            dConns = self._oLocal.dConns = {}
+        oConn = dConns.get((sScheme, sHost))
+        if oConn is None:
+            if sScheme == 'https':
+                oConn = http.client.HTTPSConnection(sHost,
+                                                    timeout=self._fTimeout)
+            else:
+                oConn = http.client.HTTPConnection(sHost,
+                                                   timeout=self._fTimeout)
+            dConns[(sScheme, sHost)] = oConn
+            with self._oConnLock:
+                self._aConnections.append(oConn)
+        return oConn
+
+    def _drop_connection(self, sScheme, sHost):
+        """Close a connection that's gone bad"""
+        oConn = self._oLocal.dConns.pop((sScheme, sHost), None)
+        if oConn is not None:
+            oConn.close()
+
+    def _request_via_urllib(self, sUrl, dHeaders):
+        """Fetch sUrl with urllib, which handles proxies for us"""
+        try:
+            oFile = urlopen_with_timeout(sUrl, dHeaders=dHeaders,
+                                         bBinary=True)
+        except HTTPError as oErr:
+            return oErr.code, oErr.reason, None
+        try:
+            return oFile.getcode(), 'OK', oFile.read()
+        finally:
+            oFile.close()
+
+    def _request(self, sUrl, dHeaders):
+        """Fetch sUrl, following redirects.
+
+           Returns the status code, reason and data."""
+        for _iRedirect in range(MAX_REDIRECTS):
+            oSplit = urlsplit(sUrl)
+            if oSplit.scheme not in ('http', 'https'):
+                raise URLError('Unsupported url %s' % sUrl)
+            if oSplit.scheme in getproxies() and \
+                    not proxy_bypass(oSplit.hostname):
+                return self._request_via_urllib(sUrl, dHeaders)
+            sPath = oSplit.path or '/'
+            if oSplit.query:
+                sPath += '?' + oSplit.query
+            for iAttempt in range(2):
+                oConn = self._get_connection(oSplit.scheme, oSplit.netloc)
+                try:
+                    oConn.request('GET', sPath, headers=dHeaders)
+                    oResp = oConn.getresponse()
+                    sData = oResp.read()
+                    break
+                except (http.client.HTTPException, OSError):
+                    self._drop_connection(oSplit.scheme, oSplit.netloc)
+                    if iAttempt > 0:
+                        raise
+                    # The server may have closed an idle connection, so
+                    # we retry once with a fresh one
+            if oResp.status in (301, 302, 303, 307, 308):
+                sLocation = oResp.getheader('Location')
+                if not sLocation:
+                    return oResp.status, oResp.reason, None
+                sUrl = urljoin(sUrl, sLocation)
+                continue
+            return oResp.status, oResp.reason, sData
+        raise URLError('Too many redirects for %s' % sUrl)
+
+    def _fetch(self, oJob):
+        """Download a single job, trying each url in turn"""
+        oError = None
+        for sUrl in oJob.aUrls:
+            if self._oJournal.should_skip(sUrl):
+                # Skip this url, since it's already failed, and don't
+                # fall back to the other urls until it's retried
+                return DownloadResult(oJob, SKIPPED, sUrl, oError)
+            dHeaders = dict(self._dHeaders)
+            if os.path.exists(oJob.sFileName):
+                dHeaders['If-Modified-Since'] = email.utils.formatdate(
+                    os.path.getmtime(oJob.sFileName), usegmt=True)
+            logging.info('Trying %s as source for %s', sUrl, oJob.sFileName)
+            try:
+                iStatus, sReason, sData = self._request(sUrl, dHeaders)
+            except (http.client.HTTPException, OSError) as oErr:
+                # URLError and socket.timeout are both OSErrors
+                oError = oErr
+                self._oJournal.record_failure(sUrl)
+                continue
+            if iStatus == 304:
+                # Our copy is current, so we update the timestamp so
+                # we don't consider it outdated again
+                if oJob.oRemoteDate:
+                    fTime = oJob.oRemoteDate.replace(
+                        tzinfo=datetime.timezone.utc).timestamp()
+                    os.utime(oJob.sFileName, (fTime, fTime))
+                self._oJournal.record_success(sUrl)
+                return DownloadResult(oJob, NOT_MODIFIED, sUrl)
+            if iStatus == 200 and sData:
+                try:
+                    write_file_atomic(oJob.sFileName, sData)
+                except OSError as oErr:
+                    return DownloadResult(oJob, FAILED, sUrl, oErr)
+                logging.info('Using image data from %s', sUrl)
+                self._oJournal.record_success(sUrl)
+                return DownloadResult(oJob, DOWNLOADED, sUrl)
+            if iStatus == 200:
+                logging.info('Invalid image data from %s', sUrl)
+                oError = URLError('No data from %s' % sUrl)
+                # Got bogus data, so don't retry for a while, and don't
+                # attempt to follow other urls
+                self._oJournal.record_failure(sUrl)
+                return DownloadResult(oJob, FAILED, sUrl, oError)
+            oError = HTTPError(sUrl, iStatus, sReason, None, None)
+            self._oJournal.record_failure(sUrl)
+        return DownloadResult(oJob, FAILED, None, oError)
+
+    def close(self):
+        """Close all the open connections"""
+        with self._oConnLock:
+            for oConn in self._aConnections:
+                oConn.close()
+            self._aConnections = []
+
+    def download(self, aJobs, fProgress=None):
+        """Download all the jobs, returning a list of DownloadResults.
+
+           fProgress, if given, is called in this thread with each
+           DownloadResult as it completes. The journal is saved
+           periodically and when we're done."""
+        aResults = []
+        try:
+            with ThreadPoolExecutor(max_workers=self._iWorkers) as oPool:
+                aFutures = [oPool.submit(self._fetch, oJob)
+                            for oJob in aJobs]
+                for oFuture in as_completed(aFutures):
+                    oResult = oFuture.result()
+                    aResults.append(oResult)
+                    if fProgress:
+                        fProgress(oResult)
+                    if len(aResults) % JOURNAL_SAVE_INTERVAL == 0:
+                        self._oJournal.save()
+        finally:
+            self.close()
+            self._oJournal.save()
+        return aResults
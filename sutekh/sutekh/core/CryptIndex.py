@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Precomputed features of the crypt cards, for finding similar crypt
+   cards.
+
+   Each crypt card is described by a sparse feature vector built from
+   its disciplines, with superior disciplines weighted more heavily, or
+   virtues for imbued, along with the clan or creed, sect, titles and
+   keywords. Similarity is the cosine similarity of the feature vectors,
+   with a penalty for differences in group and capacity or life.
+
+   The features for all the crypt cards are read the first time they're
+   needed, along with an index from each discipline or virtue to the
+   cards with it, so finding similar cards doesn't need any database
+   queries. The index only depends on the card list, so it must be
+   flushed when the card list changes. flush_crypt_index is registered
+   with flush_cache, so this happens along with the other caches."""
+
+import math
+from itertools import combinations
+
+from sutekh.base.core.BaseTables import AbstractCard
+from sutekh.base.core.DBUtility import register_flush_function
+from sutekh.core.Filters import CryptCardFilter
+from sutekh.SutekhUtility import is_vampire
+
+SUPERIOR_WEIGHT = 2.0
+INFERIOR_WEIGHT = 1.0
+CLAN_WEIGHT = 1.5
+SECT_WEIGHT = 0.5
+TITLE_WEIGHT = 0.5
+KEYWORD_WEIGHT = 0.25
+# Penalty for each step of group difference, and for each point of
+# capacity or life difference
+GROUP_PENALTY = 0.1
+CAPACITY_PENALTY = 0.02
+
+
+class CryptCardFeatures:
+    """The features of a single crypt card"""
+    # pylint: disable=too-many-instance-attributes
+    # We need to keep all the features
+
+    def __init__(self, oCard):
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        self.oCard = oCard
+        self.bVampire = is_vampire(oCard)
+        self.iGroup = oCard.group
+        # Disciplines or virtues -> True if superior
+        self.dTraits = {}
+        self.dVector = {}
+        if self.bVampire:
+            self.iCapacity = oCard.capacity or 0
+            for oPair in oCard.discipline:
+                bSuperior = oPair.level == 'superior'
+                self.dTraits[oPair.discipline] = bSuperior
+                self.dVector[('discipline', oPair.discipline.name)] = \
+                    SUPERIOR_WEIGHT if bSuperior else INFERIOR_WEIGHT
+            for oClan in oCard.clan:
+                self.dVector[('clan', oClan.name)] = CLAN_WEIGHT
+        else:
+            self.iCapacity = oCard.life or 0
+            for oVirtue in oCard.virtue:
+                self.dTraits[oVirtue] = False
+                self.dVector[('virtue', oVirtue.name)] = INFERIOR_WEIGHT
+            for oCreed in oCard.creed:
+                self.dVector[('creed', oCreed.name)] = CLAN_WEIGHT
+        for oSect in oCard.sect:
+            self.dVector[('sect', oSect.name)] = SECT_WEIGHT
+        for oTitle in oCard.title:
+            self.dVector[('title', oTitle.name)] = TITLE_WEIGHT
+        for oKeyword in oCard.keywords:
+            self.dVector[('keyword', oKeyword.keyword)] = KEYWORD_WEIGHT
+        self.fNorm = math.sqrt(sum(fVal * fVal for fVal in
+                                   self.dVector.values()))
+
+    def get_traits(self, bSuperior):
+        """Return the set of disciplines or virtues, or just the
+           superior disciplines if bSuperior is True"""
+        if bSuperior:
+            return set(oTrait for oTrait, bSup in self.dTraits.items()
+                       if bSup)
+        return set(self.dTraits)
+
+    def similarity(self, oOther):
+        """Return the similarity to the other card's features.
+
+           1.0 is an exact match, and cards with nothing in common will
+           score 0 or less."""
+        if not self.fNorm or not oOther.fNorm:
+            fCos = 0.0
+        else:
+            fDot = sum(fVal * oOther.dVector.get(tKey, 0.0)
+                       for tKey, fVal in self.dVector.items())
+            fCos = fDot / (self.fNorm * oOther.fNorm)
+        iGrpDiff = 0
+        if (self.iGroup or 0) > 0 and (oOther.iGroup or 0) > 0:
+            iGrpDiff = abs(self.iGroup - oOther.iGroup)
+        return (fCos - GROUP_PENALTY * iGrpDiff -
+                CAPACITY_PENALTY * abs(self.iCapacity - oOther.iCapacity))
+
+
+class CryptIndex:
+    """The features of all the crypt cards"""
+
+    def __init__(self):
+        # abstract card id -> CryptCardFeatures
+        self._dFeatures = None
+        # discipline or virtue -> set of ids of the cards with it
+        self._dTraitCards = {}
+        # discipline -> set of ids of the cards with it at superior
+        self._dSuperiorCards = {}
+        self._iMaxGroup = 0
+
+    def _build(self):
+        """Read the features of all the crypt cards"""
+        self._dFeatures = {}
+        self._dTraitCards = {}
+        self._dSuperiorCards = {}
+        for oCard in CryptCardFilter().select(AbstractCard):
+            if oCard.id in self._dFeatures:
+                continue
+            oFeatures = CryptCardFeatures(oCard)
+            self._dFeatures[oCard.id] = oFeatures
+            for oTrait, bSuperior in oFeatures.dTraits.items():
+                self._dTraitCards.setdefault(oTrait, set()).add(oCard.id)
+                if bSuperior:
+                    self._dSuperiorCards.setdefault(oTrait,
+                                                    set()).add(oCard.id)
+        self._iMaxGroup = max([oFeat.iGroup or 0 for oFeat in
+                               self._dFeatures.values()], default=0)
+
+    def get_features(self, oCard):
+        """Return the features for the card, or None if it isn't a crypt
+           card"""
+        if self._dFeatures is None:
+            self._build()
+        return self._dFeatures.get(oCard.id)
+
+    def _is_compatible(self, oFeatures, oOther):
+        """Check if the other card is the same kind of card, in a
+           compatible group"""
+        if oFeatures.bVampire != oOther.bVampire:
+            return False
+        iGrp = oFeatures.iGroup or 0
+        # We ignore the any group cases, as for the group filter
+        iMin = max(1, iGrp - 1)
+        iMax = min(self._iMaxGroup, iGrp + 1)
+        return oOther.iGroup is not None and iMin <= oOther.iGroup <= iMax
+
+    def find_similar(self, oCard, iTopK=None, aRestrict=None):
+        """Return the crypt cards in compatible groups most similar to the
+           given card, as a list of (card, similarity) tuples, most
+           similar first.
+
+           aRestrict is an optional set of abstract card ids to limit the
+           results to."""
+        oFeatures = self.get_features(oCard)
+        if oFeatures is None:
+            return []
+        aResults = []
+        for iId, oOther in self._dFeatures.items():
+            if iId == oCard.id or (aRestrict is not None and
+                                   iId not in aRestrict):
+                continue
+            if self._is_compatible(oFeatures, oOther):
+                aResults.append((oOther.oCard,
+                                 oFeatures.similarity(oOther)))
+        aResults.sort(key=lambda x: (-x[1], x[0].name))
+        if iTopK is not None:
+            return aResults[:iTopK]
+        return aResults
+
+    def find_sharing(self, oCard, iNum, bSuperior, aRestrict=None):
+        """Find the crypt cards in compatible groups which share at least
+           iNum of the card's disciplines or virtues (or superior
+           disciplines if bSuperior is True).
+
+           Returns the set of matching cards, and a dictionary mapping
+           each frozenset of iNum disciplines or virtues to the list of
+           matching cards which share them. aRestrict is as for
+           find_similar."""
+        oFeatures = self.get_features(oCard)
+        if oFeatures is None:
+            return set(), {}
+        dCardIndex = self._dSuperiorCards if bSuperior else \
+            self._dTraitCards
+        aTraits = oFeatures.get_traits(bSuperior)
+        dCounts = {}
+        for oTrait in aTraits:
+            for iId in dCardIndex.get(oTrait, ()):
+                dCounts.setdefault(iId, 0)
+                dCounts[iId] += 1
+        aMatches = set()
+        dSubsets = {}
+        for iId, iCount in dCounts.items():
+            if iCount < iNum or iId == oCard.id:
+                continue
+            if aRestrict is not None and iId not in aRestrict:
+                continue
+            oOther = self._dFeatures[iId]
+            if not self._is_compatible(oFeatures, oOther):
+                continue
+            aMatches.add(oOther.oCard)
+            aShared = aTraits & oOther.get_traits(bSuperior)
+            for tSubset in combinations(aShared, iNum):
+                dSubsets.setdefault(frozenset(tSubset),
+                                    []).append(oOther.oCard)
+        return aMatches, dSubsets
+
+
+class _CryptIndexHolder:
+    """Holds the current crypt index"""
+    oIndex = None
+
+
+def get_crypt_index():
+    """Return the current crypt index"""
+    if _CryptIndexHolder.oIndex is None:
+        _CryptIndexHolder.oIndex = CryptIndex()
+    return _CryptIndexHolder.oIndex
+
+
+def flush_crypt_index():
+    """Discard the crypt index, so it's rebuilt on the next lookup"""
+    _CryptIndexHolder.oIndex = None
+
+
+register_flush_function(flush_crypt_index)
@@ -83,6 +83,12 @@ class SutekhCardFilter(Filter):
         return [LEFTJOINOn(None, self._oMapTable,
                            AbstractCard.q.id == self._oMapTable.q.id)]
 
+    def _get_column_bits(self, oIndex, oField, aValues, bMatchNull=False):
+        """Look up the cards with the given values for the column in the
+           card index."""
+        return oIndex.get_column_bits(str(oField.tableName), oField.fieldName,
+                                      aValues, bMatchNull)
+
 
 # Individual Filters
 class ClanFilter(SingleFilter):
@@ -386,6 +392,10 @@ class GroupFilter(SutekhCardFilter):
     def _get_expression(self):
         return self._oMapTable.q.grp == self.__iGroup
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.grp,
+                                     [self.__iGroup])
+
 
 class MultiGroupFilter(SutekhCardFilter):
     """Filter on multiple Groups"""
@@ -414,6 +424,10 @@ class MultiGroupFilter(SutekhCardFilter):
     def _get_expression(self):
         return IN(self._oMapTable.q.grp, self.__aGroups)
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.grp,
+                                     self.__aGroups)
+
 
 class CapacityFilter(SutekhCardFilter):
     """Filter on Capacity"""
@@ -428,6 +442,10 @@ class CapacityFilter(SutekhCardFilter):
     def _get_expression(self):
         return self._oMapTable.q.capacity == self.__iCap
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.capacity,
+                                     [self.__iCap])
+
 
 class MultiCapacityFilter(SutekhCardFilter):
     """Filter on a list of Capacities"""
@@ -454,6 +472,10 @@ class MultiCapacityFilter(SutekhCardFilter):
     def _get_expression(self):
         return IN(self._oMapTable.q.capacity, self.__aCaps)
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.capacity,
+                                     self.__aCaps)
+
 
 class CostFilter(SutekhCardFilter):
     """Filter on Cost"""
@@ -473,6 +495,11 @@ class CostFilter(SutekhCardFilter):
     def _get_expression(self):
         return self._oMapTable.q.cost == self.__iCost
 
+    def _get_bits(self, oIndex):
+        # == None becomes IS NULL in the SQL version
+        return self._get_column_bits(oIndex, self._oMapTable.q.cost,
+                                     [self.__iCost], self.__iCost is None)
+
 
 class MultiCostFilter(SutekhCardFilter):
     """Filter on a list of Costs"""
@@ -511,6 +538,10 @@ class MultiCostFilter(SutekhCardFilter):
             return self._oMapTable.q.cost == None
         return IN(self._oMapTable.q.cost, self.__aCost)
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.cost,
+                                     self.__aCost, self.__bZeroCost)
+
 
 class CostTypeFilter(SutekhCardFilter):
     """Filter on cost type"""
@@ -526,6 +557,10 @@ class CostTypeFilter(SutekhCardFilter):
     def _get_expression(self):
         return self._oMapTable.q.costtype == self.__sCostType.lower()
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.costtype,
+                                     [self.__sCostType.lower()])
+
 
 class MultiCostTypeFilter(SutekhCardFilter):
     """Filter on a list of cost types"""
@@ -553,6 +588,10 @@ class MultiCostTypeFilter(SutekhCardFilter):
     def _get_expression(self):
         return IN(self._oMapTable.q.costtype, self.__aCostTypes)
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.costtype,
+                                     self.__aCostTypes)
+
 
 class LifeFilter(SutekhCardFilter):
     """Filter on life"""
@@ -567,6 +606,10 @@ class LifeFilter(SutekhCardFilter):
     def _get_expression(self):
         return self._oMapTable.q.life == self.__iLife
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.life,
+                                     [self.__iLife])
+
 
 class MultiLifeFilter(SutekhCardFilter):
     """Filter on a list of list values"""
@@ -595,6 +638,10 @@ class MultiLifeFilter(SutekhCardFilter):
     def _get_expression(self):
         return IN(self._oMapTable.q.life, self.__aLife)
 
+    def _get_bits(self, oIndex):
+        return self._get_column_bits(oIndex, self._oMapTable.q.life,
+                                     self.__aLife)
+
 
 class CardTextFilter(BaseCardTextFilter):
     """Filter on Card Text"""
@@ -624,6 +671,13 @@ class CardTextFilter(BaseCardTextFilter):
         return LIKE(func.LOWER(self._oMapTable.q.search_text),
                     '%' + self._sPattern + '%')
 
+    def _get_bits(self, oIndex):
+        if self._bBraces:
+            return super()._get_bits(oIndex)
+        oField = self._oMapTable.q.search_text
+        return oIndex.get_text_bits(str(oField.tableName), oField.fieldName,
+                                    self._sPattern)
+
 
 class CardFunctionFilter(DirectFilter):
     """Filter for various interesting card properties - unlock,
@@ -728,3 +782,7 @@ class CardFunctionFilter(DirectFilter):
     def _get_expression(self):
         """Expression for the constructed filter"""
         return self._oFilter._get_expression()
+
+    def _get_bits(self, oIndex):
+        """Index lookup for the constructed filter"""
+        return self._oFilter._get_bits(oIndex)
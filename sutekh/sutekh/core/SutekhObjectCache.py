@@ -15,8 +15,8 @@ class SutekhObjectCache(ObjectCache):
     """Add Sutekh specific classes to the generic database cache.
        """
 
-    def __init__(self):
+    def __init__(self, sSnapshotFile=None):
         aExtraTypesToCache = [Discipline, DisciplinePair, Clan,
                               Creed, Virtue, Sect, Title,
                               SutekhAbstractCard]
-        super().__init__(aExtraTypesToCache)
+        super().__init__(aExtraTypesToCache, sSnapshotFile)
@@ -8,11 +8,13 @@
 
 import logging
 import datetime
+import os
 
 from gi.repository import Gtk
 
 from sqlobject import SQLObjectNotFound
 
+from sutekh.base.Utility import prefs_dir, is_memory_db
 from sutekh.base.core.BaseAdapters import IAbstractCard
 from sutekh.base.core.DBUtility import (CARDLIST_UPDATE_DATE, flush_cache,
                                         get_metadata_date)
@@ -22,6 +24,7 @@ from sutekh.base.gui.GuiDataPack import gui_error_handler
 from sutekh.base.gui.SutekhDialog import do_complaint
 from sutekh.base.gui.UpdateDialog import UpdateDialog
 
+from sutekh.SutekhInfo import SutekhInfo
 from sutekh.core.SutekhObjectCache import SutekhObjectCache
 
 from sutekh.io.PhysicalCardSetWriter import PhysicalCardSetWriter
@@ -59,6 +62,18 @@ class SutekhMainWindow(AppMainWindow):
         # Sutekh lookup cache
         self.__oSutekhObjectCache = None
 
+    # pylint: disable=no-self-use
+    # convienent to have this as a method
+    def _get_cache_snapshot_file(self):
+        """Return the path used to store the object cache snapshot.
+
+           We don't keep a snapshot for in-memory databases, since
+           they're rebuilt on every run."""
+        if is_memory_db():
+            return None
+        return os.path.join(prefs_dir(SutekhInfo.NAME),
+                            'cache_snapshot.pickle')
+
     def _verify_database(self):
         """Check that the database is correctly populated"""
         try:
@@ -74,7 +89,8 @@ class SutekhMainWindow(AppMainWindow):
                 self.do_refresh_card_list()
 
         # Create object cache
-        self.__oSutekhObjectCache = SutekhObjectCache()
+        self.__oSutekhObjectCache = SutekhObjectCache(
+            self._get_cache_snapshot_file())
 
     def setup(self, oConfig):
         """After database checks are passed, setup what we need to display
@@ -102,7 +118,8 @@ class SutekhMainWindow(AppMainWindow):
         # Flush the caches, so we don't hit stale lookups
         flush_cache()
         # Reset the lookup cache holder
-        self.__oSutekhObjectCache = SutekhObjectCache()
+        self.__oSutekhObjectCache = SutekhObjectCache(
+            self._get_cache_snapshot_file())
         # We publish here, after we've cleared the caches
         super().update_to_new_db()
 
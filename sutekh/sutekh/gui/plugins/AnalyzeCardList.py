@@ -23,6 +23,7 @@ from sutekh.base.gui.SutekhDialog import NotebookDialog, SutekhDialog
 from sutekh.base.gui.GuiUtils import wrap
 from sutekh.base.gui.MultiSelectComboBox import MultiSelectComboBox
 from sutekh.base.gui.AutoScrolledWindow import AutoScrolledWindow
+from sutekh.base.gui.BackgroundJob import run_job, JobCancelled
 
 from sutekh.core.SutekhTables import CRYPT_TYPES
 from sutekh.gui.PluginManager import SutekhPlugin
@@ -518,11 +519,45 @@ class AnalyzeCardList(SutekhPlugin):
 
     def make_analysis_dialog(self, iAnalysisType=DEFAULT):
         """Make the dialog for the given analysis type"""
+        try:
+            aPages = run_job('Analyzing card set', self._do_analysis,
+                             iAnalysisType)
+        except JobCancelled:
+            return
         oDlg = NotebookDialog("Analysis of Card List", self.oDlg,
                               Gtk.DialogFlags.DESTROY_WITH_PARENT,
                               ("_Close", Gtk.ResponseType.CLOSE))
         oDlg.connect("response", lambda oDlg, resp: oDlg.destroy())
 
+        oHappyBox = Gtk.VBox(homogeneous=False, spacing=2)
+        # Do happy family analysis
+        self.happy_families_init(oHappyBox, oDlg)
+
+        # Fill the dialog with the results
+        oMainBox = Gtk.VBox(homogeneous=False, spacing=2)
+        oDlg.add_widget_page(oMainBox, 'Basic Info')
+        oDlg.add_widget_page(oHappyBox, 'Happy Families Analysis')
+        for sText, sTitle in aPages:
+            oDlg.add_widget_page(wrap(sText), sTitle)
+
+        # Setup the main notebook
+        oTitle, oDesc, oDetails = self._prepare_main(iAnalysisType)
+        oMainBox.pack_start(oTitle, False, True, 0)
+        # Excess Space goes to the description
+        oMainBox.pack_start(oDesc, True, True, 0)
+        oMainBox.pack_start(oDetails, False, True, 0)
+        if self.iLibSize > 0:
+            oMainBox.pack_start(self._process_library(), False, True, 0)
+        oDlg.show_all()
+        oDlg.notebook.set_current_page(0)
+        oDlg.run()
+
+    def _do_analysis(self, oProgress, iAnalysisType):
+        """Gather the statistics, and create the text for the card type
+           pages.
+
+           This is run as a BackgroundJob, so doesn't create any widgets.
+           Returns a list of (text, page title) pairs."""
         self.dTypeNumbers = {}
         dCardLists = {}
 
@@ -530,7 +565,9 @@ class AnalyzeCardList(SutekhPlugin):
                          self.model.get_card_iterator(None)]
         aAllCards = _get_abstract_cards(aAllPhysCards)
 
-        for sCardType in self._dConstruct:
+        for iNum, sCardType in enumerate(self._dConstruct):
+            # Gathering the lists is about half the work
+            oProgress.update_bar(iNum / (2 * len(self._dConstruct)))
             if sCardType not in SPECIAL:
                 dCardLists[sCardType] = _get_abstract_cards(
                     self.model.get_card_iterator(CardTypeFilter(sCardType)))
@@ -580,8 +617,6 @@ class AnalyzeCardList(SutekhPlugin):
                     self.dTypeNumbers[sCardType] = len(aAllPhysCards)
                 dCardLists[sCardType] = aAllPhysCards
 
-        oHappyBox = Gtk.VBox(homogeneous=False, spacing=2)
-
         self.iTotNumber = len(aAllCards)
         self.dCryptStats = {}
         self.dLibStats = {}
@@ -590,14 +625,9 @@ class AnalyzeCardList(SutekhPlugin):
         self.iLibSize = len(aAllCards) - self.iCryptSize
         self.get_crypt_stats(dCardLists['Vampire'], dCardLists['Imbued'])
         self.get_library_stats(aAllCards, dCardLists)
-        # Do happy family analysis
-        self.happy_families_init(oHappyBox, oDlg)
-
-        # Fill the dialog with the results
-        oMainBox = Gtk.VBox(homogeneous=False, spacing=2)
-        oDlg.add_widget_page(oMainBox, 'Basic Info')
-        oDlg.add_widget_page(oHappyBox, 'Happy Families Analysis')
+        oProgress.update_bar(0.5)
 
+        aPages = []
         # overly clever? crypt cards first, then alphabetical, then specials
         aOrderToList = (sorted(CRYPT_TYPES) +
                         [x for x in sorted(self.dTypeNumbers) if
@@ -605,44 +635,31 @@ class AnalyzeCardList(SutekhPlugin):
                           and x not in [RT_BANNED, RT_WATCHLIST, 
                                         NOT_V5_LEGAL, NOT_TWO_PLAYER_LEGAL]] +
                         sorted(SPECIAL))
-        for sCardType in aOrderToList:
+        for iNum, sCardType in enumerate(aOrderToList):
+            oProgress.update_bar(0.5 + iNum / (2 * len(aOrderToList)))
             if self.dTypeNumbers[sCardType]:
                 fProcess = self._dConstruct[sCardType]
-                oDlg.add_widget_page(wrap(fProcess(dCardLists[sCardType])),
-                                     sCardType)
+                aPages.append((fProcess(dCardLists[sCardType]), sCardType))
         if iAnalysisType == RAPID:
             fProcess = self._dConstruct['Not Tournament Legal Cards']
             for sType in [RT_BANNED, RT_WATCHLIST]:
                 if self.dTypeNumbers[sType]:
-                    oDlg.add_widget_page(wrap(fProcess(dCardLists[sType],
-                                                       sType)),
-                                         ILLEGAL_LOOKUP[sType])
+                    aPages.append((fProcess(dCardLists[sType], sType),
+                                   ILLEGAL_LOOKUP[sType]))
         elif iAnalysisType == TWO_PLAYER:
             fProcess = self._dConstruct['Not Tournament Legal Cards']
             for sType in [NOT_TWO_PLAYER_LEGAL]:
                 if self.dTypeNumbers[sType]:
-                    oDlg.add_widget_page(wrap(fProcess(dCardLists[sType],
-                                                       sType)),
-                                         ILLEGAL_LOOKUP[sType])
+                    aPages.append((fProcess(dCardLists[sType], sType),
+                                   ILLEGAL_LOOKUP[sType]))
         elif  iAnalysisType == V5_FORMAT:
             fProcess = self._dConstruct['Not Tournament Legal Cards']
             for sType in [NOT_V5_LEGAL]:
                 if self.dTypeNumbers[sType]:
-                    oDlg.add_widget_page(wrap(fProcess(dCardLists[sType],
-                                                       sType)),
-                                         ILLEGAL_LOOKUP[sType])
-
-        # Setup the main notebook
-        oTitle, oDesc, oDetails = self._prepare_main(iAnalysisType)
-        oMainBox.pack_start(oTitle, False, True, 0)
-        # Excess Space goes to the description
-        oMainBox.pack_start(oDesc, True, True, 0)
-        oMainBox.pack_start(oDetails, False, True, 0)
-        if self.iLibSize > 0:
-            oMainBox.pack_start(self._process_library(), False, True, 0)
-        oDlg.show_all()
-        oDlg.notebook.set_current_page(0)
-        oDlg.run()
+                    aPages.append((fProcess(dCardLists[sType], sType),
+                                   ILLEGAL_LOOKUP[sType]))
+        oProgress.update_bar(1.0)
+        return aPages
 
     # pylint: enable=attribute-defined-outside-init
     # pylint: enable=too-many-branches, too-many-statements
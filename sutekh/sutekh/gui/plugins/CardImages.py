@@ -5,18 +5,13 @@
 
 """Adds a frame which will display card images from ARDB in the GUI"""
 
-import datetime
 import os
-import re
 import logging
 
 from gi.repository import Gtk
 
-from sqlobject import SQLObjectNotFound
-
-from sutekh.base.core.BaseAdapters import IExpansion, IPrinting
 from sutekh.base.gui.SutekhDialog import do_complaint_error
-from sutekh.base.Utility import ensure_dir_exists, to_ascii
+from sutekh.base.Utility import ensure_dir_exists
 from sutekh.base.gui.plugins.BaseImages import (BaseImageFrame,
                                                 BaseImageConfigDialog,
                                                 BaseImagePlugin,
@@ -26,90 +21,13 @@ from sutekh.base.gui.plugins.BaseImages import (BaseImageFrame,
                                                 DOWNLOAD_EXPANSIONS)
 
 from sutekh.gui.PluginManager import SutekhPlugin
+from sutekh.io.CardImageSource import (SUTEKH_IMAGE_SITE, SUTEKH_USER_AGENT,
+                                       make_image_name,
+                                       make_expansion_pathname,
+                                       make_image_url, make_date_url,
+                                       parse_image_dates)
 from sutekh.SutekhInfo import SutekhInfo
 
-# Base url for downloading the images from
-SUTEKH_IMAGE_SITE = 'https://sutekh.vtes.za.net'
-IMAGE_DATE_FILE = "image_dates.txt"
-
-SUTEKH_USER_AGENT = {
-    'User-Agent': 'Sutekh Image Plugin'
-}
-
-GROUP_RE = re.compile(r'\(group ([0-9]+)\)')
-
-# Special cases where we don't want to use the Promo short name
-SPECIAL_EXPANSIONS = [
-    "Anarchs and Alastors Storyline",
-]
-
-
-def make_image_name(sCardName):
-    """Convert a card name to an image name"""
-    # Some symbols are converted to uppercase, so fix that
-    sFilename = to_ascii(sCardName).lower()
-    if sFilename.startswith('the '):
-        sFilename = sFilename[4:] + 'the'
-    elif sFilename.startswith('an '):
-         sFilename = sFilename[3:] + 'an'
-    sFilename = sFilename.replace('(advanced)', 'adv')
-    # Convert vampire names to match krcg's group handling
-    if '(group' in sFilename:
-        iGroup = int(GROUP_RE.search(sFilename).groups()[0])
-        sFilename = GROUP_RE.sub('', sFilename) + '%02d' % iGroup
-    # Should probably do this via translate
-    for sChar in (" ", ".", ",", "'", "(", ")", "-", ":", "!", '"', "/"):
-        sFilename = sFilename.replace(sChar, '')
-    return sFilename + '.jpg'
-
-
-def make_expansion_pathname(sExpansionName):
-    """Convert an expansion name to the directory name"""
-    bOK = False
-    # pylint: disable=no-member
-    # pylint doesn't pick up IExpansion methods correctly
-    try:
-        oExpansion = IExpansion(sExpansionName)
-        oPrinting = None
-        bOK = True
-    except SQLObjectNotFound:
-        if '(' in sExpansionName:
-            # Maybe a Printing?
-            sSplitExp, sPrintName = [x.strip() for x in
-                                     sExpansionName.split('(', 1)]
-            # Remove trailing ')'
-            if sPrintName.endswith(')'):
-                sPrintName = sPrintName[:-1]
-            try:
-                oExpansion = IExpansion(sSplitExp)
-                oPrinting = IPrinting((oExpansion, sPrintName))
-                bOK = True
-            except SQLObjectNotFound:
-                pass
-    if not bOK:
-        # This can happen because we cache the expansion name and
-        # a new database import may cause that to vanish.
-        # We return just return a blank path segment, as the safest choice
-        logging.warning('Expansion %s no longer found in the database',
-                        sExpansionName)
-        return ''
-    # check special cases
-    # Promos always get the full name, so we can find the right image
-    # for cards printed in multiple different promo sets
-    if oExpansion.name in SPECIAL_EXPANSIONS or \
-            oExpansion.name.startswith('Promo'):
-        sExpName = oExpansion.name.lower()
-    else:
-        sExpName = oExpansion.shortname.lower()
-    if oPrinting:
-        sExpName += '_' + oPrinting.name.lower()
-    # Normalise storyline cards
-    sExpName = sExpName.replace(' ', '_').replace('-', '_')
-    # Strip quotes as well
-    sExpName = sExpName.replace("'", '')
-    return sExpName
-
-
 class CardImageFrame(BaseImageFrame):
     # pylint: disable=too-many-public-methods, too-many-instance-attributes
     # can't not trigger these warning with pyGtk
@@ -174,15 +92,12 @@ class CardImageFrame(BaseImageFrame):
             if sCurExpansionPath == '':
                 # Error path, we don't know where to search for the image
                 return None
-            sUrl = '%s/cardimages/%s/%s' % (SUTEKH_IMAGE_SITE,
-                                            sCurExpansionPath,
-                                            sFilename)
-            aUrls.append(sUrl)
+            aUrls.append(make_image_url(sCurExpansionPath, sFilename))
         return aUrls
 
     def _make_date_url(self):
         """Date info file lives with the images"""
-        return '%s/cardimages/%s' % (SUTEKH_IMAGE_SITE, IMAGE_DATE_FILE)
+        return make_date_url()
 
     def _parse_date_data(self, sDateData):
         """Parse date file into entries"""
@@ -190,19 +105,7 @@ class CardImageFrame(BaseImageFrame):
         # We do want to catch all errors here, so we log failures
         # correctly.
         try:
-            self._dDateCache = {}
-            for sLine in sDateData.splitlines():
-                sLine = sLine.strip()
-                if not sLine:
-                    continue
-                # We are dealing with ls-lR type formatting
-                # size YYYY-mm-DD HH:MM:SS ./<dir>/<name> [ link info, etc ]
-                _sSize, sDay, sTime, sName = sLine.split()[:4]
-                oCacheDate = datetime.datetime.strptime(
-                    "%s %s" % (sDay, sTime), "%Y-%m-%d %H:%M:%S")
-                sExpansion, sCardName = sName.replace('./', '').split('/')
-                sKey = os.path.join(self._sPrefsPath, sExpansion, sCardName)
-                self._dDateCache[sKey] = oCacheDate
+            self._dDateCache = parse_image_dates(sDateData, self._sPrefsPath)
             if len(self._dDateCache) > 100:
                 return True
         except Exception as oErr:
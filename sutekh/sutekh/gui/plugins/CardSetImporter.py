@@ -6,17 +6,9 @@
 
 """Convert a ELDB or ARDB text or html file into an Card Set."""
 
-from sutekh.io.ELDBHTMLParser import ELDBHTMLParser
-from sutekh.io.ARDBTextParser import ARDBTextParser
-from sutekh.io.ARDBXMLDeckParser import ARDBXMLDeckParser
-from sutekh.io.ARDBXMLInvParser import ARDBXMLInvParser
-from sutekh.io.ELDBDeckFileParser import ELDBDeckFileParser
-from sutekh.io.ELDBInventoryParser import ELDBInventoryParser
-from sutekh.io.JOLDeckParser import JOLDeckParser
-from sutekh.io.LackeyDeckParser import LackeyDeckParser
-from sutekh.io.GuessFileParser import GuessFileParser
+from sutekh.io.CardSetFormats import CARD_SET_PARSERS
 from sutekh.gui.PluginManager import SutekhPlugin
-from sutekh.base.gui.plugins.BaseImport import BaseImport, GUESS_FILE_FORMAT
+from sutekh.base.gui.plugins.BaseImport import BaseImport
 
 
 class CardSetImporter(SutekhPlugin, BaseImport):
@@ -46,17 +38,7 @@ class CardSetImporter(SutekhPlugin, BaseImport):
                    If no cards are found in the card set, the card set
                    will not be created."""
 
-    PARSERS = {
-        'ELDB HTML File': (ELDBHTMLParser, 'HTML files', ['*.html', '*.htm']),
-        'ARDB Text File': (ARDBTextParser, 'TXT files', ['*.txt']),
-        'ELDB Deck (.eld)': (ELDBDeckFileParser, 'ELD files', ['*.eld']),
-        'ELDB Inventory': (ELDBInventoryParser, None, None),
-        'ARDB Deck XML File': (ARDBXMLDeckParser, 'XML files', ['*.xml']),
-        'ARDB Inventory XML File': (ARDBXMLInvParser, 'XML files', ['*.xml']),
-        'JOL Deck File': (JOLDeckParser, None, None),
-        'Lackey CCG Deck File': (LackeyDeckParser, None, None),
-        GUESS_FILE_FORMAT: (GuessFileParser, None, None),
-        }
+    PARSERS = CARD_SET_PARSERS
 
     @classmethod
     def get_help_list_text(cls):
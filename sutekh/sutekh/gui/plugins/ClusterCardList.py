@@ -5,15 +5,14 @@
 
 """Plugin to find clusters in the card lists."""
 
-import random
-import math
-
 from gi.repository import Gtk
 
 from sutekh.base.core.BaseTables import PhysicalCard, PhysicalCardSet
 from sutekh.base.core.BaseAdapters import IPhysicalCard
 from sutekh.base.core.CardSetUtilities import check_cs_exists
+from sutekh.base.core.Clustering import METRICS, k_means
 from sutekh.base.gui.AutoScrolledWindow import AutoScrolledWindow
+from sutekh.base.gui.BackgroundJob import run_job, JobCancelled
 from sutekh.base.gui.SutekhDialog import NotebookDialog, do_complaint_error
 
 from sutekh.core.CardListTabulator import CardListTabulator
@@ -48,6 +47,7 @@ class ClusterCardList(SutekhPlugin):
         self._oAutoNumClusters = None
         self._oNumClustersSpin = None
         self._oNumIterSpin = None
+        self._oNumRestartsSpin = None
 
     def get_menu_item(self):
         """Register on the 'Analyze' menu."""
@@ -162,6 +162,17 @@ class ClusterCardList(SutekhPlugin):
         oHbox.pack_end(self._oNumIterSpin, False, True, 0)  # right align
         oVbx.pack_start(oHbox, False, True, 0)
 
+        # Number of restarts
+        oNumRestartsLabel = Gtk.Label(label="Number of Restarts:")
+        self._oNumRestartsSpin = Gtk.SpinButton()
+        self._oNumRestartsSpin.set_range(1, 20)
+        self._oNumRestartsSpin.set_increments(1, 5)
+        self._oNumRestartsSpin.set_value(3)
+        oHbox = Gtk.HBox(False, 0)
+        oHbox.pack_start(oNumRestartsLabel, False, True, 0)  # left align
+        oHbox.pack_end(self._oNumRestartsSpin, False, True, 0)  # right align
+        oVbx.pack_start(oHbox, False, True, 0)
+
         # Autoset Num clusters
         self._oAutoNumClusters = Gtk.CheckButton("One cluster per 80 cards")
         oHbox = Gtk.HBox(False, 0)
@@ -200,7 +211,7 @@ class ClusterCardList(SutekhPlugin):
         oDistLabel.set_markup("<b>Distance Measure for Clustering</b>")
         oVbx.pack_start(oDistLabel, False, False, 5)
 
-        oIter = Vector.METRICS.keys()
+        oIter = iter(METRICS)
         for sName in oIter:
             oFirstBut = Gtk.RadioButton(group=None, label=sName)
             oVbx.pack_start(oFirstBut, False, True, 0)
@@ -322,79 +333,6 @@ class ClusterCardList(SutekhPlugin):
             if oBut.get_active():
                 self._fMakeCardSetFromCluster(iId)
 
-    @staticmethod
-    def k_means_plus_plus(aCards, iNumClust, fDist):
-        """Find a set of initial centers using the k-means++ algorithm.
-
-           See http://www.stanford.edu/~darthur/kMeansPlusPlus.pdf.
-           """
-        aMeans = [random.choice(aCards)]
-
-        while len(aMeans) < iNumClust:
-            aDists = []
-            for oVec in aCards:
-                fMinD = min((fDist(oVec, oMean) for oMean in aMeans)) ** 2
-                aDists.append(fMinD)
-
-            fSumSq = sum(aDists)
-            fPick = random.uniform(0, fSumSq)
-
-            for iCard, fMinD in enumerate(aDists):
-                fPick -= fMinD
-                if fPick <= 0:
-                    break
-
-            # iCard is defined because k_means doesn't call
-            # this unless aCards is non-empty
-            # pylint: disable=undefined-loop-variable
-
-            if iCard == len(aCards):
-                # guard against slight possibility of being very close
-                # to end of fSumSq.
-                iCard -= 1
-
-            aMeans.append(aCards[iCard])
-
-        return aMeans
-
-    def k_means(self, aCards, iNumClust, iIterations, fDist):
-        """Perform k-means clustering on a list of cards using Lloyd's
-           algorithm."""
-        if (not aCards) or (not aCards[0]):
-            # empty card set or zero-length vectors
-            return [], []
-
-        aCards = [Vector(x) for x in aCards]
-        aMeans = self.k_means_plus_plus(aCards, iNumClust, fDist)
-        iCards = len(aCards)
-
-        # just do a fixed number of interations (no complex stopping condition)
-        for _iIter in range(iIterations):
-            # empty clusters
-            aClusters = []
-            for iClust in range(iNumClust):
-                aClusters.append([])
-
-            # calculate membership in clusters
-            for iCard in range(iCards):
-                oVec = aCards[iCard]
-                # pylint: disable=cell-var-from-loop
-                # Since we use key immediately, this warning isn't
-                # an issue
-                iVmin = min(range(iNumClust),
-                            key=lambda iV: fDist(oVec, aMeans[iV]))
-                # pylint: enable=cell-var-from-loop
-                aClusters[iVmin].append(iCard)
-
-            # recompute the centroids
-            for iClust in range(iNumClust):
-                if aClusters[iClust]:
-                    aMeans[iClust] = (1.0 / len(aClusters[iClust])) * sum(
-                        (aCards[x] for x in aClusters[iClust])
-                    )
-
-        return aMeans, aClusters
-
     def do_clustering(self):
         """Call the chosen clustering algorithm"""
         # gather cards
@@ -411,29 +349,39 @@ class ClusterCardList(SutekhPlugin):
         # sort column names
         aColNames = sorted(dPropFuncs.keys())
 
-        # make tabulator and get table
-        oTab = CardListTabulator(aColNames, dPropFuncs)
-        aTable = oTab.tabulate(aCards)
-
         # set k-means parameters
         if self._oAutoNumClusters.get_active():
-            iNumClusts = max(4, int(len(aTable) / 80.0) + 1)
+            iNumClusts = None
         else:
             iNumClusts = max(2, int(self._oNumClustersSpin.get_value()))
         iIterations = max(2, int(self._oNumIterSpin.get_value()))
+        iRestarts = max(1, int(self._oNumRestartsSpin.get_value()))
         for oBut in self._aDistanceMeasureGroup:
             if oBut.get_active():
                 sName = oBut.get_label()
-                fDist = Vector.METRICS[sName]
+                oMetric = METRICS[sName]
                 break
         else:
-            fDist = Vector.METRICS['Euclidean Distance']
-
-        # aMeans -> list of vectors of cluster centroids
-        # aClusters -> list of clusters, each cluster is a list of card indexes
-
-        aMeans, aClusters = self.k_means(aTable, iNumClusts, iIterations,
-                                         fDist)
+            oMetric = METRICS['Euclidean Distance']
+
+        def _cluster(oProgress):
+            """Tabulate the cards and find the clusters.
+
+               aMeans -> list of vectors of cluster centroids
+               aClusters -> list of clusters, each cluster is a list of
+               card indexes"""
+            oTab = CardListTabulator(aColNames, dPropFuncs)
+            aTable = oTab.tabulate(aCards)
+            iClusts = iNumClusts
+            if iClusts is None:
+                iClusts = max(4, int(len(aTable) / 80.0) + 1)
+            return k_means(aTable, iClusts, iIterations, oMetric, iRestarts,
+                           fProgress=oProgress.update_bar)
+
+        try:
+            aMeans, aClusters = run_job("Clustering cards", _cluster)
+        except JobCancelled:
+            return
 
         self._populate_results(aCards, aColNames, aMeans, aClusters)
 
@@ -458,83 +406,4 @@ class ClusterCardList(SutekhPlugin):
         self._open_cs(sDeckName, True)
 
 
-class Vector:
-    """Really simple class representing a row of card table data."""
-
-    METRICS = {}
-
-    def __init__(self, aData):
-        self._aData = aData
-
-    # We do want to access _aData on other Vectors.
-    # pylint: disable=protected-access
-
-    def euclidian_distance(self, oVec2):
-        """Euclidean distance between two vectors."""
-        assert len(self._aData) == len(oVec2._aData)
-        fSum = sum(((x - y) ** 2 for (x, y) in zip(self._aData, oVec2._aData)))
-        return math.sqrt(fSum)
-
-    METRICS['Euclidean Distance'] = euclidian_distance
-
-    def sutekh_distance(self, oVec2):
-        """Like Euclidean distance, but -1 is distance 0.25 to anything
-           (including 0 and -1) and 0 is distance 4.0 from anything other
-           than 0.
-           """
-        assert len(self._aData) == len(oVec2._aData)
-        fSum = sum((
-            ((x == -1 or y == -1) and 0.25) or
-            (((x == 0) ^ (y == 0) and 4.0)) or
-            (x - y) ** 2 for (x, y) in zip(self._aData, oVec2._aData)
-        ))
-        return math.sqrt(fSum)
-
-    METRICS['Sutekh Distance'] = sutekh_distance
-
-    # Other possibile metrics:
-    #  'City Block Distance',
-    #  'Correlation',
-    #  'Absolute Value of the Correlation',
-    #  'Uncentered Correlation',
-    #  'Absolute Value of the Uncentered Correlation',
-    #  "Spearman's Rank Correlation"
-    #  "Kendall's Tau"
-
-    def __add__(self, oOther):
-        """Sum this vector with another."""
-        if oOther == 0:
-            return self
-        assert len(self._aData) == len(oOther._aData)
-        return Vector([x + y for (x, y) in zip(self._aData, oOther._aData)])
-
-    def __radd__(self, oOther):
-        """Sum this vector with another."""
-        if oOther == 0:
-            return self
-        assert len(self._aData) == len(oOther._aData)
-        return Vector([x + y for (x, y) in zip(self._aData, oOther._aData)])
-
-    def __mul__(self, fScale):
-        """Multiply this vector by a scalar."""
-        fScale = float(fScale)
-        return Vector([x * fScale for x in self._aData])
-
-    def __rmul__(self, fScale):
-        """Multiply this vector by a scalar."""
-        fScale = float(fScale)
-        return Vector([x * fScale for x in self._aData])
-
-    def __len__(self):
-        """Length of this vector."""
-        return len(self._aData)
-
-    def __str__(self):
-        """String representation of this vector."""
-        return str(self._aData)
-
-    def __iter__(self):
-        """Iterator."""
-        return iter(self._aData)
-
 plugin = ClusterCardList
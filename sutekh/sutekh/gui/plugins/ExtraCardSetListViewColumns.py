@@ -7,14 +7,15 @@
 """Display extra columns in the tree view"""
 
 from sutekh.gui.PluginManager import SutekhPlugin
-from sutekh.base.core.BaseTables import MapPhysicalCardToPhysicalCardSet
-from sutekh.base.core.BaseFilters import PhysicalCardSetFilter, FilterAndBox
+from sutekh.base.core.CardSetStats import (get_card_set_stats,
+                                           register_stats_category)
 from sutekh.core.Filters import CryptCardFilter
-from sutekh.base.gui.plugins.BaseExtraColumns import (get_number,
-                                                      format_number)
+from sutekh.base.gui.plugins.BaseExtraColumns import format_number
 from sutekh.base.gui.plugins.BaseExtraCSListViewColumns import (
     BaseExtraCSListViewColumns)
 
+register_stats_category('Crypt', CryptCardFilter)
+
 
 class ExtraCardSetListViewColumns(SutekhPlugin, BaseExtraCSListViewColumns):
     """Add extra columns to the card set list view.
@@ -28,8 +29,6 @@ class ExtraCardSetListViewColumns(SutekhPlugin, BaseExtraCSListViewColumns):
         'Crypt': (100, '_render_crypt', '_get_data_crypt'),
     })
 
-    CS_KEYS = ('Total Cards', 'Library', 'Crypt')
-
     sMenuName = "Extra Columns -- card set list view"
 
     sHelpCategory = "card_set_list:profile"
@@ -70,25 +69,11 @@ class ExtraCardSetListViewColumns(SutekhPlugin, BaseExtraCSListViewColumns):
 
     def _get_data_library(self, sCardSet, bGetIcons=True):
         """Return the number of library cards in the card set"""
-        def query(oCardSet):
-            """Query the database"""
-            oFilter = FilterAndBox([PhysicalCardSetFilter(oCardSet.name),
-                                    CryptCardFilter()])
-            iCrypt = oFilter.select(
-                MapPhysicalCardToPhysicalCardSet).distinct().count()
-            iTot = MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardSetID=oCardSet.id).count()
-            return iTot - iCrypt
-
-        if sCardSet:
-            # lookup totals
-            dInfo = self._dCache[sCardSet]
-            aIcons = []
-            iTotal = get_number(dInfo, 'Library', query)
-            if bGetIcons:
-                aIcons = [None]
+        iTotal, aIcons = self._get_stat(sCardSet, 'iTotal', bGetIcons)
+        if iTotal < 0:
             return iTotal, aIcons
-        return -1, []
+        return iTotal - get_card_set_stats().get_count(sCardSet,
+                                                       'Crypt'), aIcons
 
     def _render_library(self, _oColumn, oCell, _oModel, oIter, _oDummy):
         """display the library count"""
@@ -99,22 +84,10 @@ class ExtraCardSetListViewColumns(SutekhPlugin, BaseExtraCSListViewColumns):
 
     def _get_data_crypt(self, sCardSet, bGetIcons=True):
         """Return the number of crypt cards in the card set"""
-        def query(oCardSet):
-            """Query the database"""
-            oFilter = FilterAndBox([PhysicalCardSetFilter(oCardSet.name),
-                                    CryptCardFilter()])
-            return oFilter.select(
-                MapPhysicalCardToPhysicalCardSet).distinct().count()
-
-        if sCardSet:
-            # lookup totals
-            dInfo = self._dCache[sCardSet]
-            aIcons = []
-            iTotal = get_number(dInfo, 'Crypt', query)
-            if bGetIcons:
-                aIcons = [None]
+        iTotal, aIcons = self._get_stat(sCardSet, 'iTotal', bGetIcons)
+        if iTotal < 0:
             return iTotal, aIcons
-        return -1, []
+        return get_card_set_stats().get_count(sCardSet, 'Crypt'), aIcons
 
     def _render_crypt(self, _oColumn, oCell, _oModel, oIter, _oDummy):
         """display the crypt count"""
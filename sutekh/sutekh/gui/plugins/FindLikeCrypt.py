@@ -7,15 +7,10 @@
 
 from gi.repository import GObject, Gtk, Pango
 
-from sutekh.base.core.BaseTables import (PhysicalCardSet, PhysicalCard,
-                                         AbstractCard)
+from sutekh.base.core.BaseTables import PhysicalCardSet, PhysicalCard
 from sutekh.base.core.BaseAdapters import (IAbstractCard, IPhysicalCard,
                                            IPhysicalCardSet)
-from sutekh.core.SutekhTables import SutekhAbstractCard
-from sutekh.base.core.BaseFilters import CardTypeFilter, FilterAndBox
-from sutekh.core.Filters import (MultiGroupFilter, MultiVirtueFilter,
-                                 MultiDisciplineFilter,
-                                 MultiDisciplineLevelFilter)
+from sutekh.core.CryptIndex import get_crypt_index, flush_crypt_index
 from sutekh.SutekhUtility import is_crypt_card, is_vampire
 from sutekh.gui.PluginManager import SutekhPlugin
 from sutekh.base.gui.SutekhDialog import (SutekhDialog, NotebookDialog,
@@ -24,40 +19,6 @@ from sutekh.base.gui.AutoScrolledWindow import AutoScrolledWindow
 from sutekh.base.gui.GuiCardSetFunctions import create_card_set
 
 
-def _gen_subsets(aData, iSetSize, iDepth=1):
-    """Generate subsets of the given size from a list"""
-    if iDepth > iSetSize:
-        return []
-    if iDepth < 1:
-        return []
-    if iDepth == iSetSize:
-        return [set([x]) for x in aData]
-    # I'm arguably overly fond of recursion
-    aNewSets = []
-    aSets = _gen_subsets(aData, iSetSize, iDepth + 1)
-    for oVal in aData:
-        for oSet in aSets:
-            if oVal not in oSet:
-                oNewSet = oSet.union(set([oVal]))
-                if oNewSet not in aNewSets:
-                    aNewSets.append(oNewSet)
-    return aNewSets
-
-
-def _get_groups(oCard):
-    """Get compatible groups ranges"""
-    # We ignore the any group cases as they are currently uninteresing
-    # and excluded by the discipline check
-    # If this ever changes, this will need to be revisited.
-    # pylint: disable=no-member
-    # SQLObject confuses pylint
-    iGrp = oCard.group
-    iMaxGrp = SutekhAbstractCard.select().max(SutekhAbstractCard.q.group)
-    iMax = min(iMaxGrp, iGrp + 1)
-    iMin = max(1, iGrp - 1)
-    return MultiGroupFilter(range(iMin, iMax + 1))
-
-
 def make_key(aSet, bSuperior):
     """Create a suitable key"""
     if bSuperior:
@@ -67,17 +28,6 @@ def make_key(aSet, bSuperior):
     return sKey
 
 
-def _make_superset(oCard, bSuperior, bVampire):
-    """Check if all elements of aSet match oCard"""
-    if bSuperior:
-        return set([oP.discipline for oP in oCard.discipline if
-                    oP.level == 'superior'])
-    if bVampire:
-        return set([oP.discipline for oP in oCard.discipline])
-    # Imbued
-    return set(oCard.virtue)
-
-
 class FindLikeVampires(SutekhPlugin):
     """Create a list of vampires 'like' the selected vampire."""
 
@@ -96,7 +46,17 @@ class FindLikeVampires(SutekhPlugin):
                    More complex queries are possible by frist filtering the
                    card set and then using the 'Only match cards visible in
                    this pane' option to restrict the results of the crypt card
-                   search to match the filter."""
+                   search to match the filter.
+
+                   The 'Most Similar' tab lists the crypt cards in a
+                   compatible grouping which are most similar overall to the
+                   selected crypt card, considering the disciplines (with
+                   superior disciplines counting more) or virtues, clan or
+                   creed, sect, titles, keywords, group and capacity or
+                   life."""
+
+    # Number of cards to show on the 'Most Similar' tab
+    NUM_SIMILAR = 25
 
     def get_menu_item(self):
         """Register on the 'Analyze' Menu"""
@@ -133,41 +93,25 @@ class FindLikeVampires(SutekhPlugin):
             self.display_results(dGroups)
     # pylint: enable=attribute-defined-outside-init
 
-    # pylint: disable=too-many-arguments
-    # need all these arguments to format results nicely
-    def _group_cards(self, aCards, iNum, aSubSets, bSuperior, bUseCardSet):
-        """Group the cards and return only cards with iNum or more
-           instances.
-
-           This works because of our database structure and query, which
-           ends up returning a match for each discipline in the discipline
-           filter that matches."""
-        aDistinct = set(aCards)
-        dResults = {}
-        aDistinct.remove(self.oSelCard)  # Don't match ourselves
-        bVampire = is_vampire(self.oSelCard)
+    def _group_cards(self, iNum, bSuperior, bUseCardSet):
+        """Find the cards sharing iNum or more disciplines or virtues,
+           grouped by the disciplines or virtues shared, along with the
+           most similar cards."""
         if bUseCardSet:
-            aCardSetCards = set([IAbstractCard(x) for x in
-                                 self.model.get_card_iterator(
-                                     self.model.get_current_filter())])
+            aRestrict = set([IAbstractCard(x).id for x in
+                             self.model.get_card_iterator(
+                                 self.model.get_current_filter())])
         else:
-            aCardSetCards = None
-        for oCard in list(aDistinct):
-            if aCards.count(oCard) < iNum:
-                aDistinct.remove(oCard)
-            elif bUseCardSet and oCard not in aCardSetCards:
-                # Remove cards not in the view from the results
-                aDistinct.remove(oCard)
-        dResults['all'] = aDistinct
-        for oCard in aDistinct:
-            aFullSet = _make_superset(oCard, bSuperior, bVampire)
-            for aSet in aSubSets:
-                # We only add the card if it has all elements of the set
-                if aSet.issubset(aFullSet):
-                    dResults.setdefault(make_key(aSet, bSuperior),
-                                        []).append(oCard)
+            aRestrict = None
+        oIndex = get_crypt_index()
+        aMatches, dSubsets = oIndex.find_sharing(self.oSelCard, iNum,
+                                                 bSuperior, aRestrict)
+        dResults = {'all': aMatches}
+        for aSet, aCards in dSubsets.items():
+            dResults[make_key(aSet, bSuperior)] = aCards
+        dResults['similar'] = oIndex.find_similar(self.oSelCard,
+                                                  self.NUM_SIMILAR, aRestrict)
         return dResults
-    # pylint: enable=too-many-arguments
 
     def _get_selected_crypt_card(self):
         """Extract selected crypt card from the model."""
@@ -185,7 +129,6 @@ class FindLikeVampires(SutekhPlugin):
         """Construct a vampire search from the card"""
         # pylint: disable=no-member
         # SQLObject & Gtk confuse pylint
-        aFilters = [CardTypeFilter('Vampire'), _get_groups(self.oSelCard)]
         oDialog = SutekhDialog('Find Vampires like', self.parent,
                                Gtk.DialogFlags.MODAL |
                                Gtk.DialogFlags.DESTROY_WITH_PARENT,
@@ -233,27 +176,14 @@ class FindLikeVampires(SutekhPlugin):
         bUseCardSet = oUseCardSet.get_active()
         sText = oComboBox.get_active_text()
         iNum = int(sText)
-        bSuperior = oSuperior and oSuperior.get_active()
-        if bSuperior:
-            oDisciplineFilter = MultiDisciplineLevelFilter(
-                [(x.fullname, 'superior') for x in aSuperior])
-            aSets = _gen_subsets(aSuperior, iNum)
-        else:
-            oDisciplineFilter = MultiDisciplineFilter([
-                x.fullname for x in aDisciplines])
-            aSets = _gen_subsets(aDisciplines, iNum)
-        aFilters.append(oDisciplineFilter)
-        oFullFilter = FilterAndBox(aFilters)
+        bSuperior = bool(oSuperior and oSuperior.get_active())
         oDialog.destroy()
-        aCandCards = list(oFullFilter.select(AbstractCard))
-        return self._group_cards(aCandCards, iNum, aSets, bSuperior,
-                                 bUseCardSet)
+        return self._group_cards(iNum, bSuperior, bUseCardSet)
 
     def find_imbued_like(self):
         """Construct a imbued search from the card"""
         # pylint: disable=no-member
         # SQLObject & Gtk confuse pylint
-        aFilters = [CardTypeFilter('Imbued'), _get_groups(self.oSelCard)]
         oDialog = SutekhDialog('Find Imbued like', self.parent,
                                Gtk.DialogFlags.MODAL |
                                Gtk.DialogFlags.DESTROY_WITH_PARENT,
@@ -288,15 +218,8 @@ class FindLikeVampires(SutekhPlugin):
             bUseCardSet = True
         sText = oComboBox.get_active_text()
         iNum = int(sText)
-        oVirtueFilter = MultiVirtueFilter([x.fullname for x in
-                                           self.oSelCard.virtue])
-        aSets = _gen_subsets(self.oSelCard.virtue, iNum)
-        aFilters.append(oVirtueFilter)
-        oFullFilter = FilterAndBox(aFilters)
         oDialog.destroy()
-        aCandCards = list(oFullFilter.select(AbstractCard))
-        return self._group_cards(aCandCards, iNum, aSets, False,
-                                 bUseCardSet)
+        return self._group_cards(iNum, False, bUseCardSet)
 
     def _update_combo_box(self, oDiscipline, oComboBox, aDisciplines,
                           aSuperior):
@@ -342,8 +265,12 @@ class FindLikeVampires(SutekhPlugin):
         oAllView = LikeCardsView(dGroups['all'], bVampire)
         oResults.add_widget_page(AutoScrolledWindow(oAllView),
                                  'All Matches')
+        oSimilarView = LikeCardsView([x[0] for x in dGroups['similar']],
+                                     bVampire, dict(dGroups['similar']))
+        oResults.add_widget_page(AutoScrolledWindow(oSimilarView),
+                                 'Most Similar')
         for sSet in sorted(dGroups):
-            if sSet == 'all':
+            if sSet in ('all', 'similar'):
                 # Already handled
                 continue
             oView = LikeCardsView(dGroups[sSet], bVampire)
@@ -360,6 +287,10 @@ class FindLikeVampires(SutekhPlugin):
         oResults.run()
         oResults.destroy()
 
+    def update_to_new_db(self, _sSignal):
+        """The card list may have changed, so flush the crypt index"""
+        flush_crypt_index()
+
     def _update_notebook(self, oCheckBox, oDlg):
         """Add or remove the original card as required"""
         bInclude = oCheckBox.get_active()
@@ -397,9 +328,10 @@ class LikeCardsView(Gtk.TreeView):
 
     VAMP_LABELS = ['Name', 'Group', 'Capacity', 'Clan', 'Disciplines']
     IMBUED_LABELS = ['Name', 'Group', 'Life', 'Creed', 'Virtues']
+    SIMILARITY_LABEL = 'Similarity (%)'
 
-    def __init__(self, aCards, bVampire):
-        self._oModel = LikeCardsModel(aCards, bVampire)
+    def __init__(self, aCards, bVampire, dScores=None):
+        self._oModel = LikeCardsModel(aCards, bVampire, dScores)
 
         super().__init__(self._oModel)
 
@@ -410,14 +342,21 @@ class LikeCardsView(Gtk.TreeView):
             aLabels = self.VAMP_LABELS
         else:
             aLabels = self.IMBUED_LABELS
+        if dScores is not None:
+            aLabels = aLabels + [self.SIMILARITY_LABEL]
 
         for iCol, sLabel in enumerate(aLabels):
             oColumn = Gtk.TreeViewColumn(sLabel, oCell, text=iCol)
             oColumn.set_sort_column_id(iCol)
             self.append_column(oColumn)
 
-        # Sort by the name by default
-        self._oModel.set_sort_column_id(0, Gtk.SortType.ASCENDING)
+        if dScores is not None:
+            # Sort by the similarity, most similar first
+            self._oModel.set_sort_column_id(len(aLabels) - 1,
+                                            Gtk.SortType.DESCENDING)
+        else:
+            # Sort by the name by default
+            self._oModel.set_sort_column_id(0, Gtk.SortType.ASCENDING)
 
         oSelection = self.get_selection()
         oSelection.set_mode(Gtk.SelectionMode.MULTIPLE)
@@ -438,19 +377,23 @@ class LikeCardsModel(Gtk.ListStore):
     # Gtk classes, so we have lots of public methods
     """ListStore for holding details of the matching cards"""
 
-    def __init__(self, aCards, bVampire):
+    def __init__(self, aCards, bVampire, dScores=None):
         super().__init__(GObject.TYPE_STRING, GObject.TYPE_INT,
                          GObject.TYPE_INT, GObject.TYPE_STRING,
-                         GObject.TYPE_STRING)
+                         GObject.TYPE_STRING, GObject.TYPE_INT)
 
         self.bVampire = bVampire
+        self._dScores = dScores or {}
         for oCard in aCards:
             self.add_card(oCard)
 
     def add_card(self, oCard):
         """Add the card to the model"""
         oIter = self.append(None)
-        self.set(oIter, 0, oCard.name, 1, oCard.group)
+        # The original card is a perfect match for itself
+        fScore = self._dScores.get(oCard, 1.0)
+        self.set(oIter, 0, oCard.name, 1, oCard.group,
+                 5, int(round(100 * fScore)))
         if self.bVampire:
             self.set(oIter, 2, oCard.capacity)
             self.set(oIter, 3, oCard.clan[0].name)
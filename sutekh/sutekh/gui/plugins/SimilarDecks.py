@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Find the card sets most similar to the current card set"""
+
+from gi.repository import Gtk
+
+from sutekh.base.core.BaseTables import PhysicalCardSet
+from sutekh.base.core.DeckSimilarity import (get_deck_similarity,
+                                             rank_similar)
+from sutekh.base.gui.SutekhDialog import SutekhDialog
+from sutekh.base.gui.AutoScrolledWindow import AutoScrolledWindow
+from sutekh.base.gui.BackgroundJob import run_job
+from sutekh.core.Filters import CryptCardFilter
+from sutekh.gui.PluginManager import SutekhPlugin
+
+
+def _rank_similar(_oProgress, oSketch, aCandidates, iCount):
+    """Score the candidate card sets against the sketch"""
+    return rank_similar(oSketch, aCandidates, iCount)
+
+
+class SimilarDecks(SutekhPlugin):
+    """Find the card sets with the most similar crypt and library
+       to the current card set."""
+
+    dTableVersions = {PhysicalCardSet: (5, 6, 7)}
+    aModelsSupported = (PhysicalCardSet,)
+
+    sMenuName = "Find similar card sets"
+
+    sHelpCategory = "card_sets:analysis"
+
+    sHelpText = """This lists the card sets, including any TWDA decks
+                   you've downloaded, which have the most similar cards
+                   to the current card set.
+
+                   The similarity is estimated separately for the crypt
+                   and the library, taking the number of copies of each
+                   card into account, and the overall similarity is the
+                   average of these. Card sets which have very few cards
+                   in common with the current card set are not listed.
+
+                   The matching card sets can be opened as new panes by
+                   choosing the "Open cardset" option."""
+
+    NUM_RESULTS = 20
+
+    def get_menu_item(self):
+        """Register on the 'Analyze' menu"""
+        oSimilar = Gtk.MenuItem(label=self.sMenuName)
+        oSimilar.connect("activate", self.activate)
+        return ('Analyze', oSimilar)
+
+    def activate(self, _oWidget):
+        """Find the similar card sets and show the results"""
+        oCardSet = self._get_card_set()
+        # The index is updated by the database signals on the main thread,
+        # so we build it here, and only score the candidates in the job
+        oIndex = get_deck_similarity('All card sets',
+                                     fGetSplitFilter=CryptCardFilter)
+        oSketch = oIndex.get_sketch(oCardSet)
+        aCandidates = oIndex.get_candidates(oSketch, (oCardSet.id,))
+        aResults = run_job('Finding similar card sets', _rank_similar,
+                           oSketch, aCandidates, self.NUM_RESULTS,
+                           bCancel=False)
+        # pylint: disable=no-member
+        # Gtk confuses pylint
+        oDlg = SutekhDialog("Card sets similar to %s" % oCardSet.name,
+                            self.parent, Gtk.DialogFlags.DESTROY_WITH_PARENT,
+                            ("_Close", Gtk.ResponseType.CLOSE))
+        oDlg.connect('response', lambda dlg, but: dlg.destroy())
+        if not aResults:
+            oLabel = Gtk.Label(label="No similar card sets found")
+            oDlg.vbox.pack_start(oLabel, True, True, 0)
+        else:
+            oInfo = Gtk.VBox(homogeneous=False, spacing=2)
+            for iSetId, fScore, aParts in aResults:
+                oInfo.pack_start(self._make_row(iSetId, fScore, aParts),
+                                 False, True, 0)
+                oInfo.pack_start(Gtk.HSeparator(), False, True, 0)
+            oDlg.vbox.pack_start(AutoScrolledWindow(oInfo), True, True, 0)
+            oDlg.set_default_size(500, 600)
+        oDlg.show_all()
+
+    def _make_row(self, iSetId, fScore, aParts):
+        """Create the widgets describing a similar card set"""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        oCS = PhysicalCardSet.get(iSetId)
+        aText = ['<b>%s</b>  %.0f%%' % (self._escape(oCS.name),
+                                        100 * fScore)]
+        for sPart, fPart in zip(('Crypt', 'Library'), aParts):
+            if fPart is not None:
+                aText.append('  %s: %.0f%%' % (sPart, 100 * fPart))
+        oLabel = Gtk.Label()
+        oLabel.set_markup('\n'.join(aText))
+        oButton = Gtk.Button(label="Open cardset")
+        oButton.connect('clicked', self._open_card_set, oCS.name)
+        oRow = Gtk.VBox(homogeneous=False, spacing=2)
+        oRow.pack_start(oLabel, False, True, 0)
+        oRow.pack_start(oButton, False, True, 0)
+        return oRow
+
+    def _open_card_set(self, _oButton, sName):
+        """Wrapper around open_cs to handle being called directly from a
+           Gtk widget"""
+        self._open_cs(sName)
+
+
+plugin = SimilarDecks
@@ -20,6 +20,7 @@ from sutekh.base.core.BaseAdapters import (IRarityPair, IPhysicalCardSet,
                                            IExpansion)
 from sutekh.base.core.BaseFilters import (PhysicalCardSetFilter,
                                           FilterAndBox, SpecificCardIdFilter)
+from sutekh.base.core.CardSetUtilities import CountedCardRows
 from sutekh.base.core.DBSignals import (listen_row_destroy, listen_row_update,
                                         listen_row_created,
                                         disconnect_row_destroy,
@@ -487,8 +488,8 @@ class StarterInfoPlugin(SutekhPlugin):
                 # Sort by exp, name
                 oFilter = FilterAndBox([SpecificCardIdFilter(oAbsCard.id),
                                         PhysicalCardSetFilter(oCS.name)])
-                iCount = oFilter.select(
-                    MapPhysicalCardToPhysicalCardSet).count()
+                iCount = CountedCardRows(oFilter.select(
+                    MapPhysicalCardToPhysicalCardSet).distinct()).count()
                 if iCount > 0:
                     dInfo[sType].append("x %(count)d %(exp)s (%(cardset)s)" % {
                         'count': iCount,
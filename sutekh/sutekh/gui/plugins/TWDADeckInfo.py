@@ -14,12 +14,9 @@ from gi.repository import Gtk
 
 from sqlobject import SQLObjectNotFound
 
-from sutekh.base.core.BaseTables import (PhysicalCardSet, PhysicalCard,
-                                         MapPhysicalCardToPhysicalCardSet)
-from sutekh.base.core.BaseAdapters import IAbstractCard, IPhysicalCardSet
-from sutekh.base.core.BaseFilters import (FilterOrBox, FilterAndBox,
-                                          SpecificCardFilter,
-                                          MultiPhysicalCardSetMapFilter)
+from sutekh.base.core.BaseTables import PhysicalCardSet, PhysicalCard
+from sutekh.base.core.BaseAdapters import IPhysicalCardSet
+from sutekh.base.core.CardSetIndex import get_card_set_index
 from sutekh.base.io.UrlOps import urlopen_with_timeout, fetch_data, HashError
 from sutekh.base.gui.SutekhDialog import (SutekhDialog, NotebookDialog,
                                           do_complaint_error)
@@ -35,6 +32,26 @@ from sutekh.io.DataPack import find_all_data_packs, DOC_URL
 from sutekh.io.ZipFileWrapper import ZipFileWrapper
 from sutekh.gui.PluginManager import SutekhPlugin
 
+# pattern for TWDA holders
+TWDA_HOLDER_REGEX = re.compile('^TWDA ([0-9]{4})$')
+
+
+def get_twda_names():
+    """Get names of all the TWDA entries in the current database"""
+    aNames = []
+    for oCS in PhysicalCardSet.select():
+        if not oCS.parent or not oCS.inuse:
+            continue
+        oMatch = TWDA_HOLDER_REGEX.match(oCS.parent.name)
+        if oMatch:
+            aNames.append(oCS.name)
+    return aNames
+
+
+def get_twda_index():
+    """Return the index of the cards in the TWDA decks"""
+    return get_card_set_index('TWDA', get_twda_names)
+
 
 class BinnedCountLogHandler(SutekhCountLogHandler):
     """Wrapped around SutekhCountLogHandler to handle downloading
@@ -134,7 +151,7 @@ class TWDAInfoPlugin(SutekhPlugin):
     aModelsSupported = (PhysicalCardSet, PhysicalCard, 'MainWindow')
 
     # pattern for TWDA holders
-    oTWDARegex = re.compile('^TWDA ([0-9]{4})$')
+    oTWDARegex = TWDA_HOLDER_REGEX
 
     dGlobalConfig = {
         'twda configured': 'option("Yes", "No", "Unasked", default="Unasked")',
@@ -149,8 +166,10 @@ class TWDAInfoPlugin(SutekhPlugin):
                    deck archive for decks containing specific combinations of
                    cards.
 
-                   You can either search for all the selected cards or for
-                   those that contain at least 1 of the selected cards.
+                   You can either search for all the selected cards, for
+                   those that contain at least 1 of the selected cards, or
+                   for those that contain at least a given number of the
+                   selected cards.
 
                    The results are grouped by year, and list the number of
                    matching card found in each listed deck. The matching
@@ -165,6 +184,7 @@ class TWDAInfoPlugin(SutekhPlugin):
         super().__init__(*args, **kwargs)
         self.oAllTWDA = None
         self.oAnyTWDA = None
+        self.oSomeTWDA = None
 
     def get_menu_item(self):
         """Overrides method from base class.
@@ -186,12 +206,12 @@ class TWDAInfoPlugin(SutekhPlugin):
         self.oAnyTWDA = Gtk.MenuItem(label="ANY selected cards")
         oSubMenu.add(self.oAnyTWDA)
         self.oAnyTWDA.connect("activate", self.find_twda, "any")
-        if self.check_enabled():
-            self.oAnyTWDA.set_sensitive(True)
-            self.oAllTWDA.set_sensitive(True)
-        else:
-            self.oAnyTWDA.set_sensitive(False)
-            self.oAllTWDA.set_sensitive(False)
+        self.oSomeTWDA = Gtk.MenuItem(label="AT LEAST N selected cards")
+        oSubMenu.add(self.oSomeTWDA)
+        self.oSomeTWDA.connect("activate", self.find_twda, "some")
+        bEnabled = self.check_enabled()
+        for oItem in (self.oAllTWDA, self.oAnyTWDA, self.oSomeTWDA):
+            oItem.set_sensitive(bEnabled)
         return ('Analyze', oTWDMenu)
 
     def find_twda(self, _oWidget, sMode):
@@ -201,45 +221,39 @@ class TWDAInfoPlugin(SutekhPlugin):
         if not aAbsCards:
             do_complaint_error('Need to select some cards for this plugin')
             return
-        if len(aAbsCards) > 20:
-            do_complaint_error('Too many cards selected (%d). Please select '
-                               'no more than 20 cards' % len(aAbsCards))
-            return
-        aCardFilters = []
         iTotCards = len(aAbsCards)
-        for oCard in aAbsCards:
-            aCardFilters.append(SpecificCardFilter(oCard))
-        # needs to be OR, since we're matching against the card to card set
-        # mapping table
-        oCardFilter = FilterOrBox(aCardFilters)
-        aNames = self._get_twda_names()
-        oMapFilter = MultiPhysicalCardSetMapFilter(aNames)
-        oFullFilter = FilterAndBox([oCardFilter, oMapFilter])
+        iMin = 1
+        if sMode == 'all':
+            iMin = iTotCards
+        elif sMode == 'some':
+            iMin = self._ask_min_cards(iTotCards)
+            if iMin is None:
+                return
+        dNames = dict((x.id, x.name) for x in aAbsCards)
+        oIndex = get_twda_index()
+        if iMin == 1:
+            aMatches = oIndex.find_any(dNames)
+        elif iMin == iTotCards:
+            aMatches = oIndex.find_all(dNames)
+        else:
+            aMatches = oIndex.find_at_least(dNames, iMin)
 
         # pylint: disable=no-member
         # SQLObject confuses pylint
         dCardSets = {}
-        for oMapCard in oFullFilter.select(MapPhysicalCardToPhysicalCardSet):
-            oCS = oMapCard.physicalCardSet
-            sCardName = IAbstractCard(oMapCard).name
-            dCardSets.setdefault(oCS, {})
-            dCardSets[oCS].setdefault(sCardName, 0)
-            dCardSets[oCS][sCardName] += 1
-
-        if sMode == 'all' and iTotCards > 1:
-            # This is a little clunky, but, because of how we construct the
-            # filters, we currently have the any match set, so we need to
-            # filter this down to those that match all the cards
-            for oCS in list(dCardSets):
-                if len(dCardSets[oCS]) != iTotCards:
-                    # Not all, so drop this one
-                    del dCardSets[oCS]
+        for iSetId in aMatches:
+            oCS = PhysicalCardSet.get(iSetId)
+            dCardSets[oCS] = dict(
+                (dNames[iAbsId], iCnt) for iAbsId, iCnt in
+                oIndex.get_counts(iSetId, dNames).items())
 
         sCards = '",  "'.join(sorted([x.name for x in aAbsCards]))
-        if sMode == 'any':
+        if iMin == 1:
             sMatchText = 'Matching ANY of "%s"' % sCards
-        else:
+        elif iMin == iTotCards:
             sMatchText = 'Matching ALL of "%s"' % sCards
+        else:
+            sMatchText = 'Matching AT LEAST %d of "%s"' % (iMin, sCards)
 
         # Create a dialog showing the results
         if dCardSets:
@@ -251,6 +265,31 @@ class TWDAInfoPlugin(SutekhPlugin):
         oDlg.show_all()
         oDlg.show()
 
+    def _ask_min_cards(self, iTotCards):
+        """Ask the user for the minimum number of the selected cards
+           to match. Returns None if the user cancels."""
+        oDlg = SutekhDialog("Minimum number of cards", self.parent,
+                            Gtk.DialogFlags.MODAL |
+                            Gtk.DialogFlags.DESTROY_WITH_PARENT,
+                            ("_OK", Gtk.ResponseType.OK,
+                             "_Cancel", Gtk.ResponseType.CANCEL))
+        oLabel = Gtk.Label(label="Find decks containing at least this many "
+                                 "of the %d selected cards" % iTotCards)
+        oSpin = Gtk.SpinButton()
+        oSpin.set_range(1, iTotCards)
+        oSpin.set_increments(1, 5)
+        oSpin.set_value(min(2, iTotCards))
+        # pylint: disable=no-member
+        # Gtk confuses pylint
+        oDlg.vbox.pack_start(oLabel, False, False, 0)
+        oDlg.vbox.pack_start(oSpin, False, False, 0)
+        oDlg.show_all()
+        iMin = None
+        if oDlg.run() == Gtk.ResponseType.OK:
+            iMin = oSpin.get_value_as_int()
+        oDlg.destroy()
+        return iMin
+
     def _fill_dlg(self, dCardSets, sMatchText):
         """Add info about the card sets to the dialog"""
         oDlg = NotebookDialog("TWDA matches", self.parent,
@@ -314,16 +353,12 @@ class TWDAInfoPlugin(SutekhPlugin):
                 break
         return bEnabled
 
+    # pylint: disable=no-self-use
+    # method for consistency with _get_twda_holders
     def _get_twda_names(self):
         """Get names of all the TWDA entries in the current database"""
-        aNames = []
-        for oCS in PhysicalCardSet.select():
-            if not oCS.parent or not oCS.inuse:
-                continue
-            oMatch = self.oTWDARegex.match(oCS.parent.name)
-            if oMatch:
-                aNames.append(oCS.name)
-        return aNames
+        return get_twda_names()
+    # pylint: enable=no-self-use
 
     def _get_twda_holders(self):
         """Return all the TWDA holders in the current database"""
@@ -498,8 +533,7 @@ class TWDAInfoPlugin(SutekhPlugin):
             if oCS.parent.name in aToReplace:
                 aToDelete.append(oCS.name)
 
-        return unzip_files_into_db(aZipHolders, "Adding TWDA Data",
-                                   self.parent, aToDelete)
+        return self._unzip_into_db(aZipHolders, aToDelete)
 
     def _unzip_twda_file(self, oFile):
         """Unzip a single zip file containing all the TWDA entries"""
@@ -517,8 +551,16 @@ class TWDAInfoPlugin(SutekhPlugin):
         # We do this to handle card sets being removed from the TWDA
         # correctly
         aToDelete = self._get_twda_names()
-        return unzip_files_into_db([oFile], "Adding TWDA Data", self.parent,
-                                   aToDelete)
+        return self._unzip_into_db([oFile], aToDelete)
+
+    def _unzip_into_db(self, aZipHolders, aToDelete):
+        """Unzip the TWDA files, and rebuild the index"""
+        bResult = unzip_files_into_db(aZipHolders, "Adding TWDA Data",
+                                      self.parent, aToDelete)
+        # The card set signals flush the index, but we ensure the index
+        # is rebuilt, even if the unzip failed part way through
+        get_twda_index().flush()
+        return bResult
 
 
 plugin = TWDAInfoPlugin
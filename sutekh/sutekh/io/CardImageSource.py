@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2008 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Naming and download details for the card images on
+   sutekh.vtes.za.net.
+
+   Split out of the card images plugin, so the images can also be
+   downloaded without the GUI."""
+
+import datetime
+import logging
+import os
+import re
+
+from sqlobject import SQLObjectNotFound
+
+from sutekh.base.core.BaseTables import PhysicalCard
+from sutekh.base.core.BaseAdapters import IExpansion, IPrinting, IPrintingName
+from sutekh.base.io.ImageDownloader import (ImageDownloader, DownloadJob,
+                                            DownloadJournal, DEFAULT_WORKERS,
+                                            JOURNAL_FILE)
+from sutekh.base.io.UrlOps import urlopen_with_timeout, fetch_data
+from sutekh.base.Utility import ensure_dir_exists, to_ascii
+
+# Base url for downloading the images from
+SUTEKH_IMAGE_SITE = 'https://sutekh.vtes.za.net'
+IMAGE_DATE_FILE = "image_dates.txt"
+
+SUTEKH_USER_AGENT = {
+    'User-Agent': 'Sutekh Image Plugin'
+}
+
+GROUP_RE = re.compile(r'\(group ([0-9]+)\)')
+
+# Special cases where we don't want to use the Promo short name
+SPECIAL_EXPANSIONS = [
+    "Anarchs and Alastors Storyline",
+]
+
+
+def make_image_name(sCardName):
+    """Convert a card name to an image name"""
+    # Some symbols are converted to uppercase, so fix that
+    sFilename = to_ascii(sCardName).lower()
+    if sFilename.startswith('the '):
+        sFilename = sFilename[4:] + 'the'
+    elif sFilename.startswith('an '):
+         sFilename = sFilename[3:] + 'an'
+    sFilename = sFilename.replace('(advanced)', 'adv')
+    # Convert vampire names to match krcg's group handling
+    if '(group' in sFilename:
+        iGroup = int(GROUP_RE.search(sFilename).groups()[0])
+        sFilename = GROUP_RE.sub('', sFilename) + '%02d' % iGroup
+    # Should probably do this via translate
+    for sChar in (" ", ".", ",", "'", "(", ")", "-", ":", "!", '"', "/"):
+        sFilename = sFilename.replace(sChar, '')
+    return sFilename + '.jpg'
+
+
+def make_expansion_pathname(sExpansionName):
+    """Convert an expansion name to the directory name"""
+    bOK = False
+    # pylint: disable=no-member
+    # pylint doesn't pick up IExpansion methods correctly
+    try:
+        oExpansion = IExpansion(sExpansionName)
+        oPrinting = None
+        bOK = True
+    except SQLObjectNotFound:
+        if '(' in sExpansionName:
+            # Maybe a Printing?
+            sSplitExp, sPrintName = [x.strip() for x in
+                                     sExpansionName.split('(', 1)]
+            # Remove trailing ')'
+            if sPrintName.endswith(')'):
+                sPrintName = sPrintName[:-1]
+            try:
+                oExpansion = IExpansion(sSplitExp)
+                oPrinting = IPrinting((oExpansion, sPrintName))
+                bOK = True
+            except SQLObjectNotFound:
+                pass
+    if not bOK:
+        # This can happen because we cache the expansion name and
+        # a new database import may cause that to vanish.
+        # We return just return a blank path segment, as the safest choice
+        logging.warning('Expansion %s no longer found in the database',
+                        sExpansionName)
+        return ''
+    # check special cases
+    # Promos always get the full name, so we can find the right image
+    # for cards printed in multiple different promo sets
+    if oExpansion.name in SPECIAL_EXPANSIONS or \
+            oExpansion.name.startswith('Promo'):
+        sExpName = oExpansion.name.lower()
+    else:
+        sExpName = oExpansion.shortname.lower()
+    if oPrinting:
+        sExpName += '_' + oPrinting.name.lower()
+    # Normalise storyline cards
+    sExpName = sExpName.replace(' ', '_').replace('-', '_')
+    # Strip quotes as well
+    sExpName = sExpName.replace("'", '')
+    return sExpName
+
+
+def make_image_url(sExpansionPath, sFilename):
+    """Return the url for the image of sFilename in the expansion"""
+    return '%s/cardimages/%s/%s' % (SUTEKH_IMAGE_SITE, sExpansionPath,
+                                    sFilename)
+
+
+def make_date_url():
+    """Return the url of the image date info file"""
+    return '%s/cardimages/%s' % (SUTEKH_IMAGE_SITE, IMAGE_DATE_FILE)
+
+
+def parse_image_dates(sDateData, sImagePath):
+    """Parse the image date info file into a dictionary of local filename
+       to the date of the image on the server.
+
+       Raises ValueError if the file can't be parsed."""
+    dDates = {}
+    for sLine in sDateData.splitlines():
+        sLine = sLine.strip()
+        if not sLine:
+            continue
+        # We are dealing with ls-lR type formatting
+        # size YYYY-mm-DD HH:MM:SS ./<dir>/<name> [ link info, etc ]
+        _sSize, sDay, sTime, sName = sLine.split()[:4]
+        oCacheDate = datetime.datetime.strptime(
+            "%s %s" % (sDay, sTime), "%Y-%m-%d %H:%M:%S")
+        sExpansion, sCardName = sName.replace('./', '').split('/')
+        sKey = os.path.join(sImagePath, sExpansion, sCardName)
+        dDates[sKey] = oCacheDate
+    return dDates
+
+
+def is_outdated(sFileName, dDates):
+    """Check if the server has a newer version of the file"""
+    # Entries not in the cache are automatically older than we are
+    oCacheDate = dDates.get(sFileName, datetime.datetime.utcfromtimestamp(0))
+    # We assume the cache dates are utc, so we convert to that
+    oCurDate = datetime.datetime.utcfromtimestamp(os.path.getmtime(sFileName))
+    # We allow some fuzz to add a bit of protection against weird
+    # filesystems and timezone issues - this is probably too generous
+    return oCacheDate - oCurDate > datetime.timedelta(seconds=60)
+
+
+def make_image_jobs(sImagePath, dDates):
+    """Create the download jobs for all the images with expansion info
+       which are missing from sImagePath or outdated."""
+    dJobs = {}
+    for oCard in PhysicalCard.select():
+        if not oCard.printing:
+            # The "No expansion" case is a subset of the others
+            continue
+        sExpansionPath = make_expansion_pathname(IPrintingName(oCard))
+        if not sExpansionPath:
+            continue
+        sImageName = make_image_name(oCard.abstractCard.canonicalName)
+        sFileName = os.path.join(sImagePath, sExpansionPath, sImageName)
+        if sFileName in dJobs or sFileName not in dDates:
+            # Only files listed on the server can be downloaded
+            continue
+        if os.path.exists(sFileName) and not is_outdated(sFileName, dDates):
+            continue
+        dJobs[sFileName] = DownloadJob(
+            sFileName, [make_image_url(sExpansionPath, sImageName)],
+            dDates[sFileName])
+    return [dJobs[x] for x in sorted(dJobs)]
+
+
+def _log_date_error(oExp):
+    """Log failures fetching the image date information"""
+    logging.warning('Unable to fetch the image dates: %s', oExp)
+
+
+def download_card_images(sImagePath, iWorkers=DEFAULT_WORKERS,
+                         fProgress=None):
+    """Download all the missing or outdated card images into sImagePath.
+
+       Returns the list of DownloadResults, or None if the image date
+       information couldn't be fetched."""
+    ensure_dir_exists(sImagePath)
+    oFile = urlopen_with_timeout(make_date_url(),
+                                 fErrorHandler=_log_date_error,
+                                 dHeaders=SUTEKH_USER_AGENT)
+    if oFile is None:
+        return None
+    sData = fetch_data(oFile, fErrorHandler=_log_date_error)
+    if sData is None:
+        return None
+    dDates = parse_image_dates(sData, sImagePath)
+    if not dDates:
+        return None
+    aJobs = make_image_jobs(sImagePath, dDates)
+    oJournal = DownloadJournal(os.path.join(sImagePath, JOURNAL_FILE))
+    oDownloader = ImageDownloader(SUTEKH_USER_AGENT, iWorkers, oJournal)
+    return oDownloader.download(aJobs, fProgress)
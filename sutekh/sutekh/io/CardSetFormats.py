@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""The card set export and import formats.
+
+   These are used by the export and import plugins and the query
+   server, so they all support the same formats."""
+
+from sutekh.base.io.BaseGuessFileParser import GUESS_FILE_FORMAT
+from sutekh.io.ARDBTextParser import ARDBTextParser
+from sutekh.io.ARDBXMLDeckParser import ARDBXMLDeckParser
+from sutekh.io.ARDBXMLInvParser import ARDBXMLInvParser
+from sutekh.io.ELDBDeckFileParser import ELDBDeckFileParser
+from sutekh.io.ELDBHTMLParser import ELDBHTMLParser
+from sutekh.io.ELDBInventoryParser import ELDBInventoryParser
+from sutekh.io.GuessFileParser import GuessFileParser
+from sutekh.io.JOLDeckParser import JOLDeckParser
+from sutekh.io.LackeyDeckParser import LackeyDeckParser
+from sutekh.io.WriteArdbInvXML import WriteArdbInvXML
+from sutekh.io.WriteArdbText import WriteArdbText
+from sutekh.io.WriteArdbXML import WriteArdbXML
+from sutekh.io.WriteELDBDeckFile import WriteELDBDeckFile
+from sutekh.io.WriteELDBInventory import WriteELDBInventory
+from sutekh.io.WriteJOL import WriteJOL
+from sutekh.io.WriteLackeyCCG import WriteLackeyCCG
+from sutekh.io.WriteTWDAText import WriteTWDAText
+from sutekh.io.WriteVEKNForum import WriteVEKNForum
+
+# See BaseCardSetExport for the format of the entries
+CARD_SET_EXPORTERS = {
+    'JOL': (WriteJOL, 'Export to JOL format', 'jol.txt'),
+    'Lackey': (WriteLackeyCCG, 'Export to Lackey CCG format',
+               'lackey.txt'),
+    'ARDB Text': (WriteArdbText, 'Export to ARDB Text', 'ardb.txt'),
+    'TWDA Text': (WriteTWDAText, 'Export to text formated used in the'
+                  ' TWDA', 'twda.txt'),
+    'vekn.net': (WriteVEKNForum,
+                 'BBcode output for the V:EKN Forums', 'vekn.txt'),
+    'FELDB Inv': (WriteELDBInventory,
+                  'Export to ELDB CSV Inventory File', 'eldb.csv',
+                  'CSV Files', ['*.csv']),
+    'FELDB Deck': (WriteELDBDeckFile, 'Export to ELDB ELD Deck File',
+                   'eldb.eld', 'ELD Files', ['*.eld']),
+    'ARDB Inv': (WriteArdbInvXML, 'Export to ARDB Inventory XML File',
+                 'inv.ardb.xml', 'XML Files', ['*.xml']),
+    'ARDB Deck': (WriteArdbXML, 'Export to ARDB Deck XML File',
+                  'ardb.xml', 'XML Files', ['*.xml']),
+}
+
+# See BaseImport for the format of the entries
+CARD_SET_PARSERS = {
+    'ELDB HTML File': (ELDBHTMLParser, 'HTML files', ['*.html', '*.htm']),
+    'ARDB Text File': (ARDBTextParser, 'TXT files', ['*.txt']),
+    'ELDB Deck (.eld)': (ELDBDeckFileParser, 'ELD files', ['*.eld']),
+    'ELDB Inventory': (ELDBInventoryParser, None, None),
+    'ARDB Deck XML File': (ARDBXMLDeckParser, 'XML files', ['*.xml']),
+    'ARDB Inventory XML File': (ARDBXMLInvParser, 'XML files', ['*.xml']),
+    'JOL Deck File': (JOLDeckParser, None, None),
+    'Lackey CCG Deck File': (LackeyDeckParser, None, None),
+    GUESS_FILE_FORMAT: (GuessFileParser, None, None),
+}
@@ -7,7 +7,6 @@
 """Attempts to identify a XML file as either PhysicalCardSet, PhysicalCard
    or AbstractCardSet (the last two to support legacy backups)."""
 
-from sutekh.base.core.CardSetUtilities import check_cs_exists
 from sutekh.base.io.BaseIdXMLFile import BaseIdXMLFile
 from sutekh.io.AbstractCardSetParser import AbstractCardSetParser
 from sutekh.io.PhysicalCardParser import PhysicalCardParser
@@ -29,15 +28,15 @@ class IdentifyXMLFile(BaseIdXMLFile):
             self._sType = 'AbstractCardSet'
             # Same reasoning as on database upgrades
             self._sName = '(ACS) ' + oRoot.attrib['name']
-            self._bSetExists = check_cs_exists(self._sName)
+            self._bSetExists = self._cs_exists(self._sName)
             self._bParentExists = True  # Always a top level card set
         elif oRoot.tag == 'physicalcardset':
             self._sType = 'PhysicalCardSet'
             self._sName = oRoot.attrib['name']
-            self._bSetExists = check_cs_exists(self._sName)
+            self._bSetExists = self._cs_exists(self._sName)
             if 'parent' in oRoot.attrib:
                 self._sParent = oRoot.attrib['parent']
-                self._bParentExists = check_cs_exists(self._sParent)
+                self._bParentExists = self._cs_exists(self._sParent)
             else:
                 self._bParentExists = True  # Top level card set
         elif oRoot.tag == 'cards':
@@ -45,7 +44,7 @@ class IdentifyXMLFile(BaseIdXMLFile):
             # Old Physical Card Collection XML file - it exists if a card
             # set called 'My Collection' exists
             self._sName = 'My Collection'
-            self._bSetExists = check_cs_exists(self._sName)
+            self._bSetExists = self._cs_exists(self._sName)
             self._bParentExists = True  # Always a top level card set
         elif oRoot.tag == 'cardmapping':
             # This is ignored now
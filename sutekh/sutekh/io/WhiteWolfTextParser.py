@@ -15,6 +15,7 @@ from sutekh.base.io.SutekhBaseHTMLParser import LogStateWithInfo
 
 from sutekh.base.core.DBUtility import CARDLIST_UPDATE_DATE, set_metadata_date
 from sutekh.base.core.BaseTables import LookupHints
+from sutekh.base.core.FilterIndex import flush_card_index
 
 from sutekh.core.SutekhObjectMaker import SutekhObjectMaker
 from sutekh.base.Utility import move_articles_to_front
@@ -1071,6 +1072,9 @@ class WhiteWolfTextParser:
             # today as the most sensible default for most situations and
             # assume the caller will fix it if that's not correct.
             set_metadata_date(CARDLIST_UPDATE_DATE, datetime.datetime.today())
+            # The card text has changed, so the search indexes need to
+            # be rebuilt
+            flush_card_index()
         else:
             raise IOError('Failed to parse card list - '
                           'unexpected state at end of file.\n'
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the image caches"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from sutekh.base.io.ImageCache import (ImageLRUCache, ThumbnailCache,
+                                       get_thumbnail_size, THUMBNAIL_SIZES)
+
+
+class ImageCacheTests(unittest.TestCase):
+    """Class for the image cache tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_lru(self):
+        """Test the size bounded LRU cache"""
+        oCache = ImageLRUCache(10, len)
+        oCache.set('a', 'aaaa')
+        oCache.set('b', 'bbbb')
+        self.assertEqual(oCache.get('a'), 'aaaa')
+        # b is now the least recently used, so is evicted
+        oCache.set('c', 'cccc')
+        self.assertFalse('b' in oCache)
+        self.assertEqual(oCache.get('b'), None)
+        self.assertEqual(oCache.iSize, 8)
+        # Replacing an entry updates the size
+        oCache.set('c', 'cc')
+        self.assertEqual(oCache.iSize, 6)
+        self.assertEqual(len(oCache), 2)
+        # Values which are too big aren't kept
+        oCache.set('d', 'd' * 11)
+        self.assertEqual(oCache.get('d'), None)
+        self.assertEqual(len(oCache), 2)
+        self.assertEqual(oCache.get_stats(),
+                         {'entries': 2, 'size': 6, 'max size': 10,
+                          'hits': 1, 'misses': 2, 'evictions': 1})
+        oCache.set_max_size(3)
+        self.assertEqual(len(oCache), 1)
+        self.assertEqual(oCache.get('c'), 'cc')
+        oCache.clear()
+        self.assertEqual(len(oCache), 0)
+        self.assertEqual(oCache.iSize, 0)
+        self.assertEqual(oCache.iHits, 2)
+
+    def test_thumbnails(self):
+        """Test the thumbnail directory"""
+        sDir = tempfile.mkdtemp(prefix='sutekhtests')
+        try:
+            sImage = os.path.join(sDir, 'image.jpg')
+            with open(sImage, 'wb') as oFile:
+                oFile.write(b'image')
+            oCache = ThumbnailCache(os.path.join(sDir, 'thumbs'))
+            self.assertEqual(oCache.lookup([sImage], (10, 20)), None)
+            sThumb = oCache.prepare([sImage], (10, 20))
+            self.assertTrue(os.path.isdir(os.path.dirname(sThumb)))
+            self.assertNotEqual(sThumb, oCache.get_name([sImage], (20, 10)))
+            with open(sThumb, 'wb') as oFile:
+                oFile.write(b'thumbnail')
+            self.assertEqual(oCache.lookup([sImage], (10, 20)), sThumb)
+            # Thumbnails older than the image aren't used
+            os.utime(sThumb, (0, 0))
+            self.assertEqual(oCache.lookup([sImage], (10, 20)), None)
+            self.assertEqual((oCache.iHits, oCache.iMisses), (1, 2))
+            oCache.clear()
+            self.assertFalse(os.path.exists(os.path.join(sDir, 'thumbs')))
+        finally:
+            shutil.rmtree(sDir)
+
+    def test_thumbnail_sizes(self):
+        """Test rounding the pane size to the thumbnail sizes"""
+        iSmallest = THUMBNAIL_SIZES[0]
+        self.assertEqual(get_thumbnail_size((10, 20)), (iSmallest, iSmallest))
+        self.assertEqual(get_thumbnail_size((iSmallest, 1)),
+                         (iSmallest, iSmallest))
+        self.assertEqual(get_thumbnail_size((iSmallest + 1, 1)),
+                         (THUMBNAIL_SIZES[1], THUMBNAIL_SIZES[1]))
+        # Similar pane sizes share a thumbnail
+        self.assertEqual(get_thumbnail_size((iSmallest + 1, 10)),
+                         get_thumbnail_size((10, iSmallest + 2)))
+        self.assertEqual(get_thumbnail_size((THUMBNAIL_SIZES[-1] + 1, 1)),
+                         None)
+
+    def test_thumbnail_pruning(self):
+        """Test removing the least recently used thumbnails"""
+        sDir = tempfile.mkdtemp(prefix='sutekhtests')
+        try:
+            aImages = []
+            for iNum in range(4):
+                sImage = os.path.join(sDir, 'image%d.jpg' % iNum)
+                with open(sImage, 'wb') as oFile:
+                    oFile.write(b'image')
+                os.utime(sImage, (0, 0))
+                aImages.append(sImage)
+            oCache = ThumbnailCache(os.path.join(sDir, 'thumbs'), 30)
+            aThumbs = []
+            for iNum, sImage in enumerate(aImages[:3]):
+                sThumb = oCache.prepare([sImage], (256, 256))
+                with open(sThumb, 'wb') as oFile:
+                    oFile.write(b'x' * 10)
+                os.utime(sThumb, (10 + iNum, 10 + iNum))
+                oCache.added(sThumb)
+                aThumbs.append(sThumb)
+            self.assertEqual(oCache.iPruned, 0)
+            # Using the first thumbnail makes it the most recently used
+            self.assertEqual(oCache.lookup([aImages[0]], (256, 256)),
+                             aThumbs[0])
+            sThumb = oCache.prepare([aImages[3]], (256, 256))
+            with open(sThumb, 'wb') as oFile:
+                oFile.write(b'x' * 10)
+            oCache.added(sThumb)
+            # We prune down to below 3/4 of the limit, removing the
+            # two least recently used thumbnails
+            self.assertEqual(oCache.iPruned, 2)
+            self.assertTrue(os.path.exists(aThumbs[0]))
+            self.assertFalse(os.path.exists(aThumbs[1]))
+            self.assertFalse(os.path.exists(aThumbs[2]))
+            self.assertTrue(os.path.exists(sThumb))
+            # A new cache object finds the existing thumbnails
+            os.utime(aThumbs[0], (20, 20))
+            oCache = ThumbnailCache(os.path.join(sDir, 'thumbs'), 15)
+            oCache.prune()
+            self.assertEqual(oCache.iPruned, 1)
+            self.assertFalse(os.path.exists(aThumbs[0]))
+            self.assertTrue(os.path.exists(sThumb))
+        finally:
+            shutil.rmtree(sDir)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the concurrent image downloader against a local http server"""
+
+import datetime
+import email.utils
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+
+from sutekh.base.io.ImageDownloader import (ImageDownloader, DownloadJob,
+                                            DownloadJournal, DOWNLOADED,
+                                            NOT_MODIFIED, SKIPPED, FAILED)
+
+# Server modification time for all the files
+FILE_DATE = datetime.datetime(2020, 1, 1, 12, 0, 0)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serve the files in the server's dFiles"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        """Handle a request"""
+        # pylint: disable=invalid-name
+        # name required by BaseHTTPRequestHandler
+        oServer = self.server
+        with oServer.oLock:
+            oServer.aRequests.append((self.path,
+                                      self.headers.get('If-Modified-Since'),
+                                      self.headers.get('User-Agent')))
+            oServer.aClients.add(self.client_address)
+        if self.path.startswith('/redirect/'):
+            self.send_response(302)
+            self.send_header('Location', self.path[len('/redirect'):])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        sData = oServer.dFiles.get(self.path)
+        if sData is None:
+            self.send_error(404)
+            return
+        sSince = self.headers.get('If-Modified-Since')
+        if sSince and email.utils.parsedate_to_datetime(sSince).replace(
+                tzinfo=None) >= FILE_DATE:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(sData)))
+        self.end_headers()
+        self.wfile.write(sData)
+
+    def log_message(self, *_aArgs):
+        """Keep the test output quiet"""
+
+
+class ImageDownloaderTests(unittest.TestCase):
+    """Class for the image downloader tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def setUp(self):
+        """Start the server and create a directory to download to"""
+        self.oServer = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.oServer.daemon_threads = True
+        self.oServer.oLock = threading.Lock()
+        self.oServer.aRequests = []
+        self.oServer.aClients = set()
+        self.oServer.dFiles = {}
+        oThread = threading.Thread(target=self.oServer.serve_forever)
+        oThread.daemon = True
+        oThread.start()
+        self.sBase = 'http://127.0.0.1:%d' % self.oServer.server_address[1]
+        self.sDir = tempfile.mkdtemp(prefix='sutekhtests')
+
+    def tearDown(self):
+        """Stop the server and clean up"""
+        self.oServer.shutdown()
+        self.oServer.server_close()
+        shutil.rmtree(self.sDir)
+
+    def _job(self, sName, aPaths):
+        """Create a job for the given server paths"""
+        return DownloadJob(os.path.join(self.sDir, 'exp', sName),
+                           [self.sBase + x for x in aPaths], FILE_DATE)
+
+    def test_download(self):
+        """Test downloading a batch of files"""
+        for iNum in range(20):
+            self.oServer.dFiles['/img/%d.jpg' % iNum] = b'image %d' % iNum
+        aJobs = [self._job('%d.jpg' % x, ['/img/%d.jpg' % x])
+                 for x in range(20)]
+        aProgress = []
+        oDownloader = ImageDownloader({'User-Agent': 'Sutekh Test'}, 4)
+        aResults = oDownloader.download(aJobs, aProgress.append)
+        self.assertEqual(len(aProgress), 20)
+        self.assertEqual(set(x.sStatus for x in aResults), {DOWNLOADED})
+        for iNum in range(20):
+            with open(os.path.join(self.sDir, 'exp', '%d.jpg' % iNum),
+                      'rb') as oFile:
+                self.assertEqual(oFile.read(), b'image %d' % iNum)
+        # No temporary files left behind
+        self.assertEqual(len(os.listdir(os.path.join(self.sDir, 'exp'))), 20)
+        self.assertEqual(set(x[2] for x in self.oServer.aRequests),
+                         {'Sutekh Test'})
+        # Connections are reused, so we don't need a connection per file
+        self.assertTrue(len(self.oServer.aClients) <= 4)
+
+    def test_conditional(self):
+        """Test that current files aren't downloaded again"""
+        self.oServer.dFiles['/img/a.jpg'] = b'new image'
+        oJob = self._job('a.jpg', ['/img/a.jpg'])
+        os.makedirs(os.path.dirname(oJob.sFileName))
+        with open(oJob.sFileName, 'wb') as oFile:
+            oFile.write(b'old image')
+        # Our copy is older than the server's
+        os.utime(oJob.sFileName, (0, 0))
+        [oResult] = ImageDownloader().download([oJob])
+        self.assertEqual(oResult.sStatus, DOWNLOADED)
+        self.assertTrue(self.oServer.aRequests[-1][1] is not None)
+        # Our copy is now newer
+        [oResult] = ImageDownloader().download([oJob])
+        self.assertEqual(oResult.sStatus, NOT_MODIFIED)
+        with open(oJob.sFileName, 'rb') as oFile:
+            self.assertEqual(oFile.read(), b'new image')
+        # and the timestamp matches the server
+        self.assertEqual(
+            datetime.datetime.utcfromtimestamp(
+                os.path.getmtime(oJob.sFileName)), FILE_DATE)
+
+    def test_failures(self):
+        """Test falling back to other urls and the failure journal"""
+        self.oServer.dFiles['/img/b.jpg'] = b'image b'
+        sJournal = os.path.join(self.sDir, 'journal.json')
+        oJournal = DownloadJournal(sJournal)
+        aJobs = [self._job('a.jpg', ['/missing/a.jpg']),
+                 self._job('b.jpg', ['/missing/b.jpg', '/redirect/img/b.jpg'])]
+        dResults = dict((x.oJob.sFileName, x) for x in
+                        ImageDownloader(oJournal=oJournal).download(aJobs))
+        oResult = dResults[aJobs[0].sFileName]
+        self.assertEqual(oResult.sStatus, FAILED)
+        self.assertTrue(isinstance(oResult.oError, HTTPError))
+        self.assertEqual(oResult.oError.code, 404)
+        self.assertFalse(os.path.exists(aJobs[0].sFileName))
+        oResult = dResults[aJobs[1].sFileName]
+        self.assertEqual(oResult.sStatus, DOWNLOADED)
+        self.assertEqual(oResult.sUrl, self.sBase + '/redirect/img/b.jpg')
+
+        # The failures are remembered by a new journal
+        oJournal = DownloadJournal(sJournal)
+        self.assertEqual(oJournal.get_failed(),
+                         [self.sBase + '/missing/a.jpg',
+                          self.sBase + '/missing/b.jpg'])
+        iRequests = len(self.oServer.aRequests)
+        [oResult] = ImageDownloader(oJournal=oJournal).download(aJobs[:1])
+        self.assertEqual(oResult.sStatus, SKIPPED)
+        self.assertEqual(len(self.oServer.aRequests), iRequests)
+        # Until the retry delay has passed
+        self.assertFalse(oJournal.should_skip(self.sBase + '/missing/a.jpg',
+                                              datetime.timedelta(0)))
+        self.assertEqual(oJournal.get_failed(),
+                         [self.sBase + '/missing/b.jpg'])
+
+        # A corrupt journal is ignored
+        with open(sJournal, 'w') as oFile:
+            oFile.write('not json')
+        self.assertEqual(DownloadJournal(sJournal).get_failed(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -10,12 +10,16 @@ from io import StringIO
 from mock import patch
 
 from sutekh.base.core.BaseTables import PhysicalCardSet
+from sutekh.base.core.CardSetUtilities import add_cards_to_set
+from sutekh.base.tests.TestUtils import make_card
+from sutekh.core.Filters import CryptCardFilter
 from sutekh.tests.core.test_PhysicalCardSet import make_set_1
 from sutekh.tests.TestCore import SutekhTest
 
 from sutekh.SutekhCli import print_card_details
 from sutekh.base.CliUtils import (run_filter, print_card_filter_list,
-                                  print_card_list, do_print_card)
+                                  print_card_list, do_print_card,
+                                  print_similar_card_sets)
 
 
 TREE_1 = """ Root
@@ -180,3 +184,22 @@ class CliUtilsTests(SutekhTest):
         with patch('sys.stdout', new_callable=StringIO) as oMock:
             print_card_filter_list(dResults, None, False)
             self.assertEqual(oMock.getvalue(), FILTER_LIST)
+
+    def test_print_similar_card_sets(self):
+        """Test printing the similar card sets"""
+        oAlex = make_card('Alexandra (Group 2)', None)
+        oAK = make_card('AK-47', None)
+        add_cards_to_set(PhysicalCardSet(name='Deck 1'), [oAlex, oAK, oAK])
+        add_cards_to_set(PhysicalCardSet(name='Deck 2'), [oAlex, oAK, oAK])
+        add_cards_to_set(PhysicalCardSet(name='Deck 3'), [oAlex])
+        with patch('sys.stdout', new_callable=StringIO) as oMock:
+            self.assertTrue(print_similar_card_sets(
+                'Deck 1', 1, CryptCardFilter, ('crypt', 'library')))
+            self.assertEqual(oMock.getvalue(),
+                             'Card sets similar to Deck 1:\n'
+                             '  100%  Deck 2 (crypt 100%, library 100%)\n')
+
+        with patch('sys.stdout', new_callable=StringIO) as oMock:
+            self.assertFalse(print_similar_card_sets('Missing', 1))
+            self.assertEqual(oMock.getvalue(),
+                             'Unable to load card set Missing\n')
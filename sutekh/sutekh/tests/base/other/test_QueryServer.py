@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the query server on localhost"""
+
+import json
+import sqlite3
+import threading
+import unittest
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen, Request
+
+from sqlobject import sqlhub
+from sqlobject.sqlite.sqliteconnection import SQLiteConnection
+
+from sutekh.base.core.BaseTables import PhysicalCardSet
+from sutekh.base.core.CardSetUtilities import add_cards_to_set
+from sutekh.base.core.DBUtility import flush_cache
+from sutekh.base.CliUtils import filter_cards
+from sutekh.base.QueryServer import QueryServer, ReadWriteLock, LOCALHOST
+from sutekh.base.tests.TestUtils import make_card
+from sutekh.tests.core.test_PhysicalCardSet import make_set_1
+from sutekh.tests.TestCore import SutekhTest
+
+from sutekh.SutekhCli import (format_card_details, SERVER_WRITERS,
+                              SERVER_PARSERS)
+
+
+class QueryClient:
+    """Simple client for the query server"""
+
+    def __init__(self, oServer):
+        self.sBase = 'http://%s:%d' % oServer.server_address[:2]
+
+    def _read(self, oRequest):
+        """Return the status and decoded JSON response"""
+        try:
+            with urlopen(oRequest, timeout=30) as oResp:
+                return oResp.status, json.loads(oResp.read().decode('utf8'))
+        except HTTPError as oErr:
+            return oErr.code, json.loads(oErr.read().decode('utf8'))
+
+    def get(self, sPath, **kwargs):
+        """Make a GET request"""
+        sUrl = self.sBase + sPath
+        if kwargs:
+            sUrl += '?' + urlencode(kwargs)
+        return self._read(sUrl)
+
+    def post(self, sPath, dData):
+        """Make a POST request with the JSON data"""
+        oRequest = Request(self.sBase + sPath,
+                           data=json.dumps(dData).encode('utf8'),
+                           headers={'Content-Type': 'application/json'})
+        return self._read(oRequest)
+
+
+class QueryServerTests(SutekhTest):
+    """Class for the query server tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def _make_server(self):
+        """Create the server on a free local port"""
+        return QueryServer((LOCALHOST, 0), format_card_details,
+                           SERVER_WRITERS, SERVER_PARSERS)
+
+    def _check_requests(self, oClient):
+        """Run the requests and check the responses"""
+        iStatus, dResult = oClient.get('/formats')
+        self.assertEqual(iStatus, 200)
+        self.assertTrue('ARDB Text' in dResult['export'])
+        self.assertTrue('Sutekh XML' in dResult['import'])
+
+        iStatus, dResult = oClient.get('/card', name='Path of Blood, The')
+        self.assertEqual(iStatus, 200)
+        self.assertEqual(dResult['name'], 'The Path of Blood')
+        self.assertTrue('CardType: Master' in dResult['details'])
+        self.assertEqual(oClient.get('/card', name='Swallowed')[0], 404)
+        self.assertEqual(oClient.get('/card')[0], 400)
+
+        iStatus, dResult = oClient.get('/filter', filter="Clan = 'Ministry'")
+        self.assertEqual(iStatus, 200)
+        aNames = [x['name'] for x in dResult['cards']]
+        self.assertEqual(len(aNames), 6)
+        self.assertTrue('Amisa (Group 2)' in aNames)
+        iStatus, dResult = oClient.get('/filter', filter="Clan = 'Ahrimane'",
+                                       cardset='Test Set 1')
+        self.assertEqual(iStatus, 200)
+        self.assertEqual(dResult['cards'],
+                         [{'name': 'The Siamese (Group 2)', 'count': 2}])
+        self.assertEqual(oClient.get('/filter', filter="Clan = ")[0], 400)
+        self.assertEqual(oClient.get('/filter', filter="Clan = 'Ahrimane'",
+                                     cardset='Missing')[0], 404)
+
+        iStatus, dResult = oClient.get('/export', cardset='Test Set 1',
+                                       format='Sutekh XML')
+        self.assertEqual(iStatus, 200)
+        sData = dResult['data']
+        self.assertTrue('physicalcardset' in sData)
+        self.assertEqual(oClient.get('/export', cardset='Test Set 1',
+                                     format='Missing')[0], 400)
+
+        iStatus, dResult = oClient.post('/import', {
+            'data': sData, 'format': 'Sutekh XML', 'name': 'Imported'})
+        self.assertEqual(iStatus, 200)
+        self.assertEqual(dResult['name'], 'Imported')
+        # The name is taken
+        self.assertEqual(oClient.post('/import', {
+            'data': sData, 'format': 'Sutekh XML',
+            'name': 'Imported'})[0], 409)
+        self.assertEqual(oClient.post('/import', {
+            'data': 'Not a card set', 'format': 'Sutekh XML',
+            'name': 'Bad'})[0], 400)
+        iStatus, dResult = oClient.get('/export', cardset='Imported',
+                                       format='ARDB Text')
+        self.assertEqual(iStatus, 200)
+        self.assertTrue('The Siamese' in dResult['data'])
+
+        iStatus, dResult = oClient.get('/cardsets')
+        self.assertEqual([x['name'] for x in dResult['cardsets']],
+                         ['Imported', 'Test Set 1'])
+        self.assertEqual(oClient.get('/missing')[0], 404)
+
+    def test_main_thread(self):
+        """Test the server with the database work on the main thread"""
+        make_set_1()
+        oServer = self._make_server()
+        oClient = QueryClient(oServer)
+        aErrors = []
+
+        def _client():
+            """Run the requests, and then stop the server"""
+            # pylint: disable=broad-except
+            # We need to report all the errors back to the test
+            try:
+                self._check_requests(oClient)
+            except Exception as oErr:
+                aErrors.append(oErr)
+            oClient.post('/shutdown', {})
+
+        oThread = threading.Thread(target=_client)
+        oThread.start()
+        try:
+            oServer.serve()
+        finally:
+            oThread.join()
+            oServer.server_close()
+        if aErrors:
+            raise aErrors[0]
+        self.assertEqual(PhysicalCardSet.selectBy(name='Imported').count(),
+                         1)
+
+    def test_concurrent(self):
+        """Test concurrent requests with a file database"""
+        make_set_1()
+        sDBFile = self._create_tmp_file()
+        oOldConn = sqlhub.processConnection
+        # Copy the test database to the file
+        oFile = sqlite3.connect(sDBFile)
+        oOldConn.getConnection().backup(oFile)
+        oFile.close()
+        oConn = SQLiteConnection(sDBFile)
+        sqlhub.processConnection = oConn
+        oServer = self._make_server()
+        oServerThread = threading.Thread(target=oServer.serve)
+        oServerThread.start()
+        try:
+            oClient = QueryClient(oServer)
+            self._check_requests(oClient)
+            aResults = []
+
+            def _query(iNum):
+                """Query the server"""
+                if iNum % 5 == 0:
+                    aResults.append(oClient.post('/import', {
+                        'data': oClient.get(
+                            '/export', cardset='Test Set 1',
+                            format='Sutekh XML')[1]['data'],
+                        'format': 'Sutekh XML',
+                        'name': 'Copy %d' % iNum})[0])
+                else:
+                    aResults.append(oClient.get(
+                        '/filter', filter="CardType = 'Reaction'")[0])
+
+            aThreads = [threading.Thread(target=_query, args=(iNum,))
+                        for iNum in range(20)]
+            for oThread in aThreads:
+                oThread.start()
+            for oThread in aThreads:
+                oThread.join()
+            self.assertEqual(aResults, [200] * 20)
+            iStatus, dResult = oClient.get('/cardsets')
+            self.assertEqual(iStatus, 200)
+            self.assertEqual(len(dResult['cardsets']), 6)
+            self.assertEqual(oClient.post('/shutdown', {})[0], 200)
+        finally:
+            oServer.stop()
+            oServerThread.join()
+            oServer.server_close()
+            sqlhub.processConnection = oOldConn
+            oConn.close()
+            flush_cache()
+
+    def test_filter_changes(self):
+        """Test filters see changes made after they were first compiled"""
+        oPCS = PhysicalCardSet(name='Counts')
+        oServer = self._make_server()
+        try:
+            sFilter = 'CardCount in 1 from "Counts"'
+            self.assertEqual(filter_cards(oServer.compile_filter(sFilter)),
+                             {})
+            oAK = make_card('AK-47', None)
+            add_cards_to_set(oPCS, [oAK])
+            self.assertEqual(
+                list(filter_cards(oServer.compile_filter(sFilter))),
+                [oAK.abstractCard])
+        finally:
+            oServer.server_close()
+
+    def test_read_write_lock(self):
+        """Test the readers-writer lock"""
+        oLock = ReadWriteLock()
+        aEvents = []
+        oReading = threading.Event()
+        oRelease = threading.Event()
+
+        def _reader():
+            """Hold the read lock until released"""
+            with oLock.read():
+                aEvents.append('read')
+                oReading.set()
+                oRelease.wait()
+            aEvents.append('read done')
+
+        def _writer():
+            """Take the write lock"""
+            with oLock.write():
+                aEvents.append('write')
+
+        oReader = threading.Thread(target=_reader)
+        oReader.start()
+        oReading.wait()
+        # Readers can share the lock
+        with oLock.read():
+            aEvents.append('second read')
+        oWriter = threading.Thread(target=_writer)
+        oWriter.start()
+        oRelease.set()
+        oReader.join()
+        oWriter.join()
+        self.assertEqual(aEvents, ['read', 'second read', 'read done',
+                                   'write'])
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
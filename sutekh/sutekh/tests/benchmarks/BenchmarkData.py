@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Create databases for the benchmarks.
+
+   The card list is read from the test data, and the card sets are
+   generated randomly, from a fixed seed, so runs with the same
+   parameters use the same data."""
+
+import os
+import random
+
+from sqlobject import sqlhub, connectionForURI
+from sqlobject.sqlite.sqliteconnection import SQLiteConnection
+
+from sutekh.base.core.BaseTables import PhysicalCard, PhysicalCardSet
+from sutekh.base.core.DBUtility import refresh_tables
+from sutekh.base.io.EncodedFile import EncodedFile
+from sutekh.base.tests.TestUtils import create_pkg_tmp_file
+from sutekh.core.SutekhTables import TABLE_LIST
+from sutekh.SutekhUtility import read_lookup_data
+from sutekh.tests import create_db
+from sutekh.tests.TestData import TEST_LOOKUP_LIST
+
+ROOT_NAME = 'Benchmark Root'
+
+
+def make_connection(sDBUrl=None):
+    """Create a new database connection.
+
+       If sDBUrl isn't given, a new sqlite memory database is used. We
+       can't use connectionForURI for this, as that would return the
+       same connection each time."""
+    if sDBUrl is None:
+        return SQLiteConnection(':memory:')
+    oConn = connectionForURI(sDBUrl)
+    # pylint: disable=protected-access
+    # No public way to check for memory databases
+    if oConn.dbName == 'sqlite' and not oConn._memory:
+        oConn.query("PRAGMA journal_mode=WAL;")
+    return oConn
+
+
+def fill_card_db(oConn):
+    """Create the tables and read the test card list into the database.
+
+       oConn is left as the current connection."""
+    sqlhub.processConnection = oConn
+    create_db()
+
+
+def prepare_card_list_db(oConn):
+    """Create the tables and the lookup data needed to read the card list.
+
+       oConn is left as the current connection."""
+    sqlhub.processConnection = oConn
+    if not refresh_tables(TABLE_LIST, oConn):
+        raise RuntimeError('Unable to create the card list tables')
+    sLookupData = create_pkg_tmp_file(TEST_LOOKUP_LIST)
+    try:
+        read_lookup_data(EncodedFile(sLookupData), None)
+    finally:
+        os.remove(sLookupData)
+
+
+def get_set_name(iNum):
+    """Name of the generated card set iNum"""
+    if iNum == 0:
+        return ROOT_NAME
+    return 'Benchmark Set %04d' % iNum
+
+
+def make_card_sets(iSets, iCopies, iDepth, iSeed=1):
+    """Add iSets generated card sets to the current database.
+
+       The first card set contains up to iCopies of every physical card.
+       The others are arranged in a tree, up to iDepth levels below the
+       first, and each contains a random selection of cards, with up to
+       iCopies of each. Every third card set is marked as in use.
+
+       Returns the card sets, grouped by their depth in the tree."""
+    oRand = random.Random(iSeed)
+    aCards = [x.id for x in PhysicalCard.select()]
+    oRoot = PhysicalCardSet(name=get_set_name(0))
+    oRoot.add_card_counts(dict((x, oRand.randint(1, iCopies))
+                               for x in aCards))
+    oRoot.syncUpdate()
+    aLevels = [[oRoot]]
+    iDepth = max(iDepth, 1)
+    for iNum in range(1, iSets):
+        iLevel = 1 + (iNum - 1) % iDepth
+        if iLevel == len(aLevels):
+            aLevels.append([])
+        oSet = PhysicalCardSet(name=get_set_name(iNum),
+                               parent=oRand.choice(aLevels[iLevel - 1]),
+                               inuse=(iNum % 3 == 0))
+        iSize = oRand.randint(1, min(len(aCards), 90))
+        oSet.add_card_counts(dict((x, oRand.randint(1, iCopies))
+                                  for x in oRand.sample(aCards, iSize)))
+        oSet.syncUpdate()
+        aLevels[iLevel].append(oSet)
+    return aLevels
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Time the core Sutekh operations on a generated database.
+
+   The results are written as JSON, and an earlier results file can be
+   given to compare against, so regressions show up between runs.
+
+   The card set model benchmarks need Gtk, and are skipped if it isn't
+   available."""
+
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from sqlobject import sqlhub
+
+from sutekh.base.core.BaseTables import (AbstractCard, PhysicalCardSet,
+                                         MapPhysicalCardToPhysicalCardSet,
+                                         PHYSICAL_SET_LIST)
+from sutekh.base.core.BaseDBManagement import copy_to_new_abstract_card_db
+from sutekh.base.core.BaseFilters import FilterAndBox, PhysicalCardSetFilter
+from sutekh.base.core.CardLookup import SimpleLookup
+from sutekh.base.core.CardSetUtilities import CountedCardRows
+from sutekh.base.core.DBUtility import (flush_cache, refresh_tables,
+                                        get_cached_joins, get_join_key,
+                                        init_cache)
+from sutekh.base.core.FilterParser import FilterParser
+from sutekh.base.io.EncodedFile import EncodedFile
+from sutekh.base.tests.TestUtils import create_pkg_tmp_file
+from sutekh.core.SutekhObjectCache import SutekhObjectCache
+from sutekh.io.ZipFileWrapper import ZipFileWrapper
+from sutekh.SutekhInfo import SutekhInfo
+from sutekh.SutekhUtility import read_white_wolf_list
+from sutekh.tests.TestData import TEST_CARD_LIST
+from sutekh.tests.benchmarks.BenchmarkData import (make_connection,
+                                                   fill_card_db,
+                                                   prepare_card_list_db,
+                                                   make_card_sets)
+
+# Filters applied to the whole card list
+CARD_FILTERS = [
+    'Clan in Ventrue, Toreador',
+    'Discipline_with_Level in cel with superior',
+    'CardType in Action && Cost in 1, 2',
+    'CardText in "strike"',
+    'CardName in "the"',
+    'Sect in Sabbat || Title in Prince, Bishop',
+]
+
+# Filters applied to a card set
+CARD_SET_FILTERS = [
+    'CardType in Combat',
+    'Clan in Ventrue && Capacity in 4, 5, 6',
+]
+
+# The card set model modes, named as in ShowMode and ParentCountMode.
+# We use the names, as those need Gtk
+SHOW_MODES = ('THIS_SET_ONLY', 'ALL_CARDS', 'PARENT_CARDS', 'CHILD_CARDS')
+PARENT_COUNT_MODES = ('IGNORE_PARENT', 'PARENT_COUNT', 'MINUS_THIS_SET',
+                      'MINUS_SETS_IN_USE')
+
+
+class BenchmarkRunner:
+    """Time the benchmarks and collect the results"""
+
+    def __init__(self, iRepeat, aOnly=None, aSkip=None):
+        self.iRepeat = iRepeat
+        self.aOnly = aOnly
+        self.aSkip = aSkip
+        self.dResults = {}
+
+    def wanted(self, sName):
+        """Check if the named benchmark should be run"""
+        if self.aSkip and any(sName.startswith(x) for x in self.aSkip):
+            return False
+        if not self.aOnly:
+            return True
+        return any(sName.startswith(x) for x in self.aOnly)
+
+    def time(self, sName, fRun, fSetup=None):
+        """Time fRun, calling fSetup before each run if given.
+
+           Only the time taken by fRun is counted."""
+        if not self.wanted(sName):
+            return
+        aTimes = []
+        for _iRun in range(self.iRepeat):
+            if fSetup:
+                fSetup()
+            fStart = time.perf_counter()
+            fRun()
+            aTimes.append(time.perf_counter() - fStart)
+        self.dResults[sName] = {
+            'runs': len(aTimes),
+            'min': min(aTimes),
+            'median': statistics.median(aTimes),
+            'mean': statistics.mean(aTimes),
+            'max': max(aTimes),
+        }
+
+    def skip(self, sName, sReason):
+        """Record that a benchmark couldn't be run"""
+        if self.wanted(sName):
+            self.dResults[sName] = {'skipped': sReason}
+
+
+def _restore_connection(oConn):
+    """Switch back to oConn after using a scratch database"""
+    sqlhub.processConnection = oConn
+    flush_cache()
+
+
+def bench_card_list_parse(oRunner):
+    """Time reading the test card list into a new database"""
+    if not oRunner.wanted('card list parse'):
+        return
+    oOrigConn = sqlhub.processConnection
+    oNewConn = make_connection()
+    sCardList = create_pkg_tmp_file(TEST_CARD_LIST)
+
+    def _setup():
+        prepare_card_list_db(oNewConn)
+
+    def _run():
+        read_white_wolf_list(EncodedFile(sCardList))
+
+    try:
+        oRunner.time('card list parse', _run, _setup)
+    finally:
+        _restore_connection(oOrigConn)
+        oNewConn.close()
+        os.remove(sCardList)
+
+
+def bench_object_cache(oRunner):
+    """Time filling the object cache from an empty cache.
+
+       Returns the last cache created, so the later benchmarks run
+       with the cache filled, as the GUI does."""
+    oConn = sqlhub.processConnection
+    aCaches = []
+
+    def _setup():
+        del aCaches[:]
+        flush_cache()
+        oConn.cache.clear()
+
+    def _run():
+        aCaches.append(SutekhObjectCache())
+
+    oRunner.time('object cache', _run, _setup)
+    if not aCaches:
+        aCaches.append(SutekhObjectCache())
+    return aCaches[0]
+
+
+def bench_init_cache(oRunner):
+    """Time filling the cached joins, reading the join rows from the
+       database and using saved rows, as for the cache snapshot.
+
+       The objects are already in the SQLObject cache, as they are at
+       startup."""
+    dJoinRows = dict((get_join_key(oJoin), oJoin.get_join_rows())
+                     for oJoin in get_cached_joins())
+
+    def _setup():
+        for oJoin in get_cached_joins():
+            oJoin.flush_cache()
+
+    oRunner.time('init cache', init_cache, _setup)
+    oRunner.time('init cache: saved rows', lambda: init_cache(dJoinRows),
+                 _setup)
+
+
+def bench_filters(oRunner, sCardSet):
+    """Time parsing and applying the filters"""
+    oParser = FilterParser()
+    for sFilter in CARD_FILTERS:
+        oRunner.time(
+            'filter: %s' % sFilter,
+            lambda sFilter=sFilter: oParser.apply(sFilter).get_filter(
+            ).select(AbstractCard).distinct().count())
+    for sFilter in CARD_SET_FILTERS:
+        oRunner.time(
+            'card set filter: %s' % sFilter,
+            lambda sFilter=sFilter: CountedCardRows(FilterAndBox([
+                PhysicalCardSetFilter(sCardSet),
+                oParser.apply(sFilter).get_filter()]).select(
+                    MapPhysicalCardToPhysicalCardSet).distinct()).count())
+
+
+def _model_name(sShowMode, sParentMode):
+    """Name of the model benchmark for the given modes"""
+    return 'card set model: %s, %s' % (sShowMode, sParentMode)
+
+
+def bench_card_set_models(oRunner, sCardSet):
+    """Time loading the card set model in each of the display modes"""
+    # pylint: disable=import-outside-toplevel, protected-access
+    # Gtk is optional for the benchmarks
+    # We set the modes directly, rather than via a config file
+    aModes = [(x, y) for x in SHOW_MODES for y in PARENT_COUNT_MODES
+              if oRunner.wanted(_model_name(x, y))]
+    if not aModes:
+        return
+    try:
+        from sutekh.base.gui.CardSetListModel import (CardSetCardListModel,
+                                                      ShowMode,
+                                                      ParentCountMode)
+        from sutekh.gui.ConfigFile import ConfigFile
+    except (ImportError, ValueError) as oErr:
+        for sShowMode, sParentMode in aModes:
+            oRunner.skip(_model_name(sShowMode, sParentMode),
+                         'Gtk not available: %s' % oErr)
+        return
+    fConfig, sConfigFile = tempfile.mkstemp(suffix='.ini',
+                                            prefix='sutekhbench')
+    os.close(fConfig)
+    try:
+        oConfig = ConfigFile(sConfigFile)
+        oConfig.validate()
+        for sShowMode, sParentMode in aModes:
+            oModel = CardSetCardListModel(sCardSet, oConfig)
+            oModel._change_count_mode(ShowMode[sShowMode])
+            oModel._change_parent_count_mode(ParentCountMode[sParentMode])
+            oRunner.time(_model_name(sShowMode, sParentMode), oModel.load)
+            oModel.cleanup()
+    finally:
+        os.remove(sConfigFile)
+
+
+def bench_zip(oRunner, sTempDir):
+    """Time writing all the card sets to a zip file and restoring them"""
+    sZipFile = os.path.join(sTempDir, 'benchmark.zip')
+
+    def _dump():
+        if os.path.exists(sZipFile):
+            os.remove(sZipFile)
+        ZipFileWrapper(sZipFile).do_dump_all_to_zip()
+
+    def _clear_card_sets():
+        if not refresh_tables(PHYSICAL_SET_LIST, sqlhub.processConnection):
+            raise RuntimeError('Unable to clear the card sets')
+
+    def _restore():
+        ZipFileWrapper(sZipFile).do_restore_from_zip()
+
+    oRunner.time('zip dump', _dump)
+    if oRunner.wanted('zip restore'):
+        if not os.path.exists(sZipFile):
+            _dump()
+        oRunner.time('zip restore', _restore, _clear_card_sets)
+
+
+def bench_copy_db(oRunner):
+    """Time copying the card sets to a database with a new card list"""
+    if not oRunner.wanted('copy to new card list'):
+        return
+    oOrigConn = sqlhub.processConnection
+    aConns = []
+
+    def _setup():
+        for oConn in aConns:
+            oConn.close()
+        aConns[:] = [make_connection()]
+        fill_card_db(aConns[0])
+        sqlhub.processConnection = oOrigConn
+
+    def _run():
+        copy_to_new_abstract_card_db(oOrigConn, aConns[0], SimpleLookup())
+
+    try:
+        oRunner.time('copy to new card list', _run, _setup)
+    finally:
+        _restore_connection(oOrigConn)
+        for oConn in aConns:
+            oConn.close()
+
+
+def run_benchmarks(iSets, iCopies, iDepth, iRepeat=3, aOnly=None,
+                   aSkip=None):
+    """Run the benchmarks on the current database, which must contain the
+       test card list and no card sets.
+
+       aOnly and aSkip are lists of benchmark name prefixes to run or
+       skip.
+
+       Returns a dictionary of benchmark name to timings."""
+    oRunner = BenchmarkRunner(iRepeat, aOnly, aSkip)
+    aLevels = make_card_sets(iSets, iCopies, iDepth)
+    # Use a card set with both a parent and children for the models
+    if len(aLevels) > 2:
+        sCardSet = aLevels[1][0].name
+    else:
+        sCardSet = aLevels[-1][0].name
+    bench_card_list_parse(oRunner)
+    # Keep the cache around for the later benchmarks
+    oCache = bench_object_cache(oRunner)
+    bench_init_cache(oRunner)
+    bench_filters(oRunner, sCardSet)
+    bench_card_set_models(oRunner, sCardSet)
+    sTempDir = tempfile.mkdtemp(prefix='sutekhbench')
+    try:
+        bench_zip(oRunner, sTempDir)
+    finally:
+        for sFile in os.listdir(sTempDir):
+            os.remove(os.path.join(sTempDir, sFile))
+        os.rmdir(sTempDir)
+    bench_copy_db(oRunner)
+    del oCache
+    return oRunner.dResults
+
+
+def make_report(dResults, dParams):
+    """Add the details of the run to the results"""
+    return {
+        'sutekh version': SutekhInfo.VERSION_STR,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'parameters': dParams,
+        'card sets': PhysicalCardSet.select().count(),
+        'results': dResults,
+    }
+
+
+def compare_reports(dOld, dNew):
+    """Return a list of lines comparing the median times of the two
+       reports"""
+    aLines = []
+    for sName, dNewTimes in sorted(dNew['results'].items()):
+        dOldTimes = dOld['results'].get(sName, {})
+        if 'median' not in dNewTimes or 'median' not in dOldTimes:
+            continue
+        fRatio = dNewTimes['median'] / max(dOldTimes['median'], 1e-9)
+        aLines.append('%-60s %9.4fs %9.4fs %6.2fx' % (
+            sName, dOldTimes['median'], dNewTimes['median'], fRatio))
+    return aLines
+
+
+def parse_options(aArgs):
+    """Handle the command line options"""
+    oParser = ArgumentParser(description='Benchmark the core Sutekh'
+                             ' operations on a generated database')
+    oParser.add_argument('--sets', type=int, default=100,
+                         help='Number of card sets to generate')
+    oParser.add_argument('--copies', type=int, default=4,
+                         help='Maximum copies of each card in a card set')
+    oParser.add_argument('--depth', type=int, default=5,
+                         help='Depth of the card set tree')
+    oParser.add_argument('--repeat', type=int, default=3,
+                         help='Number of times to run each benchmark')
+    oParser.add_argument('--only', action='append', default=[],
+                         help='Only run benchmarks starting with this name'
+                         ' (can be given multiple times)')
+    oParser.add_argument('--skip', action='append', default=[],
+                         help='Skip benchmarks starting with this name'
+                         ' (can be given multiple times)')
+    oParser.add_argument('--db', default=None,
+                         help='Database url to use. The database is'
+                         ' overwritten. Defaults to a memory database.')
+    oParser.add_argument('-o', '--output', default='-',
+                         help='File to write the JSON results to')
+    oParser.add_argument('--compare', default=None,
+                         help='Earlier results file to compare against')
+    return oParser.parse_args(aArgs)
+
+
+def main(aArgs):
+    """Run the benchmarks and write the results"""
+    oOpts = parse_options(aArgs[1:])
+    # Creating the test database logs warnings we don't care about
+    logging.getLogger().setLevel(logging.ERROR)
+    fill_card_db(make_connection(oOpts.db))
+    dResults = run_benchmarks(oOpts.sets, oOpts.copies, oOpts.depth,
+                              oOpts.repeat, oOpts.only, oOpts.skip)
+    dReport = make_report(dResults, {'sets': oOpts.sets,
+                                     'copies': oOpts.copies,
+                                     'depth': oOpts.depth,
+                                     'repeat': oOpts.repeat})
+    sData = json.dumps(dReport, indent=2, sort_keys=True)
+    if oOpts.output == '-':
+        print(sData)
+    else:
+        with open(oOpts.output, 'w') as fOut:
+            fOut.write(sData)
+    if oOpts.compare:
+        with open(oOpts.compare, 'r') as fIn:
+            dOld = json.load(fIn)
+        for sLine in compare_reports(dOld, dReport):
+            print(sLine, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))  # pragma: no cover
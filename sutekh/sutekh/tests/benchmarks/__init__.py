@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Benchmarks for the core Sutekh data paths.
+
+   Run with python -m sutekh.tests.benchmarks.Benchmarks --help"""
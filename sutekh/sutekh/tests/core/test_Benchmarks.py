@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Check the benchmarks run"""
+
+import json
+import unittest
+
+from sutekh.base.core.BaseTables import PhysicalCardSet
+from sutekh.tests.TestCore import SutekhTest
+from sutekh.tests.benchmarks.Benchmarks import (run_benchmarks, make_report,
+                                                compare_reports, CARD_FILTERS)
+
+
+class BenchmarkTests(SutekhTest):
+    """Class for the benchmark tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_benchmarks(self):
+        """Run a small set of the benchmarks"""
+        dResults = run_benchmarks(6, 2, 3, 1, ['filter', 'zip'],
+                                  ['card set filter'])
+        self.assertEqual(sorted(dResults),
+                         sorted(['filter: %s' % x for x in CARD_FILTERS] +
+                                ['zip dump', 'zip restore']))
+        self.assertEqual(dResults['zip dump']['runs'], 1)
+        # The restore recreates all the card sets
+        self.assertEqual(PhysicalCardSet.select().count(), 6)
+        oChild = PhysicalCardSet.byName('Benchmark Set 0003')
+        self.assertEqual(oChild.parent.parent.parent.name, 'Benchmark Root')
+
+        dReport = json.loads(json.dumps(make_report(dResults, {'sets': 6})))
+        self.assertEqual(dReport['card sets'], 6)
+        aLines = compare_reports(dReport, dReport)
+        self.assertEqual(len(aLines), len(dResults))
+        self.assertTrue(aLines[0].endswith('1.00x'))
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
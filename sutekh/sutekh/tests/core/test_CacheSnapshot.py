@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the object cache snapshot"""
+
+import datetime
+import os
+import pickle
+
+from mock import patch
+
+from sutekh.tests.TestCore import SutekhTest
+from sutekh.base.core.BaseAdapters import IAbstractCard
+from sutekh.base.core.BaseTables import AbstractCard, Keyword
+from sutekh.base.core.DBUtility import (CARDLIST_UPDATE_DATE,
+                                        set_metadata_date)
+from sutekh.base.core.CacheSnapshot import load_object_cache
+from sutekh.base.core.CachedRelatedJoin import SOCachedRelatedJoin
+from sutekh.core.SutekhTables import SutekhAbstractCard, Clan
+
+
+class CacheSnapshotTests(SutekhTest):
+    """Class for the object cache snapshot tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_snapshot(self):
+        """Test saving and reloading the snapshot"""
+        sFile = self._create_tmp_file()
+        os.remove(sFile)
+        aTypes = [Keyword, Clan, AbstractCard, SutekhAbstractCard]
+        dCache = load_object_cache(aTypes, sFile)
+        self.assertTrue(os.path.exists(sFile))
+        self.assertEqual(dCache[Clan], list(Clan.select()))
+        self.assertEqual(len(dCache[SutekhAbstractCard]),
+                         AbstractCard.select().count())
+
+        with open(sFile, 'rb') as fIn:
+            dSnapshot = pickle.load(fIn)
+        # Reloading uses the saved rows, so doesn't read the tables or
+        # the joins from the database
+        oErr = AssertionError('Snapshot not used')
+        with patch('sutekh.base.core.CacheSnapshot._get_table_rows',
+                   side_effect=oErr) as oTableRows, \
+                patch.object(SOCachedRelatedJoin, 'get_join_rows',
+                             side_effect=oErr) as oJoinRows:
+            dCache = load_object_cache(aTypes, sFile)
+        self.assertFalse(oTableRows.called)
+        self.assertFalse(oJoinRows.called)
+        with open(sFile, 'rb') as fIn:
+            self.assertEqual(pickle.load(fIn), dSnapshot)
+        self.assertEqual(dCache[Keyword], list(Keyword.select()))
+        oCard = IAbstractCard('Aire of Elation')
+        self.assertTrue(oCard in dCache[SutekhAbstractCard])
+        self.assertEqual([x.name for x in oCard.cardtype], ['Action Modifier'])
+        oCard = IAbstractCard('Abebe')
+        self.assertEqual([x.name for x in oCard.clan], ['Samedi'])
+
+        # Changing the card list date invalidates the snapshot
+        set_metadata_date(CARDLIST_UPDATE_DATE, datetime.date(2000, 1, 1))
+        load_object_cache(aTypes, sFile)
+        with open(sFile, 'rb') as fIn:
+            self.assertNotEqual(pickle.load(fIn)['key'], dSnapshot['key'])
+
+        # A corrupt snapshot is replaced
+        with open(sFile, 'wb') as fOut:
+            fOut.write(b'Not a snapshot')
+        dCache = load_object_cache(aTypes, sFile)
+        self.assertEqual(dCache[Clan], list(Clan.select()))
+        with open(sFile, 'rb') as fIn:
+            self.assertTrue('key' in pickle.load(fIn))
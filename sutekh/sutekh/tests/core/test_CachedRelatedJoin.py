@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the cached join initialisation"""
+
+from sqlobject import joins
+
+from sutekh.tests.TestCore import SutekhTest
+from sutekh.base.core.DBUtility import get_cached_joins, get_join_key
+
+
+def _get_init_cache(dJoinRows=None):
+    """Initialise all the cached joins, returning a copy of the cache
+       contents."""
+    if dJoinRows is None:
+        dJoinRows = {}
+    aJoins = get_cached_joins()
+    for oJoin in aJoins:
+        oJoin.init_cache(dJoinRows.get(get_join_key(oJoin)))
+    # pylint: disable=protected-access
+    # we inspect the cache contents directly
+    dContents = dict((get_join_key(oJoin), dict(oJoin._dJoinCache))
+                     for oJoin in aJoins)
+    return dContents
+
+
+class CachedRelatedJoinTests(SutekhTest):
+    """Class for the cached join tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_init_cache(self):
+        """Test initialising the cache from the database and from rows"""
+        dCache = _get_init_cache()
+        # Check we've actually loaded something
+        self.assertTrue(sum(len(x) for x in dCache.values()) > 0)
+        # The cache matches the uncached join
+        for oJoin in get_cached_joins():
+            dJoinCache = dCache[get_join_key(oJoin)]
+            for oInst, aOthers in dJoinCache.items():
+                self.assertEqual(
+                    aOthers, joins.SORelatedJoin.performJoin(oJoin, oInst))
+        # Initialising again doesn't duplicate entries
+        self.assertEqual(_get_init_cache(), dCache)
+        # Supplying the rows gives the same cache
+        dJoinRows = dict((get_join_key(oJoin), oJoin.get_join_rows())
+                         for oJoin in get_cached_joins())
+        self.assertEqual(_get_init_cache(dJoinRows), dCache)
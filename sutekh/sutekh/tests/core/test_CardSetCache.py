@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test keeping card set caches in sync with the database signals"""
+
+import unittest
+
+from sutekh.base.core.BaseTables import PhysicalCardSet
+from sutekh.base.core.CardSetCache import CardSetCache, CardSetCaches
+from sutekh.base.core.CardSetUtilities import (add_cards_to_set,
+                                              delete_physical_card_set)
+from sutekh.base.core.DBSignals import send_changed_signal
+from sutekh.base.tests.TestUtils import make_card
+from sutekh.tests.TestCore import SutekhTest
+
+
+class RecordingCache(CardSetCache):
+    """Cache which records the signals it's passed"""
+
+    def __init__(self):
+        self.aEvents = []
+
+    def flush(self):
+        """Record the flush"""
+        self.aEvents.append('flush')
+
+    def card_changed(self, oCardSet, oPhysCard, iChg):
+        """Record the card change"""
+        self.aEvents.append((oCardSet.name, oPhysCard.id, iChg))
+
+
+class CardSetCacheTests(SutekhTest):
+    """Class for the card set cache tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_signals(self):
+        """Test the caches are updated and flushed by the signals"""
+        oCaches = CardSetCaches()
+        oCache = oCaches.get('test', RecordingCache)
+        self.assertTrue(oCaches.get('test', RecordingCache) is oCache)
+        oOther = oCaches.get('other', RecordingCache)
+        self.assertFalse(oOther is oCache)
+
+        oPCS = PhysicalCardSet(name='Test')
+        self.assertEqual(oCache.aEvents, ['flush'])
+        oAK = make_card('ak-47', None)
+        oMagnum = make_card('.44 magnum', None)
+        add_cards_to_set(oPCS, [oAK, oMagnum, oAK])
+        send_changed_signal(oPCS, oAK, -1)
+        self.assertEqual(sorted(oCache.aEvents[1:3]),
+                         sorted([('Test', oAK.id, 2),
+                                 ('Test', oMagnum.id, 1)]))
+        self.assertEqual(oCache.aEvents[3:], [('Test', oAK.id, -1)])
+        oCache.aEvents = []
+        oPCS.name = 'Renamed'
+        oPCS.syncUpdate()
+        self.assertEqual(oCache.aEvents, ['flush'])
+        delete_physical_card_set('Renamed')
+        self.assertEqual(oCache.aEvents, ['flush', 'flush'])
+        oCaches.flush()
+        self.assertEqual(oCache.aEvents, ['flush'] * 3)
+        self.assertEqual(oOther.aEvents.count('flush'), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
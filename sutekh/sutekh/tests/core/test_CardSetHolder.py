@@ -11,6 +11,7 @@ from sutekh.base.core.CardSetHolder import CardSetHolder, CachedCardSetHolder
 from sutekh.base.core.BaseAdapters import (IPhysicalCardSet, IExpansion,
                                            IAbstractCard, IPrinting)
 from sutekh.base.core.BaseTables import MapPhysicalCardToPhysicalCardSet
+from sutekh.base.core.CardSetUtilities import CountedCardRows
 from sutekh.base.core import BaseFilters
 
 from sutekh.tests.TestCore import SutekhTest
@@ -55,13 +56,15 @@ class CardSetHolderTests(SutekhTest):
         oPCSFilter = BaseFilters.PhysicalCardSetFilter('Test Set 1')
         oAbbotFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.SpecificCardFilter('Abbot')])
-        aCSCards = [IAbstractCard(x).name for x in oAbbotFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oAbbotFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'Abbot'])
         oVampireFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.CardTypeFilter('Vampire')])
-        aCSCards = [IAbstractCard(x).name for x in oVampireFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oVampireFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'Abebe (Group 4)',
                                     u'Abebe (Group 4)',
                                     u'Abebe (Group 4)'])
@@ -85,13 +88,15 @@ class CardSetHolderTests(SutekhTest):
         oPCSFilter = BaseFilters.PhysicalCardSetFilter('Test Set 2')
         oAbbotFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.SpecificCardFilter('Abbot')])
-        aCSCards = [IAbstractCard(x).name for x in oAbbotFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oAbbotFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [])
         oVampireFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.CardTypeFilter('Vampire')])
-        aCSCards = [IAbstractCard(x).name for x in oVampireFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oVampireFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'Abebe (Group 4)',
                                     u'Abebe (Group 4)',
                                     u'Abebe (Group 4)'])
@@ -115,15 +120,16 @@ class CardSetHolderTests(SutekhTest):
         oPCSFilter = BaseFilters.PhysicalCardSetFilter('Test Set 3')
         oGunFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.SpecificCardFilter('.44 Magnum')])
-        aCSCards = [IAbstractCard(x).name for x in oGunFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oGunFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'.44 Magnum', u'.44 Magnum',
                                     '.44 Magnum'])
         oVampireFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.CardTypeFilter('Vampire')])
         aCSCards = [IAbstractCard(x).name for x in
-                    oVampireFilter.select(
-                        MapPhysicalCardToPhysicalCardSet).distinct()]
+                    CountedCardRows(oVampireFilter.select(
+                        MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [])
 
         # Misspelt expansions - all cards should be added, but some with
@@ -155,13 +161,15 @@ class CardSetHolderTests(SutekhTest):
         oPCSFilter = BaseFilters.PhysicalCardSetFilter('Test Set 4')
         oGunFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.SpecificCardFilter('AK-47')])
-        aCSCards = [IAbstractCard(x).name for x in oGunFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oGunFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'AK-47', u'AK-47'])
         oVampireFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.CardTypeFilter('Vampire')])
-        aCSCards = [IAbstractCard(x).name for x in oVampireFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oVampireFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'Abebe (Group 4)',
                                     u'Abebe (Group 4)',
                                     u'Abebe (Group 4)'])
@@ -206,14 +214,14 @@ class CardSetHolderTests(SutekhTest):
         oAbbotFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.SpecificCardFilter('Abbot')])
         aCSCards = [IAbstractCard(x).name for x in
-                    oAbbotFilter.select(
-                        MapPhysicalCardToPhysicalCardSet).distinct()]
+                    CountedCardRows(oAbbotFilter.select(
+                        MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'Abbot'])
         oVampireFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.CardTypeFilter('Vampire')])
         aCSCards = [IAbstractCard(x).name for x in
-                    oVampireFilter.select(
-                        MapPhysicalCardToPhysicalCardSet).distinct()]
+                    CountedCardRows(oVampireFilter.select(
+                        MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'Abebe (Group 4)',
                                     u'Abebe (Group 4)',
                                     u'Abebe (Group 4)'])
@@ -240,13 +248,15 @@ class CardSetHolderTests(SutekhTest):
         oPCSFilter = BaseFilters.PhysicalCardSetFilter('Test Set 2')
         oAbbotFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.SpecificCardFilter('Abbot')])
-        aCSCards = [IAbstractCard(x).name for x in oAbbotFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oAbbotFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [])
         oVampireFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.CardTypeFilter('Vampire')])
-        aCSCards = [IAbstractCard(x).name for x in oVampireFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oVampireFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'Abebe (Group 4)',
                                     u'Abebe (Group 4)',
                                     u'Abebe (Group 4)'])
@@ -272,14 +282,16 @@ class CardSetHolderTests(SutekhTest):
         oPCSFilter = BaseFilters.PhysicalCardSetFilter('Test Set 3')
         oGunFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.SpecificCardFilter('.44 Magnum')])
-        aCSCards = [IAbstractCard(x).name for x in oGunFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oGunFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'.44 Magnum', u'.44 Magnum',
                                     '.44 Magnum'])
         oVampireFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.CardTypeFilter('Vampire')])
-        aCSCards = [IAbstractCard(x).name for x in oVampireFilter.select(
-            MapPhysicalCardToPhysicalCardSet).distinct()]
+        aCSCards = [IAbstractCard(x).name for x in CountedCardRows(
+            oVampireFilter.select(
+                MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [])
 
         self.assertEqual(dLookupCache['cards'][u'Abede'], None)
@@ -308,14 +320,14 @@ class CardSetHolderTests(SutekhTest):
         oGunFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.SpecificCardFilter('AK-47')])
         aCSCards = [IAbstractCard(x).name for x in
-                    oGunFilter.select(
-                        MapPhysicalCardToPhysicalCardSet).distinct()]
+                    CountedCardRows(oGunFilter.select(
+                        MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'AK-47', u'AK-47'])
         oVampireFilter = BaseFilters.FilterAndBox([
             oPCSFilter, BaseFilters.CardTypeFilter('Vampire')])
         aCSCards = [IAbstractCard(x).name for x in
-                    oVampireFilter.select(
-                        MapPhysicalCardToPhysicalCardSet).distinct()]
+                    CountedCardRows(oVampireFilter.select(
+                        MapPhysicalCardToPhysicalCardSet).distinct())]
         self.assertEqual(aCSCards, [u'Abebe (Group 4)',
                                     u'Abebe (Group 4)',
                                     u'Abebe (Group 4)'])
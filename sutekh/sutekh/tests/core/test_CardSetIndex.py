@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the card set card index"""
+
+import unittest
+
+from sutekh.base.core.BaseTables import PhysicalCardSet
+from sutekh.base.core.BaseAdapters import IAbstractCard
+from sutekh.base.core.CardSetIndex import (get_card_set_index,
+                                           flush_card_set_indexes)
+from sutekh.base.core.CardSetUtilities import (add_cards_to_set,
+                                               delete_physical_card_set)
+from sutekh.base.core.DBSignals import send_changed_signal
+from sutekh.base.tests.TestUtils import make_card
+from sutekh.tests.TestCore import SutekhTest
+from sutekh.tests.core.test_Filters import make_physical_card_sets
+
+
+class CardSetIndexTests(SutekhTest):
+    """Class for the card set index tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_index(self):
+        """Test the index lookups and updates"""
+        aPCSs = make_physical_card_sets()
+        aNames = ['Test 1', 'Test 2']
+        oIndex = get_card_set_index('test', lambda: aNames)
+        flush_card_set_indexes()
+        iSet1, iSet2, iSet3 = [x.id for x in aPCSs]
+        iSha = IAbstractCard('Sha-Ennu (Group 4)').id
+        iAlex = IAbstractCard('Alexandra (Group 2)').id
+        iAbombwe = IAbstractCard('Abombwe').id
+        iAK = IAbstractCard('AK-47').id
+        iYvette = IAbstractCard('Yvette, The Hopeless (Group 3)').id
+
+        self.assertEqual(oIndex.get_card_set_ids(), {iSet1, iSet2})
+        self.assertEqual(oIndex.find_any([iAbombwe, iAK]), {iSet1, iSet2})
+        self.assertEqual(oIndex.find_all([iSha, iAlex]), {iSet1, iSet2})
+        self.assertEqual(oIndex.find_all([iSha, iAK]), {iSet2})
+        self.assertEqual(oIndex.find_all([iAbombwe, iAK]), set())
+        self.assertEqual(oIndex.find_all([]), set())
+        # Test 3 isn't in the index
+        self.assertEqual(oIndex.find_any([iYvette]), set())
+        self.assertEqual(oIndex.find_at_least([iSha, iAlex, iAbombwe], 3),
+                         {iSet1})
+        self.assertEqual(oIndex.find_at_least([iSha, iAlex, iAK], 2),
+                         {iSet1, iSet2})
+        self.assertEqual(oIndex.get_counts(iSet1, [iSha, iAlex, iAK]),
+                         {iSha: 4, iAlex: 1})
+        self.assertEqual(oIndex.get_counts(iSet2, [iSha, iAlex, iAK]),
+                         {iSha: 1, iAlex: 2, iAK: 1})
+
+        # Card changes in the indexed card sets are applied directly
+        oAK = make_card('AK-47', 'LotN')
+        add_cards_to_set(aPCSs[0], [oAK, oAK])
+        self.assertEqual(oIndex.get_counts(iSet1, [iAK]), {iAK: 2})
+        aPCSs[1].removePhysicalCard(oAK, 1)
+        send_changed_signal(aPCSs[1], oAK, -1)
+        self.assertEqual(oIndex.find_any([iAK]), {iSet1})
+        oYvette = make_card('Yvette, The Hopeless (Group 3)', 'BSC')
+        add_cards_to_set(aPCSs[2], [oYvette])
+        self.assertEqual(oIndex.find_any([iYvette]), set())
+
+        # Adding card sets rebuilds the index
+        oNew = PhysicalCardSet(name='Test 4')
+        add_cards_to_set(oNew, [oAK])
+        aNames.append('Test 4')
+        oIndex.get_card_set_ids()
+        PhysicalCardSet(name='Test 5')
+        self.assertEqual(oIndex.find_any([iAK]), {iSet1, oNew.id})
+        aNames.remove('Test 1')
+        delete_physical_card_set('Test 1')
+        self.assertEqual(oIndex.find_any([iAK]), {oNew.id})
+        self.assertEqual(oIndex.get_card_set_ids(), {iSet2, oNew.id})
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
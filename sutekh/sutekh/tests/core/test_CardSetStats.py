@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the card set statistics"""
+
+import unittest
+
+from sutekh.base.core.BaseTables import (PhysicalCardSet,
+                                         MapPhysicalCardToPhysicalCardSet)
+from sutekh.base.core.BaseFilters import PhysicalCardSetFilter, FilterAndBox
+from sutekh.base.core.CardSetStats import (get_card_set_stats,
+                                           flush_card_set_stats,
+                                           register_stats_category)
+from sutekh.base.core.CardSetUtilities import (add_cards_to_set,
+                                               delete_physical_card_set,
+                                               CountedCardRows)
+from sutekh.base.core.DBSignals import send_changed_signal
+from sutekh.base.tests.TestUtils import make_card
+from sutekh.core.Filters import CryptCardFilter
+from sutekh.tests.TestCore import SutekhTest
+from sutekh.tests.core.test_PhysicalCardSet import get_phys_cards
+
+
+def _count_crypt(sName):
+    """Count the crypt cards in the card set with a filter"""
+    oFilter = FilterAndBox([PhysicalCardSetFilter(sName), CryptCardFilter()])
+    return CountedCardRows(oFilter.select(
+        MapPhysicalCardToPhysicalCardSet).distinct()).count()
+
+
+class CardSetStatsTests(SutekhTest):
+    """Class for the card set statistics tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def _check_stats(self):
+        """Check the incrementally updated statistics match those read
+           from the database"""
+        oStats = get_card_set_stats()
+        dCurrent = dict((sName, (oInfo.iTotal, oInfo.iChildren,
+                                 oInfo.iInUseChildren, oInfo.iParentId,
+                                 oStats.get_count(sName, 'Crypt')))
+                        for sName, oInfo in oStats.get_all().items())
+        flush_card_set_stats()
+        oStats = get_card_set_stats()
+        dFresh = dict((sName, (oInfo.iTotal, oInfo.iChildren,
+                               oInfo.iInUseChildren, oInfo.iParentId,
+                               oStats.get_count(sName, 'Crypt')))
+                      for sName, oInfo in oStats.get_all().items())
+        self.assertEqual(dCurrent, dFresh)
+        return dFresh
+
+    def test_stats(self):
+        """Test the statistics and their updates"""
+        register_stats_category('Crypt', CryptCardFilter)
+        aCards = get_phys_cards()
+        oRoot = PhysicalCardSet(name='Root')
+        oChild = PhysicalCardSet(name='Child', parent=oRoot, inuse=True)
+        PhysicalCardSet(name='Child 2', parent=oRoot)
+        add_cards_to_set(oRoot, aCards)
+        add_cards_to_set(oChild, aCards[:4])
+
+        oStats = get_card_set_stats()
+        oInfo = oStats.get_info('Root')
+        self.assertEqual(oInfo.iTotal, len(aCards))
+        self.assertEqual(oInfo.iChildren, 2)
+        self.assertEqual(oInfo.iInUseChildren, 1)
+        self.assertEqual(oStats.get_count('Root', 'Crypt'),
+                         _count_crypt('Root'))
+        self.assertEqual(oStats.get_count('Child', 'Crypt'), 0)
+        self.assertEqual(oStats.get_info('Missing'), None)
+        self.assertEqual(oStats.get_count('Missing', 'Crypt'), None)
+
+        # Changes are tracked from the database signals
+        oAbebe = make_card('Abebe', None)
+        add_cards_to_set(oChild, [oAbebe, oAbebe])
+        self.assertEqual(oStats.get_info('Child').iTotal, 6)
+        self.assertEqual(oStats.get_count('Child', 'Crypt'), 2)
+        oChild.removePhysicalCard(oAbebe, 1)
+        send_changed_signal(oChild, oAbebe, -1)
+        self.assertEqual(oStats.get_count('Child', 'Crypt'), 1)
+        oNew = PhysicalCardSet(name='New', parent=oChild, inuse=True)
+        self.assertEqual(oStats.get_info('Child').iInUseChildren, 1)
+        oNew.inuse = False
+        oNew.syncUpdate()
+        self.assertEqual(oStats.get_info('Child').iInUseChildren, 0)
+        oNew.parent = oRoot
+        oNew.name = 'Renamed'
+        oNew.syncUpdate()
+        self.assertEqual(oStats.get_info('New'), None)
+        self.assertEqual(oStats.get_info('Renamed').iTotal, 0)
+        self.assertEqual(oStats.get_info('Root').iChildren, 3)
+        dStats = self._check_stats()
+        self.assertEqual(dStats['Root'][1:3], (3, 1))
+
+        delete_physical_card_set('Child')
+        dStats = self._check_stats()
+        self.assertEqual(sorted(dStats), ['Child 2', 'Renamed', 'Root'])
+        self.assertEqual(dStats['Root'][1:3], (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
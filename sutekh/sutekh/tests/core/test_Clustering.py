@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the k-means clustering"""
+
+import random
+import unittest
+
+from sutekh.base.core.Clustering import METRICS, ClusterTable, k_means
+
+
+def _make_table(oRandom):
+    """Create a table with three obvious clusters"""
+    aTable = []
+    for aCenter in ([5, 0, 0, 1, 0], [0, 5, 0, 0, -1], [0, 0, 5, 2, 0]):
+        for _iRow in range(20):
+            aTable.append([x + oRandom.choice([0, 0, 0, 1]) if x > 0 else x
+                           for x in aCenter])
+    return aTable
+
+
+class ClusteringTests(unittest.TestCase):
+    """Class for the clustering tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_distances(self):
+        """Test the sparse distances match the dense calculation"""
+        oRandom = random.Random(7)
+        aTable = [[oRandom.choice([-1, 0, 0, 0, 1, 2]) for _iCol in range(8)]
+                  for _iRow in range(30)]
+        oTable = ClusterTable(aTable)
+        for oMetric in METRICS.values():
+            for aCenter in (aTable[3], [0.5] * 8, [0, -1, 2.5, 0, 0, 1, 0, 0]):
+                for fSparse, aRow in zip(oTable.distances_sq(aCenter,
+                                                             oMetric),
+                                         aTable):
+                    self.assertAlmostEqual(fSparse,
+                                           oMetric.distance_sq(aRow, aCenter))
+        self.assertEqual(oTable.centroid([0, 1]),
+                         [(x + y) / 2 for x, y in zip(aTable[0], aTable[1])])
+
+    def test_k_means(self):
+        """Test clustering a simple table"""
+        aTable = _make_table(random.Random(1))
+        for sName, oMetric in METRICS.items():
+            aProgress = []
+            aMeans, aClusters = k_means(aTable, 3, 10, oMetric, 4,
+                                        random.Random(3), aProgress.append)
+            self.assertEqual(len(aMeans), 3, sName)
+            self.assertEqual(sorted(sorted(x) for x in aClusters),
+                             [list(range(0, 20)), list(range(20, 40)),
+                              list(range(40, 60))], sName)
+            self.assertEqual(aProgress[-1], 1.0)
+            self.assertEqual(aProgress, sorted(aProgress))
+            # Seeding gives repeatable results
+            self.assertEqual(k_means(aTable, 3, 10, oMetric, 4,
+                                     random.Random(3)), (aMeans, aClusters))
+
+    def test_empty(self):
+        """Test the trivial cases"""
+        oMetric = METRICS['Euclidean Distance']
+        self.assertEqual(k_means([], 3, 10, oMetric), ([], []))
+        self.assertEqual(k_means([[], []], 3, 10, oMetric), ([], []))
+        # More clusters than cards
+        aMeans, aClusters = k_means([[1, 0], [0, 1]], 4, 5, oMetric,
+                                    oRandom=random.Random(0))
+        self.assertEqual(len(aMeans), 4)
+        self.assertEqual(sorted(sum(aClusters, [])), [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
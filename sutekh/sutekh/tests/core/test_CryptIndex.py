@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the crypt card index"""
+
+import unittest
+
+from sutekh.base.core.BaseTables import AbstractCard
+from sutekh.base.core.BaseAdapters import IAbstractCard
+from sutekh.base.core.BaseFilters import CardTypeFilter, FilterAndBox
+from sutekh.base.core.DBUtility import flush_cache
+from sutekh.core.CryptIndex import get_crypt_index, flush_crypt_index
+from sutekh.core.Filters import (MultiGroupFilter, MultiDisciplineFilter,
+                                 MultiDisciplineLevelFilter,
+                                 MultiVirtueFilter)
+from sutekh.tests.TestCore import SutekhTest
+
+
+def _filter_matches(oCard, iNum, bSuperior):
+    """Find the matching cards with the filters, for comparison"""
+    # pylint: disable=no-member
+    # SQLObject confuses pylint
+    aGroups = [x.group for x in AbstractCard.select() if x.group]
+    oGroupFilter = MultiGroupFilter(range(max(1, oCard.group - 1),
+                                          min(max(aGroups),
+                                              oCard.group + 1) + 1))
+    if oCard.virtue:
+        oTypeFilter = CardTypeFilter('Imbued')
+        aFilters = [MultiVirtueFilter([x.fullname]) for x in oCard.virtue]
+    elif bSuperior:
+        oTypeFilter = CardTypeFilter('Vampire')
+        aFilters = [MultiDisciplineLevelFilter([(x.discipline.fullname,
+                                                 'superior')])
+                    for x in oCard.discipline if x.level == 'superior']
+    else:
+        oTypeFilter = CardTypeFilter('Vampire')
+        aFilters = [MultiDisciplineFilter([x.discipline.fullname])
+                    for x in oCard.discipline]
+    dCounts = {}
+    for oFilter in aFilters:
+        oFullFilter = FilterAndBox([oTypeFilter, oGroupFilter, oFilter])
+        for oMatch in set(oFullFilter.select(AbstractCard)):
+            dCounts.setdefault(oMatch, 0)
+            dCounts[oMatch] += 1
+    return set(x for x, iCnt in dCounts.items() if iCnt >= iNum and
+               x != oCard)
+
+
+class CryptIndexTests(SutekhTest):
+    """Class for the crypt index tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_find_sharing(self):
+        """Test finding cards sharing disciplines and virtues"""
+        flush_crypt_index()
+        oIndex = get_crypt_index()
+        for sName, iNum, bSuperior in [
+                ('Alexandra (Group 2)', 1, False),
+                ('Alexandra (Group 2)', 2, False),
+                ('Alexandra (Group 2)', 2, True),
+                ('Sha-Ennu (Group 4)', 3, False),
+                ('Anson (Group 1)', 1, True),
+                ('Abd al-Rashid (Group 2)', 2, False),
+                ('Inez "Nurse216" Villagrande (Group 4)', 1, False)]:
+            oCard = IAbstractCard(sName)
+            aMatches, dSubsets = oIndex.find_sharing(oCard, iNum, bSuperior)
+            self.assertEqual(aMatches,
+                             _filter_matches(oCard, iNum, bSuperior))
+            for aSet, aCards in dSubsets.items():
+                self.assertEqual(len(aSet), iNum)
+                for oMatch in aCards:
+                    self.assertTrue(oMatch in aMatches)
+                    aTraits = oIndex.get_features(oMatch).get_traits(
+                        bSuperior)
+                    self.assertTrue(aSet.issubset(aTraits))
+
+        oCard = IAbstractCard('Alexandra (Group 2)')
+        aMatches, _dSubsets = oIndex.find_sharing(oCard, 1, False)
+        aRestrict = set(x.id for x in list(aMatches)[:2])
+        aRestricted, _dSubsets = oIndex.find_sharing(oCard, 1, False,
+                                                     aRestrict)
+        self.assertEqual(set(x.id for x in aRestricted), aRestrict)
+        # Library cards aren't in the index
+        oLibrary = IAbstractCard('AK-47')
+        self.assertEqual(oIndex.get_features(oLibrary), None)
+        self.assertEqual(oIndex.find_sharing(oLibrary, 1, False),
+                         (set(), {}))
+        self.assertEqual(oIndex.find_similar(oLibrary), [])
+
+    def test_find_similar(self):
+        """Test the ranked similar cards"""
+        flush_crypt_index()
+        oIndex = get_crypt_index()
+        oCard = IAbstractCard('Alexandra (Group 2)')
+        oFeatures = oIndex.get_features(oCard)
+        self.assertAlmostEqual(oFeatures.similarity(oFeatures), 1.0)
+        aResults = oIndex.find_similar(oCard)
+        self.assertTrue(aResults)
+        self.assertTrue(oCard not in [x[0] for x in aResults])
+        aScores = [x[1] for x in aResults]
+        self.assertEqual(aScores, sorted(aScores, reverse=True))
+        for oMatch, _fScore in aResults:
+            self.assertEqual(oMatch.cardtype[0].name, 'Vampire')
+            self.assertTrue(1 <= oMatch.group <= 3)
+        self.assertEqual(oIndex.find_similar(oCard, 3), aResults[:3])
+        # A card shares more with a card of the same clan, with many
+        # of the same disciplines, than a card with none of them
+        oSameClan = [x for x, _fScore in aResults
+                     if x.clan == oCard.clan][0]
+        oNoDisc = [x for x, _fScore in aResults
+                   if not oIndex.get_features(x).get_traits(False) &
+                   oFeatures.get_traits(False)]
+        if oNoDisc:
+            self.assertTrue(oFeatures.similarity(
+                oIndex.get_features(oSameClan)) > oFeatures.similarity(
+                    oIndex.get_features(oNoDisc[0])))
+
+    def test_flush(self):
+        """Test the index is flushed with the other caches"""
+        oIndex = get_crypt_index()
+        self.assertTrue(get_crypt_index() is oIndex)
+        flush_cache()
+        self.assertFalse(get_crypt_index() is oIndex)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
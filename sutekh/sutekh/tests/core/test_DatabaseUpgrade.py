@@ -13,20 +13,22 @@ import sys
 
 from sqlobject import sqlhub, connectionForURI
 
-from sutekh.base.core.BaseDBManagement import copy_to_new_abstract_card_db
+from sutekh.base.core.BaseDBManagement import (copy_to_new_abstract_card_db,
+                                               update_abstract_card_db)
 from sutekh.base.core.CardLookup import SimpleLookup
 from sutekh.base.core.BaseTables import (AbstractCard, PhysicalCardSet,
                                          PhysicalCard, Printing, Expansion,
-                                         VersionTable)
+                                         VersionTable, PHYSICAL_SET_LIST,
+                                         MapPhysicalCardToPhysicalCardSet)
 from sutekh.base.core.BaseAdapters import (IAbstractCard, IPhysicalCardSet,
                                            IPhysicalCard, IPrinting,
                                            IExpansion)
 from sutekh.base.core.DatabaseVersion import DatabaseVersion
-from sutekh.base.core.DBUtility import init_cache
+from sutekh.base.core.DBUtility import init_cache, flush_cache
 from sutekh.base.tests.TestUtils import make_null_handler, make_card
 
 from sutekh.core.DatabaseUpgrade import DBUpgradeManager
-from sutekh.core.SutekhTables import TABLE_LIST
+from sutekh.core.SutekhTables import TABLE_LIST, SutekhAbstractCard
 from sutekh.tests.TestCore import SutekhTest
 from sutekh.tests import create_db
 
@@ -1657,6 +1659,98 @@ class DatabaseUpgradeTests(SutekhTest):
 
         oNewConn.close()
 
+    def test_update_ac_db(self):
+        """Test updating an existing database in place using
+           update_abstract_card_db."""
+        # pylint: disable=too-many-locals, too-many-statements
+        # We need to check a lot of things here
+        oNewConn = sqlhub.processConnection
+
+        sDbFile = self._create_tmp_file()
+        # We exclude this because of the platform specific branches
+        if sys.platform.startswith("win"):  # pragma: no cover
+            oOldConn = connectionForURI("sqlite:///%s" % sDbFile)
+        else:
+            oOldConn = connectionForURI("sqlite://%s" % sDbFile)
+        sqlhub.processConnection = oOldConn
+        create_db()
+
+        # Turn this into an older version of the card list, with a
+        # different name for one card, different text for another and
+        # a card which has since been removed
+        oMagnum = IAbstractCard('.44 magnum')
+        oMagnum.text = 'Old text'
+        oPier = IAbstractCard('Pier 13, Port of Baltimore')
+        oPier.canonicalName = 'pier 13'
+        oPier.name = 'Pier 13'
+        oOldCard = SutekhAbstractCard(canonicalName='old card',
+                                      name='Old Card', text='')
+        oOldPhys = PhysicalCard(abstractCard=oOldCard, printing=None)
+
+        oMyCollection = PhysicalCardSet(name="My Collection")
+        oPCS1 = PhysicalCardSet(name="PCS1", parent=oMyCollection)
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        oMyCollection.addPhysicalCard(make_card('.44 magnum', 'Jyhad'))
+        oMyCollection.addPhysicalCard(make_card('Pier 13', None), 2)
+        oMyCollection.addPhysicalCard(oOldPhys)
+        oPCS1.addPhysicalCard(make_card('.44 magnum', None), 3)
+        # pylint: enable=no-member
+        iCollId, iPCS1Id = oMyCollection.id, oPCS1.id
+        aPCS1Rows = [x.id for x in MapPhysicalCardToPhysicalCardSet.selectBy(
+            physicalCardSetID=iPCS1Id)]
+
+        bOK, aMessages = update_abstract_card_db(oNewConn, TABLE_LIST,
+                                                 SimpleLookup(),
+                                                 make_null_handler())
+        self.assertTrue(bOK)
+        self.assertEqual(len(aMessages), 1)
+        self.assertTrue('"My Collection": 1 cards' in aMessages[0])
+
+        # The card data now matches the new database
+        for cTable in TABLE_LIST:
+            if cTable in PHYSICAL_SET_LIST:
+                continue
+            self.assertEqual(cTable.select(connection=oOldConn).count(),
+                             cTable.select(connection=oNewConn).count())
+        sQuery = 'SELECT canonical_name, name, text FROM abstract_card'
+        self.assertEqual(sorted(oOldConn.queryAll(sQuery)),
+                         sorted(oNewConn.queryAll(sQuery)))
+        sQuery = ('SELECT a.canonical_name, k.keyword FROM abs_keyword_map m'
+                  ' JOIN abstract_card a ON a.id = m.abstract_card_id'
+                  ' JOIN keyword k ON k.id = m.keyword_id')
+        self.assertEqual(sorted(oOldConn.queryAll(sQuery)),
+                         sorted(oNewConn.queryAll(sQuery)))
+        sQuery = ('SELECT a.canonical_name, e.name, p.name'
+                  ' FROM physical_card c'
+                  ' JOIN abstract_card a ON a.id = c.abstract_card_id'
+                  ' LEFT JOIN printing p ON p.id = c.printing_id'
+                  ' LEFT JOIN expansion e ON e.id = p.expansion_id')
+        self.assertEqual(sorted(oOldConn.queryAll(sQuery), key=str),
+                         sorted(oNewConn.queryAll(sQuery), key=str))
+        self.assertNotEqual(IAbstractCard('.44 magnum').text, 'Old text')
+
+        # The card sets are updated in place
+        oMyCollection = IPhysicalCardSet("My Collection")
+        self.assertEqual(oMyCollection.id, iCollId)
+        oPCS1 = IPhysicalCardSet("PCS1")
+        self.assertEqual(oPCS1.id, iPCS1Id)
+        self.assertEqual(oPCS1.parent, oMyCollection)
+        dCards = {}
+        for iCardId, iCount in oMyCollection.get_card_counts():
+            sName = PhysicalCard.get(iCardId).abstractCard.name
+            dCards[sName] = dCards.get(sName, 0) + iCount
+        self.assertEqual(dCards, {'.44 Magnum': 1,
+                                  'Pier 13, Port of Baltimore': 2})
+        # Unaffected card sets aren't touched
+        self.assertEqual(
+            [x.id for x in MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardSetID=iPCS1Id)], aPCS1Rows)
+
+        sqlhub.processConnection = oNewConn
+        flush_cache()
+        oOldConn.close()
+
     def test_upgrade_old_version(self):
         """Test upgrading from 0.8"""
         # We only run this test if using sqlite, since iterdump isn't part
@@ -1683,6 +1777,13 @@ class DatabaseUpgradeTests(SutekhTest):
         oCursor = oCursorConn.cursor()
         for sSQL in OLD_VERSION_DUMP:
             oCursor.execute(sSQL)
+        # Add a card set, using the old physical_map layout with a row
+        # for each copy of the card
+        oCursor.execute("INSERT INTO physical_card_set VALUES"
+                        "(1, 'Upgrade Test', '', '', '', 0, NULL)")
+        for iCardId in (1, 1, 1, 8):
+            oCursor.execute("INSERT INTO physical_map (physical_card_id,"
+                            " physical_card_set_id) VALUES(%d, 1)" % iCardId)
         oCursor.close()
         oOldDB.releaseConnection(oCursorConn)
 
@@ -1698,7 +1799,7 @@ class DatabaseUpgradeTests(SutekhTest):
                                                           aVersions)
 
         self.assertEqual(len(aHigherTables), 0)
-        self.assertEqual(len(aLowerTables), 12)
+        self.assertEqual(len(aLowerTables), 13)
 
         # Run the upgrade code
         oDBManager = DBUpgradeManager()
@@ -1730,6 +1831,13 @@ class DatabaseUpgradeTests(SutekhTest):
         assert oDefJyhad
         assert IPhysicalCard((oMagnum, oDefJyhad))
 
+        # Check the card set counts survived the upgrade
+        oCS = IPhysicalCardSet('Upgrade Test')
+        self.assertEqual(len(oCS.cards), 4)
+        self.assertEqual(sorted(oCS.get_card_counts()), [(1, 3), (8, 1)])
+        self.assertEqual(MapPhysicalCardToPhysicalCardSet.selectBy(
+            physicalCardSetID=oCS.id).count(), 2)
+
         oVer.expire_cache()
         oVer.expire_table_conn(oOldDB)
         oOldDB.close()
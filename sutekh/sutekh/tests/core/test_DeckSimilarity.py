@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the deck similarity sketches"""
+
+import unittest
+
+from sutekh.base.core.BaseTables import PhysicalCardSet
+from sutekh.base.core.DeckSimilarity import (make_signature, DeckSketch,
+                                             get_deck_similarity,
+                                             flush_deck_similarity,
+                                             rank_similar,
+                                             NUM_HASHES)
+from sutekh.base.core.CardSetUtilities import (add_cards_to_set,
+                                               delete_physical_card_set)
+from sutekh.base.tests.TestUtils import make_card
+from sutekh.core.Filters import CryptCardFilter
+from sutekh.tests.TestCore import SutekhTest
+from sutekh.tests.core.test_Filters import make_physical_card_sets
+
+
+class DeckSimilarityTests(SutekhTest):
+    """Class for the deck similarity tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_signatures(self):
+        """Test the signatures estimate the weighted Jaccard similarity"""
+        self.assertEqual(make_signature({}), None)
+        aSig1 = make_signature({1: 2, 2: 1, 3: 4})
+        self.assertEqual(len(aSig1), NUM_HASHES)
+        self.assertEqual(aSig1, make_signature({3: 4, 1: 2, 2: 1}))
+        self.assertNotEqual(aSig1, make_signature({1: 1, 2: 1, 3: 4}))
+        # 150 cards in common out of 250
+        dCounts1 = dict((iId, 1) for iId in range(200))
+        dCounts2 = dict((iId, 1) for iId in range(50, 250))
+        oSketch1 = DeckSketch(dCounts1, set())
+        oSketch2 = DeckSketch(dCounts2, set())
+        fScore, aParts = oSketch1.similarity(oSketch2)
+        self.assertAlmostEqual(fScore, 0.6, delta=0.15)
+        self.assertEqual(aParts[0], None)
+        # Extra copies reduce the similarity
+        dCounts3 = dict((iId, 3) for iId in range(200))
+        fScore3, _aParts = oSketch1.similarity(DeckSketch(dCounts3, set()))
+        self.assertAlmostEqual(fScore3, 1 / 3, delta=0.15)
+        # The parts are compared separately
+        oSplit1 = DeckSketch(dCounts1, set(range(10)))
+        oSplit2 = DeckSketch(dict((iId, 1) for iId in range(10, 200)),
+                             set(range(10)))
+        self.assertEqual(oSplit1.similarity(oSplit1), (1.0, [1.0, 1.0]))
+        fScore, aParts = oSplit1.similarity(oSplit2)
+        self.assertEqual(aParts[0], 0.0)
+        self.assertEqual(aParts[1], 1.0)
+        self.assertEqual(fScore, 0.5)
+
+    def test_index(self):
+        """Test finding similar card sets, and updating the sketches"""
+        aPCSs = make_physical_card_sets()
+        oIndex = get_deck_similarity('test', fGetSplitFilter=CryptCardFilter)
+        flush_deck_similarity()
+        iSet1, iSet2, iSet3 = [x.id for x in aPCSs]
+        oCopy = PhysicalCardSet(name='Test 1 Copy')
+        add_cards_to_set(oCopy, [make_card('Abombwe', None),
+                                 make_card('Alexandra (Group 2)', 'CE')] +
+                         [make_card('Sha-Ennu (Group 4)', None)] * 4)
+        PhysicalCardSet(name='Empty')
+        self.assertEqual(len(oIndex.get_card_set_ids()), 5)
+
+        aResults = oIndex.find_similar(aPCSs[0], 10)
+        self.assertEqual(aResults[0], (oCopy.id, 1.0, [1.0, 1.0]))
+        aIds = [x[0] for x in aResults]
+        self.assertTrue(iSet1 not in aIds)
+        # Test 3 shares no cards with Test 1
+        self.assertTrue(iSet3 not in aIds)
+        self.assertEqual(len(oIndex.find_similar(aPCSs[0], 1)), 1)
+        # Scoring the candidates separately gives the same results
+        oSketch = oIndex.get_sketch(aPCSs[0])
+        aCandidates = oIndex.get_candidates(oSketch, (iSet1,))
+        self.assertEqual(sorted(x[0] for x in aCandidates),
+                         sorted(aIds))
+        self.assertEqual(rank_similar(oSketch, aCandidates, 10), aResults)
+        # Test 2 has no library cards in common with Test 1
+        for iSetId, fScore, aParts in aResults:
+            if iSetId == iSet2:
+                self.assertTrue(fScore < 0.5)
+                self.assertEqual(aParts[1], 0.0)
+
+        # Card changes update the sketch
+        oAK = make_card('AK-47', 'LotN')
+        add_cards_to_set(oCopy, [oAK])
+        aResults = oIndex.find_similar(aPCSs[0], 1)
+        self.assertEqual(aResults[0][0], oCopy.id)
+        self.assertEqual(aResults[0][2][0], 1.0)
+        self.assertTrue(aResults[0][2][1] < 1.0)
+        add_cards_to_set(aPCSs[0], [oAK])
+        self.assertEqual(oIndex.find_similar(aPCSs[0], 1),
+                         [(oCopy.id, 1.0, [1.0, 1.0])])
+
+        # Deleting card sets flushes the index
+        delete_physical_card_set('Test 1 Copy')
+        aResults = oIndex.find_similar(aPCSs[0], 10)
+        self.assertTrue(oCopy.id not in [x[0] for x in aResults])
+        self.assertEqual(len(oIndex.get_card_set_ids()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the card draw probability calculations"""
+
+import itertools
+import unittest
+from math import comb
+
+from sutekh.base.core.DrawProbabilities import (gen_choice_list,
+                                                multi_hyper_prob,
+                                                hyper_prob_at_least,
+                                                prob_table)
+
+
+def _brute_exact(aFound, iDraws, aObjects, iTotal):
+    """Directly calculate the multivariate hypergeometric probability"""
+    iWays = comb(iTotal - sum(aObjects), iDraws - sum(aFound)) \
+        if iDraws >= sum(aFound) else 0
+    for iFound, iObjects in zip(aFound, aObjects):
+        iWays *= comb(iObjects, iFound)
+    return iWays / comb(iTotal, iDraws)
+
+
+def _brute_at_least(aFound, iDraws, aObjects, iTotal):
+    """Sum the exact probabilities over all the larger draws"""
+    fProb = 0.0
+    for aCur in itertools.product(*[range(iFound, iObjects + 1) for
+                                    iFound, iObjects in
+                                    zip(aFound, aObjects)]):
+        fProb += _brute_exact(list(aCur), iDraws, aObjects, iTotal)
+    return fProb
+
+
+class DrawProbabilitiesTests(unittest.TestCase):
+    """Class for the draw probability tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_gen_choice_list(self):
+        """Test generating the possible draws"""
+        self.assertEqual(gen_choice_list([2]), [[0], [1], [2]])
+        self.assertEqual(gen_choice_list([2, 1]),
+                         [[0, 0], [0, 1], [1, 0], [1, 1], [2, 0], [2, 1]])
+        self.assertEqual(gen_choice_list([3, 2, 2], 1),
+                         [[0, 0, 0], [0, 0, 1], [0, 1, 0], [1, 0, 0]])
+        aAll = gen_choice_list([4, 3, 1])
+        self.assertEqual(len(aAll), 5 * 4 * 2)
+        self.assertEqual(gen_choice_list([4, 3, 1], 3),
+                         [x for x in aAll if sum(x) <= 3])
+
+    def test_known_values(self):
+        """Test some simple cases with known answers"""
+        # Drawing the only ace from a 4 card deck in 1 draw
+        self.assertAlmostEqual(multi_hyper_prob([1], 1, [1], 4), 0.25)
+        self.assertAlmostEqual(hyper_prob_at_least([1], 2, [1], 4), 0.5)
+        # At least one of 4 copies in a 60 card deck in a 7 card hand
+        self.assertAlmostEqual(hyper_prob_at_least([1], 7, [4], 60),
+                               1 - comb(56, 7) / comb(60, 7))
+        # Drawing everything
+        self.assertAlmostEqual(multi_hyper_prob([2, 3], 10, [2, 3], 10), 1.0)
+        self.assertAlmostEqual(hyper_prob_at_least([0, 0], 5, [2, 3], 10),
+                               1.0)
+        # Impossible draws
+        self.assertEqual(multi_hyper_prob([3], 2, [4], 10), 0.0)
+        self.assertEqual(hyper_prob_at_least([3, 1], 3, [4, 1], 10), 0.0)
+        self.assertEqual(multi_hyper_prob([0], 5, [8], 10), 0.0)
+        self.assertRaises(RuntimeError, multi_hyper_prob, [1, 1], 2, [1], 4)
+        self.assertRaises(RuntimeError, hyper_prob_at_least, [1], 5, [1], 4)
+        self.assertRaises(RuntimeError, multi_hyper_prob, [1], 0, [1], 4)
+
+    def test_against_brute_force(self):
+        """Compare with direct calculations"""
+        for aObjects, iTotal in [([4], 40), ([3, 2], 20), ([4, 2, 1], 30),
+                                 ([6, 6, 3], 15)]:
+            aChoices = gen_choice_list(aObjects)
+            for aFound in aChoices:
+                for iDraws in range(1, iTotal + 1, 3):
+                    self.assertAlmostEqual(
+                        multi_hyper_prob(aFound, iDraws, aObjects, iTotal),
+                        _brute_exact(aFound, iDraws, aObjects, iTotal))
+                    self.assertAlmostEqual(
+                        hyper_prob_at_least(aFound, iDraws, aObjects, iTotal),
+                        _brute_at_least(aFound, iDraws, aObjects, iTotal))
+            # The exact probabilities over all the draws should sum to 1
+            self.assertAlmostEqual(
+                sum(multi_hyper_prob(x, 5, aObjects, iTotal)
+                    for x in aChoices), 1.0)
+
+    def test_large_deck(self):
+        """Test we don't overflow with large decks"""
+        fProb = hyper_prob_at_least([2, 1], 600, [30, 20], 1200)
+        self.assertTrue(0.99 < fProb <= 1.0)
+        self.assertAlmostEqual(multi_hyper_prob([0], 600, [1], 1200), 0.5)
+
+    def test_prob_table(self):
+        """Test calculating the whole table at once"""
+        aObjects = [4, 3]
+        aChoices = gen_choice_list(aObjects, 3)
+        aDraws = [7, 8, 9, 100]
+        aTable = prob_table(aChoices, aDraws, aObjects, 60)
+        self.assertEqual(len(aTable), len(aChoices))
+        for aFound, aRow in zip(aChoices, aTable):
+            self.assertEqual(len(aRow), len(aDraws))
+            self.assertEqual(aRow[-1], None)
+            for iDraws, tProbs in zip(aDraws, aRow[:-1]):
+                self.assertAlmostEqual(
+                    tProbs[0], multi_hyper_prob(aFound, iDraws, aObjects, 60))
+                self.assertAlmostEqual(
+                    tProbs[1],
+                    hyper_prob_at_least(aFound, iDraws, aObjects, 60))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,8 +12,13 @@ from sutekh.base.core.BaseTables import (AbstractCard, PhysicalCardSet,
                                          PhysicalCard,
                                          MapPhysicalCardToPhysicalCardSet)
 from sutekh.base.core.BaseAdapters import IAbstractCard
+from sutekh.base.core.CardSetUtilities import CountedCardRows
 from sutekh.base.core import FilterParser, FilterBox
-from sutekh.base.core.FilterParser import escape, unescape
+from sutekh.base.core.FilterParser import (escape, unescape,
+                                           get_compiled_filter)
+from sutekh.base.core.FilterCache import get_filter_cache, flush_filter_cache
+from sutekh.base.core.BaseFilters import CachedFilter
+from sutekh.base.core.DBUtility import flush_cache
 
 from sutekh.core import Filters
 from sutekh.tests.TestCore import SutekhTest
@@ -47,8 +52,8 @@ class FilterParserTests(SutekhTest):
            names"""
         oFullFilter = Filters.FilterAndBox([oPCSFilter, oFilter])
         aNames = [IAbstractCard(x).name for x in
-                  oFullFilter.select(
-                      MapPhysicalCardToPhysicalCardSet).distinct()]
+                  CountedCardRows(oFullFilter.select(
+                      MapPhysicalCardToPhysicalCardSet).distinct())]
         return sorted(aNames)
 
     # pylint: enable=no-self-use
@@ -458,6 +463,62 @@ class FilterParserTests(SutekhTest):
         oAST = self.oFilterParser.apply('CardType in "Vampire","Action Mod"')
         self.assertEqual(oAST.get_invalid_values(), ["Action Mod"])
 
+    def test_compiled_filters(self):
+        """Test the parsed filter cache"""
+        oCache = get_filter_cache()
+        flush_filter_cache()
+        tStart = (oCache.iHits, oCache.iMisses)
+        oFilter = get_compiled_filter('CardType in $a', {'$a': ['Vampire']})
+        self.assertTrue(isinstance(oFilter, CachedFilter))
+        # Each caller gets a new filter from the parsed filter
+        oSecond = get_compiled_filter('CardType in $a', {'$a': ['Vampire']})
+        self.assertFalse(oSecond is oFilter)
+        self.assertEqual(self._get_abs_names(oSecond),
+                         self._get_abs_names(oFilter))
+        oOther = get_compiled_filter('CardType in $a', {'$a': ['Imbued']})
+        self.assertEqual(self._get_abs_names(oFilter), self._get_abs_names(
+            self._parse_filter('CardType in Vampire')))
+        self.assertEqual(self._get_abs_names(oOther), self._get_abs_names(
+            Filters.CardTypeFilter('Imbued')))
+        self.assertEqual((oCache.iHits - tStart[0],
+                          oCache.iMisses - tStart[1]), (1, 2))
+        # Unset variables give no filter
+        self.assertEqual(get_compiled_filter('CardType in $a'), None)
+        self.assertEqual(len(oCache), 3)
+        flush_cache()
+        self.assertEqual(len(oCache), 0)
+
+        # Filters which depend on the database contents aren't stale
+        aPCSs = make_physical_card_sets()
+        oFilter = get_compiled_filter('CardSetName = "Test 1"')
+        self.assertEqual(list(oFilter.select(PhysicalCardSet)), [aPCSs[0]])
+        aPCSs[0].name = 'Renamed'
+        aPCSs[0].syncUpdate()
+        self.assertEqual(list(get_compiled_filter(
+            'CardSetName = "Test 1"').select(PhysicalCardSet)), [])
+        oEmpty = PhysicalCardSet(name='Empty', parent=aPCSs[1])
+
+        def _get_cards(sFilter):
+            """Get the cards selected by the compiled filter"""
+            oCompiled = get_compiled_filter(sFilter)
+            return set(oCompiled.select(PhysicalCard).distinct())
+
+        sCount = 'CardCount in 1 from "Empty"'
+        sInUse = 'SetsInUse in "Test 2"'
+        self.assertEqual(_get_cards(sCount), set())
+        self.assertEqual(_get_cards(sInUse), set())
+        for oPhys in aPCSs[1].cards:
+            oEmpty.addPhysicalCard(oPhys.id)
+        oEmpty.syncUpdate()
+        aCards = _get_cards(sCount)
+        self.assertTrue(aCards)
+        self.assertEqual(aCards, set(self._parse_filter(sCount).select(
+            PhysicalCard).distinct()))
+        self.assertEqual(_get_cards(sInUse), set())
+        oEmpty.inuse = True
+        oEmpty.syncUpdate()
+        self.assertEqual(_get_cards(sInUse), set(aPCSs[1].cards))
+
     def test_filter_box_missing_values(self):
         """Test that filter box handle missing values as expected"""
         # Test filters that should be treated as empty
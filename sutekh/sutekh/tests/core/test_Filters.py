@@ -15,6 +15,13 @@ from sutekh.base.core.BaseTables import (AbstractCard, PhysicalCard,
                                          MapPhysicalCardToPhysicalCardSet)
 from sutekh.base.core.BaseAdapters import (IAbstractCard, IPhysicalCard,
                                            IExpansion, IPrinting)
+from sutekh.base.core.CardSetUtilities import CountedCardRows
+from sutekh.base.core.FilterIndex import (enable_card_index,
+                                          disable_card_index,
+                                          get_card_index, bits_to_ids,
+                                          ids_to_bits)
+from sutekh.base.core.TextIndex import (TrigramTextIndex, FTSTextIndex,
+                                        sqlite3)
 from sutekh.core import Filters
 from sutekh.base.core import BaseFilters
 
@@ -942,8 +949,8 @@ class FilterTests(SutekhTest):
             oFullFilter = Filters.FilterAndBox([oPCSFilter, oFilter])
             self.assertTrue('PhysicalCard' in oFullFilter.types)
             aCSCards = [IAbstractCard(x).name for x in
-                        oFullFilter.select(
-                            MapPhysicalCardToPhysicalCardSet).distinct()]
+                        CountedCardRows(oFullFilter.select(
+                            MapPhysicalCardToPhysicalCardSet).distinct())]
             aCSCards.sort()
             aExpectedCards.sort()
             self.assertEqual(aCSCards, aExpectedCards,
@@ -969,8 +976,8 @@ class FilterTests(SutekhTest):
             self.assertTrue('PhysicalCard' in oFullFilter.types)
             aCSCards = sorted(
                 [IPhysicalCard(x) for x in
-                 oFullFilter.select(
-                     MapPhysicalCardToPhysicalCardSet).distinct()],
+                 CountedCardRows(oFullFilter.select(
+                     MapPhysicalCardToPhysicalCardSet).distinct())],
                 key=lambda x: x.id)
             aExpectedPhysCards = self._convert_to_phys_cards(aExpectedCards)
             aExpectedPhysCards.sort(key=lambda x: x.id)
@@ -1036,14 +1043,43 @@ class FilterTests(SutekhTest):
         for oPCSFilter, oFilter, aExpectedCards in aPCSNumberTests:
             oFullFilter = Filters.FilterAndBox([oPCSFilter, oFilter])
             aCSCards = [IAbstractCard(x).name for x in
-                        oFullFilter.select(
-                            MapPhysicalCardToPhysicalCardSet).distinct()]
+                        CountedCardRows(oFullFilter.select(
+                            MapPhysicalCardToPhysicalCardSet).distinct())]
             aCSCards.sort()
             aExpectedCards.sort()
             self.assertEqual(aCSCards, aExpectedCards,
                              "Filter Object %s failed. %s != %s." % (
                                  oFullFilter, aCSCards, aExpectedCards))
 
+    def test_card_counts(self):
+        """Test the grouped card counts match the selected rows"""
+        make_physical_card_sets()
+        aFilters = [
+            Filters.PhysicalCardSetFilter('Test 1'),
+            Filters.FilterAndBox([Filters.PhysicalCardSetFilter('Test 1'),
+                                  Filters.CardTypeFilter('Vampire')]),
+            # Multiple disciplines, so the joins duplicate rows
+            Filters.FilterAndBox([
+                BaseFilters.MultiPhysicalCardSetMapFilter(
+                    ['Test 1', 'Test 2']),
+                Filters.MultiDisciplineFilter(['obf', 'dom', 'pre'])]),
+            Filters.FilterAndBox([Filters.PhysicalCardSetFilter('Test 3'),
+                                  Filters.CardTypeFilter('Vampire')]),
+        ]
+        for oFilter in aFilters:
+            aCounts = sorted(oFilter.select_card_counts())
+            aExpected = sorted(
+                (IAbstractCard(x).id, IPhysicalCard(x).id,
+                 x.physicalCardSetID, iCnt) for x, iCnt in
+                CountedCardRows(oFilter.select(
+                    MapPhysicalCardToPhysicalCardSet).distinct(
+                    )).counted_rows())
+            self.assertEqual(aCounts, aExpected,
+                             "Filter Object %s failed. %s != %s." % (
+                                 oFilter, aCounts, aExpected))
+        self.assertEqual(
+            sum(x[3] for x in aFilters[1].select_card_counts()), 5)
+
     def test_best_guess_filter(self):
         """Test the best guess filter"""
         # This seems the best fit, to include it with the other filter tests
@@ -1078,5 +1114,85 @@ class FilterTests(SutekhTest):
                                  aNames, aExpectedNames, sGuess))
 
 
+class IndexedFilterTests(FilterTests):
+    """Rerun the filter tests using the card index"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    # pylint: disable=invalid-name
+    # setUp + tearDown names are needed by unittest - use their convention
+    def setUp(self):
+        """Enable the card index"""
+        super().setUp()
+        enable_card_index()
+
+    def tearDown(self):
+        """Disable the card index again"""
+        disable_card_index()
+        super().tearDown()
+
+    # pylint: enable=invalid-name
+    def test_bits(self):
+        """Test the bitset conversion"""
+        self.assertEqual(ids_to_bits([]), 0)
+        self.assertEqual(ids_to_bits([0, 3, 9]), 0b1000001001)
+        self.assertEqual(bits_to_ids(ids_to_bits([12, 1, 7, 300])),
+                         [1, 7, 12, 300])
+
+    def test_index_rewrite(self):
+        """Test that the filters are replaced by index lookups"""
+        # pylint: disable=protected-access
+        # we test the protected methods
+        oIndex = get_card_index()
+        oFilter = Filters.FilterAndBox([
+            Filters.DisciplineFilter('dom'), Filters.DisciplineFilter('obf'),
+            Filters.FilterNot(Filters.ClanFilter('Ventrue'))])
+        oIndexed = oFilter._apply_index(oIndex)
+        self.assertTrue(isinstance(oIndexed, BaseFilters.IndexedCardFilter))
+        self.assertEqual(oIndexed._get_joins(), [])
+        # Physical card filters aren't indexed, but their siblings are
+        oFilter = Filters.FilterAndBox([Filters.PhysicalCardFilter(),
+                                        Filters.CardTypeFilter('Action'),
+                                        Filters.CardTextFilter('bleed'),
+                                        Filters.PhysicalExpansionFilter(
+                                            'Jyhad')])
+        oIndexed = oFilter._apply_index(oIndex)
+        self.assertTrue(isinstance(oIndexed, Filters.FilterAndBox))
+        self.assertTrue(oIndexed[0] is oFilter[0])
+        self.assertTrue(isinstance(oIndexed[1],
+                                   BaseFilters.IndexedCardFilter))
+        self.assertTrue(isinstance(oIndexed[2],
+                                   BaseFilters.IndexedCardFilter))
+        self.assertTrue(oIndexed[3] is oFilter[3])
+        aCards = sorted(oFilter.select(PhysicalCard).distinct(),
+                        key=lambda x: x.id)
+        disable_card_index()
+        aExpectedCards = sorted(oFilter.select(PhysicalCard).distinct(),
+                                key=lambda x: x.id)
+        self.assertTrue(aCards)
+        self.assertEqual(aCards, aExpectedCards)
+
+    def test_text_index(self):
+        """Test the text indexes match the SQL LIKE results"""
+        dTexts = dict((oCard.id, oCard.text)
+                      for oCard in AbstractCard.select())
+        aIndexes = [TrigramTextIndex(dTexts)]
+        if sqlite3 is not None:
+            try:
+                aIndexes.append(FTSTextIndex(dTexts))
+            except sqlite3.OperationalError:  # pragma: no cover
+                # No FTS5 support, so we only test the fallback
+                pass
+        disable_card_index()
+        for sPattern in ['bleed', '+_ stealth', '(d) bleed%at +_ bleed',
+                         'st', 'untap this%vampire', 'no such text', '',
+                         "don't", '100%']:
+            oFilter = BaseFilters.BaseCardTextFilter(sPattern)
+            aExpected = {x.id for x in oFilter.select(AbstractCard)}
+            for oIndex in aIndexes:
+                self.assertEqual(oIndex.search(sPattern), aExpected,
+                                 "%s failed for %s" % (oIndex, sPattern))
+
+
 if __name__ == "__main__":
     unittest.main()  # pragma: no cover
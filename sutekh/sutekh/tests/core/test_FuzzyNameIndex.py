@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the fuzzy card name index"""
+
+import unittest
+
+from sqlobject import SQLObjectNotFound
+
+from sutekh.base.core.BaseAdapters import IAbstractCard, CardNameLookupAdapter
+from sutekh.base.core.CardLookup import SimpleLookup
+from sutekh.base.core.FuzzyNameIndex import (get_fuzzy_name_index,
+                                             flush_fuzzy_name_index,
+                                             normalise_name, edit_distance)
+from sutekh.tests.TestCore import SutekhTest
+
+
+class FuzzyNameIndexTests(SutekhTest):
+    """Class for the fuzzy name index tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_normalise(self):
+        """Test normalising names"""
+        self.assertEqual(normalise_name('Path of Blood, The'),
+                         'the path of blood')
+        self.assertEqual(normalise_name(u'L\xe1z\xe1r  Dobrescu'),
+                         'lazar dobrescu')
+        self.assertEqual(normalise_name('Sha-Ennu (Group 4)'),
+                         'sha ennu group 4')
+        self.assertEqual(edit_distance('kitten', 'sitting'), 3)
+        self.assertEqual(edit_distance('', 'abc'), 3)
+
+    def test_candidates(self):
+        """Test finding and resolving candidates"""
+        flush_fuzzy_name_index()
+        oIndex = get_fuzzy_name_index()
+        oShaEnnu = IAbstractCard('Sha-Ennu (Group 4)')
+        oPath = IAbstractCard('The Path of Blood')
+        oAnastasz = IAbstractCard('Anastasz di Zagreb (Group 3)')
+        # Misspellings
+        aCandidates = oIndex.find_candidates('She-Ennu (Group 4)')
+        self.assertEqual(aCandidates[0][0], oShaEnnu)
+        self.assertTrue(aCandidates[0][1] < 1.0)
+        self.assertEqual(oIndex.resolve('Sha-Enu'), oShaEnnu)
+        self.assertEqual(oIndex.resolve('Path of Blod, The'), oPath)
+        # Accents and case
+        self.assertEqual(oIndex.resolve(u'L\xe1zar DOBRESCU'),
+                         IAbstractCard('L\xe1z\xe1r Dobrescu'))
+        # Aliases from the lookup hints
+        self.assertEqual(oIndex.resolve('Anastaszdi Zagrab'), oAnastasz)
+        # Scores are ranked
+        aScores = [x[1] for x in oIndex.find_candidates('Alexandr', 5)]
+        self.assertEqual(aScores, sorted(aScores, reverse=True))
+        self.assertTrue(len(aScores) <= 5)
+        # Poor matches aren't resolved
+        self.assertEqual(oIndex.resolve('Completely Unknown Card'), None)
+        self.assertEqual(oIndex.find_candidates(''), [])
+        # Bulk lookups
+        dResults = oIndex.resolve_all(['Sha-Enu', 'Path of Blod, The',
+                                       'Zzzzz'])
+        self.assertEqual(dResults, {'Sha-Enu': oShaEnnu,
+                                    'Path of Blod, The': oPath,
+                                    'Zzzzz': None})
+        dCandidates = oIndex.find_all_candidates(['Sha-Enu', 'Alexandr'], 3)
+        self.assertEqual(dCandidates['Sha-Enu'][0][0], oShaEnnu)
+        self.assertTrue(len(dCandidates['Alexandr']) <= 3)
+
+    def test_lookups(self):
+        """Test the lookups can resolve names with the index"""
+        flush_fuzzy_name_index()
+        oShaEnnu = IAbstractCard('Sha-Ennu (Group 4)')
+        aNames = ['Sha-Ennu (Group 4)', 'Sha-Enu', '', 'Zzzzz']
+        self.assertEqual(SimpleLookup().lookup(aNames, 'Test'),
+                         [oShaEnnu, None, None, None])
+        self.assertEqual(SimpleLookup(0.8).lookup(aNames, 'Test'),
+                         [oShaEnnu, oShaEnnu, None, None])
+        # The adapter is strict by default
+        self.assertRaises(SQLObjectNotFound, IAbstractCard, 'Sha-Enu')
+        CardNameLookupAdapter.set_fuzzy_threshold(0.8)
+        try:
+            self.assertEqual(IAbstractCard('Sha-Enu'), oShaEnnu)
+            self.assertRaises(SQLObjectNotFound, IAbstractCard, 'Zzzzz')
+        finally:
+            CardNameLookupAdapter.set_fuzzy_threshold(None)
+        self.assertRaises(SQLObjectNotFound, IAbstractCard, 'Sha-Enu')
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -13,7 +13,12 @@ from sutekh.base.core.BaseTables import (PhysicalCardSet,
                                          MapPhysicalCardToPhysicalCardSet)
 from sutekh.base.core.BaseAdapters import IAbstractCard, IPhysicalCardSet
 from sutekh.base.tests.TestUtils import make_card
-from sutekh.base.core.CardSetUtilities import delete_physical_card_set
+from sutekh.base.core.CardSetUtilities import (delete_physical_card_set,
+                                              add_cards_to_set,
+                                              CountedCardRows)
+from sutekh.base.core.DBSignals import (listen_changed, disconnect_changed,
+                                       listen_cards_changed,
+                                       disconnect_cards_changed)
 
 from sutekh.tests.TestCore import SutekhTest
 
@@ -176,12 +181,15 @@ class PhysicalCardSetTests(SutekhTest):
 
         self.assertEqual(len(oPhysCardSet1.cards), 5)
         # Because we repeat .44 Magnum 3 times
-        self.assertEqual(MapPhysicalCardToPhysicalCardSet.selectBy(
-            physicalCardID=aAddedPhysCards[0].id).count(), 3)
-        self.assertEqual(MapPhysicalCardToPhysicalCardSet.selectBy(
-            physicalCardID=aAddedPhysCards[4].id).count(), 1)
-        self.assertEqual(MapPhysicalCardToPhysicalCardSet.selectBy(
-            physicalCardID=aAddedPhysCards[7].id).count(), 0)
+        self.assertEqual(
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[0].id)).count(), 3)
+        self.assertEqual(
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[4].id)).count(), 1)
+        self.assertEqual(
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[7].id)).count(), 0)
 
         oPhysCardSet2 = PhysicalCardSet(name=CARD_SET_NAMES[1],
                                         comment='Test 2',
@@ -199,14 +207,14 @@ class PhysicalCardSetTests(SutekhTest):
 
         self.assertEqual(len(oPhysCardSet2.cards), 5)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[0].id).count(), 3)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[0].id)).count(), 3)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[4].id).count(), 2)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[4].id)).count(), 2)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[7].id).count(), 1)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[7].id)).count(), 1)
 
         oPhysCardSet3 = make_set_1()
         self.assertEqual(len(oPhysCardSet3.cards), len(aAddedPhysCards))
@@ -244,20 +252,90 @@ class PhysicalCardSetTests(SutekhTest):
         # pylint: enable=no-member
 
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[0].id).count(), 3)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[0].id)).count(), 3)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[4].id).count(), 1)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[4].id)).count(), 1)
 
         delete_physical_card_set(CARD_SET_NAMES[2])
 
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[0].id).count(), 0)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[0].id)).count(), 0)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[4].id).count(), 0)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[4].id)).count(), 0)
+
+    def test_card_counts(self):
+        """Test that physical_map stores a single counted row per card"""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        oMagnum = make_card(ABSTRACT_CARDS[0][0], None)
+        oAK = make_card(ABSTRACT_CARDS[1][0], None)
+        oPCS = PhysicalCardSet(name=CARD_SET_NAMES[0])
+        oPCS.addPhysicalCard(oMagnum.id)
+        oPCS.addPhysicalCard(oMagnum.id, 2)
+        oPCS.addPhysicalCard(oAK.id)
+        oPCS.syncUpdate()
+
+        self.assertEqual(len(oPCS.cards), 4)
+        self.assertEqual(MapPhysicalCardToPhysicalCardSet.selectBy(
+            physicalCardSetID=oPCS.id).count(), 2)
+        self.assertEqual(sorted(oPCS.get_card_counts()),
+                         sorted([(oMagnum.id, 3), (oAK.id, 1)]))
+        self.assertEqual(len(oMagnum.sets), 3)
+
+        oPCS.removePhysicalCard(oMagnum.id, 1)
+        self.assertEqual(
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardSetID=oPCS.id)).count(), 3)
+        # Removing without a count removes all copies
+        oPCS.removePhysicalCard(oMagnum.id)
+        self.assertEqual(MapPhysicalCardToPhysicalCardSet.selectBy(
+            physicalCardID=oMagnum.id).count(), 0)
+        # Removing the last copy removes the row
+        oPCS.removePhysicalCard(oAK.id, 1)
+        self.assertEqual(MapPhysicalCardToPhysicalCardSet.selectBy(
+            physicalCardSetID=oPCS.id).count(), 0)
+        self.assertEqual(len(oPCS.cards), 0)
+
+    def test_add_cards_to_set(self):
+        """Test adding a batch of cards to a card set"""
+        # pylint: disable=no-member
+        # SQLObject confuses pylint
+        aChanges = []
+        aBulkChanges = []
+
+        def _listener(oCardSet, oPhysCard, iChg):
+            """Record the changed signals"""
+            aChanges.append((oCardSet.name, oPhysCard.id, iChg))
+
+        def _bulk_listener(oCardSet, dChanges):
+            """Record the bulk changed signals"""
+            aBulkChanges.append((oCardSet.name, sorted(
+                (oCard.id, iChg) for oCard, iChg in dChanges.items())))
+
+        oMagnum = make_card(ABSTRACT_CARDS[0][0], None)
+        oAK = make_card(ABSTRACT_CARDS[1][0], None)
+        oPCS = PhysicalCardSet(name=CARD_SET_NAMES[0])
+        oPCS.addPhysicalCard(oAK.id)
+        listen_changed(_listener, PhysicalCardSet)
+        listen_cards_changed(_bulk_listener, PhysicalCardSet)
+        try:
+            add_cards_to_set(oPCS, [oMagnum, None, oAK, oMagnum, oMagnum])
+        finally:
+            disconnect_changed(_listener, PhysicalCardSet)
+            disconnect_cards_changed(_bulk_listener, PhysicalCardSet)
+
+        self.assertEqual(sorted(oPCS.get_card_counts()),
+                         sorted([(oMagnum.id, 3), (oAK.id, 2)]))
+        self.assertEqual(len(oPCS.cards), 5)
+        # A single bulk signal, with the total change for each card
+        self.assertEqual(aChanges, [])
+        self.assertEqual(aBulkChanges,
+                         [(CARD_SET_NAMES[0],
+                           sorted([(oMagnum.id, 3), (oAK.id, 1)]))])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the background job runner"""
+
+import logging
+import threading
+import unittest
+
+from sqlobject import sqlhub
+from sqlobject.sqlite.sqliteconnection import SQLiteConnection
+
+from sutekh.tests.TestCore import SutekhTest
+from sutekh.base.gui.BackgroundJob import (BackgroundJob, JobCancelled,
+                                           run_job, can_run_in_thread)
+from sutekh.base.gui.ProgressDialog import SutekhCountLogHandler
+
+
+def _work(oProgress, iNum):
+    """Simple job, which reports progress"""
+    for iStep in range(iNum):
+        oProgress.update_bar(iStep / iNum)
+    return iNum, threading.current_thread() is threading.main_thread()
+
+
+def _cancelled_work(oProgress):
+    """Job which is cancelled part way through"""
+    oProgress.update_bar(0.2)
+    oProgress.cancel()
+    oProgress.update_bar(0.4)
+    return True
+
+
+def _failing_work(_oProgress):
+    """Job which fails"""
+    raise RuntimeError('Failed')
+
+
+class TestBackgroundJob(SutekhTest):
+    """Class for the BackgroundJob test cases"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def _check_jobs(self, bThread):
+        """Run the test jobs, checking if we used a worker thread"""
+        self.assertEqual(run_job('Test', _work, 5, bDialog=False),
+                         (5, not bThread))
+        self.assertRaises(JobCancelled, run_job, 'Test', _cancelled_work,
+                          bDialog=False)
+        self.assertRaises(RuntimeError, run_job, 'Test', _failing_work,
+                          bDialog=False)
+        # Check logging progress
+        oLogger = logging.Logger('Test job')
+        oHandler = SutekhCountLogHandler()
+        oLogger.addHandler(oHandler)
+        oHandler.set_total(3)
+
+        def _log_work(_oProgress):
+            """Report progress with the log handler"""
+            for iNum in range(3):
+                oLogger.info('Step %d', iNum)
+            return oHandler.iCount
+
+        oJob = BackgroundJob('Test', _log_work, oLogHandler=oHandler,
+                             bDialog=False)
+        self.assertEqual(oJob.run(), 3)
+        self.assertEqual(oHandler.oDialog, None)
+
+    def test_main_thread(self):
+        """Test running jobs on the main thread for memory databases"""
+        self.assertFalse(can_run_in_thread())
+        self._check_jobs(False)
+
+    def test_worker_thread(self):
+        """Test running jobs on a worker thread"""
+        sDBFile = self._create_tmp_file()
+        oConn = SQLiteConnection(sDBFile)
+        self.assertTrue(can_run_in_thread(oConn))
+        oOldConn = sqlhub.processConnection
+        sqlhub.processConnection = oConn
+        try:
+            self._check_jobs(True)
+        finally:
+            sqlhub.processConnection = oOldConn
+            oConn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
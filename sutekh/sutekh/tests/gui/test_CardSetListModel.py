@@ -8,8 +8,14 @@
 
 """Tests the Card List Model"""
 
+import sqlite3
+import threading
 import unittest
 
+from gi.repository import GLib
+from sqlobject import sqlhub
+from sqlobject.sqlite.sqliteconnection import SQLiteConnection
+
 from sutekh.base.tests.TestUtils import make_card
 from sutekh.base.tests.GuiTestUtils import (LocalTestListener,
                                             DummyCardSetController,
@@ -23,8 +29,8 @@ from sutekh.base.core import BaseFilters
 from sutekh.base.core.BaseGroupings import (CardTypeGrouping,
                                             ExpansionGrouping,
                                             RarityGrouping, NullGrouping)
-from sutekh.base.core.BaseTables import (PhysicalCardSet,
-                                         MapPhysicalCardToPhysicalCardSet)
+from sutekh.base.core.BaseTables import PhysicalCardSet
+from sutekh.base.core.DBUtility import flush_cache
 from sutekh.base.gui.BaseConfigFile import CARDSET, FRAME
 from sutekh.base.gui.CardSetListModel import (CardSetCardListModel,
                                               ExtraLevels, ShowMode,
@@ -188,12 +194,9 @@ class CardSetListModelTests(ConfigSutekhTest):
                                  "Listener has wrong count after inc_card",
                                  iListCnt, iSetCnt, oModel, oPCS))
         # Card removal
-        # We use the map table, so we can also test dec_card properly
+        # We remove single copies, so we can also test dec_card properly
         for oCard in self.aPhysCards:
-            oMapEntry = list(
-                MapPhysicalCardToPhysicalCardSet.selectBy(
-                    physicalCardID=oCard.id, physicalCardSetID=oPCS.id))[-1]
-            MapPhysicalCardToPhysicalCardSet.delete(oMapEntry.id)
+            oPCS.removePhysicalCard(oCard.id, 1)
             oPCS.syncUpdate()
             send_changed_signal(oPCS, oCard, -1)
         for oModel in aModels:
@@ -630,11 +633,7 @@ class CardSetListModelTests(ConfigSutekhTest):
                     self._check_cache_totals(oPCS, oModelCache, oModelNoCache,
                                              'adding')
                     for oCard in aCardsToAdd:
-                        oMapEntry = list(
-                            MapPhysicalCardToPhysicalCardSet.selectBy(
-                                physicalCardID=oCard.id,
-                                physicalCardSetID=oPCS.id))[-1]
-                        MapPhysicalCardToPhysicalCardSet.delete(oMapEntry.id)
+                        oPCS.removePhysicalCard(oCard.id, 1)
                         oPCS.syncUpdate()
                         send_changed_signal(oPCS, oCard, -1)
                     self._check_cache_totals(oPCS, oModelCache, oModelNoCache,
@@ -696,12 +695,7 @@ class CardSetListModelTests(ConfigSutekhTest):
                             self._check_cache_totals(oCS, oModelCache,
                                                      oModelNoCache, 'adding')
                         for oCard in aCardsToAdd:
-                            oMapEntry = list(
-                                MapPhysicalCardToPhysicalCardSet.selectBy(
-                                    physicalCardID=oCard.id,
-                                    physicalCardSetID=oCS.id))[-1]
-                            MapPhysicalCardToPhysicalCardSet.delete(
-                                oMapEntry.id)
+                            oCS.removePhysicalCard(oCard.id, 1)
                             oCS.syncUpdate()
                             send_changed_signal(oCS, oCard, -1)
                         for oModelCache, oModelNoCache in \
@@ -808,6 +802,153 @@ class CardSetListModelTests(ConfigSutekhTest):
         self._loop_modes(oPCS, aModels)
         cleanup_models(aModels)
 
+    def test_incremental_load(self):
+        """Test reloading the model updates the existing rows"""
+        # pylint: disable=protected-access
+        # we need to access protected methods
+        _aCards, _oPCS, oChildPCS = self._setup_parent_child()
+        oChildPCS.inuse = True
+        oModel = self._get_model(self.aNames[0])
+        oModel._change_level_mode(ExtraLevels.CARD_SETS_AND_EXP)
+        oModel.load()
+        aInserted = []
+        iHandler = oModel.connect('row-inserted',
+                                  lambda *aArgs: aInserted.append(aArgs))
+        # Nothing has changed, so no rows should be added
+        oModel.load()
+        self.assertEqual(aInserted, [])
+        for eShowMode in (ShowMode.ALL_CARDS, ShowMode.CHILD_CARDS,
+                          ShowMode.THIS_SET_ONLY):
+            oModel._change_count_mode(eShowMode)
+            oModel.load()
+            oFullModel = self._get_model(self.aNames[0])
+            oFullModel._change_level_mode(ExtraLevels.CARD_SETS_AND_EXP)
+            oFullModel._change_count_mode(eShowMode)
+            oFullModel.load()
+            self.assertEqual(sorted(get_all_counts(oModel)),
+                             sorted(get_all_counts(oFullModel)))
+            cleanup_models([oFullModel])
+        oModel.disconnect(iHandler)
+        cleanup_models([oModel])
+
+    def test_lazy_levels(self):
+        """Test adding the extra levels when the card rows are expanded"""
+        # pylint: disable=protected-access
+        # we need to access protected methods
+        _aCards, oPCS, oChildPCS = self._setup_parent_child()
+        oChildPCS.inuse = True
+        aModels = []
+        for bLazy in (False, True):
+            oModel = self._get_model(self.aNames[0])
+            oModel._change_level_mode(ExtraLevels.EXP_AND_CARD_SETS)
+            oModel._change_lazy_mode(bLazy)
+            oModel.load()
+            aModels.append(oModel)
+        oModel, oLazyModel = aModels
+
+        def _get_card_rows(oModel):
+            """Get the card level rows"""
+            aRows = []
+            oIter = oModel.get_iter_first()
+            while oIter:
+                oCardIter = oModel.iter_children(oIter)
+                while oCardIter:
+                    aRows.append(oCardIter)
+                    oCardIter = oModel.iter_next(oCardIter)
+                oIter = oModel.iter_next(oIter)
+            return aRows
+
+        # The card level rows are the same, but each card only has a
+        # placeholder below it
+        aCardRows = _get_card_rows(oModel)
+        aLazyRows = _get_card_rows(oLazyModel)
+        self.assertEqual(
+            sorted(oModel.get(x, 0, 1, 2) for x in aCardRows),
+            sorted(oLazyModel.get(x, 0, 1, 2) for x in aLazyRows))
+        self.assertEqual(count_second_level(oLazyModel),
+                         len([x for x in aCardRows
+                              if oModel.iter_has_child(x)]))
+        # Filling in the rows gives the same model
+        for oIter in aLazyRows:
+            oLazyModel.fill_children(oIter)
+        self.assertEqual(sorted(get_all_counts(oModel)),
+                         sorted(get_all_counts(oLazyModel)))
+        # Changes to cards which haven't been filled in are handled
+        cleanup_models([oLazyModel])
+        oLazyModel = self._get_model(self.aNames[0])
+        oLazyModel._change_level_mode(ExtraLevels.EXP_AND_CARD_SETS)
+        oLazyModel._change_lazy_mode(True)
+        oLazyModel.load()
+        aModels = [oModel, oLazyModel]
+        for oCard in self.aPhysCards[:4]:
+            # pylint: disable=no-member
+            # SQLObject confuses pylint
+            oPCS.addPhysicalCard(oCard.id)
+            oPCS.syncUpdate()
+            send_changed_signal(oPCS, oCard, 1)
+        for oIter in _get_card_rows(oLazyModel):
+            oLazyModel.fill_children(oIter)
+        self.assertEqual(sorted(get_all_counts(oModel)),
+                         sorted(get_all_counts(oLazyModel)))
+        cleanup_models(aModels)
+
+    def test_background_load(self):
+        """Test loading a model in a background job.
+
+           With a file backed database, the cards are grouped on a
+           worker thread, and reloads requested while the job is
+           running are done once it's finished."""
+        # pylint: disable=protected-access
+        # we need to access protected methods
+        _aCards, _oPCS, oChildPCS = self._setup_parent_child()
+        oChildPCS.inuse = True
+        oChildPCS.syncUpdate()
+        # ALL_CARDS is always loaded in a job
+        oModel = self._get_model(self.aNames[0])
+        oModel._change_level_mode(ExtraLevels.CARD_SETS_AND_EXP)
+        oModel._change_count_mode(ShowMode.ALL_CARDS)
+        oModel.load()
+        aExpected = sorted(get_all_counts(oModel))
+        cleanup_models([oModel])
+        sDBFile = self._create_tmp_file()
+        oOldConn = sqlhub.processConnection
+        oFile = sqlite3.connect(sDBFile)
+        oOldConn.getConnection().backup(oFile)
+        oFile.close()
+        oConn = SQLiteConnection(sDBFile)
+        sqlhub.processConnection = oConn
+        flush_cache()
+        try:
+            oModel = self._get_model(self.aNames[0])
+            oModel._change_level_mode(ExtraLevels.CARD_SETS_AND_EXP)
+            oModel._change_count_mode(ShowMode.ALL_CARDS)
+            aThreads = []
+            fGroupedIter = oModel.grouped_card_iter
+
+            def _grouped_iter(oCardIter):
+                """Record the thread used for the grouping, and ask for
+                   a reload while the job is running."""
+                aThreads.append(threading.current_thread())
+                if len(aThreads) == 1:
+                    GLib.idle_add(oModel.load)
+                return fGroupedIter(oCardIter)
+
+            oModel.grouped_card_iter = _grouped_iter
+            oModel.load()
+            # The reload runs after the first load is done
+            self.assertEqual(len(aThreads), 2)
+            for oThread in aThreads:
+                self.assertNotEqual(oThread, threading.main_thread())
+            self.assertEqual(sorted(get_all_counts(oModel)), aExpected)
+            # The caches filled in the job are used by the model
+            self.assertTrue(oModel._dCache['full card list'])
+            self.assertFalse(oModel._bLoading)
+            cleanup_models([oModel])
+        finally:
+            sqlhub.processConnection = oOldConn
+            oConn.close()
+            flush_cache()
+
     def test_parent_child_grandchild(self):
         """Test against parent-child-grandchild setup"""
         _oCache = SutekhObjectCache()
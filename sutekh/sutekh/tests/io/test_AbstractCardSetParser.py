@@ -13,6 +13,7 @@ from sutekh.base.core.BaseTables import (PhysicalCardSet,
                                          MapPhysicalCardToPhysicalCardSet)
 from sutekh.base.core.BaseAdapters import IPhysicalCardSet
 from sutekh.base.core.CardSetHolder import CardSetHolder
+from sutekh.base.core.CardSetUtilities import CountedCardRows
 from sutekh.base.tests.TestUtils import make_card
 
 from sutekh.io.AbstractCardSetParser import AbstractCardSetParser
@@ -75,11 +76,11 @@ class AbstractCardSetParserTest(SutekhTest):
         self.assertEqual(len(oCardSet1.cards), 5)
         self.assertEqual(len(oCardSet2.cards), 9)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=oPhysCard0.id).count(), 3)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=oPhysCard0.id)).count(), 3)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=oPhysCard2.id).count(), 2)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=oPhysCard2.id)).count(), 2)
 
         PhysicalCardSet.delete(oCardSet1.id)
         oFile = AbstractCardSetXmlFile()
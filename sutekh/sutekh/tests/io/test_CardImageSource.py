@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# vim:fileencoding=utf-8 ai ts=4 sts=4 et sw=4
+# Copyright 2026 Neil Muller <drnlmuller+sutekh@gmail.com>
+# GPL - see COPYING for details
+
+"""Test the card image naming and download job creation"""
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from sutekh.tests.TestCore import SutekhTest
+from sutekh.io.CardImageSource import (make_image_name, make_image_url,
+                                       parse_image_dates, make_image_jobs,
+                                       SUTEKH_IMAGE_SITE)
+
+DATE_DATA = """
+12345 2020-03-04 10:11:12 ./kmw/aireofelation.jpg
+2345 2021-01-02 03:04:05 ./ds/aireofelation.jpg
+2345 2021-01-02 03:04:05 ./ds/notacard.jpg
+"""
+
+
+class CardImageSourceTests(SutekhTest):
+    """Class for the card image source tests"""
+    # pylint: disable=too-many-public-methods
+    # unittest.TestCase, so many public methods
+
+    def test_names(self):
+        """Test the image name and url generation"""
+        self.assertEqual(make_image_name('Aire of Elation'),
+                         'aireofelation.jpg')
+        self.assertEqual(make_image_name('The Path of Blood'),
+                         'pathofbloodthe.jpg')
+        self.assertEqual(make_image_name('Inez "Nurse216" Villagrande'),
+                         'ineznurse216villagrande.jpg')
+        self.assertEqual(make_image_name('Ablative Skin (Advanced)'),
+                         'ablativeskinadv.jpg')
+        self.assertEqual(make_image_url('kmw', 'aireofelation.jpg'),
+                         SUTEKH_IMAGE_SITE + '/cardimages/kmw/'
+                         'aireofelation.jpg')
+
+    def test_jobs(self):
+        """Test finding the images to download"""
+        sDir = tempfile.mkdtemp(prefix='sutekhtests')
+        try:
+            dDates = parse_image_dates(DATE_DATA, sDir)
+            sKmw = os.path.join(sDir, 'kmw', 'aireofelation.jpg')
+            sDS = os.path.join(sDir, 'ds', 'aireofelation.jpg')
+            self.assertEqual(dDates[sKmw],
+                             datetime.datetime(2020, 3, 4, 10, 11, 12))
+            self.assertEqual(len(dDates), 3)
+            self.assertRaises(ValueError, parse_image_dates, 'bad line',
+                              sDir)
+
+            aJobs = make_image_jobs(sDir, dDates)
+            # Only cards listed with a printing on the server
+            self.assertEqual([x.sFileName for x in aJobs], [sDS, sKmw])
+            self.assertEqual(aJobs[0].aUrls,
+                             [make_image_url('ds', 'aireofelation.jpg')])
+            self.assertEqual(aJobs[0].oRemoteDate, dDates[sDS])
+
+            # Up to date files are skipped, outdated ones aren't
+            for sFile in (sKmw, sDS):
+                os.makedirs(os.path.dirname(sFile))
+                with open(sFile, 'wb') as oFile:
+                    oFile.write(b'image')
+            os.utime(sDS, (0, 0))
+            aJobs = make_image_jobs(sDir, dDates)
+            self.assertEqual([x.sFileName for x in aJobs], [sDS])
+        finally:
+            shutil.rmtree(sDir)
+
+
+if __name__ == "__main__":
+    unittest.main()  # pragma: no cover
@@ -13,6 +13,7 @@ from sutekh.base.core.BaseTables import (PhysicalCardSet,
                                          MapPhysicalCardToPhysicalCardSet)
 from sutekh.base.core.BaseAdapters import IPhysicalCardSet
 from sutekh.base.core.CardSetHolder import CardSetHolder
+from sutekh.base.core.CardSetUtilities import CountedCardRows
 
 from sutekh.io.PhysicalCardSetParser import PhysicalCardSetParser
 from sutekh.io.XmlFileHandling import PhysicalCardSetXmlFile
@@ -214,28 +215,28 @@ class PhysicalCardSetParserTests(SutekhTest):
         self.assertEqual(len(oPhysCardSet2.cards), 8)
         self.assertEqual(len(oPhysCardSet3.cards), 7)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[0].id).count(), 1)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[0].id)).count(), 1)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[7].id).count(), 2)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[7].id)).count(), 2)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[4].id).count(), 3)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[4].id)).count(), 3)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[1].id).count(), 1)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[1].id)).count(), 1)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[6].id).count(), 3)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[6].id)).count(), 3)
         # Aaron's Feeding razor
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[14].id).count(), 0)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[14].id)).count(), 0)
         # Inez
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[12].id).count(), 0)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[12].id)).count(), 0)
 
         PhysicalCardSet.delete(oPhysCardSet2.id)
         oFile = PhysicalCardSetXmlFile()
@@ -294,28 +295,28 @@ class PhysicalCardSetParserTests(SutekhTest):
         self.assertEqual(len(oPhysCardSet3.cards), 7)
 
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[7].id).count(), 2)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[7].id)).count(), 2)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[4].id).count(), 3)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[4].id)).count(), 3)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[0].id).count(), 1)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[0].id)).count(), 1)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[1].id).count(), 1)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[1].id)).count(), 1)
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[6].id).count(), 3)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[6].id)).count(), 3)
         # Aaron's Feeding razor
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[14].id).count(), 0)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[14].id)).count(), 0)
         # Inez
         self.assertEqual(
-            MapPhysicalCardToPhysicalCardSet.selectBy(
-                physicalCardID=aAddedPhysCards[12].id).count(), 0)
+            CountedCardRows(MapPhysicalCardToPhysicalCardSet.selectBy(
+                physicalCardID=aAddedPhysCards[12].id)).count(), 0)
 
         self.assertEqual(oPhysCardSet2.annotations, None)
         self.assertEqual(oPhysCardSet3.annotations, 'Some annotations')
@@ -13,6 +13,8 @@ from sutekh.base.core.BaseAdapters import IPhysicalCardSet
 from sutekh.base.core.CardSetUtilities import delete_physical_card_set
 from sutekh.base.gui.ProgressDialog import SutekhCountLogHandler
 
+from sutekh.base.io.BaseZipFileWrapper import write_string
+from sutekh.io.PhysicalCardSetWriter import PhysicalCardSetWriter
 from sutekh.io.ZipFileWrapper import ZipFileWrapper
 from sutekh.tests.TestCore import SutekhTest
 from sutekh.tests.core.test_PhysicalCardSet import (CARD_SET_NAMES,
@@ -23,6 +25,17 @@ from sutekh.tests.io.test_PhysicalCardSetParser import PCS_EXAMPLE_1
 from sutekh.tests.io.test_PhysicalCardParser import make_example_pcxml
 
 
+def _make_pcs_xml(sName, sParent=None):
+    """Create the XML for a simple card set"""
+    sParentAttr = ''
+    if sParent:
+        sParentAttr = ' parent="%s"' % sParent
+    return ('<physicalcardset author="" name="%s"%s '
+            'sutekh_xml_version="1.3"><annotations /><card count="2" '
+            'expansion="None Specified" name="Abbot" />'
+            '</physicalcardset>' % (sName, sParentAttr))
+
+
 class ZipFileWrapperTest(SutekhTest):
     """class for the Zip File tests"""
     # pylint: disable=too-many-public-methods
@@ -78,6 +91,13 @@ class ZipFileWrapperTest(SutekhTest):
         self.assertEqual(oHandler.fTot, 3)
         dEntries = oZipFile.get_all_entries()
         self.assertEqual(len(dEntries), 3)
+        # The streamed entries match the output of the card set writer
+        with zipfile.ZipFile(sTempFileName, 'r') as oZip:
+            for oCS in (oMyCollection, oPhysCardSet1, oPhysCardSet2):
+                sZipName = dEntries[oCS.name][0]
+                self.assertEqual(
+                    oZip.read(sZipName).decode('ascii'),
+                    write_string(PhysicalCardSetWriter(), oCS))
         self.assertTrue(oPhysCardSet2.name in dEntries)
         self.assertTrue(oPhysCardSet1.name in dEntries)
         self.assertTrue(oMyCollection.name in dEntries)
@@ -188,6 +208,45 @@ class ZipFileWrapperTest(SutekhTest):
         self.assertEqual(oACSCardSet1.parent, None)
         self.assertEqual(oACSCardSet2.parent, None)
 
+    def test_restore_order(self):
+        """Test restoring card sets stored after their children"""
+        sTempFileName = self._create_tmp_file()
+        oZipFile = zipfile.ZipFile(sTempFileName, 'w')
+        # A chain of card sets, written with the children first
+        iNum = 40
+        for iSet in reversed(range(iNum)):
+            sParent = 'Set %d' % (iSet - 1) if iSet else None
+            oZipFile.writestr('set_%d.xml' % iSet,
+                              _make_pcs_xml('Set %d' % iSet, sParent))
+        oZipFile.writestr('notes.txt', 'Not a card set')
+        oZipFile.close()
+
+        oHandler = SutekhCountLogHandler()
+        ZipFileWrapper(sTempFileName).do_restore_from_zip(
+            oLogHandler=oHandler)
+        self.assertEqual(PhysicalCardSet.select().count(), iNum)
+        self.assertEqual(oHandler.fTot, iNum + 1)
+        oLast = IPhysicalCardSet('Set %d' % (iNum - 1))
+        self.assertEqual(oLast.parent.name, 'Set %d' % (iNum - 2))
+        self.assertEqual(len(oLast.cards), 2)
+        self.assertEqual(IPhysicalCardSet('Set 0').parent, None)
+
+        # Cycles and missing parents are reported
+        oZipFile = zipfile.ZipFile(sTempFileName, 'w')
+        oZipFile.writestr('a.xml', _make_pcs_xml('A', 'B'))
+        oZipFile.writestr('b.xml', _make_pcs_xml('B', 'A'))
+        oZipFile.writestr('c.xml', _make_pcs_xml('C', 'Missing'))
+        oZipFile.writestr('d.xml', _make_pcs_xml('D'))
+        oZipFile.close()
+        oZipWrapper = ZipFileWrapper(sTempFileName)
+        with self.assertRaises(IOError) as oContext:
+            oZipWrapper.do_restore_from_zip()
+        self.assertEqual(str(oContext.exception),
+                         'Card sets with unstatisfiable parents '
+                         'a.xml,b.xml,c.xml')
+        # The sets we could restore are still restored
+        self.assertEqual([x.name for x in PhysicalCardSet.select()], ['D'])
+
 
 if __name__ == "__main__":
     unittest.main()  # pragma: no cover